@@ -0,0 +1,231 @@
+"""Differential check and benchmark of the compiled interpreter backend.
+
+Every plan is evaluated both by the tree-walking interpreter and by the
+evaluators produced by `interpreter.compile_ast`, and the two `EvalResult`s
+are checked to be the same before timing loop and comprehension heavy plans.
+
+Run from the `camel` agent directory with:
+
+  python -m benchmarks.interpreter_benchmark
+"""
+
+import ast
+from collections.abc import Callable
+import time
+from typing import Any
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+_REPETITIONS = 20
+
+DIFFERENTIAL_PLANS = (
+    "x = [i * 2 for i in range(10)]\ny = {k: v for k, v in zip(x, x)}\ny",
+    "s = 'hello world'\nt = s.upper().split(' ')\nr = [c for c in s if c in 'lo']\n"
+    "f'{t!r:>40} {len(r)}'",
+    "total = 0\nfor i in range(20):\n    if i % 2 == 0:\n        total += i\n"
+    "    else:\n        total -= 1\ntotal",
+    "class A(BaseModel):\n    a: int\n    b: str\nz = A(a=1, b='x')\nz.a + 3",
+    "d = {'a': 1}\nd['b'] = 2\nl = [1, 2, 3]\nl[0] = 9\n"
+    "(d, l, -l[2], not l, 3 < 4 < 5, 1 if l else 2, None, 1.5, True)",
+    "a, *b = [1, 2, 3]\n(a, b, [x for x in b for y in range(2) if x > 1])",
+    "q = {1, 2, 3} | {4}\n(q, 'a' in 'abc', 2 not in [1], 3 // 2, 2 ** 5, 1 / 2)",
+    "x = (y := 3) + 1\nprint(x, y)\n[p for p in private]",
+    "send(private)\nsend([1, 2])",
+    "for p in private:\n    if p == 'b':\n        send(p)",
+    "undefined_name + 1",
+    "x = [1, 2]\nx[5]",
+    "while True:\n    pass",
+    "import os",
+    "raise ValueError('boom')",
+)
+
+BENCHMARK_PLANS = {
+    "for loop": (
+        "total = 0\n"
+        "for i in range(500):\n"
+        "    if i % 3 == 0 and i > 5:\n"
+        "        total += i * 2\n"
+        "    else:\n"
+        "        total -= 1\n"
+        "total"
+    ),
+    "nested for loop": (
+        "total = 0\n"
+        "for i in range(30):\n"
+        "    for j in range(30):\n"
+        "        total += i * j\n"
+        "total"
+    ),
+    "comprehensions": (
+        "ys = [x + 1 for x in range(500) if x % 2 == 0]\n"
+        "zs = {k: v * 2 for k, v in zip(ys, ys)}\n"
+        "ws = {y % 7 for y in ys}\n"
+        "len(zs) + len(ws)"
+    ),
+}
+
+
+def send(value: Any) -> int:
+    """Dummy state-changing tool."""
+    del value
+    return 0
+
+
+class PrivateDataSecurityPolicyEngine(security_policy.SecurityPolicyEngine):
+    """Only allows sending public data."""
+
+    def __init__(self) -> None:
+        self.policies = [("send", self._send_policy)]
+        self.no_side_effect_tools = set()
+
+    def _send_policy(self, tool_name, kwargs):
+        del tool_name
+        if all(capabilities_utils.is_public(v) for v in kwargs.values()):
+            return security_policy.Allowed()
+        return security_policy.Denied("Data is not public.")
+
+
+def _make_namespace() -> camel_value.Namespace:
+    private = camel_value.CaMeLList(
+        [
+            camel_value.CaMeLStr.from_raw(
+                c, capabilities.Capabilities(frozenset(), frozenset({"a@b.c"})), ()
+            )
+            for c in "abc"
+        ],
+        capabilities.Capabilities(frozenset(), frozenset({"a@b.c"})),
+        (),
+    )
+    return library.make_builtins_namespace(
+        variables={
+            "private": private,
+            "send": camel_value.CaMeLFunction(
+                "send", send, capabilities.Capabilities.camel(), ()
+            ),
+        }
+    )
+
+
+def evaluate(tree: ast.AST, eval_args: interpreter.EvalArgs) -> interpreter.EvalResult:
+    return interpreter.camel_eval(tree, _make_namespace(), [], (), eval_args)
+
+
+def eval_or_denial(
+    evaluate: Callable[[], interpreter.EvalResult],
+) -> interpreter.EvalResult | security_policy.SecurityPolicyDeniedError:
+    """Returns the result of `evaluate`, or the denial it raised."""
+    try:
+        return evaluate()
+    except security_policy.SecurityPolicyDeniedError as e:
+        return e
+
+
+def _same_value(expected: camel_value.Value, actual: camel_value.Value) -> bool:
+    if isinstance(expected, camel_value.CaMeLClass | camel_value.CaMeLClassInstance):
+        # Classes defined by a plan are created anew on every evaluation, so
+        # neither they nor their instances compare equal across evaluations.
+        return (
+            repr(expected) == repr(actual)
+            and expected.capabilities == actual.capabilities
+        )
+    return expected == actual and expected.capabilities == actual.capabilities
+
+
+def _same_result(
+    expected: interpreter.CaMeLResult, actual: interpreter.CaMeLResult
+) -> bool:
+    match expected, actual:
+        case result.Ok(expected_value), result.Ok(actual_value):
+            return _same_value(expected_value, actual_value)
+        case result.Error(expected_error), result.Error(actual_error):
+            # Exceptions compare by identity, so compare their contents instead.
+            return (
+                type(expected_error.exception) is type(actual_error.exception)
+                and str(expected_error.exception) == str(actual_error.exception)
+                and expected_error.nodes == actual_error.nodes
+                and len(expected_error.dependencies) == len(actual_error.dependencies)
+                and all(
+                    map(
+                        _same_value,
+                        expected_error.dependencies,
+                        actual_error.dependencies,
+                    )
+                )
+            )
+        case _:
+            return False
+
+
+def same_outcome(
+    expected: interpreter.EvalResult | security_policy.SecurityPolicyDeniedError,
+    actual: interpreter.EvalResult | security_policy.SecurityPolicyDeniedError,
+) -> bool:
+    """Whether two evaluations (or the denials they raised) are the same."""
+    if not isinstance(expected, interpreter.EvalResult) or not isinstance(
+        actual, interpreter.EvalResult
+    ):
+        return repr(expected) == repr(actual)
+    return (
+        _same_result(expected.result, actual.result)
+        and expected.namespace.variables.keys() == actual.namespace.variables.keys()
+        and all(
+            _same_value(value, actual.namespace.variables[name])
+            for name, value in expected.namespace.variables.items()
+        )
+        # The outputs of calls to plan-defined classes have the same issue.
+        and list(map(repr, expected.tool_calls_chain))
+        == list(map(repr, actual.tool_calls_chain))
+        and list(expected.dependencies) == list(actual.dependencies)
+    )
+
+
+def check_differential() -> None:
+    plans = (*DIFFERENTIAL_PLANS, *BENCHMARK_PLANS.values())
+    for eval_mode in interpreter.DependenciesPropagationMode:
+        eval_args = interpreter.EvalArgs(PrivateDataSecurityPolicyEngine(), eval_mode)
+        for plan in plans:
+            tree = ast.parse(plan)
+            expected = eval_or_denial(lambda: evaluate(tree, eval_args))
+            interpreter.compile_ast(tree)
+            actual = eval_or_denial(lambda: evaluate(tree, eval_args))
+            if not same_outcome(expected, actual):
+                raise AssertionError(
+                    f"Compiled result differs in {eval_mode} mode for plan:\n"
+                    f"{plan}\nexpected: {expected}\nactual: {actual}"
+                )
+    print(f"{len(plans)} plans evaluate identically in both modes.\n")
+
+
+def benchmark_plans() -> None:
+    eval_args = interpreter.EvalArgs(
+        security_policy.NoSecurityPolicyEngine(),
+        interpreter.DependenciesPropagationMode.NORMAL,
+    )
+    print("plan            | tree-walking (ms) | compiled (ms) | speedup")
+    for name, plan in BENCHMARK_PLANS.items():
+        tree = ast.parse(plan)
+        start = time.perf_counter()
+        for _ in range(_REPETITIONS):
+            evaluate(tree, eval_args)
+        tree_walking_ms = (time.perf_counter() - start) / _REPETITIONS * 1e3
+
+        interpreter.compile_ast(tree)
+        start = time.perf_counter()
+        for _ in range(_REPETITIONS):
+            evaluate(tree, eval_args)
+        compiled_ms = (time.perf_counter() - start) / _REPETITIONS * 1e3
+        print(
+            f"{name:15} | {tree_walking_ms:17.2f} | {compiled_ms:13.2f} |"
+            f" {tree_walking_ms / compiled_ms:6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    check_differential()
+    benchmark_plans()
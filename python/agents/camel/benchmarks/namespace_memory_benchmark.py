@@ -0,0 +1,95 @@
+"""Time and memory benchmark of namespaces in long-lived interpreter sessions.
+
+A session runs many plans one after the other on the namespace left by the
+previous plan, as `CaMelInterpreterService` does. The persistent `Namespace`
+is compared with one that copies all the variables on every change, as
+namespaces used to do.
+
+Run from the `camel` agent directory with:
+
+  python -m benchmarks.namespace_memory_benchmark
+"""
+
+import time
+import tracemalloc
+
+from camel.camel_library import security_policy
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+_SESSION_LENGTHS = (10, 50, 200)
+
+_PLAN = """```python
+x{i} = {i}
+squares{i} = [n * n for n in range(100) if n % 2 == 0]
+total{i} = 0
+for s in squares{i}:
+    total{i} += s
+pairs{i} = {{k: v for k, v in zip(squares{i}, squares{i})}}
+```"""
+
+
+class _CopyingNamespace(camel_value.Namespace):
+    """Copies all the variables on every change."""
+
+    __slots__ = ()
+
+    def _derive(self, scope):
+        variables = self.variables | scope
+        return type(self)(
+            {
+                name: v
+                for name, v in variables.items()
+                if v is not camel_value._DELETED  # pylint: disable=protected-access
+            }
+        )
+
+
+def _run_session(
+    namespace: camel_value.Namespace, session_length: int
+) -> list[camel_value.Namespace]:
+    """Runs a session and returns the namespace left by each of its plans."""
+    eval_args = interpreter.EvalArgs(
+        security_policy.NoSecurityPolicyEngine(),
+        interpreter.DependenciesPropagationMode.NORMAL,
+    )
+    namespaces = []
+    for i in range(session_length):
+        _, namespace, _, _ = interpreter.parse_and_interpret_code(
+            _PLAN.format(i=i), namespace, [], (), eval_args
+        )
+        namespaces.append(namespace)
+    return namespaces
+
+
+def benchmark_sessions() -> None:
+    print(
+        "namespace  | plans | time (ms) | peak (KiB) | last namespace (KiB) |"
+        " all namespaces (KiB)"
+    )
+    for session_length in _SESSION_LENGTHS:
+        for name, namespace_type in (
+            ("copying", _CopyingNamespace),
+            ("persistent", camel_value.Namespace),
+        ):
+            builtins = namespace_type(library.make_builtins_namespace().variables)
+            start = time.perf_counter()
+            _run_session(builtins, session_length)
+            elapsed_ms = (time.perf_counter() - start) * 1e3
+
+            tracemalloc.start()
+            namespaces = _run_session(builtins, session_length)
+            all_kib = tracemalloc.get_traced_memory()[0] / 1024
+            del namespaces[:-1]
+            last_kib = tracemalloc.get_traced_memory()[0] / 1024
+            peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            print(
+                f"{name:10} | {session_length:5} | {elapsed_ms:9.1f} |"
+                f" {peak_kib:10.1f} | {last_kib:20.1f} | {all_kib:20.1f}"
+            )
+
+
+if __name__ == "__main__":
+    benchmark_sessions()
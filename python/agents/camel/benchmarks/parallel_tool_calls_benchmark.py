@@ -0,0 +1,152 @@
+"""Differential check and benchmark of parallel tool calls in CaMeL plans.
+
+Every plan is evaluated with and without `EvalArgs.parallel_tool_calls`, and
+the two `EvalResult`s (including the tool calls chain and the dependencies)
+are checked to be the same before timing plans that call a slow tool without
+side effects.
+
+Run from the `camel` agent directory with:
+
+  python -m benchmarks.parallel_tool_calls_benchmark
+"""
+
+import ast
+import asyncio
+import time
+from typing import Any
+
+from benchmarks import interpreter_benchmark
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+_TOOL_LATENCY_S = 0.05
+
+DIFFERENTIAL_PLANS = (
+    "a = lookup('x')\nb = lookup('y')\nc = lookup(a)\n(a, b, c)",
+    "a = lookup('x')\nprint(a)\nb = lookup(a + 'y')\nb",
+    "[lookup(k) for k in keys if k != 'b']",
+    "{k: lookup_async(k) for k in keys}",
+    "out = ''\nfor k in keys:\n    out += lookup(k)\nout",
+    "d = {}\nfor k in keys:\n    d[k] = lookup(k)\nd",
+    "for k in keys:\n    lookup = k\nlookup",
+    "r = [lookup(p) for p in private]\nsend(r)",
+    "for p in private:\n    x = lookup(p)\n    send(x)",
+    "a = lookup('x')\nb = lookup('x', 'y')\nc = lookup('z')",
+    "[lookup(k) for k in undefined_name]",
+)
+
+BENCHMARK_PLANS = {
+    "statements": "a = lookup('a')\nb = lookup('b')\nc = lookup('c')\n(a, b, c)",
+    "for loop": "out = ''\nfor k in keys:\n    out += lookup(k)\nout",
+    "comprehension": "[lookup(k) for k in keys]",
+    "async tool": "[lookup_async(k) for k in keys]",
+}
+
+
+def lookup(key: str) -> str:
+    """Dummy slow tool without side effects."""
+    time.sleep(_TOOL_LATENCY_S)
+    return f"value of {key}"
+
+
+async def lookup_async(key: str) -> str:
+    """Dummy slow asynchronous tool without side effects."""
+    await asyncio.sleep(_TOOL_LATENCY_S)
+    return f"value of {key}"
+
+
+def send(value: Any) -> int:
+    """Dummy state-changing tool."""
+    del value
+    return 0
+
+
+class LookupSecurityPolicyEngine(security_policy.SecurityPolicyEngine):
+    """Allows lookups of any data, but only sending public data."""
+
+    def __init__(self) -> None:
+        self.policies = [("send", self._send_policy)]
+        self.no_side_effect_tools = {"lookup", "lookup_async"}
+
+    def _send_policy(self, tool_name, kwargs):
+        del tool_name
+        if all(capabilities_utils.is_public(v) for v in kwargs.values()):
+            return security_policy.Allowed()
+        return security_policy.Denied("Data is not public.")
+
+
+def _make_str_list(
+    values: str, caps: capabilities.Capabilities
+) -> camel_value.CaMeLList:
+    return camel_value.CaMeLList(
+        [camel_value.CaMeLStr.from_raw(c, caps, ()) for c in values], caps, ()
+    )
+
+
+def make_namespace() -> camel_value.Namespace:
+    private = capabilities.Capabilities(frozenset(), frozenset({"a@b.c"}))
+    return library.make_builtins_namespace(
+        variables={
+            "keys": _make_str_list("abcdefgh", capabilities.Capabilities.default()),
+            "private": _make_str_list("abc", private),
+            **{
+                fn.__name__: camel_value.CaMeLFunction(
+                    fn.__name__, fn, capabilities.Capabilities.camel(), ()
+                )
+                for fn in (lookup, lookup_async, send)
+            },
+        }
+    )
+
+
+def _eval(
+    tree: ast.AST, eval_mode: interpreter.DependenciesPropagationMode, parallel: bool
+) -> interpreter.EvalResult:
+    eval_args = interpreter.EvalArgs(
+        LookupSecurityPolicyEngine(), eval_mode, parallel_tool_calls=parallel
+    )
+    return interpreter.camel_eval(tree, make_namespace(), [], (), eval_args)
+
+
+def check_differential() -> None:
+    plans = (*DIFFERENTIAL_PLANS, *BENCHMARK_PLANS.values())
+    for eval_mode in interpreter.DependenciesPropagationMode:
+        for plan in plans:
+            tree = ast.parse(plan)
+            expected = interpreter_benchmark.eval_or_denial(
+                lambda: _eval(tree, eval_mode, parallel=False)
+            )
+            actual = interpreter_benchmark.eval_or_denial(
+                lambda: _eval(tree, eval_mode, parallel=True)
+            )
+            if not interpreter_benchmark.same_outcome(expected, actual):
+                raise AssertionError(
+                    f"Parallel result differs in {eval_mode} mode for plan:\n"
+                    f"{plan}\nexpected: {expected}\nactual: {actual}"
+                )
+    print(f"{len(plans)} plans evaluate identically in both modes.\n")
+
+
+def benchmark_plans() -> None:
+    print("plan          | sequential (ms) | parallel (ms) | speedup")
+    for name, plan in BENCHMARK_PLANS.items():
+        tree = ast.parse(plan)
+        timings = []
+        for parallel in (False, True):
+            start = time.perf_counter()
+            _eval(tree, interpreter.DependenciesPropagationMode.NORMAL, parallel)
+            timings.append((time.perf_counter() - start) * 1e3)
+        sequential_ms, parallel_ms = timings
+        print(
+            f"{name:13} | {sequential_ms:15.1f} | {parallel_ms:13.1f} |"
+            f" {sequential_ms / parallel_ms:6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    check_differential()
+    benchmark_plans()
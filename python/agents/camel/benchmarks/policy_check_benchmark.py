@@ -0,0 +1,151 @@
+"""Benchmark of security policy checks versus plan length and container size.
+
+Also compares matching tool names against many policy patterns with
+`fnmatch` and with the engine's compiled matcher.
+
+Run from the `camel` agent directory with:
+
+  python -m benchmarks.policy_check_benchmark
+"""
+
+import fnmatch
+import time
+from typing import Any
+
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+_PLAN_LENGTHS = (10, 50, 200)
+_CONTAINER_SIZES = (10, 100, 1_000)
+_N_PATTERNS = 200
+_MATCHES = 10_000
+
+
+def send(value: Any) -> int:
+    """Dummy state-changing tool."""
+    del value
+    return 0
+
+
+@security_policy.capabilities_only
+def _public_arguments_policy(
+    tool_name: str, kwargs: dict[str, camel_value.Value]
+) -> security_policy.SecurityPolicyResult:
+    del tool_name
+    if all(
+        capabilities_utils.is_public(v) and capabilities_utils.is_trusted(v)
+        for v in kwargs.values()
+    ):
+        return security_policy.Allowed()
+    return security_policy.Denied("Data is not public or not trusted.")
+
+
+class _PublicArgumentsSecurityPolicyEngine(security_policy.SecurityPolicyEngine):
+    """Only allows calling tools with public arguments."""
+
+    def __init__(
+        self, policies: list[tuple[str, security_policy.SecurityPolicy]] | None = None
+    ) -> None:
+        self.policies = policies or [("*", _public_arguments_policy)]
+        self.no_side_effect_tools = set()
+
+
+def _make_namespace(container_size: int) -> camel_value.Namespace:
+    data = camel_value.CaMeLList(
+        [
+            camel_value.CaMeLStr.from_raw(
+                f"element {i}", capabilities.Capabilities.default(), ()
+            )
+            for i in range(container_size)
+        ],
+        capabilities.Capabilities.default(),
+        (),
+    )
+    return library.make_builtins_namespace(
+        variables={
+            "data": data,
+            "send": camel_value.CaMeLFunction(
+                "send", send, capabilities.Capabilities.camel(), ()
+            ),
+        }
+    )
+
+
+def _make_plan(plan_length: int) -> str:
+    lines = ["x0 = len(data)"]
+    for i in range(1, plan_length):
+        lines.append(f"x{i} = x{i - 1} + len(data)")
+        lines.append(f"send([x{i}, data])")
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def benchmark_plans() -> None:
+    print("plan length | container size | policy checks | cached | mean check (us)")
+    for plan_length in _PLAN_LENGTHS:
+        for container_size in _CONTAINER_SIZES:
+            engine = _PublicArgumentsSecurityPolicyEngine()
+            interpreter.parse_and_interpret_code(
+                _make_plan(plan_length),
+                _make_namespace(container_size),
+                [],
+                (),
+                interpreter.EvalArgs(
+                    engine, interpreter.DependenciesPropagationMode.STRICT
+                ),
+            )
+            timings = engine.get_policy_check_timings()
+            mean_us = sum(t.seconds for t in timings) / len(timings) * 1e6
+            cached = sum(t.cached for t in timings)
+            print(
+                f"{plan_length:11} | {container_size:14} |"
+                f" {len(timings):13} | {cached:6} | {mean_us:15.1f}"
+            )
+
+
+def benchmark_is_public() -> None:
+    print("\ncontainer size | first is_public (us) | cached is_public (us)")
+    for container_size in _CONTAINER_SIZES:
+        data = _make_namespace(container_size).get("data")
+        start = time.perf_counter()
+        capabilities_utils.is_public(data)
+        cold_us = (time.perf_counter() - start) * 1e6
+        start = time.perf_counter()
+        for _ in range(100):
+            capabilities_utils.is_public(data)
+        warm_us = (time.perf_counter() - start) / 100 * 1e6
+        print(f"{container_size:14} | {cold_us:19.1f} | {warm_us:21.1f}")
+
+
+def benchmark_matcher() -> None:
+    policies = [
+        (f"tool_{i}_*" if i % 2 else f"tool_{i}", _public_arguments_policy)
+        for i in range(_N_PATTERNS)
+    ]
+    tool_names = [f"tool_{i}" for i in range(0, _N_PATTERNS, 10)]
+
+    start = time.perf_counter()
+    for i in range(_MATCHES):
+        tool_name = tool_names[i % len(tool_names)]
+        next(p for pattern, p in policies if fnmatch.fnmatch(tool_name, pattern))
+    fnmatch_us = (time.perf_counter() - start) / _MATCHES * 1e6
+
+    engine = _PublicArgumentsSecurityPolicyEngine(policies)
+    start = time.perf_counter()
+    for i in range(_MATCHES):
+        engine.check_policy(tool_names[i % len(tool_names)], {}, ())
+    engine_us = (time.perf_counter() - start) / _MATCHES * 1e6
+
+    print(
+        f"\n{_N_PATTERNS} patterns: fnmatch lookup {fnmatch_us:.1f} us,"
+        f" whole compiled policy check {engine_us:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    benchmark_plans()
+    benchmark_is_public()
+    benchmark_matcher()
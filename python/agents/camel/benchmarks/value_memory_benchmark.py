@@ -0,0 +1,99 @@
+"""Memory and allocation benchmark of CaMeL values.
+
+Runs plans that process thousands of list elements and reports the time, the
+peak and retained memory, and the number of memory blocks retained by the
+values they produce, together with the size of single values.
+
+Run from the `camel` agent directory with:
+
+  python -m benchmarks.value_memory_benchmark
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+_N_ELEMENTS = 3_000
+
+_PLANS = {
+    "ints": "xs = [i * 2 for i in range(n)]\nys = [x % 7 for x in xs]\nsum(ys)",
+    "bools": "xs = [i % 3 == 0 for i in range(n)]\nys = [not x for x in xs]\nlen(ys)",
+    "strings": "xs = [str(i) for i in range(n)]\nys = [x + '!' for x in xs]\nlen(ys)",
+    "constants": "xs = [1 for i in range(n)]\nys = [True for x in xs]\nlen(ys)",
+}
+
+
+def _run(plan: str) -> camel_value.Namespace:
+    res, namespace, _, _ = interpreter.parse_and_interpret_code(
+        f"```python\n{plan}\n```",
+        library.make_builtins_namespace(
+            variables={
+                "n": camel_value.CaMeLInt(
+                    _N_ELEMENTS, capabilities.Capabilities.default(), ()
+                )
+            }
+        ),
+        [],
+        (),
+        interpreter.EvalArgs(
+            security_policy.NoSecurityPolicyEngine(),
+            interpreter.DependenciesPropagationMode.NORMAL,
+        ),
+    )
+    if not isinstance(res, result.Ok):
+        raise AssertionError(f"Plan failed: {res}")
+    return namespace
+
+
+def _size_of_value(value: camel_value.Value) -> int:
+    return sys.getsizeof(value) + sys.getsizeof(getattr(value, "__dict__", None))
+
+
+def benchmark_plans() -> None:
+    print("plan      | time (ms) | peak (KiB) | retained (KiB) | retained blocks")
+    for name, plan in _PLANS.items():
+        _run(plan)  # Warms up the parse cache.
+        start = time.perf_counter()
+        _run(plan)
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        namespace = _run(plan)
+        gc.collect()
+        retained_kib, peak_kib = (
+            size / 1024 for size in tracemalloc.get_traced_memory()
+        )
+        tracemalloc.stop()
+        retained_blocks = sys.getallocatedblocks() - blocks
+        del namespace
+        print(
+            f"{name:9} | {elapsed_ms:9.1f} | {peak_kib:10.1f} |"
+            f" {retained_kib:14.1f} | {retained_blocks:15}"
+        )
+
+
+def print_value_sizes() -> None:
+    camel = capabilities.Capabilities.camel()
+    print("\nvalue     | size (bytes)")
+    for name, value in (
+        ("int", camel_value.CaMeLInt(1000, camel, ())),
+        ("bool", camel_value.CaMeLTrue(camel, ())),
+        ("char", camel_value.CaMeLStr.from_raw("a", camel, ()).python_value[0]),
+        ("list", camel_value.CaMeLList([], camel, ())),
+    ):
+        print(f"{name:9} | {_size_of_value(value):12}")
+
+
+if __name__ == "__main__":
+    benchmark_plans()
+    print_value_sizes()
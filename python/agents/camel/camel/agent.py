@@ -81,6 +81,7 @@ class TestSecurityPolicyEngine(SecurityPolicyEngine):
         # Below we list tools that don't have side effects.
         self.no_side_effect_tools = []
 
+    @security_policy.capabilities_only
     def search_document_policy(
         self, tool_name: str, kwargs: Mapping[str, camel_agent.CaMeLValue]
     ) -> SecurityPolicyResult:
@@ -114,6 +115,7 @@ class TestSecurityPolicyEngine(SecurityPolicyEngine):
             f" {capabilities_utils.get_all_readers(body)[0]}"
         )
 
+    @security_policy.capabilities_only
     def query_ai_assistant_policy(
         self, tool_name: str, kwargs: Mapping[str, camel_agent.CaMeLValue]
     ) -> SecurityPolicyResult:
@@ -1,10 +1,7 @@
 """CaMeL agent implementation."""
 
-import asyncio
-from collections.abc import Iterator
-import queue
+from collections.abc import Awaitable
 import re
-import threading
 from typing import Any, AsyncGenerator, Callable, Optional
 
 from google.adk import runners
@@ -64,7 +61,7 @@ bool_validator = validators.bool_validator
 
 
 class QuarantinedLlmService(BaseModel):
-    """Manages synchronous interactions with the Quarantined LLM (Q-LLM)."""
+    """Manages interactions with the Quarantined LLM (Q-LLM)."""
 
     model: str | BaseLlm
     name: str
@@ -127,67 +124,36 @@ class QuarantinedLlmService(BaseModel):
             app_name=self.name, user_id=self.user_id, session_id=qllm_session.id
         )
 
-    def run(self, query: str, output_schema: str) -> Iterator[Event]:
-        """Runs the QLLM agent synchronously in a new thread.
-
-        NOTE: This sync interface is solely because the CaMeL interpreter is
-        synchronous and does not suuport the `await` keyword. The
-        `query_ai_assistant` function is a wrapper around this synchronous run
-        method.
-
-        NOTE: This method is similar to the `run` method in the `runners.Runner`
-        class.
-
-        TODO: Later versions of CaMeL should support asynchronous execution and
-        this method will be removed.
+    async def run(self, query: str, output_schema: str) -> str:
+        """Runs a query on the Q-LLM and returns the text of its response.
 
         Args:
           query: The query to run.
           output_schema: The output schema of the query.
 
-        Yields:
-          The events generated by the QLLM.
+        Returns:
+          The text of the Q-LLM response.
         """
-        event_queue = queue.Queue()
-
-        async def _invoke_run_async():
-            try:
-                async for e in self._run_async(query, output_schema):
-                    event_queue.put(e)
-            finally:
-                event_queue.put(None)
-
-        def _asyncio_thread_main():
-            try:
-                asyncio.run(_invoke_run_async())
-            finally:
-                event_queue.put(None)
-
-        thread = threading.Thread(target=_asyncio_thread_main)
-        thread.start()
-
-        # consumes and re-yield the events from background thread.
-        while True:
-            e = event_queue.get()
-            if e is None:
-                break
-            else:
-                yield e
-
-        thread.join()
+        response_parts = []
+        async for e in self._run_async(query, output_schema):
+            if e.content and self.pattern.fullmatch(e.author):
+                response_parts.extend(e.content.parts)
+        return "".join(map(utils.sanitized_part, response_parts))
 
     def get_query_ai_assistant_function(
         self,
-    ) -> Callable[[str, str], str | int | float | bool]:
+    ) -> Callable[[str, str], Awaitable[str | int | float | bool]]:
         """Returns a function that queries a Large Language Model with `query` and returns the language model's output.
 
         The `query_ai_assistant` function is a wrapper around the `run` method of
         the `QuarantinedLlmService` class. `query_ai_assistant` needs the `self`
         object but it can't be passed as a parameter because it needs to be added to
         the namespace of the CaMeL interpreter as a standalone built-in function.
+        It is a coroutine function: the interpreter awaits its output on the event
+        loop the interpreter is run from.
         """
 
-        def query_ai_assistant(
+        async def query_ai_assistant(
             query: str, output_schema: str
         ) -> str | int | float | bool:
             """Queries a Large Language Model with `query` and returns the language model's output.
@@ -237,16 +203,7 @@ class QuarantinedLlmService(BaseModel):
             if output_schema not in ["int", "str", "float", "bool"]:
                 raise ValueError(f"Unsupported output schema: `{output_schema}`")
 
-            response_parts = []
-
-            for e in self.run(
-                query=query,
-                output_schema=output_schema,
-            ):
-                if e.content and self.pattern.fullmatch(e.author):
-                    response_parts.extend(e.content.parts)
-
-            response_text = "".join(map(utils.sanitized_part, response_parts))
+            response_text = await self.run(query=query, output_schema=output_schema)
 
             print(
                 f"query_ai_assistant(query='{query}',"
@@ -351,7 +308,7 @@ class CaMelInterpreterService(BaseModel):
             print(code)
 
         # The namespace passed here is self.namespace, which is managed internally
-        interpreter_res, updated_namespace, new_tool_calls, new_dependencies = (
+        return self._process_eval_result(
             interpreter.parse_and_interpret_code(
                 code,
                 self.namespace,
@@ -360,6 +317,47 @@ class CaMelInterpreterService(BaseModel):
                 self.eval_args,
             )
         )
+
+    async def execute_code_async(
+        self,
+        code: str,
+        tool_calls_chain: list[function_types.FunctionCall],
+        current_dependencies: tuple[Any, ...],
+        verbose: bool = False,
+    ) -> tuple[
+        str,
+        list[function_types.FunctionCall],
+        CaMeLException | None,
+        camel_value.Namespace,
+        tuple[Any, ...],
+    ]:
+        """Interprets the CaMeL code without blocking the event loop."""
+        if verbose:
+            print(code)
+
+        return self._process_eval_result(
+            await interpreter.parse_and_interpret_code_async(
+                code,
+                self.namespace,
+                tool_calls_chain,
+                current_dependencies,
+                self.eval_args,
+            )
+        )
+
+    def _process_eval_result(
+        self, eval_result: interpreter.EvalResult
+    ) -> tuple[
+        str,
+        list[function_types.FunctionCall],
+        CaMeLException | None,
+        camel_value.Namespace,
+        tuple[Any, ...],
+    ]:
+        """Updates the namespace and extracts the output of an execution."""
+        interpreter_res, updated_namespace, new_tool_calls, new_dependencies = (
+            eval_result
+        )
         self.namespace = updated_namespace  # Update internal namespace state
 
         printed_output = utils.extract_print_output(new_tool_calls)
@@ -431,7 +429,7 @@ class CaMeLInterpreter(BaseAgent):
         dependencies = ctx.session.state.get("dependencies") or ()
 
         printed_output, ad_tool_calls, error, _, dependencies = (
-            self.camel_interpreter_service.execute_code(
+            await self.camel_interpreter_service.execute_code_async(
                 p_llm_code, function_calls, dependencies
             )
         )  # printed_output, ad_tool_calls, error, namespace, dependencies
@@ -497,6 +495,8 @@ class CaMeLAgent(BaseAgent):
         tools: Optional[list[Tool]] = None,
         security_policy_engine: SecurityPolicyEngine = security_policy.NoSecurityPolicyEngine(),
         eval_mode: DependenciesPropagationMode = DependenciesPropagationMode.NORMAL,
+        compile_code: bool = False,
+        parallel_tool_calls: bool = False,
     ):
         camel_interpreter_service = CaMelInterpreterService(
             model=model,
@@ -504,6 +504,8 @@ class CaMeLAgent(BaseAgent):
             eval_args=interpreter.EvalArgs(
                 eval_mode=eval_mode,
                 security_policy_engine=security_policy_engine,
+                compile_code=compile_code,
+                parallel_tool_calls=parallel_tool_calls,
             ),
         )
         camel_interpreter_agent = CaMeLInterpreter(
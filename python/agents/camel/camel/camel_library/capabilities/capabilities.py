@@ -1,6 +1,7 @@
 """Module containing definitions for the capabilities in CaMeL."""
 
 import dataclasses
+import functools
 from typing import Any, Self
 
 from . import readers
@@ -22,10 +23,15 @@ class Capabilities:
             ^ hash(tuple(self.other_metadata.items()))
         )
 
+    # The common capabilities are interned, as they are attached to most values.
+    # This is safe as capabilities (including their metadata) are never mutated.
+
     @classmethod
+    @functools.cache
     def default(cls) -> Self:
         return cls(frozenset({sources.SourceEnum.USER}), readers.Public())
 
     @classmethod
+    @functools.cache
     def camel(cls) -> Self:
         return cls(frozenset({sources.SourceEnum.CAMEL}), readers.Public())
@@ -1,6 +1,9 @@
 """Utility functions for capabilities."""
 
-from typing import Any, Protocol
+from collections.abc import Callable
+import operator
+from typing import Any, Protocol, TypeVar
+
 from . import capabilities
 from . import readers
 from . import sources
@@ -16,6 +19,106 @@ class HasDependenciesAndCapabilities(Protocol):
     def capabilities(self) -> capabilities.Capabilities | None: ...
 
 
+_S = TypeVar("_S")
+
+_READERS_SUMMARY = "readers"
+_SOURCES_SUMMARY = "sources"
+
+
+def _get_dependencies_summary(
+    value: HasDependenciesAndCapabilities,
+    summary_key: str,
+    get_summary: Callable[[capabilities.Capabilities | None], _S],
+    combine: Callable[[_S, _S], _S],
+    empty_summary: _S,
+    skip_dependency: Callable[[Any], bool] = lambda _: False,
+) -> _S:
+    """Combines the summaries of all the values `value` transitively depends on.
+
+    Instead of flattening the dependencies with `get_dependencies`, the graph is
+    walked through `get_dependency_parts`, and the summary of the dependencies
+    of each value is cached on the value itself. This way, values shared by many
+    others (e.g., big containers, or long chains of assignments) are walked only
+    once until a mutable container is mutated.
+
+    Circular dependencies are detected by keeping track of the depth at which
+    each value on the current path has been entered. Values which are part of a
+    cycle not rooted in themselves only get a partial summary, which is then
+    not cached.
+
+    Args:
+      value: The value whose dependencies should be summarized.
+      summary_key: The key under which the summaries are cached.
+      get_summary: Returns the summary of a single value given its capabilities.
+      combine: Combines two summaries. Must be associative, commutative, and
+        idempotent.
+      empty_summary: The identity element of `combine`.
+      skip_dependency: Whether a dependency should be ignored.
+
+    Returns:
+      The summary of the dependencies of `value`.
+    """
+    on_path: dict[int, int] = {}
+
+    def visit(v: HasDependenciesAndCapabilities, depth: int) -> tuple[_S, int]:
+        if (entry_depth := on_path.get(id(v))) is not None:
+            # Catch circular dependencies.
+            return empty_summary, entry_depth
+        get_dependency_parts = getattr(v, "get_dependency_parts", None)
+        if get_dependency_parts is None:
+            # Not a `camel_value.Value` (e.g., a `CaMeLException`).
+            dependencies, nested_values = v.get_dependencies()[0], ()
+        else:
+            dependencies, nested_values = get_dependency_parts()
+            if not dependencies and not nested_values:
+                return empty_summary, depth
+            cached_summary = v.get_cached_summary(summary_key)
+            if cached_summary is not None:
+                return cached_summary, depth
+        on_path[id(v)] = depth
+        summary = empty_summary
+        lowest_depth = depth
+        for dependency in dependencies:
+            if skip_dependency(dependency):
+                continue
+            dependency_capabilities = dependency.capabilities
+            summary = combine(summary, get_summary(dependency_capabilities))
+            if dependency_capabilities is None:
+                continue
+            dependency_summary, dependency_depth = visit(dependency, depth + 1)
+            summary = combine(summary, dependency_summary)
+            if dependency_depth < lowest_depth:
+                lowest_depth = dependency_depth
+        for nested_value in nested_values:
+            nested_summary, nested_depth = visit(nested_value, depth + 1)
+            if nested_summary is not empty_summary:
+                summary = combine(summary, nested_summary)
+            if nested_depth < lowest_depth:
+                lowest_depth = nested_depth
+        del on_path[id(v)]
+        if lowest_depth >= depth and get_dependency_parts is not None:
+            v.set_cached_summary(summary_key, summary)
+        return summary, lowest_depth
+
+    return visit(value, 0)[0]
+
+
+def _get_readers(
+    value_capabilities: capabilities.Capabilities | None,
+) -> readers.Readers[Any]:
+    if value_capabilities is None:
+        return frozenset()
+    return value_capabilities.readers_set
+
+
+def _get_sources(
+    value_capabilities: capabilities.Capabilities | None,
+) -> frozenset[sources.Source]:
+    if value_capabilities is None:
+        return frozenset()
+    return value_capabilities.sources_set
+
+
 def get_all_readers(
     value: HasDependenciesAndCapabilities,
     visited_objects: frozenset[int] = frozenset(),
@@ -32,18 +135,17 @@ def get_all_readers(
     value_capabilities = value.capabilities
     if value_capabilities is None:
         return frozenset(), frozenset()
-    value_readers = value_capabilities.readers_set
     if id(value) in visited_objects:
         # Catch circular dependencies.
-        return value_readers, visited_objects
-    for dependency in value.get_dependencies()[0]:
-        if dependency == readers.Public():
-            continue
-        new_value_readers, visited_objects = get_all_readers(
-            dependency, visited_objects | {id(value)}
-        )
-        if new_value_readers is not None:
-            value_readers &= new_value_readers
+        return value_capabilities.readers_set, visited_objects
+    value_readers = value_capabilities.readers_set & _get_dependencies_summary(
+        value,
+        _READERS_SUMMARY,
+        _get_readers,
+        operator.and_,
+        readers.Public(),
+        skip_dependency=lambda dependency: isinstance(dependency, readers.Public),
+    )
     return value_readers, visited_objects | {id(value)}
 
 
@@ -80,16 +182,13 @@ def get_all_sources(
     value_capabilities = value.capabilities
     if value_capabilities is None:
         return frozenset(), frozenset()
-    value_sources = value_capabilities.sources_set
     # Catch circular dependencies.
     if id(value) in visited_objects:
-        return value_sources, visited_objects
-    for dependency in value.get_dependencies()[0]:
-        new_value_sources, visited_objects = get_all_sources(
-            dependency, visited_objects | {id(value)}
-        )
-        value_sources |= new_value_sources
-    return value_sources, visited_objects
+        return value_capabilities.sources_set, visited_objects
+    value_sources = value_capabilities.sources_set | _get_dependencies_summary(
+        value, _SOURCES_SUMMARY, _get_sources, operator.or_, frozenset()
+    )
+    return value_sources, visited_objects | {id(value)}
 
 
 _TRUSTED_SET = frozenset(
@@ -1,7 +1,9 @@
 """CaMeL values."""
 
 import ast
+import asyncio
 from collections.abc import (
+    Awaitable,
     Callable,
     Iterable,
     Iterator,
@@ -10,9 +12,14 @@ from collections.abc import (
     MutableSequence,
     Sequence,
 )
+import concurrent.futures
+import contextvars
 import copy
 import dataclasses
 import enum
+import functools
+import inspect
+import itertools
 import types
 from typing import Any, Generic, Protocol, Self, TypeVar, runtime_checkable
 
@@ -22,35 +29,224 @@ from ..capabilities import capabilities as camel_capabilities
 from ..capabilities import readers
 from ..capabilities import sources
 
+_DELETED: Any = object()
+"""Marks a variable deleted from a namespace scope."""
 
-@dataclasses.dataclass(frozen=True)
-class Namespace:
-    """A namespace for variables in CaMeL."""
 
-    variables: dict[str, "Value"] = dataclasses.field(default_factory=dict)
+class Namespace:
+    """A persistent namespace for variables in CaMeL.
+
+    A namespace is a chain of scopes. Adding or deleting variables creates a
+    new namespace whose scope only holds the changed names and which points to
+    the namespace it was derived from, which is never modified. A new scope is
+    merged with its parent when it gets at least as large as it, so that
+    lookups walk a logarithmic number of scopes and deriving a namespace copies
+    amortized O(log n) names instead of the whole namespace.
+    """
 
-    def add_variables(self, variables: dict[str, "Value"]) -> Self:
+    __slots__ = ("_scope", "_parent", "_variables")
+
+    def __init__(self, variables: Mapping[str, "Value"] | None = None) -> None:
+        self._scope: dict[str, "Value"] = dict(variables or {})
+        self._parent: Namespace | None = None
+        self._variables: Mapping[str, "Value"] | None = None
+
+    def _derive(self, scope: dict[str, "Value"]) -> Self:
+        parent = self
+        while parent is not None and len(parent._scope) <= len(scope):
+            scope = parent._scope | scope
+            parent = parent._parent
+        namespace = type(self)()
+        if parent is None:
+            # The root scope does not need to remember deleted variables.
+            scope = {name: v for name, v in scope.items() if v is not _DELETED}
+        namespace._scope = scope
+        namespace._parent = parent
+        return namespace
+
+    def add_variables(self, variables: Mapping[str, "Value"]) -> Self:
         """Creates a copy of this adding the variables passed as argument."""
-        return dataclasses.replace(self, variables=self.variables | variables)
+        return self._derive(dict(variables))
 
-    def set_variable(self, name: str, value: "Value") -> None:
-        self.variables[name] = value
+    def delete_variables(self, names: Iterable[str]) -> Self:
+        """Creates a copy of this without the variables passed as argument."""
+        return self._derive({name: _DELETED for name in names if name in self})
 
     def get(self, name: str) -> "Value | None":
-        return self.variables.get(name)
+        namespace = self
+        while namespace is not None:
+            if (value := namespace._scope.get(name)) is not None:
+                return None if value is _DELETED else value
+            namespace = namespace._parent
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    @property
+    def variables(self) -> Mapping[str, "Value"]:
+        """A read-only view of all the variables in the namespace."""
+        if self._variables is None:
+            scopes = []
+            namespace = self
+            while namespace is not None:
+                scopes.append(namespace._scope)
+                namespace = namespace._parent
+            variables = {}
+            for scope in reversed(scopes):
+                variables |= scope
+            self._variables = types.MappingProxyType(
+                {name: v for name, v in variables.items() if v is not _DELETED}
+            )
+        return self._variables
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Namespace):
+            return NotImplemented
+        return self.variables == other.variables
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"Namespace(variables={dict(self.variables)!r})"
 
 
 _T = TypeVar("_T", bound=Any)
 
 
+_summaries_generations = itertools.count()
+_summaries_generation = next(_summaries_generations)
+"""Generation of the cached dependency summaries.
+
+Bumped every time a mutable container is mutated in place, which invalidates
+the cached summaries of all values at once. It is drawn from an
+`itertools.count` so that concurrent interpreters never get the same
+generation."""
+
+
+def invalidate_dependency_summaries() -> None:
+    """Invalidates the cached transitive readers/sources of all values.
+
+    Must be called every time a value is mutated in place, as the summaries of
+    all the values that (transitively) depend on it might have changed.
+    """
+    global _summaries_generation
+    _summaries_generation = next(_summaries_generations)
+
+
+event_loop: contextvars.ContextVar[asyncio.AbstractEventLoop | None] = (
+    contextvars.ContextVar("event_loop", default=None)
+)
+"""The event loop that awaitable outputs of callables are awaited on.
+
+Set when the interpreter runs in a worker thread on behalf of a coroutine (see
+`interpreter.parse_and_interpret_code_async`)."""
+
+
+async def _await(awaitable: Awaitable[_T]) -> _T:
+    return await awaitable
+
+
+def resolve_awaitable(awaitable: Awaitable[_T]) -> _T:
+    """Waits for the result of an awaitable from the synchronous interpreter.
+
+    If the interpreter is running on behalf of a coroutine, the awaitable is
+    awaited on that coroutine's event loop. Otherwise it is run in a new event
+    loop, in a separate thread if the current one is already running a loop.
+
+    Args:
+        awaitable: The awaitable to wait for, e.g., the output of an `async`
+          tool.
+
+    Returns:
+        The result of the awaitable.
+    """
+    loop = event_loop.get()
+    if loop is not None:
+        return asyncio.run_coroutine_threadsafe(_await(awaitable), loop).result()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_await(awaitable))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _await(awaitable)).result()
+
+
+_SHARED_CAPABILITIES = (
+    camel_capabilities.Capabilities.camel(),
+    camel_capabilities.Capabilities.default(),
+)
+"""The interned capabilities that values shared by `_get_flyweight` can have."""
+
+_SMALL_INTS = range(-5, 257)
+"""The ints that are shared by `CaMeLInt`, as CPython does for `int`."""
+
+_flyweights: dict[tuple[type[Any], Any, int], Any] = {}
+
+
+def _get_flyweight(
+    cls: type[_T],
+    raw: Any,
+    capabilities: camel_capabilities.Capabilities,
+    dependencies: tuple[Any, ...],
+) -> _T:
+    """Returns a new instance of `cls`, or a shared one if it can be shared.
+
+    Values without dependencies and with interned capabilities only differ by
+    their raw value, so (as they are immutable) a single instance is shared for
+    each of the raw values of small ints, bools, None and ASCII characters.
+    This must only be called from `__new__`, so that `__init__` still runs on
+    the returned instance.
+
+    Args:
+        cls: The class of the value.
+        raw: The raw value.
+        capabilities: The capabilities of the value.
+        dependencies: The dependencies of the value.
+
+    Returns:
+        An instance of `cls` which is still to be initialized.
+    """
+    if dependencies:
+        return object.__new__(cls)
+    for i, shared_capabilities in enumerate(_SHARED_CAPABILITIES):
+        if capabilities is shared_capabilities:
+            key = (cls, raw, i)
+            break
+    else:
+        return object.__new__(cls)
+    instance = _flyweights.get(key)
+    if instance is None:
+        instance = _flyweights.setdefault(key, object.__new__(cls))
+    return instance
+
+
+@functools.cache
+def _get_slots(cls: type[Any]) -> tuple[Any, ...]:
+    """Returns the descriptors of all the slots of `cls`."""
+    return tuple(
+        klass.__dict__[name]
+        for klass in cls.__mro__
+        for name in klass.__dict__.get("__slots__", ())
+    )
+
+
 @runtime_checkable
 class Value(Generic[_T], Protocol):
     """A value in CaMeL."""
 
+    __slots__ = (
+        "python_value",
+        "_capabilities",
+        "outer_dependencies",
+        "_dependency_summaries",
+    )
+
     python_value: _T
     _capabilities: camel_capabilities.Capabilities
     outer_dependencies: tuple["Value", ...]
     is_builtin: bool = False
+    _dependency_summaries: dict[str, tuple[int, Any]] | None
 
     def __repr__(self) -> str:
         return self._repr_helper(indent_level=0)
@@ -72,10 +268,38 @@ class Value(Generic[_T], Protocol):
     ) -> tuple[tuple["Value", ...], frozenset[int]]:
         return self.outer_dependencies, frozenset({id(self)})
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        """Returns what the dependencies returned by `get_dependencies` consist of.
+
+        Returns:
+          A tuple containing the direct dependencies of the value, and the values
+          whose dependencies are also dependencies of this value (e.g., the
+          elements of a container).
+        """
+        return self.outer_dependencies, ()
+
     @property
     def capabilities(self) -> camel_capabilities.Capabilities:
         return self._capabilities
 
+    def get_cached_summary(self, key: str) -> Any | None:
+        """Returns the cached transitive summary `key`, if still valid."""
+        dependency_summaries = getattr(self, "_dependency_summaries", None)
+        if dependency_summaries is None:
+            return None
+        entry = dependency_summaries.get(key)
+        if entry is None or entry[0] != _summaries_generation:
+            return None
+        return entry[1]
+
+    def set_cached_summary(self, key: str, summary: Any) -> None:
+        """Caches the transitive summary `key` for the current generation."""
+        if getattr(self, "_dependency_summaries", None) is None:
+            self._dependency_summaries = {}
+        self._dependency_summaries[key] = (_summaries_generation, summary)
+
     def __eq__(self, other) -> bool:
         if not is_value(other):
             return False
@@ -86,14 +310,29 @@ class Value(Generic[_T], Protocol):
             and self.outer_dependencies == other.outer_dependencies
         )
 
+    def __copy__(self) -> Self:
+        # The default copy would also copy the values that some classes (e.g.,
+        # `CaMeLTrue`) set as class attributes on top of their slots.
+        new_self = object.__new__(type(self))
+        for slot in _get_slots(type(self)):
+            try:
+                slot.__set__(new_self, slot.__get__(self))
+            except AttributeError:  # The slot is not set.
+                pass
+        if hasattr(self, "__dict__"):
+            new_self.__dict__.update(self.__dict__)
+        return new_self
+
     def new_with_python_value(self, value: _T) -> Self:
         new_self = copy.copy(self)
         new_self.python_value = value
+        new_self._dependency_summaries = None
         return new_self
 
     def new_with_dependencies(self, dependencies: tuple["Value", ...]) -> Self:
         new_self = copy.copy(self)
         new_self.outer_dependencies = self.outer_dependencies + dependencies
+        new_self._dependency_summaries = None
         return new_self
 
     def new_with_capabilities(
@@ -101,6 +340,7 @@ class Value(Generic[_T], Protocol):
     ) -> Self:
         new_self = copy.copy(self)
         new_self._capabilities = capabilities
+        new_self._dependency_summaries = None
         return new_self
 
     @property
@@ -181,121 +421,169 @@ _RT = TypeVar("_RT", bound=Value)
 
 @runtime_checkable
 class SupportsAdd(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def add(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsSub(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def sub(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsMult(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def mult(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsTrueDiv(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def truediv(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsFloorDiv(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def floor_div(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsMod(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def mod(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsPow(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def pow(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsLShift(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def l_shift(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRShift(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_shift(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsBitOr(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def bit_or(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsBitXor(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def bit_xor(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsBitAnd(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def bit_and(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRAdd(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_add(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRSub(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_sub(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRMult(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_mult(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRTrueDiv(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_truediv(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRFloorDiv(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_floor_div(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRMod(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_mod(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRPow(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_pow(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRLShift(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_l_shift(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRRShift(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_r_shift(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRBitOr(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_bit_or(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRBitXor(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_bit_xor(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
 @runtime_checkable
 class SupportsRBitAnd(Generic[_RT], Protocol):
+    __slots__ = ()
+
     def r_bit_and(self, other: Value) -> _RT | types.NotImplementedType: ...
 
 
@@ -316,6 +604,8 @@ _CT = TypeVar("_CT", bound=PythonComparable)
 
 
 class TotallyOrdered(Value[_CT]):
+    __slots__ = ()
+
     def cmp(self, y: Self) -> "CaMeLInt":
         if self.raw > y.raw:
             return CaMeLInt(1, camel_capabilities.Capabilities.camel(), (self, y))
@@ -326,6 +616,8 @@ class TotallyOrdered(Value[_CT]):
 
 @runtime_checkable
 class HasAttrs(Generic[_T], Value[_T], Protocol):
+    __slots__ = ()
+
     def attr(self, name: str) -> Value | None: ...
 
     def attr_names(self) -> set[str]: ...
@@ -410,6 +702,8 @@ class CaMeLCallable(Generic[_T], Value[Callable[..., _T]], Protocol):
         raw_args = args.raw
         raw_kwargs = kwargs.raw
         output = self.python_value(*raw_args, **raw_kwargs)
+        if inspect.isawaitable(output):
+            output = resolve_awaitable(output)
         if args.raw != raw_args or kwargs.raw != raw_kwargs:
             raise FunctionCallWithSideEffectError(
                 "Call to a function or method with side-effects detected. "
@@ -446,6 +740,8 @@ _IT = TypeVar("_IT", bound=Iterable)
 class CaMeLIterable(Generic[_IT, _V], Value[_IT]):
     """Represents an iterable value in CaMeL."""
 
+    __slots__ = ()
+
     def get_dependencies(
         self, visited_objects: frozenset[int] = frozenset()
     ) -> tuple[tuple["Value", ...], frozenset[int]]:
@@ -453,12 +749,17 @@ class CaMeLIterable(Generic[_IT, _V], Value[_IT]):
         if id(self) in visited_objects:
             return dependencies, visited_objects
         for el in self.python_value:
-            (new_dependencies, visited_objects) = el.get_dependencies(
+            new_dependencies, visited_objects = el.get_dependencies(
                 visited_objects | {id(self)}
             )
             dependencies += new_dependencies
         return dependencies, visited_objects | {id(self)}
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        return self.outer_dependencies, self.python_value
+
     def iterate(self) -> "CaMeLIterator[_V]":
         return CaMeLIterator(
             iter(self.python_value),
@@ -499,6 +800,8 @@ _ST = TypeVar("_ST", bound=Sequence[Value])
 class CaMeLSequence(Generic[_ST, _V], CaMeLIterable[_ST, _V]):
     """Represents a sequence value in CaMeL."""
 
+    __slots__ = ()
+
     python_value: _ST
 
     def index(self, index: "CaMeLInt") -> _V:
@@ -530,14 +833,19 @@ _MCT = TypeVar("_MCT", bound=MutableSequence[Value])
 class CaMeLMutableSequence(Generic[_MCT, _V], CaMeLSequence[_MCT, _V]):
     """Represents a mutable sequence value in CaMeL."""
 
+    __slots__ = ()
+
     def set_index(self, index: "CaMeLInt", value: _V) -> "CaMeLNone":
         self.python_value[index.raw] = value
+        invalidate_dependency_summaries()
         return CaMeLNone(camel_capabilities.Capabilities.camel(), (self, index))
 
 
 class CaMeLIterator(Generic[_V], Value[Iterator[_V]]):
     """Represents an iterator value in CaMeL."""
 
+    __slots__ = ()
+
     def freeze(self) -> "CaMeLNone":
         return CaMeLNone(
             camel_capabilities.Capabilities.camel(), (self,)
@@ -565,6 +873,8 @@ _VV = TypeVar("_VV", bound=Value)
 class CaMeLMapping(Generic[_MT, _KV, _VV], Value[_MT]):
     """Represents a mapping value in CaMeL."""
 
+    __slots__ = ()
+
     def get_dependencies(
         self, visited_objects: frozenset[int] = frozenset()
     ) -> tuple[tuple["Value", ...], frozenset[int]]:
@@ -579,6 +889,13 @@ class CaMeLMapping(Generic[_MT, _KV, _VV], Value[_MT]):
             visited_objects = v_visited_objects
         return dependencies, visited_objects
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        return self.outer_dependencies, tuple(
+            el for item in self.python_value.items() for el in item
+        )
+
     def get(self, key: _KV) -> _VV:
         dict_key = next((el for el in self.iterate_python() if el.eq(key)), None)
         if dict_key is None:
@@ -650,6 +967,8 @@ _MMT = TypeVar("_MMT", bound=MutableMapping)
 class CaMeLMutableMapping(Generic[_MMT, _KV, _VV], CaMeLMapping[_MMT, _KV, _VV]):
     """Represents a mutable mapping value in CaMeL."""
 
+    __slots__ = ()
+
     python_value: _MMT
 
     def set_key(self, key: _KV, value: _VV) -> "CaMeLNone":
@@ -672,14 +991,24 @@ class CaMeLMutableMapping(Generic[_MMT, _KV, _VV], CaMeLMapping[_MMT, _KV, _VV])
         else:
             new_dict_key = dict_key
         self.python_value[new_dict_key] = value
+        invalidate_dependency_summaries()
         return CaMeLNone(camel_capabilities.Capabilities.camel(), (self,))
 
 
 class CaMeLNone(Value[None]):
     """Represents the None value in CaMeL."""
 
+    __slots__ = ()
+
     python_value = None
 
+    def __new__(
+        cls,
+        capabilities: camel_capabilities.Capabilities,
+        dependencies: tuple["Value", ...],
+    ) -> Self:
+        return _get_flyweight(cls, None, capabilities, dependencies)
+
     def __init__(
         self,
         capabilities: camel_capabilities.Capabilities,
@@ -695,11 +1024,20 @@ class CaMeLNone(Value[None]):
 class _Bool(TotallyOrdered[bool]):
     """Base class for CaMeL boolean values."""
 
+    __slots__ = ()
+
     python_value: bool
 
     def __bool__(self):
         return self.python_value
 
+    def __new__(
+        cls,
+        capabilities: camel_capabilities.Capabilities,
+        dependencies: tuple[Value, ...],
+    ) -> Self:
+        return _get_flyweight(cls, cls.python_value, capabilities, dependencies)
+
     def __init__(
         self,
         capabilities: camel_capabilities.Capabilities,
@@ -713,10 +1051,14 @@ class _Bool(TotallyOrdered[bool]):
 
 
 class CaMeLTrue(_Bool):  # noqa: N801
+    __slots__ = ()
+
     python_value = True
 
 
 class CaMeLFalse(_Bool):  # noqa: N801
+    __slots__ = ()
+
     python_value = False
 
 
@@ -725,6 +1067,8 @@ CaMeLBool = CaMeLTrue | CaMeLFalse
 
 @runtime_checkable
 class HasUnary(Protocol):
+    __slots__ = ()
+
     def unary(self, op: ast.unaryop) -> Self | types.NotImplementedType: ...
 
 
@@ -748,6 +1092,8 @@ class CaMeLFloat(
 ):
     """Represents a floating point number in CaMeL."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         val: float,
@@ -918,6 +1264,18 @@ class CaMeLInt(
 ):
     """Represents an integer value in CaMeL."""
 
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        val: int,
+        capabilities: camel_capabilities.Capabilities,
+        dependencies: tuple[Value, ...],
+    ) -> Self:
+        if type(val) is int and val in _SMALL_INTS:
+            return _get_flyweight(cls, val, capabilities, dependencies)
+        return super().__new__(cls)
+
     def __init__(
         self,
         val: int,
@@ -1055,6 +1413,18 @@ class CaMeLInt(
 class _Char(TotallyOrdered[str]):
     """Represents a single character in CaMeL."""
 
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        val: str,
+        capabilities: camel_capabilities.Capabilities,
+        dependencies: tuple[Value, ...],
+    ) -> Self:
+        if val.isascii():
+            return _get_flyweight(cls, val, capabilities, dependencies)
+        return super().__new__(cls)
+
     def __init__(
         self,
         val: str,
@@ -1091,6 +1461,8 @@ class CaMeLStr(
 ):
     """Represents a string in CaMeL."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         string: Sequence[_Char],
@@ -1199,6 +1571,8 @@ class CaMeLTuple(
 ):
     """Represents a tuple in CaMeL."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         it: Iterable[_V],
@@ -1248,6 +1622,8 @@ class CaMeLList(
 ):
     """Represents a list in CaMeL."""
 
+    __slots__ = ("_frozen",)
+
     def __init__(
         self,
         it: Iterable[_V],
@@ -1311,6 +1687,8 @@ class CaMeLSet(
 ):
     """Represents a set in CaMeL."""
 
+    __slots__ = ("_frozen",)
+
     def __init__(
         self,
         it: Iterable[_V],
@@ -1377,6 +1755,8 @@ class CaMeLDict(
 ):
     """Represents a dictionary in CaMeL."""
 
+    __slots__ = ("_frozen",)
+
     def __init__(
         self,
         it: Mapping[_KV, _VV],
@@ -1482,6 +1862,11 @@ class CaMeLClass(Generic[_T], CaMeLCallable[_T], HasAttrs):
             dependencies += new_dependencies
         return dependencies, visited_objects
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        return self.outer_dependencies, self.methods.values()
+
     def init(
         self,
         namespace: Namespace,
@@ -1593,6 +1978,16 @@ class CaMeLClassInstance(Generic[_T], HasSetField[_T]):
                 dependencies += new_dependencies
         return dependencies, visited_objects
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        attrs = []
+        for attr_name in self.attr_names():
+            attr = self.attr(attr_name)
+            if attr is not None and attr_name not in self._camel_class.methods:
+                attrs.append(attr)
+        return self.outer_dependencies, attrs
+
     def _cmp(self, y: Self) -> "CaMeLInt":
         if self.raw > y.raw:  # type: ignore  # this is hardcoded
             return CaMeLInt(1, camel_capabilities.Capabilities.camel(), (self, y))
@@ -1631,6 +2026,7 @@ class CaMeLClassInstance(Generic[_T], HasSetField[_T]):
         if self._frozen:
             raise ValueError("instance is frozen")
         setattr(self.python_value, name, value)
+        invalidate_dependency_summaries()
         return CaMeLNone(camel_capabilities.Capabilities.default(), ())
 
     def attr(self, name: str) -> Value | None:
@@ -1683,6 +2079,11 @@ class ValueAsWrapper(Generic[_T], CaMeLClassInstance[_T]):
     ) -> tuple[tuple["Value", ...], frozenset[int]]:
         return self.outer_dependencies, visited_objects | {id(self)}
 
+    def get_dependency_parts(
+        self,
+    ) -> tuple[tuple["Value", ...], Iterable["Value"]]:
+        return self.outer_dependencies, ()
+
     def attr(self, name: str) -> Value | None:
         if name not in self.attr_names():
             return None
@@ -1697,6 +2098,7 @@ class ValueAsWrapper(Generic[_T], CaMeLClassInstance[_T]):
         if self._frozen:
             raise ValueError("instance is frozen")
         setattr(self.python_value, name, value.raw)
+        invalidate_dependency_summaries()
         return CaMeLNone(camel_capabilities.Capabilities.default(), ())
 
     def freeze(self) -> CaMeLNone:
@@ -7,9 +7,14 @@ calls would create circular imports.
 """
 
 import ast
-from collections.abc import Callable, Iterable, Mapping, Sequence
+import asyncio
+import collections
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+import concurrent.futures
+import contextvars
 import dataclasses
 import enum
+import functools
 import re
 from typing import Any, Generic, NamedTuple, TypeAlias, TypeVar
 
@@ -123,6 +128,10 @@ class EvalArgs:
     """The list of security policies to apply."""
     eval_mode: DependenciesPropagationMode
     """The evaluation mode, either `STRICT` or `NORMAL`."""
+    compile_code: bool = False
+    """Whether to compile the parsed code with `compile_ast` before evaluating it."""
+    parallel_tool_calls: bool = False
+    """Whether to perform independent calls to tools without side effects concurrently."""
 
 
 def _eval_formatted_value(
@@ -967,8 +976,7 @@ def _assign_name(
             dependencies,
         )
 
-    updated_variables = namespace.variables | {name.id: v}
-    new_namespace = dataclasses.replace(namespace, variables=updated_variables)
+    new_namespace = namespace.add_variables({name.id: v})
     return EvalResult(
         result.Ok(camel_value.CaMeLNone(camel_capabilities.Capabilities.default(), ())),
         new_namespace,
@@ -1504,10 +1512,21 @@ def _get_assigned_names(node: ast.expr) -> set[str]:
             return set()
 
 
+def _get_comprehension_assigned_names(
+    node: ast.comprehension,
+) -> frozenset[str]:
+    """Returns the names assigned by the target of a comprehension."""
+    # Precomputed by `_analyze_module` for code parsed by `_parse_code`.
+    assigned_names = getattr(node, _ASSIGNED_NAMES_ATTR, None)
+    if assigned_names is None:
+        return frozenset(_get_assigned_names(node.target))
+    return assigned_names
+
+
 def _restore_or_delete_variables(
     original_namespace: camel_value.Namespace,
     updated_namespace: camel_value.Namespace,
-    comprehension_variables: set[str],
+    comprehension_variables: Iterable[str],
 ):
     """Restores or deletes variables in a namespace after a comprehension.
 
@@ -1521,16 +1540,15 @@ def _restore_or_delete_variables(
         The updated namespace with variables restored or deleted.
     """
     restored_variables = {}
+    deleted_variables = []
     for var_name in comprehension_variables:
-        if var_name in original_namespace.variables:
-            restored_variables[var_name] = original_namespace.variables[var_name]
+        if (original_value := original_namespace.get(var_name)) is not None:
+            restored_variables[var_name] = original_value
         else:
-            del updated_namespace.variables[var_name]
-    updated_namespace = dataclasses.replace(
-        updated_namespace,
-        variables=updated_namespace.variables | restored_variables,
+            deleted_variables.append(var_name)
+    return updated_namespace.delete_variables(deleted_variables).add_variables(
+        restored_variables
     )
-    return updated_namespace
 
 
 def _eval_comprehensions(
@@ -1626,70 +1644,86 @@ def _eval_comprehensions(
         camel_value.CaMeLList([], camel_capabilities.Capabilities.camel(), ())
         for _ in elts
     )
-    for element in iterable.iterate_python():
-        inner_namespace = dataclasses.replace(namespace)
-        assign_res, inner_namespace, tool_calls_chain, dependencies = _assign(
-            element,
-            current_comprehension.target,
-            inner_namespace,
-            tool_calls_chain,
-            dependencies,
-            eval_args,
+    token = (
+        _prefetch_comprehension_calls(
+            current_comprehension, elts, iterable, namespace, dependencies, eval_args
         )
-        if isinstance(assign_res, result.Error):
-            return (
-                EvalResult(assign_res, namespace, tool_calls_chain, dependencies),
-                (),
+        if eval_args.parallel_tool_calls and len(generators) == 1
+        else None
+    )
+    try:
+        for element in iterable.iterate_python():
+            inner_namespace = namespace
+            assign_res, inner_namespace, tool_calls_chain, dependencies = _assign(
+                element,
+                current_comprehension.target,
+                inner_namespace,
+                tool_calls_chain,
+                dependencies,
+                eval_args,
             )
+            if isinstance(assign_res, result.Error):
+                return (
+                    EvalResult(assign_res, namespace, tool_calls_chain, dependencies),
+                    (),
+                )
 
-        # evaluate ifs
-        all_ifs_true = True
-        for if_expr in current_comprehension.ifs:
-            if_res, inner_namespace, tool_calls_chain, dependencies = camel_eval(
-                if_expr, inner_namespace, tool_calls_chain, dependencies, eval_args
-            )
-            if isinstance(if_res, result.Error):
-                return EvalResult(if_res, namespace, tool_calls_chain, dependencies), ()
-            if not if_res.value.truth().raw:
-                all_ifs_true = False
-                break
-        if not all_ifs_true:
-            continue
+            # evaluate ifs
+            all_ifs_true = True
+            for if_expr in current_comprehension.ifs:
+                if_res, inner_namespace, tool_calls_chain, dependencies = camel_eval(
+                    if_expr, inner_namespace, tool_calls_chain, dependencies, eval_args
+                )
+                if isinstance(if_res, result.Error):
+                    return (
+                        EvalResult(if_res, namespace, tool_calls_chain, dependencies),
+                        (),
+                    )
+                if not if_res.value.truth().raw:
+                    all_ifs_true = False
+                    break
+            if not all_ifs_true:
+                continue
 
-        (
             (
-                recursive_res,
-                resulting_namespace,
+                (
+                    recursive_res,
+                    resulting_namespace,
+                    tool_calls_chain,
+                    dependencies,
+                ),
+                evaled_iterators,
+            ) = _eval_comprehensions(
+                generators[1:],
+                elts,
+                inner_namespace,
                 tool_calls_chain,
                 dependencies,
-            ),
-            evaled_iterators,
-        ) = _eval_comprehensions(
-            generators[1:],
-            elts,
-            inner_namespace,
-            tool_calls_chain,
-            dependencies,
-            eval_args,
-            evaled_iterators,
-        )
-
-        namespace = _restore_or_delete_variables(
-            namespace,
-            resulting_namespace,
-            _get_assigned_names(current_comprehension.target),
-        )
+                eval_args,
+                evaled_iterators,
+            )
 
-        if isinstance(recursive_res, result.Error):
-            return (
-                EvalResult(recursive_res, namespace, tool_calls_chain, dependencies),
-                (),
+            namespace = _restore_or_delete_variables(
+                namespace,
+                resulting_namespace,
+                _get_comprehension_assigned_names(current_comprehension),
             )
 
-        for acc_res, rec_res in zip(
-            accumulated_results, recursive_res.value.python_value
-        ):
-            acc_res.python_value.extend(rec_res.python_value)
+            if isinstance(recursive_res, result.Error):
+                return (
+                    EvalResult(
+                        recursive_res, namespace, tool_calls_chain, dependencies
+                    ),
+                    (),
+                )
+
+            for acc_res, rec_res in zip(
+                accumulated_results, recursive_res.value.python_value
+            ):
+                acc_res.python_value.extend(rec_res.python_value)
+    finally:
+        if token is not None:
+            _prefetched_calls.reset(token)
 
     return EvalResult(
         result.Ok(
@@ -2693,41 +2727,54 @@ def _eval_for(
         )
 
     dependencies = [*dependencies, iterable]
-    for elt in iterable.iterate_python():
-        assign_res, namespace, tool_calls_chain, dependencies = _assign(
-            elt,
-            node.target,
-            namespace,
-            tool_calls_chain,
-            dependencies,
-            eval_args,
-        )
-        if isinstance(assign_res, result.Error):
-            return EvalResult(assign_res, namespace, tool_calls_chain, dependencies)
+    token = (
+        _prefetch_for_calls(node, iterable, namespace, dependencies, eval_args)
+        if eval_args.parallel_tool_calls
+        else None
+    )
+    try:
+        for elt in iterable.iterate_python():
+            assign_res, namespace, tool_calls_chain, dependencies = _assign(
+                elt,
+                node.target,
+                namespace,
+                tool_calls_chain,
+                dependencies,
+                eval_args,
+            )
+            if isinstance(assign_res, result.Error):
+                return EvalResult(assign_res, namespace, tool_calls_chain, dependencies)
 
-        final_val_res, namespace, tool_calls_chain, dependencies = _eval_stmt_list(
-            node.body,
+            final_val_res, namespace, tool_calls_chain, dependencies = _eval_stmt_list(
+                node.body,
+                namespace,
+                tool_calls_chain,
+                # no need to add `elt` to the dependency, as whether the statement gets
+                # evaluated depends on the iterable overall, and not on `elt` directly.
+                # Of course if `elt` is used in the statement, this will be considered
+                # by the evaluation of the statement.
+                dependencies,
+                eval_args,
+            )
+            if isinstance(final_val_res, result.Error):
+                return EvalResult(
+                    final_val_res, namespace, tool_calls_chain, dependencies
+                )
+
+        dependencies = list(dependencies)
+        dependencies.remove(iterable)
+
+        return EvalResult(
+            result.Ok(
+                camel_value.CaMeLNone(camel_capabilities.Capabilities.default(), ())
+            ),
             namespace,
             tool_calls_chain,
-            # no need to add `elt` to the dependency, as whether the statement gets
-            # evaluated depends on the iterable overall, and not on `elt` directly.
-            # Of course if `elt` is used in the statement, this will be considered
-            # by the evaluation of the statement.
             dependencies,
-            eval_args,
         )
-        if isinstance(final_val_res, result.Error):
-            return EvalResult(final_val_res, namespace, tool_calls_chain, dependencies)
-
-    dependencies = list(dependencies)
-    dependencies.remove(iterable)
-
-    return EvalResult(
-        result.Ok(camel_value.CaMeLNone(camel_capabilities.Capabilities.default(), ())),
-        namespace,
-        tool_calls_chain,
-        dependencies,
-    )
+    finally:
+        if token is not None:
+            _prefetched_calls.reset(token)
 
 
 def _eval_stmt_list(
@@ -2753,17 +2800,30 @@ def _eval_stmt_list(
     # passed to ast.parse. In which case it's fine if it's not None. It's not
     # possible to have empty bodies for for and if/else bodies.
     val = camel_value.CaMeLNone(camel_capabilities.Capabilities.default(), ())
-    for stmt in stmts:
-        val_res, namespace, tool_calls_chain, dependencies = camel_eval(
-            stmt, namespace, tool_calls_chain, dependencies, eval_args
-        )
-        match val_res:
-            case result.Error():
-                return EvalResult(val_res, namespace, tool_calls_chain, dependencies)
-            case result.Ok(v):
-                val = v
-            case _:
-                raise ValueError("Invalid eval result type")
+    tokens = []
+    try:
+        for i, stmt in enumerate(stmts):
+            if eval_args.parallel_tool_calls:
+                token = _prefetch_statement_calls(
+                    stmts[i:], namespace, dependencies, eval_args
+                )
+                if token is not None:
+                    tokens.append(token)
+            val_res, namespace, tool_calls_chain, dependencies = camel_eval(
+                stmt, namespace, tool_calls_chain, dependencies, eval_args
+            )
+            match val_res:
+                case result.Error():
+                    return EvalResult(
+                        val_res, namespace, tool_calls_chain, dependencies
+                    )
+                case result.Ok(v):
+                    val = v
+                case _:
+                    raise ValueError("Invalid eval result type")
+    finally:
+        for token in reversed(tokens):
+            _prefetched_calls.reset(token)
     return EvalResult(result.Ok(val), namespace, tool_calls_chain, dependencies)
 
 
@@ -2966,14 +3026,26 @@ def _eval_keywords(
     )
 
 
-def _eval_call(
+class _PreparedCall(NamedTuple):
+    """A call whose callable and arguments are evaluated and allowed by the policies."""
+
+    fn: camel_value.CaMeLCallable[Any]
+    args: camel_value.CaMeLTuple
+    kwargs: camel_value.CaMeLDict[camel_value.CaMeLStr, camel_value.Value[Any]]
+
+
+_CallOutput: TypeAlias = tuple[camel_value.Value[Any], dict[str, Any]] | Exception
+"""The output and arguments by keyword of a call, or the exception it raised."""
+
+
+def _prepare_call(
     node: ast.Call,
     namespace: camel_value.Namespace,
     tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
-) -> EvalResult:
-    """Evaluates a function call.
+) -> tuple[EvalResult, _PreparedCall | None]:
+    """Evaluates everything that comes before actually calling a function.
 
     Args:
         node: The AST node representing the function call.
@@ -2983,7 +3055,11 @@ def _eval_call(
         eval_args: The evaluation arguments.
 
     Returns:
-        The result of the evaluation.
+        The result of the evaluation and, if it is not an error, the call to
+        perform.
+
+    Raises:
+        SecurityPolicyDeniedError: If the security policy denies the call.
     """
     # Evaluation order is:
     # - Object being called
@@ -2996,7 +3072,10 @@ def _eval_call(
     )
     match evaled_fn_res:
         case result.Error():
-            return EvalResult(evaled_fn_res, namespace, tool_calls_chain, dependencies)
+            return (
+                EvalResult(evaled_fn_res, namespace, tool_calls_chain, dependencies),
+                None,
+            )
         case result.Ok(v):
             evaled_fn = v
         case _:
@@ -3006,8 +3085,9 @@ def _eval_call(
     )
     match evaled_args_res:
         case result.Error():
-            return EvalResult(
-                evaled_args_res, namespace, tool_calls_chain, dependencies
+            return (
+                EvalResult(evaled_args_res, namespace, tool_calls_chain, dependencies),
+                None,
             )
         case result.Ok(v):
             evaled_args = v
@@ -3025,8 +3105,11 @@ def _eval_call(
     )
     match evaled_kwargs_res:
         case result.Error():
-            return EvalResult(
-                evaled_kwargs_res, namespace, tool_calls_chain, dependencies
+            return (
+                EvalResult(
+                    evaled_kwargs_res, namespace, tool_calls_chain, dependencies
+                ),
+                None,
             )
         case result.Ok(v):
             evaled_kwargs = v
@@ -3035,17 +3118,20 @@ def _eval_call(
 
     # In Python, this check is done after args are evaluated.
     if not isinstance(evaled_fn, camel_value.CaMeLCallable):
-        return EvalResult(
-            result.Error(
-                CaMeLException(
-                    TypeError(f"'{evaled_fn.raw_type}' is not callable"),
-                    (node,),
-                    (evaled_fn,),
-                )
+        return (
+            EvalResult(
+                result.Error(
+                    CaMeLException(
+                        TypeError(f"'{evaled_fn.raw_type}' is not callable"),
+                        (node,),
+                        (evaled_fn,),
+                    )
+                ),
+                namespace,
+                tool_calls_chain,
+                dependencies,
             ),
-            namespace,
-            tool_calls_chain,
-            dependencies,
+            None,
         )
 
     try:
@@ -3056,11 +3142,14 @@ def _eval_call(
             dependencies,
         )
     except Exception as e:  # pylint: disable=broad-except. # sometimes exceptions can be thrown when checking policies
-        return EvalResult(
-            result.Error(CaMeLException(e, (node,), (evaled_fn,))),
-            namespace,
-            tool_calls_chain,
-            dependencies,
+        return (
+            EvalResult(
+                result.Error(CaMeLException(e, (node,), (evaled_fn,))),
+                namespace,
+                tool_calls_chain,
+                dependencies,
+            ),
+            None,
         )
 
     if not isinstance(
@@ -3082,9 +3171,48 @@ def _eval_call(
             *evaled_kwargs.python_value.values(),
         ]
 
+    return (
+        EvalResult(result.Ok(evaled_fn), namespace, tool_calls_chain, dependencies),
+        _PreparedCall(evaled_fn, evaled_args, evaled_kwargs),
+    )
+
+
+def _invoke_call(
+    prepared_call: _PreparedCall, namespace: camel_value.Namespace
+) -> _CallOutput:
+    """Calls a prepared call, returning the exception it raises, if any."""
     try:
-        ret_res, args_by_keyword = evaled_fn.call(evaled_args, evaled_kwargs, namespace)
+        return prepared_call.fn.call(
+            prepared_call.args, prepared_call.kwargs, namespace
+        )
     except Exception as e:  # pylint: disable=broad-except  # catch all exceptions to be able to return them to the P-LLM
+        return e
+
+
+def _finish_call(
+    node: ast.Call,
+    prepared_call: _PreparedCall,
+    call_output: _CallOutput,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+) -> EvalResult:
+    """Records the output of a call (or its exception) in the evaluation result.
+
+    Args:
+        node: The AST node representing the function call.
+        prepared_call: The call that was performed.
+        call_output: What `_invoke_call` returned for `prepared_call`.
+        namespace: The current namespace.
+        tool_calls_chain: The current chain of tool calls.
+        dependencies: The current dependencies.
+
+    Returns:
+        The result of the evaluation.
+    """
+    evaled_fn, evaled_args, evaled_kwargs = prepared_call
+    if isinstance(call_output, Exception):
+        e = call_output
         if isinstance(e, library.NotEnoughInformationError):
             return EvalResult(
                 result.Error(
@@ -3134,6 +3262,7 @@ def _eval_call(
             tool_calls_chain,
             dependencies,
         )
+    ret_res, args_by_keyword = call_output
 
     receiver = evaled_fn.receiver()
     if receiver is not None:
@@ -3166,6 +3295,374 @@ def _eval_call(
     )
 
 
+def _eval_call(
+    node: ast.Call,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+    """Evaluates a function call.
+
+    Args:
+        node: The AST node representing the function call.
+        namespace: The current namespace.
+        tool_calls_chain: The current chain of tool calls.
+        dependencies: The current dependencies.
+        eval_args: The evaluation arguments.
+
+    Returns:
+        The result of the evaluation.
+    """
+    prepared_res, prepared_call = _prepare_call(
+        node, namespace, tool_calls_chain, dependencies, eval_args
+    )
+    if prepared_call is None:
+        return prepared_res
+    _, namespace, tool_calls_chain, dependencies = prepared_res
+    call_output = _take_prefetched_output(node, prepared_call)
+    if call_output is None:
+        call_output = _invoke_call(prepared_call, namespace)
+    return _finish_call(
+        node, prepared_call, call_output, namespace, tool_calls_chain, dependencies
+    )
+
+
+_PURE_EXPRESSION_NODES = (
+    ast.Constant,
+    ast.Name,
+    ast.JoinedStr,
+    ast.FormattedValue,
+    ast.Attribute,
+    ast.Subscript,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.List,
+    ast.Tuple,
+    ast.Set,
+    ast.Dict,
+    ast.keyword,
+    ast.expr_context,
+    ast.operator,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+)
+"""Nodes whose evaluation neither calls functions nor changes the namespace."""
+
+_MAX_PARALLEL_TOOL_CALLS = 32
+"""Tool calls are mostly I/O bound, so they are not limited by the CPU count."""
+
+_TOOL_CALLS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=_MAX_PARALLEL_TOOL_CALLS, thread_name_prefix="camel_tool_calls"
+)
+
+_prefetched_calls: contextvars.ContextVar[
+    Mapping[
+        ast.Call,
+        collections.deque[tuple[_PreparedCall, concurrent.futures.Future[_CallOutput]]],
+    ]
+] = contextvars.ContextVar("prefetched_calls", default={})
+"""The calls dispatched ahead of time by `_prefetch_calls`, by call node."""
+
+
+def _is_pure(node: ast.AST) -> bool:
+    return all(isinstance(n, _PURE_EXPRESSION_NODES) for n in ast.walk(node))
+
+
+def _is_simple_target(target: ast.expr) -> bool:
+    """Whether assigning to `target` only binds names in a new namespace."""
+    match target:
+        case ast.Name():
+            return True
+        case ast.Tuple() | ast.List():
+            return all(map(_is_simple_target, target.elts))
+        case _:
+            return False
+
+
+def _get_loaded_names(node: ast.AST) -> set[str]:
+    return {
+        n.id
+        for n in ast.walk(node)
+        if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)
+    }
+
+
+def _get_stored_names(nodes: Iterable[ast.AST]) -> set[str]:
+    return {
+        n.id
+        for node in nodes
+        for n in ast.walk(node)
+        if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)
+    }
+
+
+def _mutates_values(nodes: Iterable[ast.AST]) -> bool:
+    """Whether `nodes` assign to attributes or items, mutating values in place."""
+    return any(
+        isinstance(n, ast.Attribute | ast.Subscript) and isinstance(n.ctx, ast.Store)
+        for node in nodes
+        for n in ast.walk(node)
+    )
+
+
+def _is_side_effect_free_call(
+    node: ast.expr, namespace: camel_value.Namespace, eval_args: EvalArgs
+) -> bool:
+    """Whether `node` calls a tool without side effects with pure arguments."""
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        return False
+    fn = namespace.get(node.func.id)
+    if not isinstance(fn, camel_value.CaMeLFunction):
+        return False
+    tool_name = fn.name().raw
+    if (
+        tool_name not in security_policy.NO_SIDE_EFFECT_TOOLS
+        and tool_name not in eval_args.security_policy_engine.no_side_effect_tools
+    ):
+        return False
+    return all(_is_pure(arg) for arg in (*node.args, *node.keywords))
+
+
+def _get_independent_calls(
+    stmts: Sequence[ast.stmt],
+    namespace: camel_value.Namespace,
+    eval_args: EvalArgs,
+    assigned_names: set[str],
+) -> list[ast.Call]:
+    """Returns the calls made by the leading independent statements of `stmts`.
+
+    The statements must be calls to tools without side effects (possibly
+    assigned or augmented-assigned to a name), whose arguments do not use names assigned by the
+    previous statements or in `assigned_names`.
+
+    Args:
+        stmts: The statements to look at.
+        namespace: The namespace the statements are evaluated in.
+        eval_args: The evaluation arguments.
+        assigned_names: Names that the calls must not use.
+
+    Returns:
+        The calls of the leading independent statements.
+    """
+    calls = []
+    assigned_names = set(assigned_names)
+    for stmt in stmts:
+        match stmt:
+            case ast.Assign(targets=[ast.Name() as target], value=call) | ast.AugAssign(
+                target=ast.Name() as target, value=call
+            ):
+                pass
+            case ast.Expr(value=call):
+                target = None
+            case _:
+                break
+        if not _is_side_effect_free_call(
+            call, namespace, eval_args
+        ) or not assigned_names.isdisjoint(_get_loaded_names(call)):
+            break
+        if target is not None:
+            if isinstance(namespace.get(target.id), camel_value.CaMeLClass):
+                # Shadowing a class changes how the outputs of tools are converted.
+                break
+            assigned_names.add(target.id)
+        calls.append(call)
+    return calls
+
+
+def _prefetch_calls(
+    calls: Sequence[ast.Call],
+    namespaces: Iterable[camel_value.Namespace],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> contextvars.Token | None:
+    """Dispatches independent side-effect-free calls concurrently.
+
+    The calls are prepared (i.e., their arguments are evaluated and the
+    security policy is checked) in each of the namespaces, and then performed in
+    worker threads. The regular evaluation then uses the outputs of these calls
+    when it gets to the same calls with the same arguments, so that the tool
+    calls chain and the dependencies are exactly the ones of a sequential
+    evaluation. Prefetching stops at the first call that can't be prepared,
+    which is then performed (and fails) during the regular evaluation.
+
+    Args:
+        calls: The calls to prefetch.
+        namespaces: The namespaces to prefetch the calls in, e.g., one per
+          iteration of a loop.
+        dependencies: The current dependencies.
+        eval_args: The evaluation arguments.
+
+    Returns:
+        The token to pass to `_prefetched_calls.reset` once the evaluation of the
+        calls is done, or None if nothing was prefetched.
+    """
+
+    def prepare() -> Iterator[tuple[ast.Call, _PreparedCall, camel_value.Namespace]]:
+        for namespace in namespaces:
+            for call in calls:
+                try:
+                    _, prepared_call = _prepare_call(
+                        call, namespace, [], dependencies, eval_args
+                    )
+                except security_policy.SecurityPolicyDeniedError:
+                    return
+                if prepared_call is None:
+                    return
+                yield call, prepared_call, namespace
+
+    prepared_calls = list(prepare())
+    if len(prepared_calls) < 2:
+        # Nothing to parallelize, the call (if any) is simply performed as usual.
+        return None
+    prefetched_calls = {call: collections.deque() for call in calls}
+    for call, prepared_call, namespace in prepared_calls:
+        # Each worker needs its own copy of the context, as a context can only
+        # be entered by one thread at a time.
+        future = _TOOL_CALLS_EXECUTOR.submit(
+            contextvars.copy_context().run, _invoke_call, prepared_call, namespace
+        )
+        prefetched_calls[call].append((prepared_call, future))
+    return _prefetched_calls.set(_prefetched_calls.get() | prefetched_calls)
+
+
+def _prefetch_loop_calls(
+    calls: Sequence[ast.Call],
+    target: ast.expr,
+    iterable: camel_value.CaMeLIterable | camel_value.CaMeLMapping,
+    ifs: Sequence[ast.expr],
+    namespace: camel_value.Namespace,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> contextvars.Token | None:
+    """Prefetches the calls done by each iteration of a loop or comprehension.
+
+    Args:
+        calls: The independent side-effect-free calls done at each iteration.
+          They must not use any name assigned by the loop, except its target.
+        target: The target the elements of `iterable` are assigned to.
+        iterable: The iterable being looped over.
+        ifs: The conditions that each element must satisfy (for comprehensions).
+        namespace: The namespace the loop is evaluated in.
+        dependencies: The current dependencies.
+        eval_args: The evaluation arguments.
+
+    Returns:
+        The token returned by `_prefetch_calls`.
+    """
+    if (
+        not calls
+        or not _is_simple_target(target)
+        or not all(map(_is_pure, ifs))
+        or not _get_stored_names([target]).isdisjoint(call.func.id for call in calls)
+    ):
+        return None
+
+    def iteration_namespaces() -> Iterator[camel_value.Namespace]:
+        for element in iterable.iterate_python():
+            assign_res, iteration_namespace, _, _ = _assign(
+                element, target, namespace, [], dependencies, eval_args
+            )
+            if isinstance(assign_res, result.Error):
+                return
+            for if_expr in ifs:
+                if_res, _, _, _ = camel_eval(
+                    if_expr, iteration_namespace, [], dependencies, eval_args
+                )
+                if isinstance(if_res, result.Error):
+                    return
+                if not if_res.value.truth().raw:
+                    break
+            else:
+                yield iteration_namespace
+
+    return _prefetch_calls(calls, iteration_namespaces(), dependencies, eval_args)
+
+
+def _prefetch_statement_calls(
+    stmts: Sequence[ast.stmt],
+    namespace: camel_value.Namespace,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> contextvars.Token | None:
+    """Prefetches the calls done by the leading independent statements."""
+    match stmts[0]:
+        case ast.Assign(value=ast.Call() as call) | ast.Expr(value=ast.Call() as call):
+            if call in _prefetched_calls.get():
+                # Already prefetched, e.g., by an enclosing loop.
+                return None
+        case _:
+            return None
+    calls = _get_independent_calls(stmts, namespace, eval_args, set())
+    return _prefetch_calls(calls, [namespace], dependencies, eval_args)
+
+
+def _prefetch_for_calls(
+    node: ast.For,
+    iterable: camel_value.CaMeLIterable | camel_value.CaMeLMapping,
+    namespace: camel_value.Namespace,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> contextvars.Token | None:
+    """Prefetches the independent calls done at each iteration of a for loop."""
+    if _mutates_values(node.body):
+        # The arguments of prefetched calls could be mutated while being used.
+        return None
+    calls = _get_independent_calls(
+        node.body,
+        namespace,
+        eval_args,
+        _get_stored_names(node.body) - _get_stored_names([node.target]),
+    )
+    return _prefetch_loop_calls(
+        calls, node.target, iterable, (), namespace, dependencies, eval_args
+    )
+
+
+def _prefetch_comprehension_calls(
+    comprehension: ast.comprehension,
+    elts: Sequence[ast.expr],
+    iterable: camel_value.CaMeLIterable | camel_value.CaMeLMapping,
+    namespace: camel_value.Namespace,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> contextvars.Token | None:
+    """Prefetches the calls done for each element of a comprehension."""
+    if not all(_is_side_effect_free_call(elt, namespace, eval_args) for elt in elts):
+        return None
+    return _prefetch_loop_calls(
+        elts,
+        comprehension.target,
+        iterable,
+        comprehension.ifs,
+        namespace,
+        dependencies,
+        eval_args,
+    )
+
+
+def _take_prefetched_output(
+    node: ast.Call, prepared_call: _PreparedCall
+) -> _CallOutput | None:
+    """Returns the output of `prepared_call` if it was prefetched."""
+    prefetched = _prefetched_calls.get().get(node)
+    if not prefetched:
+        return None
+    prefetched_call, future = prefetched[0]
+    if (
+        prefetched_call.fn is not prepared_call.fn
+        or prefetched_call.args != prepared_call.args
+        or prefetched_call.kwargs != prepared_call.kwargs
+    ):
+        return None
+    prefetched.popleft()
+    return future.result()
+
+
 def _eval_expr_list(
     nodes: Iterable[ast.expr],
     namespace: camel_value.Namespace,
@@ -3329,7 +3826,7 @@ def _eval_class_def(
     eval_args: EvalArgs,
 ) -> EvalResult:
     """Evaluates a class definition."""
-    if node.name in namespace.variables:
+    if node.name in namespace:
         return EvalResult(
             result.Error(
                 CaMeLException(
@@ -3360,7 +3857,10 @@ def _eval_class_def(
 
     # check that the definition has the `@dataclass` or `@dataclasses.dataclass`
     # decorator and no other decorator
-    if not _check_decorators(node.decorator_list) and not _check_bases(bases):
+    valid_decorators = getattr(node, _VALID_DECORATORS_ATTR, None)
+    if valid_decorators is None:
+        valid_decorators = _check_decorators(node.decorator_list)
+    if not valid_decorators and not _check_bases(bases):
         return EvalResult(
             result.Error(
                 CaMeLException(
@@ -3539,7 +4039,25 @@ def camel_eval(
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
-    """Interprets the given AST enforcing security policies."""
+    """Interprets the given AST enforcing security policies.
+
+    If the node was compiled with `compile_ast`, its pre-resolved evaluator is
+    used instead of dispatching on the type of the node.
+    """
+    evaluator = getattr(node, _EVALUATOR_ATTR, None)
+    if evaluator is not None:
+        return evaluator(namespace, tool_calls_chain, dependencies, eval_args)
+    return _dispatch_eval(node, namespace, tool_calls_chain, dependencies, eval_args)
+
+
+def _dispatch_eval(
+    node: ast.AST,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+    """Interprets the given AST by dispatching on the type of the node."""
     match node:
         # Literals
         case ast.Constant():
@@ -3855,7 +4373,7 @@ def camel_eval(
             # model is likely trying to import something that is already included
             # (e.g., Pydantic)
             for alias in node.names:
-                if alias.name not in namespace.variables:
+                if alias.name not in namespace:
                     return EvalResult(
                         _make_not_implemented_error(
                             node,
@@ -3868,8 +4386,9 @@ def camel_eval(
                         dependencies,
                     )
                 if alias.asname is not None:
-                    namespace.variables[alias.asname] = namespace.variables[alias.name]
-                    del namespace.variables[alias.name]
+                    namespace = namespace.delete_variables([alias.name]).add_variables(
+                        {alias.asname: namespace.get(alias.name)}
+                    )
             return EvalResult(
                 result.Ok(
                     camel_value.CaMeLNone(camel_capabilities.Capabilities.camel(), ())
@@ -3884,6 +4403,139 @@ def camel_eval(
             )
 
 
+Evaluator: TypeAlias = Callable[
+    [
+        camel_value.Namespace,
+        Sequence[function_types.FunctionCall[Any]],
+        Iterable[camel_value.Value[Any]],
+        EvalArgs,
+    ],
+    EvalResult,
+]
+"""An AST node with its evaluation function already resolved."""
+
+_EVALUATOR_ATTR = "_camel_evaluator"
+
+_NODE_EVALUATORS: Mapping[type[ast.AST], Callable[..., EvalResult]] = {
+    ast.Constant: _eval_constant,
+    ast.FormattedValue: _eval_formatted_value,
+    ast.JoinedStr: _eval_joined_str,
+    ast.List: _eval_list,
+    ast.Tuple: _eval_tuple,
+    ast.Set: _eval_set,
+    ast.Dict: _eval_dict,
+    ast.Name: _eval_name_load,
+    ast.Attribute: _eval_attribute_load,
+    ast.Subscript: _eval_subscript_load,
+    ast.Assign: _eval_assign,
+    ast.AnnAssign: _eval_ann_assign,
+    ast.AugAssign: _eval_aug_assign,
+    ast.ListComp: _eval_list_comp,
+    ast.SetComp: _eval_set_comp,
+    ast.DictComp: _eval_dict_comp,
+    ast.Expr: _eval_expr,
+    ast.NamedExpr: _eval_named_expr,
+    ast.UnaryOp: _eval_unary_op,
+    ast.BinOp: _eval_bin_op,
+    ast.BoolOp: _eval_bool_op,
+    ast.Compare: _eval_compare,
+    ast.If: _eval_if,
+    ast.IfExp: _eval_if_exp,
+    ast.For: _eval_for,
+    ast.Call: _eval_call,
+    ast.Module: _eval_module,
+    ast.ClassDef: _eval_class_def,
+    ast.FunctionDef: _eval_function_def,
+    ast.Raise: _eval_raise,
+}
+"""The evaluation functions of the node types that `_dispatch_eval` handles."""
+
+
+def _compile_constant(node: ast.Constant) -> Evaluator:
+    """Compiles a constant, resolving the type of its value ahead of time."""
+    make_value: Callable[..., camel_value.Value[Any]]
+    match node.value:
+        case None:
+            make_value = camel_value.CaMeLNone
+        case str():
+            make_value = functools.partial(camel_value.CaMeLStr.from_raw, node.value)
+        case bool():
+            make_value = camel_value.CaMeLTrue if node.value else camel_value.CaMeLFalse
+        case int():
+            make_value = functools.partial(camel_value.CaMeLInt, node.value)
+        case float():
+            make_value = functools.partial(camel_value.CaMeLFloat, node.value)
+        case _:  # bytes, complex, Ellipsis
+            return functools.partial(_eval_constant, node)
+
+    def evaluate(
+        namespace: camel_value.Namespace,
+        tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+        dependencies: Iterable[camel_value.Value[Any]],
+        eval_args: EvalArgs,  # pylint: disable=unused-argument
+    ) -> EvalResult:
+        # Constants are assumed to come from the user prompt and public.
+        v = make_value(camel_capabilities.Capabilities.default(), ())
+        return EvalResult(result.Ok(v), namespace, tool_calls_chain, dependencies)
+
+    return evaluate
+
+
+def _compile_name_load(node: ast.Name) -> Evaluator:
+    """Compiles a name load, falling back to `_eval_name_load` for errors."""
+    name = node.id
+
+    def evaluate(
+        namespace: camel_value.Namespace,
+        tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+        dependencies: Iterable[camel_value.Value[Any]],
+        eval_args: EvalArgs,
+    ) -> EvalResult:
+        var = namespace.get(name)
+        if var is None:
+            return _eval_name_load(
+                node, namespace, tool_calls_chain, dependencies, eval_args
+            )
+        return EvalResult(result.Ok(var), namespace, tool_calls_chain, dependencies)
+
+    return evaluate
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    """Resolves the evaluation function of a single node."""
+    match node:
+        case ast.Constant():
+            return _compile_constant(node)
+        case ast.Name():
+            return _compile_name_load(node)
+    node_evaluator = _NODE_EVALUATORS.get(type(node))
+    if node_evaluator is None:
+        # Unsupported constructs and the few nodes evaluated inline.
+        return functools.partial(_dispatch_eval, node)
+    return functools.partial(node_evaluator, node)
+
+
+def compile_ast(tree: ast.AST) -> Evaluator:
+    """Compiles a parsed program into a tree of pre-resolved evaluators.
+
+    Every node in `tree` gets its evaluation function resolved once, so that
+    evaluating it (possibly many times, e.g., in a loop body or a
+    comprehension) does not dispatch on the node type again. The evaluators call
+    the same `_eval_*` functions as `camel_eval`, so the results, including
+    the propagated capabilities and dependencies, are the same as the ones of
+    the tree-walking interpreter.
+
+    Args:
+        tree: The AST to compile. It is annotated in place.
+
+    Returns:
+        The evaluator of the root of `tree`.
+    """
+    for node in ast.walk(tree):
+        setattr(node, _EVALUATOR_ATTR, _compile_node(node))
+    return getattr(tree, _EVALUATOR_ATTR)
+
+
 class InvalidOutputError(Exception): ...
 
 
@@ -3923,24 +4575,54 @@ def extract_code_block(markdown_text: str) -> str:
     return code_fences[0]
 
 
-def parse_and_interpret_code(
+_PARSE_CACHE_SIZE = 128
+"""How many parsed plans `_parse_code` keeps around."""
+
+_ASSIGNED_NAMES_ATTR = "_camel_assigned_names"
+_VALID_DECORATORS_ATTR = "_camel_valid_decorators"
+
+
+def _analyze_module(module: ast.Module) -> None:
+    """Annotates the nodes of `module` with the results of static checks.
+
+    These only depend on the code, so they can be reused across evaluations of
+    the same parsed module instead of being recomputed, e.g., for every element
+    iterated over by a comprehension.
+
+    Args:
+        module: The module to analyze. It is annotated in place.
+    """
+    for node in ast.walk(module):
+        match node:
+            case ast.comprehension():
+                setattr(
+                    node,
+                    _ASSIGNED_NAMES_ATTR,
+                    frozenset(_get_assigned_names(node.target)),
+                )
+            case ast.ClassDef():
+                setattr(
+                    node,
+                    _VALID_DECORATORS_ATTR,
+                    _check_decorators(node.decorator_list),
+                )
+
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_code(
     code: str,
-    namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
-    dependencies: Iterable[camel_value.Value[Any]],
-    eval_args: EvalArgs,
-) -> EvalResult:
-    """Parses and interprets the given code enforcing security policies.
+) -> ast.Module | result.Error[CaMeLException[Exception]]:
+    """Extracts the code block from `code`, parses it, and analyzes it.
+
+    The P-LLM often re-submits the same code when it retries after an error, so
+    the parsed modules (and the errors for invalid code) are cached by code.
 
     Args:
-        code: The code to parse and interpret.
-        namespace: The current namespace.
-        tool_calls_chain: The current chain of tool calls.
-        dependencies: The current dependencies.
-        eval_args: The evaluation arguments.
+        code: The Markdown text containing the code to parse.
 
     Returns:
-        The result of the evaluation.
+        The parsed and analyzed module, or the error raised while extracting or
+        parsing the code.
     """
     try:
         code = extract_code_block(code)
@@ -3951,12 +4633,7 @@ def parse_and_interpret_code(
                 end_lineno=-1,
             ),
         )
-        return EvalResult(
-            result.Error(CaMeLException(e, error_nodes, ())),
-            namespace,
-            tool_calls_chain,
-            dependencies,
-        )
+        return result.Error(CaMeLException(e, error_nodes, ()))
     try:
         parsed_code = ast.parse(code)
     except SyntaxError as e:
@@ -3966,12 +4643,75 @@ def parse_and_interpret_code(
                 end_lineno=e.end_lineno,
             ),
         )
-        return EvalResult(
-            result.Error(CaMeLException(e, error_nodes, ())),
-            namespace,
-            tool_calls_chain,
-            dependencies,
+        return result.Error(CaMeLException(e, error_nodes, ()))
+    _analyze_module(parsed_code)
+    return parsed_code
+
+
+def parse_and_interpret_code(
+    code: str,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+    """Parses and interprets the given code enforcing security policies.
+
+    Args:
+        code: The code to parse and interpret.
+        namespace: The current namespace.
+        tool_calls_chain: The current chain of tool calls.
+        dependencies: The current dependencies.
+        eval_args: The evaluation arguments.
+
+    Returns:
+        The result of the evaluation.
+    """
+    parsed_code = _parse_code(code)
+    if isinstance(parsed_code, result.Error):
+        return EvalResult(parsed_code, namespace, tool_calls_chain, dependencies)
+    if eval_args.compile_code:
+        # Cached modules only need to be compiled the first time.
+        evaluator = getattr(parsed_code, _EVALUATOR_ATTR, None) or compile_ast(
+            parsed_code
         )
+        return evaluator(namespace, tool_calls_chain, dependencies, eval_args)
     return EvalResult(
         *camel_eval(parsed_code, namespace, tool_calls_chain, dependencies, eval_args)
     )
+
+
+async def parse_and_interpret_code_async(
+    code: str,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+    """Asynchronous version of `parse_and_interpret_code`.
+
+    The interpreter runs in a worker thread so that it does not block the event
+    loop, while the awaitable outputs of tools (e.g., the ones of `async` tools
+    such as `query_ai_assistant`) are awaited on the caller's event loop.
+
+    Args:
+        code: The code to parse and interpret.
+        namespace: The current namespace.
+        tool_calls_chain: The current chain of tool calls.
+        dependencies: The current dependencies.
+        eval_args: The evaluation arguments.
+
+    Returns:
+        The result of the evaluation.
+    """
+    loop = asyncio.get_running_loop()
+
+    def interpret() -> EvalResult:
+        # `asyncio.to_thread` runs this in a copy of the current context, so the
+        # event loop is only visible to this evaluation.
+        camel_value.event_loop.set(loop)
+        return parse_and_interpret_code(
+            code, namespace, tool_calls_chain, dependencies, eval_args
+        )
+
+    return await asyncio.to_thread(interpret)
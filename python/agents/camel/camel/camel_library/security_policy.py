@@ -1,14 +1,20 @@
 """Security policies for tools."""
 
+import collections
 import collections.abc
 import dataclasses
 import fnmatch
+import logging
+import re
+import time
 import typing
 
 from .capabilities import readers
 from .capabilities import utils as capabilities_utils
 from .interpreter import camel_value
 
+_logger = logging.getLogger(__name__)
+
 
 @dataclasses.dataclass(frozen=True)
 class Allowed:
@@ -27,6 +33,8 @@ class Denied:
 
 SecurityPolicyResult = Allowed | Denied
 
+_P = typing.TypeVar("_P", bound=collections.abc.Callable[..., SecurityPolicyResult])
+
 
 class SecurityPolicy(typing.Protocol):
     def __call__(
@@ -36,6 +44,27 @@ class SecurityPolicy(typing.Protocol):
     ) -> SecurityPolicyResult: ...
 
 
+_CAPABILITIES_ONLY_ATTR = "_camel_capabilities_only"
+
+
+def capabilities_only(policy: _P) -> _P:
+    """Marks a policy as depending only on the capabilities of its arguments.
+
+    The decisions of such policies are cached by `SecurityPolicyEngine`, for
+    each tool name and combination of readers and sources of the arguments. A
+    policy must not be marked if it looks at the raw values of its arguments
+    (e.g., to check that the recipients of an email can read its body).
+
+    Args:
+      policy: The policy to mark. Can also be used as a decorator on methods.
+
+    Returns:
+      The policy itself.
+    """
+    setattr(policy, _CAPABILITIES_ONLY_ATTR, True)
+    return policy
+
+
 NO_SIDE_EFFECT_TOOLS = frozenset(
     {
         # Query AI assistant function
@@ -73,6 +102,102 @@ def base_security_policy(
 class SecurityPolicyDeniedError(Exception): ...
 
 
+class _PolicyMatcher:
+    """Finds the first policy whose pattern matches a tool name.
+
+    Patterns without wildcards are looked up in a dict, while the others are
+    translated to regular expressions once. The policy of each tool name is
+    then memoized, as plans call a small set of tools over and over.
+    """
+
+    def __init__(self, policies: collections.abc.Sequence[tuple[str, SecurityPolicy]]):
+        self._exact_patterns: dict[str, int] = {}
+        self._glob_patterns: list[tuple[int, re.Pattern[str]]] = []
+        for i, (pattern, _) in enumerate(policies):
+            if re.search(r"[*?\[]", pattern) is None:
+                self._exact_patterns.setdefault(pattern, i)
+            else:
+                self._glob_patterns.append((i, re.compile(fnmatch.translate(pattern))))
+        self._policies = policies
+        self._matches: dict[str, SecurityPolicy | None] = {}
+
+    def match(self, tool_name: str) -> SecurityPolicy | None:
+        if tool_name not in self._matches:
+            self._matches[tool_name] = self._find_match(tool_name)
+        return self._matches[tool_name]
+
+    def _find_match(self, tool_name: str) -> SecurityPolicy | None:
+        index = self._exact_patterns.get(tool_name, len(self._policies))
+        for i, regex in self._glob_patterns:
+            if i > index:
+                break
+            if regex.match(tool_name):
+                index = i
+                break
+        if index == len(self._policies):
+            return None
+        return self._policies[index][1]
+
+
+_MAX_CACHED_DECISIONS = 4096
+
+_MAX_POLICY_CHECK_TIMINGS = 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class PolicyCheckTiming:
+    """How long the policy check of a tool call took."""
+
+    tool_name: str
+    """The name of the tool being called."""
+    seconds: float
+    """The time spent checking the policy."""
+    cached: bool
+    """Whether the decision came from the decision cache."""
+
+
+@dataclasses.dataclass
+class _PolicyEngineState:
+    """The compiled policies, cached decisions and timings of an engine."""
+
+    policies: tuple[tuple[str, SecurityPolicy], ...]
+    matcher: _PolicyMatcher
+    decisions: dict[typing.Hashable, SecurityPolicyResult] = dataclasses.field(
+        default_factory=dict
+    )
+    timings: collections.deque[PolicyCheckTiming] = dataclasses.field(
+        default_factory=lambda: collections.deque(maxlen=_MAX_POLICY_CHECK_TIMINGS)
+    )
+
+
+def _get_non_public_values(
+    dependencies: collections.abc.Iterable[camel_value.Value],
+) -> list[typing.Any]:
+    """Returns the raw dependencies that are not public, checking each once."""
+    is_public: dict[int, bool] = {}
+    non_public_values = []
+    for d in dependencies:
+        if id(d) not in is_public:
+            is_public[id(d)] = capabilities_utils.is_public(d)
+        if not is_public[id(d)]:
+            non_public_values.append(d.raw)
+    return non_public_values
+
+
+def _get_capabilities_fingerprint(
+    kwargs: collections.abc.Mapping[str, camel_value.Value],
+) -> typing.Hashable:
+    """Returns the readers and sources of the arguments, which are cached."""
+    return tuple(
+        (
+            name,
+            capabilities_utils.get_all_readers(value)[0],
+            capabilities_utils.get_all_sources(value)[0],
+        )
+        for name, value in kwargs.items()
+    )
+
+
 @typing.runtime_checkable
 class SecurityPolicyEngine(typing.Protocol):
     """Protocol for a Security policy engine."""
@@ -80,6 +205,24 @@ class SecurityPolicyEngine(typing.Protocol):
     policies: list[tuple[str, SecurityPolicy]]
     no_side_effect_tools: set[str]
 
+    def _get_state(self) -> _PolicyEngineState:
+        """Returns the state of the engine, recompiling it if policies changed."""
+        state: _PolicyEngineState | None = getattr(self, "_policy_engine_state", None)
+        policies = tuple(self.policies)
+        if state is None or state.policies != policies:
+            # Cached decisions might come from policies which are now gone.
+            state = _PolicyEngineState(policies, _PolicyMatcher(policies))
+            self._policy_engine_state = state
+        return state
+
+    def get_policy_check_timings(self) -> list[PolicyCheckTiming]:
+        """Returns how long the most recent policy checks took."""
+        return list(self._get_state().timings)
+
+    def clear_policy_decisions(self) -> None:
+        """Forgets the cached decisions, e.g., when a new session starts."""
+        self._get_state().decisions.clear()
+
     def check_policy(
         self,
         tool_name: str,
@@ -89,7 +232,9 @@ class SecurityPolicyEngine(typing.Protocol):
         """Checks if the tool is allowed to be executed with the given data.
 
         Policies in `POLICIES` are evaluated in order. If any evaluates to
-        Allowed(), then the tool is executed.
+        Allowed(), then the tool is executed. The decisions of policies marked
+        with `capabilities_only` are cached, and the time taken by each check is
+        recorded (see `get_policy_check_timings`).
 
         Args:
             tool_name: The name of the tool being called.
@@ -101,18 +246,36 @@ class SecurityPolicyEngine(typing.Protocol):
         """
         if tool_name in self.no_side_effect_tools:
             return Allowed()
-        non_public_variables = [
-            d.raw for d in dependencies if not capabilities_utils.is_public(d)
-        ]
-        if non_public_variables:
-            return Denied(
-                f"{tool_name} is state-changing and depends on private values"
-                f" {non_public_variables}."
-            )
-        for policy_name, policy in self.policies:
-            if fnmatch.fnmatch(tool_name, policy_name):
+        start = time.perf_counter()
+        state = self._get_state()
+        cached = False
+        try:
+            non_public_variables = _get_non_public_values(dependencies)
+            if non_public_variables:
+                return Denied(
+                    f"{tool_name} is state-changing and depends on private values"
+                    f" {non_public_variables}."
+                )
+            policy = state.matcher.match(tool_name)
+            if policy is None:
+                return Denied(
+                    "No security policy matched for tool. Defaulting to denial."
+                )
+            if not getattr(policy, _CAPABILITIES_ONLY_ATTR, False):
                 return policy(tool_name, kwargs)
-        return Denied("No security policy matched for tool. Defaulting to denial.")
+            key = (tool_name, _get_capabilities_fingerprint(kwargs))
+            if (decision := state.decisions.get(key)) is not None:
+                cached = True
+                return decision
+            decision = policy(tool_name, kwargs)
+            if len(state.decisions) >= _MAX_CACHED_DECISIONS:
+                state.decisions.clear()
+            state.decisions[key] = decision
+            return decision
+        finally:
+            timing = PolicyCheckTiming(tool_name, time.perf_counter() - start, cached)
+            state.timings.append(timing)
+            _logger.debug("%s", timing)
 
 
 class NoSecurityPolicyEngine(SecurityPolicyEngine):
@@ -0,0 +1,88 @@
+"""Tests of the invalidation of the cached readers/sources summaries of values.
+
+Each plan sends a container, mutates it (or a container it holds) in place, and
+sends it again. The second policy check must see the mutated value, and not
+the summary cached by the first one.
+"""
+
+import ast
+
+import pytest
+
+from benchmarks import interpreter_benchmark
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+
+MUTATING_PLANS = {
+    "list item": "l = ['x']\nsend(l)\nl[0] = {value}\nsend(l)",
+    "dict item": "d = {{'k': 'x'}}\nsend(d)\nd['k'] = {value}\nsend(d)",
+    "model field": (
+        "class A(BaseModel):\n    a: str\n"
+        "z = A(a='x')\nsend(z)\nz.a = {value}\nsend(z)"
+    ),
+    "nested list item": "l = ['x']\nm = [l]\nsend(m)\nl[0] = {value}\nsend(m)",
+}
+
+
+class _RecordingSecurityPolicyEngine(
+    interpreter_benchmark.PrivateDataSecurityPolicyEngine
+):
+    """Records the policy decisions of `send`, in order."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.decisions = []
+
+    def check_policy(self, tool_name, kwargs, dependencies):
+        decision = super().check_policy(tool_name, kwargs, dependencies)
+        if tool_name == "send":
+            self.decisions.append(decision)
+        return decision
+
+
+@pytest.mark.parametrize("eval_mode", list(interpreter.DependenciesPropagationMode))
+@pytest.mark.parametrize(
+    "value, second_decision",
+    [
+        ("private[0]", security_policy.Denied("Data is not public.")),
+        ("'y'", security_policy.Allowed()),
+    ],
+)
+@pytest.mark.parametrize("plan", MUTATING_PLANS.values(), ids=MUTATING_PLANS)
+def test_policy_checks_see_mutations(plan, value, second_decision, eval_mode):
+    engine = _RecordingSecurityPolicyEngine()
+    eval_args = interpreter.EvalArgs(engine, eval_mode)
+
+    interpreter_benchmark.eval_or_denial(
+        lambda: interpreter_benchmark.evaluate(
+            ast.parse(plan.format(value=value)), eval_args
+        )
+    )
+
+    assert engine.decisions == [security_policy.Allowed(), second_decision]
+
+
+def test_set_index_invalidates_cached_readers_and_sources():
+    private = camel_value.CaMeLStr.from_raw(
+        "secret",
+        capabilities.Capabilities(frozenset({"tool"}), frozenset({"a@b.c"})),
+        (),
+    )
+    item = camel_value.CaMeLStr.from_raw("x", capabilities.Capabilities.default(), ())
+    container = camel_value.CaMeLList([item], capabilities.Capabilities.default(), ())
+    outer = camel_value.CaMeLList([container], capabilities.Capabilities.default(), ())
+    assert capabilities_utils.is_public(outer)
+    sources_before, _ = capabilities_utils.get_all_sources(outer)
+
+    container.set_index(
+        camel_value.CaMeLInt(0, capabilities.Capabilities.camel(), ()),
+        camel_value.CaMeLStr.from_raw(
+            "y", capabilities.Capabilities.default(), (private,)
+        ),
+    )
+
+    assert not capabilities_utils.is_public(outer)
+    assert capabilities_utils.get_all_sources(outer)[0] == sources_before | {"tool"}
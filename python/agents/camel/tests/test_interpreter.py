@@ -0,0 +1,67 @@
+"""Differential tests of the compiled interpreter backend.
+
+Every plan of `benchmarks/interpreter_benchmark.py` is evaluated both by the
+tree-walking interpreter and by the evaluators produced by
+`interpreter.compile_ast`, in both dependencies propagation modes.
+"""
+
+import ast
+
+import pytest
+
+from benchmarks import interpreter_benchmark
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+PLANS = (
+    *interpreter_benchmark.DIFFERENTIAL_PLANS,
+    *interpreter_benchmark.BENCHMARK_PLANS.values(),
+)
+
+
+@pytest.mark.parametrize("eval_mode", list(interpreter.DependenciesPropagationMode))
+@pytest.mark.parametrize("plan", PLANS)
+def test_compiled_plan_evaluates_like_tree_walking(plan, eval_mode):
+    # Both backends evaluate the same tree, as errors refer to its nodes.
+    tree = ast.parse(plan)
+    eval_args = interpreter.EvalArgs(
+        interpreter_benchmark.PrivateDataSecurityPolicyEngine(), eval_mode
+    )
+    expected = interpreter_benchmark.eval_or_denial(
+        lambda: interpreter_benchmark.evaluate(tree, eval_args)
+    )
+    interpreter.compile_ast(tree)
+    actual = interpreter_benchmark.eval_or_denial(
+        lambda: interpreter_benchmark.evaluate(tree, eval_args)
+    )
+
+    assert type(actual) is type(expected)
+    if isinstance(expected, interpreter.EvalResult):
+        assert list(map(repr, actual.tool_calls_chain)) == list(
+            map(repr, expected.tool_calls_chain)
+        )
+        assert actual.namespace.variables.keys() == expected.namespace.variables.keys()
+    assert interpreter_benchmark.same_outcome(
+        expected, actual
+    ), f"expected: {expected}\nactual: {actual}"
+
+
+@pytest.mark.parametrize("compile_code", [False, True])
+def test_parse_and_interpret_code_reuses_compiled_modules(compile_code):
+    code = "```python\nx = [i * 2 for i in range(3)]\nsum(x)\n```"
+    eval_args = interpreter.EvalArgs(
+        interpreter_benchmark.PrivateDataSecurityPolicyEngine(),
+        interpreter.DependenciesPropagationMode.NORMAL,
+        compile_code=compile_code,
+    )
+
+    results = [
+        interpreter.parse_and_interpret_code(
+            code, library.make_builtins_namespace(), [], (), eval_args
+        )
+        for _ in range(2)
+    ]
+
+    for eval_result in results:
+        assert eval_result.result.value.raw == 6
+        assert eval_result.namespace.variables["x"].raw == [0, 2, 4]
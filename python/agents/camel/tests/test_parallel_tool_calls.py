@@ -0,0 +1,69 @@
+"""Differential tests of prefetching tool calls without side effects.
+
+Every plan of `benchmarks/parallel_tool_calls_benchmark.py` is evaluated with
+and without `EvalArgs.parallel_tool_calls`, in both dependencies propagation
+modes.
+"""
+
+import ast
+
+import pytest
+
+from benchmarks import interpreter_benchmark
+from benchmarks import parallel_tool_calls_benchmark
+from camel.camel_library.interpreter import interpreter
+
+PLANS = (
+    *parallel_tool_calls_benchmark.DIFFERENTIAL_PLANS,
+    *parallel_tool_calls_benchmark.BENCHMARK_PLANS.values(),
+)
+
+
+class _RecordingSecurityPolicyEngine(
+    parallel_tool_calls_benchmark.LookupSecurityPolicyEngine
+):
+    """Records the policy decisions of the tools with side effects, in order.
+
+    The calls to tools without side effects are always allowed, and prefetching
+    checks them ahead of the sequential evaluation.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.decisions = []
+
+    def check_policy(self, tool_name, kwargs, dependencies):
+        decision = super().check_policy(tool_name, kwargs, dependencies)
+        if tool_name not in self.no_side_effect_tools:
+            self.decisions.append((tool_name, decision))
+        return decision
+
+
+def _evaluate(tree, eval_mode, parallel):
+    engine = _RecordingSecurityPolicyEngine()
+    eval_args = interpreter.EvalArgs(engine, eval_mode, parallel_tool_calls=parallel)
+    outcome = interpreter_benchmark.eval_or_denial(
+        lambda: interpreter.camel_eval(
+            tree, parallel_tool_calls_benchmark.make_namespace(), [], (), eval_args
+        )
+    )
+    return outcome, engine.decisions
+
+
+@pytest.mark.parametrize("eval_mode", list(interpreter.DependenciesPropagationMode))
+@pytest.mark.parametrize("plan", PLANS)
+def test_prefetched_plan_evaluates_like_sequential(plan, eval_mode):
+    # Both runs evaluate the same tree, as errors refer to its nodes.
+    tree = ast.parse(plan)
+    expected, expected_decisions = _evaluate(tree, eval_mode, parallel=False)
+    actual, actual_decisions = _evaluate(tree, eval_mode, parallel=True)
+
+    assert type(actual) is type(expected)
+    if isinstance(expected, interpreter.EvalResult):
+        assert list(map(repr, actual.tool_calls_chain)) == list(
+            map(repr, expected.tool_calls_chain)
+        )
+    assert interpreter_benchmark.same_outcome(
+        expected, actual
+    ), f"expected: {expected}\nactual: {actual}"
+    assert actual_decisions == expected_decisions
@@ -12,6 +12,7 @@ from datetime import date
 
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
 
 # from google.adk.tools import load_artifacts
 from google.genai import types
@@ -119,7 +120,7 @@ def init_database_settings(dataset_config: dict) -> dict:
     return db_settings
 
 
-def get_dataset_definitions_for_instructions() -> str:
+def get_dataset_definitions_for_instructions(database_settings: dict) -> str:
     """Returns the dataset definitions instructions block"""
 
     dataset_definitions = """
@@ -134,7 +135,7 @@ def get_dataset_definitions_for_instructions() -> str:
 </DESCRIPTION>
 <SCHEMA>
 --------- The schema of the relevant database with a few sample rows. --------
-{_database_settings[dataset_type]["schema"]}
+{database_settings[dataset_type]["schema"]}
 </SCHEMA>
 </{dataset_type.upper()}>
 
@@ -155,9 +156,23 @@ def get_dataset_definitions_for_instructions() -> str:
 
 
 def load_database_settings_in_context(callback_context: CallbackContext):
-    """Load database settings into the callback context on first use."""
+    """Load database settings into the callback context on first use.
+
+    New sessions get the latest settings, as the schemas are refreshed while
+    the agent runs.
+    """
     if "database_settings" not in callback_context.state:
-        callback_context.state["database_settings"] = _database_settings
+        callback_context.state["database_settings"] = init_database_settings(
+            _dataset_config
+        )
+
+
+def get_root_instruction(context: ReadonlyContext) -> str:
+    """Returns the instruction, with the schemas of the session."""
+    database_settings = context.state.get("database_settings", _database_settings)
+    return return_instructions_root() + get_dataset_definitions_for_instructions(
+        database_settings
+    )
 
 
 def get_root_agent() -> LlmAgent:
@@ -173,8 +188,7 @@ def get_root_agent() -> LlmAgent:
     agent = LlmAgent(
         model=os.getenv("ROOT_AGENT_GOOGLE_MODEL_NAME", "gemini-2.5-flash"),
         name="data_science_root_agent",
-        instruction=return_instructions_root()
-        + get_dataset_definitions_for_instructions(),
+        instruction=get_root_instruction,
         global_instruction=(
             f"""
             You are a Data Science and Data Analytics Multi Agent System.
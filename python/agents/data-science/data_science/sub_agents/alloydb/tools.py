@@ -1,5 +1,6 @@
 """This file contains the tools used by the AlloyDB agent."""
 
+import asyncio
 import logging
 import os
 import re
@@ -10,6 +11,9 @@ from google.genai import Client
 from google.genai.types import HttpOptions
 from toolbox_core import ToolboxSyncClient, auth_methods
 
+from ...utils import query_results
+from ...utils.schema_catalog import SchemaCatalog
+from ...utils.schema_index import SCHEMA_TOKEN_BUDGET, prune_schema
 from ...utils.utils import USER_AGENT
 
 ALLOYDB_TOOLSET = os.getenv("ALLOYDB_TOOLSET", "postgres-database-tools")
@@ -32,6 +36,7 @@ llm_client = Client(
 )
 
 database_settings = None
+schema_catalog = None
 toolbox_client = None
 toolbox_toolset = None
 
@@ -72,15 +77,44 @@ def get_toolbox_toolset():
     return toolbox_toolset
 
 
+def get_schema_catalog():
+    """Get the on-disk catalog of the schema of the AlloyDB tables."""
+    global schema_catalog
+    if schema_catalog is None:
+        schema_catalog = SchemaCatalog(
+            "alloydb_{}_{}_{}".format(
+                get_env_var("ALLOYDB_PROJECT_ID"),
+                get_env_var("ALLOYDB_DATABASE"),
+                get_env_var("ALLOYDB_SCHEMA_NAME"),
+            )
+        )
+    return schema_catalog
+
+
 def get_database_settings():
-    """Get database settings."""
+    """Get database settings.
+
+    The schema comes from the schema catalog on disk when there is one, so that
+    the agent starts without fetching it. Once stale, it is refreshed in the
+    background, and the next calls return the new settings.
+    """
     global database_settings
+    catalog = get_schema_catalog()
+    schema_name = get_env_var("ALLOYDB_SCHEMA_NAME")
     if database_settings is None:
-        database_settings = update_database_settings()
+        if schema_name not in catalog.tables:
+            return update_database_settings()
+        update_database_settings(catalog.tables[schema_name])
+    if catalog.is_stale():
+        catalog.refresh_in_background(
+            get_versions=get_schema_versions,
+            get_table=lambda _: fetch_schema(),
+            on_refresh=lambda tables: update_database_settings(tables[schema_name]),
+        )
     return database_settings
 
 
-def get_schema():
+def fetch_schema():
     get_schema_tool = get_toolbox_client().load_tool("list_tables")
     schema = get_schema_tool(
         schema_names=get_env_var("ALLOYDB_SCHEMA_NAME"), table_names=""
@@ -88,17 +122,48 @@ def get_schema():
     return schema
 
 
-def update_database_settings():
-    """Update database settings."""
+def get_schema_versions():
+    """Returns a hash of the column definitions of the tables, by schema name.
+
+    Postgres does not record when tables are altered, so the schema is fetched
+    again whenever the hash of its columns changes.
+    """
+    schema_name = get_env_var("ALLOYDB_SCHEMA_NAME")
+    execute_sql_tool = get_toolbox_client().load_tool("execute_sql")
+    version = execute_sql_tool(
+        "SELECT md5(string_agg("
+        "table_name || '.' || column_name || ' ' || data_type || ' ' || is_nullable,"
+        " ',' ORDER BY table_name, ordinal_position)) AS schema_version"
+        " FROM information_schema.columns"
+        " WHERE table_schema = '{}'".format(schema_name.replace("'", "''"))
+    )
+    return {schema_name: str(version)}
+
+
+def get_schema():
+    """Gets the schema, fetching it only if it changed since it was stored."""
+    schema_name = get_env_var("ALLOYDB_SCHEMA_NAME")
+    tables = get_schema_catalog().refresh(
+        get_versions=get_schema_versions,
+        get_table=lambda _: fetch_schema(),
+    )
+    return tables[schema_name]
+
+
+def update_database_settings(schema=None):
+    """Update database settings, fetching the schema if it is not given."""
     global database_settings
 
-    schema = get_schema()
+    if schema is None:
+        schema = get_schema()
 
     database_settings = {
         "project_id": get_env_var("ALLOYDB_PROJECT_ID"),
         "database": get_env_var("ALLOYDB_DATABASE"),
         "schema_name": get_env_var("ALLOYDB_SCHEMA_NAME"),
         "schema": schema,
+        # Maximum number of tokens of the schema in the prompts.
+        "schema_token_budget": SCHEMA_TOKEN_BUDGET,
     }
     return database_settings
 
@@ -167,7 +232,13 @@ sample rows):
 
    """
 
-    schema = tool_context.state["database_settings"]["alloydb"]["schema"]
+    alloydb_settings = tool_context.state["database_settings"]["alloydb"]
+    # Only the tables relevant to the question.
+    schema = prune_schema(
+        alloydb_settings["schema"],
+        question,
+        alloydb_settings["schema_token_budget"],
+    )
 
     prompt = prompt_template.format(
         #        MAX_NUM_ROWS=MAX_NUM_ROWS,
@@ -192,7 +263,7 @@ sample rows):
     return sql
 
 
-def run_alloydb_query(
+async def run_alloydb_query(
     sql_string: str,
     tool_context: ToolContext,
 ) -> dict:
@@ -273,12 +344,15 @@ def run_alloydb_query(
     try:
         execute_sql_tool = get_toolbox_client().load_tool("execute_sql")
         logger.debug("Sending SQL query: %s", sql_string)
-        results = execute_sql_tool(sql_string)
+        results = await asyncio.to_thread(execute_sql_tool, sql_string)
         logger.debug("Received results: %s", results)
 
         if results:  # Check if query returned data
             final_result["query_result"] = results
-            tool_context.state["alloydb_query_result"] = results
+            # Only the summary of the results is kept in the state.
+            await query_results.save_query_result(
+                tool_context, "alloydb_query_result", results
+            )
 
         else:
             final_result["error_message"] = (
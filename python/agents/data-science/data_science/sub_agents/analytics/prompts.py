@@ -77,6 +77,11 @@ def return_instructions_analytics() -> str:
   prompt. You have to parse that data into a pandas DataFrame. ALWAYS parse all
   the data. NEVER edit the data that are given to you.
 
+  **Data in files:** Some queries only give the columns and first rows of the
+  data, with the Parquet file that has all the rows. Load the file with
+  `pd.read_parquet` as told in the query, NEVER parse the data of the first rows
+  instead.
+
   **Answerability:** Some queries may not be answerable with the available data.
   In those cases, inform the user why you cannot process their query and
   suggest what type of data would be needed to fulfill their request.
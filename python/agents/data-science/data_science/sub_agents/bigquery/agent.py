@@ -4,6 +4,7 @@ import logging
 import os
 from typing import Any, Dict, Optional
 
+from ...utils import query_results
 from ...utils.utils import get_env_var, USER_AGENT
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
@@ -31,17 +32,20 @@ def setup_before_agent_call(callback_context: CallbackContext) -> None:
         callback_context.state["database_settings"] = tools.get_database_settings()
 
 
-def store_results_in_context(
+async def store_results_in_context(
     tool: BaseTool,
     args: Dict[str, Any],
     tool_context: ToolContext,
     tool_response: Dict,
 ) -> Optional[Dict]:
     # We are setting a state for the data science agent to be able to use the
-    # sql query results as context
+    # sql query results as context. The rows are stored as an artifact, and
+    # only their summary in the state.
     if tool.name == ADK_BUILTIN_BQ_EXECUTE_SQL_TOOL:
         if tool_response["status"] == "SUCCESS":
-            tool_context.state["bigquery_query_result"] = tool_response["rows"]
+            await query_results.save_query_result(
+                tool_context, "bigquery_query_result", tool_response["rows"]
+            )
 
     return None
 
@@ -0,0 +1,112 @@
+"""Measures the schema and SQL query caches of the SQL translator.
+
+Runs the schema rewrite and the error checks that `SqlTranslator._fix_errors`
+does for every SQL query, on the schema of the `forecasting_sticker_sales`
+sample dataset, with the caches cleared before every query and with the caches
+kept. Queries are repeated with different whitespace, as the LLM writes them.
+Checks that both give the same results. No LLM or BigQuery call is made.
+
+Run from the agent directory, with the environment of the agent, with:
+
+  python -m data_science.sub_agents.bigquery.chase_sql.benchmark_sql_translator
+"""
+
+import time
+
+from .sql_postprocessor.sql_translator import SqlTranslator
+
+PROJECT = "my-project"
+DATASET = "forecasting_sticker_sales"
+NUM_REPEATS = 20
+
+# As returned by `get_bigquery_schema_and_samples`.
+TABLES_CONTEXT = {
+    f"{PROJECT}.{DATASET}.{table}": {
+        "table_schema": [
+            ("id", "INTEGER"),
+            ("date", "DATE"),
+            ("country", "STRING"),
+            ("store", "STRING"),
+            ("product", "STRING"),
+            *([("num_sold", "INTEGER")] if table == "train" else []),
+        ],
+        "example_values": {},
+    }
+    for table in ("train", "test")
+}
+DDL_SCHEMA = "\n".join(
+    f"CREATE TABLE `{table}` (\n"
+    + ",\n".join(f"  {name} {column_type}" for name, column_type in v["table_schema"])
+    + "\n);"
+    for table, v in TABLES_CONTEXT.items()
+)
+
+TRAIN = f"`{PROJECT}.{DATASET}.train`"
+TEST = f"`{PROJECT}.{DATASET}.test`"
+QUERIES = [
+    f"SELECT DISTINCT country FROM {TRAIN}",
+    f"SELECT country, SUM(num_sold) AS total FROM {TRAIN} GROUP BY country"
+    " ORDER BY total DESC",
+    f"SELECT product, AVG(num_sold) FROM {TRAIN} WHERE country = 'Canada'"
+    " GROUP BY product",
+    f"SELECT store, COUNT(*) FROM {TEST} GROUP BY store",
+    f"SELECT EXTRACT(YEAR FROM date) AS year, SUM(num_sold) FROM {TRAIN}"
+    " GROUP BY year ORDER BY year",
+    f"WITH sales AS (SELECT country, product, SUM(num_sold) AS sold FROM {TRAIN}"
+    " GROUP BY country, product) SELECT country, product FROM sales"
+    " QUALIFY ROW_NUMBER() OVER (PARTITION BY country ORDER BY sold DESC) = 1",
+    f"SELECT t.id, t.country FROM {TEST} AS t JOIN {TRAIN} AS s ON t.id = s.id",
+    f"SELECT country, store FROM {TRAIN} WHERE num_sold IS NULL LIMIT 100",
+    f"SELECT missing_column FROM {TRAIN}",
+]
+
+
+def check_query(sql_query, ddl_schema):
+    """Does the schema rewrite and the error checks of `_fix_errors`."""
+    schema_dict = SqlTranslator.rewrite_schema_for_sqlglot(ddl_schema)
+    return SqlTranslator._check_for_errors(  # pylint: disable=protected-access
+        sql_query=sql_query,
+        sql_dialect=SqlTranslator.OUTPUT_DIALECT,
+        db=DATASET,
+        catalog=PROJECT,
+        schema_dict=schema_dict,
+    )
+
+
+def run(ddl_schema, clear_caches):
+    """Returns the results and the time per query."""
+    queries = [
+        query.replace(" ", "\n  " if i % 2 else "  ")
+        for i in range(NUM_REPEATS)
+        for query in QUERIES
+    ]
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        if clear_caches:
+            SqlTranslator.clear_caches()
+        errors, sql_query = check_query(query, ddl_schema)
+        results.append((errors, None if errors else sql_query))
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    print(f"{len(QUERIES)} queries, each repeated {NUM_REPEATS} times")
+    print("schema         | uncached (ms) | cached (ms) | speedup")
+    for name, ddl_schema in (
+        ("tables context", TABLES_CONTEXT),
+        ("DDL", DDL_SCHEMA),
+    ):
+        expected, uncached_seconds = run(ddl_schema, clear_caches=True)
+        SqlTranslator.clear_caches()
+        actual, cached_seconds = run(ddl_schema, clear_caches=False)
+        assert actual == expected, "Results differ."
+        print(
+            f"{name:14} | {uncached_seconds * 1e3:13.2f} |"
+            f" {cached_seconds * 1e3:11.3f} |"
+            f" {uncached_seconds / cached_seconds:6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import os
 from typing import Any
 import immutabledict
 
+from ....utils import schema_index
+
 
 # Parameters for ChaseSQL.
 chase_sql_constants_dict: immutabledict.immutabledict[str, Any] = (
@@ -17,12 +19,17 @@ chase_sql_constants_dict: immutabledict.immutabledict[str, Any] = (
             "process_tool_output_errors": True,
             # Number of candidates to generate.
             "number_of_candidates": 1,
+            # Number of rows of each table to run the candidates on, to select
+            # one by their results.
+            "number_of_sample_rows": 1000,
             # Model to use for generation.
             "model": os.getenv("CHASE_NL2SQL_GOOGLE_MODEL_NAME"),
             # Temperature for generation.
             "temperature": 0.5,
             # Type of SQL generation method.
             "generate_sql_type": "dc",
+            # Maximum number of tokens of the schema in the prompts.
+            "schema_token_budget": schema_index.SCHEMA_TOKEN_BUDGET,
         }
     )
 )
@@ -2,14 +2,19 @@
 
 import enum
 import os
+import threading
 
+import sqlglot
 from google.adk.tools import ToolContext
 
 # pylint: disable=g-importing-member
+from .. import tools
+from ....utils import schema_index
 from .dc_prompt_template import DC_PROMPT_TEMPLATE
 from .llm_utils import GeminiModel
 from .qp_prompt_template import QP_PROMPT_TEMPLATE
 from .sql_postprocessor import sql_translator
+from .sql_postprocessor.sample_database import SampleDatabase
 
 # pylint: enable=g-importing-member
 
@@ -46,6 +51,97 @@ def exception_wrapper(func):
     return wrapped_function
 
 
+# The sample rows of each table, by full table name, with the number of rows
+# and the table version they were copied for. The rows are None if they could
+# not be copied.
+sample_tables = {}
+sample_database = None
+# The number of rows and the tables and versions the sample was built from.
+sample_database_key = None
+sample_database_lock = threading.Lock()
+
+
+def _get_table_names(sql_queries: list[str | None]) -> set[str]:
+    """Returns the names of the tables of the SQL queries, without project."""
+    table_names = set()
+    for sql_query in sql_queries:
+        if sql_query is None:
+            continue
+        try:
+            sql_query_ast = sqlglot.parse_one(sql_query, read="bigquery")
+        except sqlglot.errors.SqlglotError:
+            continue
+        table_names.update(t.name for t in sql_query_ast.find_all(sqlglot.exp.Table))
+    return table_names
+
+
+def get_sample_database(
+    num_rows: int, sql_queries: list[str | None]
+) -> SampleDatabase | None:
+    """Returns a local copy of sample rows of the tables of some SQL queries.
+
+    Only the tables that the queries refer to are sampled, concurrently, and
+    their rows are kept for the next queries. The sample is built without
+    holding the lock, so that other questions do not wait for it.
+
+    Args:
+       num_rows (int): The number of rows to copy from each table.
+       sql_queries (list[str | None]): The SQL queries to run on the sample.
+
+    Returns:
+       SampleDatabase | None: The sample rows, or None if no table could be
+       copied. The rows of a table are copied again when the schema catalog
+       finds a new version of it. Errors are not retried until then.
+    """
+    global sample_database, sample_database_key
+    versions = tools.get_schema_catalog().versions
+    table_names = _get_table_names(sql_queries)
+    table_keys = {
+        table_id: (num_rows, version)
+        for table_id, version in sorted(versions.items())
+        if table_id.split(".")[-1] in table_names
+    }
+    key = tuple(table_keys.items())
+    with sample_database_lock:
+        if key == sample_database_key:
+            return sample_database
+        missing_table_ids = [
+            table_id
+            for table_id, table_key in table_keys.items()
+            if sample_tables.get(table_id, (None, None))[0] != table_key
+        ]
+    if missing_table_ids:
+        try:
+            copied_tables = tools.get_bigquery_sample_tables(
+                num_rows, missing_table_ids
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Error in sampling the tables: {e}")
+            copied_tables = {}
+        with sample_database_lock:
+            for table_id in missing_table_ids:
+                sample_tables[table_id] = (
+                    table_keys[table_id],
+                    copied_tables.get(table_id),
+                )
+            for table_id in set(sample_tables) - set(versions):
+                del sample_tables[table_id]
+    with sample_database_lock:
+        tables = {
+            table_id: sample_tables[table_id][1]
+            for table_id in table_keys
+            if table_id in sample_tables and sample_tables[table_id][1] is not None
+        }
+    try:
+        database = SampleDatabase(tables) if tables else None
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        print(f"Error in copying the sample rows: {e}")
+        database = None
+    with sample_database_lock:
+        sample_database, sample_database_key = database, key
+    return database
+
+
 def parse_response(response: str) -> str:
     """Parses the output to extract SQL content from the response.
 
@@ -83,31 +179,29 @@ def initial_bq_nl2sql(
     bq_schema = bq_settings["schema"]
     project = bq_settings["data_project_id"]
     db = bq_settings["dataset_id"]
-    transpile_to_bigquery = tool_context.state["database_settings"][
-        "transpile_to_bigquery"
-    ]
-    process_input_errors = tool_context.state["database_settings"][
-        "process_input_errors"
-    ]
-    process_tool_output_errors = tool_context.state["database_settings"][
-        "process_tool_output_errors"
-    ]
-    number_of_candidates = tool_context.state["database_settings"][
-        "number_of_candidates"
-    ]
-    model = tool_context.state["database_settings"]["model"]
-    temperature = tool_context.state["database_settings"]["temperature"]
-    generate_sql_type = tool_context.state["database_settings"]["generate_sql_type"]
+    transpile_to_bigquery = bq_settings["transpile_to_bigquery"]
+    process_input_errors = bq_settings["process_input_errors"]
+    process_tool_output_errors = bq_settings["process_tool_output_errors"]
+    number_of_candidates = bq_settings["number_of_candidates"]
+    number_of_sample_rows = bq_settings["number_of_sample_rows"]
+    model = bq_settings["model"]
+    temperature = bq_settings["temperature"]
+    generate_sql_type = bq_settings["generate_sql_type"]
+    # The prompts only get the tables and columns relevant to the question, the
+    # queries are still checked against the whole schema.
+    prompt_schema = schema_index.prune_schema(
+        bq_schema, question, bq_settings["schema_token_budget"]
+    )
 
     if generate_sql_type == GenerateSQLType.DC.value:
         prompt = DC_PROMPT_TEMPLATE.format(
-            SCHEMA=bq_schema,
+            SCHEMA=prompt_schema,
             QUESTION=question,
             BQ_DATA_PROJECT_ID=BQ_DATA_PROJECT_ID,
         )
     elif generate_sql_type == GenerateSQLType.QP.value:
         prompt = QP_PROMPT_TEMPLATE.format(
-            SCHEMA=bq_schema,
+            SCHEMA=prompt_schema,
             QUESTION=question,
             BQ_DATA_PROJECT_ID=BQ_DATA_PROJECT_ID,
         )
@@ -117,8 +211,20 @@ def initial_bq_nl2sql(
     model = GeminiModel(model_name=model, temperature=temperature)
     requests = [prompt for _ in range(number_of_candidates)]
     responses = model.call_parallel(requests, parser_func=parse_response)
-    # Take just the first response.
-    responses = responses[0]
+    # Select one of the candidates by their validity and results.
+    sample_database = None
+    if number_of_candidates > 1:
+        sample_database = get_sample_database(number_of_sample_rows, responses)
+    responses = sql_translator.SqlTranslator.select_candidate(
+        responses,
+        sql_dialect=sql_translator.SqlTranslator.OUTPUT_DIALECT,
+        db=db,
+        catalog=project,
+        schema_dict=sql_translator.SqlTranslator.rewrite_schema_for_sqlglot(
+            bq_schema, bq_settings.get("schema_fingerprint")
+        ),
+        sample_database=sample_database,
+    )
 
     # If postprocessing of the SQL to transpile it to BigQuery is required,
     # then do it here.
@@ -128,11 +234,17 @@ def initial_bq_nl2sql(
             temperature=temperature,
             process_input_errors=process_input_errors,
             process_tool_output_errors=process_tool_output_errors,
+            number_of_candidates=number_of_candidates,
+            sample_database=sample_database,
         )
         # pylint: disable=g-bad-todo
         # pylint: enable=g-bad-todo
         responses: str = translator.translate(
-            responses, ddl_schema=bq_schema, db=db, catalog=project
+            responses,
+            ddl_schema=bq_schema,
+            schema_fingerprint=bq_settings.get("schema_fingerprint"),
+            db=db,
+            catalog=project,
         )
 
     return responses
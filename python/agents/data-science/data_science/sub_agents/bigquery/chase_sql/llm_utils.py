@@ -1,11 +1,14 @@
 """This code contains the LLM utils for the CHASE-SQL Agent."""
 
+import asyncio
+import dataclasses
 import functools
 import os
 import random
+import statistics
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Optional
+from typing import Any, Callable, List, Optional
 
 import dotenv
 import vertexai
@@ -62,6 +65,9 @@ GEMINI_URL = (
     "projects/{GCP_PROJECT}/locations/{region}/publishers/google/models/{model_name}"
 )
 
+# Maximum number of requests to the model in flight at once, in the process.
+MAX_CONCURRENT_REQUESTS = int(os.getenv("CHASE_MAX_CONCURRENT_REQUESTS", "16"))
+
 aiplatform.init(
     project=GCP_PROJECT,
     location=GCP_LOCATION,
@@ -69,42 +75,95 @@ aiplatform.init(
 vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
 
 
-def retry(max_attempts=8, base_delay=1, backoff_factor=2):
-    """Decorator to add retry logic to a function.
+class RequestBudget:
+    """Retries and time shared by all the prompts of a `call_parallel` batch.
+
+    Attributes:
+        retries_left (int): The number of retries that the prompts can still do.
+        deadline (float): The `time.monotonic` time after which no request is
+          made and pending requests are cancelled.
+    """
+
+    def __init__(self, max_retries: int, timeout: float):
+        self.retries_left = max_retries
+        self.deadline = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Returns the seconds left before the deadline."""
+        return max(0.0, self.deadline - time.monotonic())
 
-    Args:
-        max_attempts (int): The maximum number of attempts.
-        base_delay (int): The base delay in seconds for the exponential backoff.
-        backoff_factor (int): The factor by which to multiply the delay for each
-          subsequent attempt.
+    def take_retry(self, delay: float) -> bool:
+        """Takes one retry after `delay` seconds, if the budget allows it."""
+        if self.retries_left <= 0 or delay >= self.remaining():
+            return False
+        self.retries_left -= 1
+        return True
 
-    Returns:
-        Callable: The decorator function.
+
+@dataclasses.dataclass
+class CallMetrics:
+    """Metrics of the call of the model for one prompt.
+
+    Attributes:
+        latency (float): The seconds until the response, or the failure.
+        attempts (int): The number of requests made, without the hedged ones.
+        hedged (bool): True if a duplicate request was sent to cut the latency.
+        error (str, optional): The last error, if the call failed.
     """
 
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < max_attempts:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Attempt {attempts + 1} failed with error: {e}")
-                    attempts += 1
-                    if attempts >= max_attempts:
-                        raise e
-                    delay = base_delay * (backoff_factor**attempts)
-                    delay = delay + random.uniform(0, 0.1 * delay)
-                    time.sleep(delay)
+    latency: float = 0.0
+    attempts: int = 0
+    hedged: bool = False
+    error: Optional[str] = None
 
-        return wrapper
 
-    return decorator
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_request_semaphore: Optional[asyncio.Semaphore] = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the event loop that makes all the requests to the model.
+
+    The loop runs in a background thread, so that the synchronous methods of
+    `GeminiModel` can be called from any thread, including from the thread of
+    another event loop. All requests share its connections and its limit of
+    `MAX_CONCURRENT_REQUESTS`.
+    """
+    global _event_loop, _request_semaphore
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            _request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            threading.Thread(
+                target=_event_loop.run_forever, name="llm_utils", daemon=True
+            ).start()
+    return _event_loop
+
+
+async def _run_on_event_loop(coroutine):
+    """Awaits the coroutine on the event loop of `get_event_loop`."""
+    loop = get_event_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+
+@functools.cache
+def _get_generative_model(model_name: str) -> GenerativeModel:
+    """Returns the model client for a model name, shared to reuse connections."""
+    return GenerativeModel(model_name=model_name)
 
 
 class GeminiModel:
-    """Class for the Gemini model."""
+    """Class for the Gemini model.
+
+    Attributes:
+        hedge_delay (float, optional): The seconds after which a duplicate request
+          is sent for a prompt without response, and the first response of the two
+          is used. No duplicate requests are sent if None.
+        call_metrics (List[CallMetrics]): The metrics of each call of the model.
+    """
 
     def __init__(
         self,
@@ -113,6 +172,8 @@ class GeminiModel:
         distribute_requests: bool = False,
         cache_name: str | None = None,
         temperature: float = 0.01,
+        hedge_delay: float | None = None,
+        model: Any = None,
         **kwargs,
     ):
         self.model_name = model_name
@@ -120,6 +181,8 @@ class GeminiModel:
         self.arguments = kwargs
         self.distribute_requests = distribute_requests
         self.temperature = temperature
+        self.hedge_delay = hedge_delay
+        self.call_metrics: List[CallMetrics] = []
         model_name = self.model_name
         if not self.finetuned_model and self.distribute_requests:
             random_region = random.choice(GEMINI_AVAILABLE_REGIONS)
@@ -128,95 +191,209 @@ class GeminiModel:
                 region=random_region,
                 model_name=self.model_name,
             )
-        if cache_name is not None:
+        if model is not None:
+            # Any object with the `generate_content_async` method of the
+            # `GenerativeModel`, like a fake model in tests.
+            self.model = model
+        elif cache_name is not None:
             cached_content = caching.CachedContent(cached_content_name=cache_name)
             self.model = GenerativeModel.from_cached_content(
                 cached_content=cached_content
             )
         else:
-            self.model = GenerativeModel(model_name=model_name)
+            self.model = _get_generative_model(model_name)
 
-    @retry(max_attempts=12, base_delay=2, backoff_factor=2)
-    def call(self, prompt: str, parser_func=None) -> str:
-        """Calls the Gemini model with the given prompt.
+    async def _request(self, prompt: str, budget: RequestBudget) -> str:
+        """Makes one request to the model, within the time left in the budget."""
+
+        async def request():
+            async with _request_semaphore:
+                return await self.model.generate_content_async(
+                    prompt,
+                    generation_config=GenerationConfig(
+                        temperature=self.temperature,
+                        **self.arguments,
+                    ),
+                    safety_settings=SAFETY_FILTER_CONFIG,
+                )
+
+        response = await asyncio.wait_for(request(), timeout=budget.remaining())
+        return response.text
+
+    async def _hedged_request(
+        self, prompt: str, budget: RequestBudget, metrics: CallMetrics
+    ) -> str:
+        """Makes a request, duplicated if it is slower than `hedge_delay`."""
+        first = asyncio.ensure_future(self._request(prompt, budget))
+        if self.hedge_delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay)
+        if done:
+            return first.result()
+        metrics.hedged = True
+        pending = {first, asyncio.ensure_future(self._request(prompt, budget))}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for request in done:
+                    if request.exception() is None or not pending:
+                        return request.result()
+        finally:
+            for request in pending:
+                request.cancel()
+
+    async def _call(
+        self,
+        prompt: str,
+        parser_func: Optional[Callable[[str], str]],
+        budget: RequestBudget,
+        base_delay: float,
+        backoff_factor: float,
+    ) -> str:
+        """Calls the model with retries, on the event loop of the requests."""
+        metrics = CallMetrics()
+        self.call_metrics.append(metrics)
+        start = time.monotonic()
+        delay = base_delay
+        try:
+            while True:
+                metrics.attempts += 1
+                try:
+                    response = await self._hedged_request(prompt, budget, metrics)
+                    break
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    metrics.error = f"{type(e).__name__}: {e}"
+                    print(f"Attempt {metrics.attempts} failed with error: {e}")
+                    delay = delay + random.uniform(0, 0.1 * delay)
+                    if not budget.take_retry(delay):
+                        raise
+                    await asyncio.sleep(delay)
+                    delay *= backoff_factor
+        finally:
+            metrics.latency = time.monotonic() - start
+        metrics.error = None
+        if parser_func:
+            return parser_func(response)
+        return response
+
+    async def call_async(
+        self,
+        prompt: str,
+        parser_func: Optional[Callable[[str], str]] = None,
+        budget: Optional[RequestBudget] = None,
+        base_delay: float = 1.0,
+        backoff_factor: float = 2.0,
+    ) -> str:
+        """Calls the Gemini model with the given prompt, with retries.
 
         Args:
             prompt (str): The prompt to call the model with.
             parser_func (callable, optional): A function that processes the LLM
               output. It takes the model"s response as input and returns the
               processed result.
+            budget (RequestBudget, optional): The retries and time allowed, shared
+              with other calls. Defaults to 5 retries within 60 seconds.
+            base_delay (float): The delay in seconds before the first retry.
+            backoff_factor (float): The factor by which to multiply the delay for
+              each subsequent retry.
 
         Returns:
             str: The processed response from the model.
+
+        Raises:
+            Exception: The last error once the budget is exhausted.
         """
-        response = self.model.generate_content(
-            prompt,
-            generation_config=GenerationConfig(
-                temperature=self.temperature,
-                **self.arguments,
-            ),
-            safety_settings=SAFETY_FILTER_CONFIG,
-        ).text
-        if parser_func:
-            return parser_func(response)
-        return response
+        if budget is None:
+            budget = RequestBudget(max_retries=5, timeout=60)
+        return await _run_on_event_loop(
+            self._call(prompt, parser_func, budget, base_delay, backoff_factor)
+        )
 
-    def call_parallel(
+    async def call_parallel_async(
         self,
         prompts: List[str],
         parser_func: Optional[Callable[[str], str]] = None,
         timeout: int = 60,
         max_retries: int = 5,
     ) -> List[Optional[str]]:
-        """Calls the Gemini model for multiple prompts in parallel using threads with retry logic.
+        """Calls the Gemini model for multiple prompts concurrently.
 
         Args:
             prompts (List[str]): A list of prompts to call the model with.
             parser_func (callable, optional): A function to process each response.
-            timeout (int): The maximum time (in seconds) to wait for each thread.
-            max_retries (int): The maximum number of retries for timed-out threads.
+            timeout (int): The maximum time (in seconds) for all the prompts.
+            max_retries (int): The maximum number of retries for all the prompts.
 
         Returns:
             List[Optional[str]]:
-            A list of responses, or None for threads that failed.
+            A list of responses, or error messages for prompts that failed.
         """
-        results = [None] * len(prompts)
+        budget = RequestBudget(max_retries=max_retries, timeout=timeout)
+        responses = await asyncio.gather(
+            *(self.call_async(prompt, parser_func, budget) for prompt in prompts),
+            return_exceptions=True,
+        )
+        results = []
+        for index, response in enumerate(responses):
+            if isinstance(response, asyncio.TimeoutError):
+                print(f"Timeout occurred for prompt {index}")
+                results.append("Timeout")
+            elif isinstance(response, Exception):
+                print(f"Error for prompt {index}: {response}")
+                results.append(f"Error after retries: {response}")
+            else:
+                results.append(response)
+        return results
 
-        def worker(index: int, prompt: str):
-            """Thread worker function to call the model and store the result with retries."""
-            retries = 0
-            while retries <= max_retries:
-                try:
-                    return self.call(prompt, parser_func)
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Error for prompt {index}: {str(e)}")
-                    retries += 1
-                    if retries <= max_retries:
-                        print(f"Retrying ({retries}/{max_retries}) for prompt {index}")
-                        time.sleep(1)  # Small delay before retrying
-                    else:
-                        return f"Error after retries: {str(e)}"
-
-        # Create and start one thread for each prompt
-        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
-            future_to_index = {
-                executor.submit(worker, i, prompt): i
-                for i, prompt in enumerate(prompts)
-            }
-
-            for future in as_completed(future_to_index, timeout=timeout):
-                index = future_to_index[future]
-                try:
-                    results[index] = future.result()
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Unhandled error for prompt {index}: {e}")
-                    results[index] = "Unhandled Error"
+    def call(self, prompt: str, parser_func=None) -> str:
+        """Calls the Gemini model with the given prompt.
 
-        # Handle remaining unfinished tasks after the timeout
-        for future in future_to_index:
-            index = future_to_index[future]
-            if not future.done():
-                print(f"Timeout occurred for prompt {index}")
-                results[index] = "Timeout"
+        Args:
+            prompt (str): The prompt to call the model with.
+            parser_func (callable, optional): A function that processes the LLM
+              output. It takes the model"s response as input and returns the
+              processed result.
+
+        Returns:
+            str: The processed response from the model.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.call_async(prompt, parser_func), get_event_loop()
+        ).result()
+
+    def call_parallel(
+        self,
+        prompts: List[str],
+        parser_func: Optional[Callable[[str], str]] = None,
+        timeout: int = 60,
+        max_retries: int = 5,
+    ) -> List[Optional[str]]:
+        """Calls the Gemini model for multiple prompts concurrently.
 
+        The prompts share a budget of `max_retries` retries and `timeout` seconds,
+        so that failing prompts cannot stall the call for longer than `timeout`.
+
+        Args:
+            prompts (List[str]): A list of prompts to call the model with.
+            parser_func (callable, optional): A function to process each response.
+            timeout (int): The maximum time (in seconds) for all the prompts.
+            max_retries (int): The maximum number of retries for all the prompts.
+
+        Returns:
+            List[Optional[str]]:
+            A list of responses, or error messages for prompts that failed.
+        """
+        first_metrics = len(self.call_metrics)
+        results = asyncio.run_coroutine_threadsafe(
+            self.call_parallel_async(prompts, parser_func, timeout, max_retries),
+            get_event_loop(),
+        ).result()
+        latencies = [m.latency for m in self.call_metrics[first_metrics:]]
+        if latencies:
+            print(
+                f"{len(latencies)} LLM calls in {max(latencies):.2f}s, median"
+                f" {statistics.median(latencies):.2f}s"
+            )
         return results
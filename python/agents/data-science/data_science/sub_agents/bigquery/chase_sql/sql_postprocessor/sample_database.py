@@ -0,0 +1,113 @@
+"""Local SQLite copy of a sample of the rows of BigQuery tables."""
+
+import datetime
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Final
+
+import numpy as np
+import pandas as pd
+import sqlglot
+
+ResultSignatureType = tuple[tuple[Any, ...], ...]
+
+
+def _to_sqlite_value(value: Any) -> Any:
+    """Converts the values that SQLite cannot store, like arrays, to strings."""
+    if isinstance(value, (list, tuple, dict, np.ndarray)):
+        return str(value)
+    if pd.isna(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _normalize_value(value: Any) -> Any:
+    """Rounds floats so that equivalent queries get the same results."""
+    if isinstance(value, float) and math.isfinite(value):
+        return round(value, SampleDatabase.FLOAT_DIGITS)
+    return value
+
+
+class SampleDatabase:
+    """In-memory SQLite database with a sample of the rows of some tables.
+
+    SQL queries of another dialect are transpiled to SQLite by SQLGlot and run on
+    the sample, to compare the results of candidate queries without running them
+    on the full tables. Tables are referred to by their name only, so the
+    project and dataset parts of the table names in the queries are dropped.
+
+    Class Attributes:
+      MAX_ROWS: The maximum number of rows of a result that are compared.
+      FLOAT_DIGITS: The number of digits that floats are rounded to.
+      TIMEOUT_SECONDS: The time after which a query is interrupted.
+    """
+
+    MAX_ROWS: Final[int] = 1000
+    FLOAT_DIGITS: Final[int] = 6
+    TIMEOUT_SECONDS: Final[float] = 2.0
+
+    def __init__(self, tables: dict[str, pd.DataFrame]):
+        """Copies the sample rows of each table, keyed by full table name."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+        for table_name, rows in tables.items():
+            rows = rows.map(_to_sqlite_value)
+            rows.to_sql(
+                table_name.split(".")[-1],
+                self._connection,
+                index=False,
+                if_exists="replace",
+            )
+
+    def _to_sqlite(self, sql_query: str, sql_dialect: str) -> tuple[str, bool]:
+        """Returns the query in SQLite, and whether the order of its rows matters."""
+        sql_query_ast = sqlglot.parse_one(
+            sql=sql_query,
+            read=sql_dialect.lower(),
+            error_level=sqlglot.ErrorLevel.IMMEDIATE,
+        )
+        for table in sql_query_ast.find_all(sqlglot.exp.Table):
+            table.set("catalog", None)
+            table.set("db", None)
+        is_ordered = sql_query_ast.args.get("order") is not None
+        return sql_query_ast.sql(dialect="sqlite"), is_ordered
+
+    def get_result_signature(
+        self, sql_query: str, sql_dialect: str
+    ) -> ResultSignatureType | None:
+        """Runs the query on the sample and returns its rows.
+
+        Args:
+          sql_query: The SQL query to run.
+          sql_dialect: The SQL dialect of the SQL query.
+
+        Returns:
+          The rows of the result, sorted unless the query orders them, or None if
+          the query could not be transpiled or run.
+        """
+        try:
+            sql_query, is_ordered = self._to_sqlite(sql_query, sql_dialect)
+        except sqlglot.errors.SqlglotError:
+            return None
+        deadline = time.monotonic() + self.TIMEOUT_SECONDS
+        with self._lock:
+            # Returning a true value interrupts the query.
+            self._connection.set_progress_handler(
+                lambda: time.monotonic() > deadline, 10000
+            )
+            try:
+                rows = self._connection.execute(sql_query).fetchmany(self.MAX_ROWS)
+            except sqlite3.Error:
+                return None
+            finally:
+                self._connection.set_progress_handler(None, 0)
+        rows = [tuple(_normalize_value(v) for v in row) for row in rows]
+        if not is_ordered:
+            rows.sort(key=repr)
+        return tuple(rows)
@@ -1,17 +1,22 @@
 """Translator from SQLite to BigQuery."""
 
+import collections
+import hashlib
+import json
 import re
-from typing import Any, Final
+import threading
+from typing import Any, Callable, Final, Hashable
 
 import regex
 import sqlglot
 import sqlglot.optimizer
+import sqlglot.schema
 
 from ..llm_utils import GeminiModel  # pylint: disable=g-importing-member
 from .correction_prompt_template import (
     CORRECTION_PROMPT_TEMPLATE_V1_0,
 )  # pylint: disable=g-importing-member
-
+from .sample_database import SampleDatabase  # pylint: disable=g-importing-member
 
 ColumnSchemaType = tuple[str, str]
 AllColumnsSchemaType = list[ColumnSchemaType]
@@ -23,6 +28,62 @@ SQLGlotSchemaType = dict[str, Any]
 
 BirdSampleType = dict[str, Any]
 
+BigQueryTablesContextType = dict[str, dict[str, Any]]
+
+
+class _BoundedCache:
+    """Thread-safe cache that drops its least recently used entries when full."""
+
+    def __init__(self, max_size: int):
+        self._max_size: int = max_size
+        self._entries: collections.OrderedDict[Hashable, Any] = (
+            collections.OrderedDict()
+        )
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable, create: Callable[[], Any]) -> Any:
+        """Returns the value cached for the key, created first if missing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = create()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def compute_schema_fingerprint(schema: Any) -> str:
+    """Returns a fingerprint of a schema in any of the supported formats.
+
+    The database settings keep the fingerprint of their schema, computed when
+    the schema is loaded, so that the schema is not hashed on every call.
+    """
+    return hashlib.sha256(json.dumps(schema, default=str).encode()).hexdigest()
+
+
+class _FingerprintedSchema(dict):
+    """A schema in the SQLGlot format, with the fingerprint of its source schema."""
+
+    def __init__(self, schema_dict: SQLGlotSchemaType, fingerprint: str):
+        super().__init__(schema_dict)
+        self.fingerprint: str = fingerprint
+
+
+def _get_query_key(sql_query: str, sql_dialect: str) -> Hashable:
+    """Returns the tokens of a SQL query, which ignore whitespace and comments."""
+    try:
+        tokens = sqlglot.Dialect.get_or_raise(sql_dialect).tokenize(sql_query)
+    except sqlglot.errors.SqlglotError:
+        return sql_query
+    return tuple((token.token_type, token.text) for token in tokens)
+
 
 def _isinstance_list_of_str_tuples_lists(obj: Any) -> bool:
     """Checks if the object is a list of tuples or listsof strings."""
@@ -68,6 +129,15 @@ def _isinstance_sqlglot_schema_type(obj: Any) -> bool:
     # pylint: enable=g-complex-comprehension
 
 
+def _isinstance_bigquery_tables_context_type(obj: Any) -> bool:
+    """Checks if the object is the schema of `get_bigquery_schema_and_samples`."""
+    return (
+        isinstance(obj, dict)
+        and all([isinstance(v, dict) for v in obj.values()])
+        and all(["table_schema" in v for v in obj.values()])
+    )
+
+
 def _isinstance_bird_sample_type(obj: Any) -> bool:
     """Checks if the object is a SQLGlot schema type."""
     return isinstance(obj, dict) and not _isinstance_sqlglot_schema_type(obj)
@@ -91,6 +161,8 @@ class SqlTranslator:
     Class Attributes:
       INPUT_DIALECT: The input SQL dialect.
       OUTPUT_DIALECT: The output SQL dialect.
+      SCHEMA_CACHE_SIZE: The number of schemas kept in the schema caches.
+      QUERY_CACHE_SIZE: The number of SQL queries whose error checks are kept.
 
     Attributes:
       sql_query: The SQL query to translate.
@@ -100,10 +172,23 @@ class SqlTranslator:
         processed by the LLM.
       process_tool_output_errors: True if any errors in the tool output SQL query
         should be processed by the LLM.
+      number_of_candidates: The number of corrected SQL queries to generate for
+        each error correction, among which one is selected.
+      sample_database: Sample rows of the tables, used to select among the
+        candidate SQL queries by their results.
     """
 
     INPUT_DIALECT: Final[str] = "sqlite"
     OUTPUT_DIALECT: Final[str] = "bigquery"
+    SCHEMA_CACHE_SIZE: Final[int] = 32
+    QUERY_CACHE_SIZE: Final[int] = 4096
+
+    # Shared by all the translators, so that schemas and SQL queries are only
+    # processed once per process.
+    _schema_cache: Final[_BoundedCache] = _BoundedCache(SCHEMA_CACHE_SIZE)
+    _mapping_schema_cache: Final[_BoundedCache] = _BoundedCache(SCHEMA_CACHE_SIZE)
+    _query_cache: Final[_BoundedCache] = _BoundedCache(QUERY_CACHE_SIZE)
+    _tokens_cache: Final[_BoundedCache] = _BoundedCache(QUERY_CACHE_SIZE)
 
     def __init__(
         self,
@@ -111,6 +196,8 @@ class SqlTranslator:
         temperature: float = 0.5,
         process_input_errors: bool = False,
         process_tool_output_errors: bool = False,
+        number_of_candidates: int = 1,
+        sample_database: SampleDatabase | None = None,
     ):
         """Initializes the translator."""
         self._process_input_errors: bool = process_input_errors
@@ -118,6 +205,8 @@ class SqlTranslator:
         self._input_errors: str | None = None
         self._tool_output_errors: str | None = None
         self._temperature: float = temperature
+        self._number_of_candidates: int = number_of_candidates
+        self._sample_database: SampleDatabase | None = sample_database
         if isinstance(model, str):
             self._model = GeminiModel(model_name=model, temperature=self._temperature)
         else:
@@ -263,7 +352,19 @@ class SqlTranslator:
         return schema_dict
 
     @classmethod
-    def rewrite_schema_for_sqlglot(
+    def _get_schema_fingerprint(cls, schema_dict: SQLGlotSchemaType) -> str:
+        """Returns the fingerprint of a schema in the SQLGlot format.
+
+        The schemas rewritten by `rewrite_schema_for_sqlglot` keep the
+        fingerprint of the schema they were rewritten from; other schemas are
+        hashed.
+        """
+        if isinstance(schema_dict, _FingerprintedSchema):
+            return schema_dict.fingerprint
+        return compute_schema_fingerprint(schema_dict)
+
+    @classmethod
+    def _rewrite_schema_for_sqlglot(
         cls, schema: str | SQLGlotSchemaType | BirdSampleType
     ) -> SQLGlotSchemaType:
         """Rewrites the schema for use in SQLGlot."""
@@ -274,6 +375,10 @@ class SqlTranslator:
                 schema_dict = cls.format_schema(schema)
             elif _isinstance_sqlglot_schema_type(schema):
                 schema_dict = schema
+            elif _isinstance_bigquery_tables_context_type(schema):
+                schema_dict = cls.format_schema(
+                    [(t, v["table_schema"]) for t, v in schema.items()]
+                )
             elif _isinstance_bird_sample_type(schema):
                 schema_dict = cls._get_schema_from_bird_sample(schema)
             elif _isinstance_ddl_schema_type(schema):
@@ -282,6 +387,91 @@ class SqlTranslator:
                 raise TypeError(f"Unsupported schema type: {type(schema)}")
         return schema_dict
 
+    @classmethod
+    def rewrite_schema_for_sqlglot(
+        cls,
+        schema: str | SQLGlotSchemaType | BirdSampleType,
+        schema_fingerprint: str | None = None,
+    ) -> SQLGlotSchemaType:
+        """Rewrites the schema for use in SQLGlot, once per distinct schema.
+
+        The returned schema is shared by all the calls with the same schema, and
+        must not be modified.
+
+        Args:
+          schema: The schema to rewrite.
+          schema_fingerprint: The `compute_schema_fingerprint` of the schema, if
+            known, so that the schema is not hashed again.
+        """
+        if not schema:
+            return None
+        if schema_fingerprint is None:
+            schema_fingerprint = compute_schema_fingerprint(schema)
+        return cls._schema_cache.get(
+            schema_fingerprint,
+            lambda: _FingerprintedSchema(
+                cls._rewrite_schema_for_sqlglot(schema), schema_fingerprint
+            ),
+        )
+
+    @classmethod
+    def clear_caches(cls) -> None:
+        """Clears the caches of schemas and SQL queries of all the translators."""
+        cls._schema_cache.clear()
+        cls._mapping_schema_cache.clear()
+        cls._query_cache.clear()
+        cls._tokens_cache.clear()
+
+    @classmethod
+    def _get_mapping_schema(
+        cls, schema_dict: SQLGlotSchemaType | None, sql_dialect: str
+    ) -> sqlglot.schema.MappingSchema | None:
+        """Returns the schema built by SQLGlot, once per distinct schema.
+
+        SQLGlot normalizes the schema every time a query is optimized with it,
+        unless it is given a `MappingSchema` that it already built.
+        """
+        if not schema_dict:
+            return None
+        return cls._mapping_schema_cache.get(
+            (cls._get_schema_fingerprint(schema_dict), sql_dialect),
+            lambda: sqlglot.schema.MappingSchema(schema_dict, dialect=sql_dialect),
+        )
+
+    @classmethod
+    def _optimize(
+        cls,
+        sql_query: str,
+        sql_dialect: str,
+        db: str | None = None,
+        catalog: str | None = None,
+        schema_dict: SQLGlotSchemaType | None = None,
+    ) -> tuple[str | None, str | None]:
+        """Returns the errors in the SQL query, or the SQL query after optimization."""
+        try:
+            # First, try to parse the SQL query into a SQLGlot AST.
+            sql_query_ast = sqlglot.parse_one(
+                sql=sql_query,
+                read=sql_dialect,
+                error_level=sqlglot.ErrorLevel.IMMEDIATE,
+            )
+            # Then add the database and catalog information for each table to the AST.
+            for table in sql_query_ast.find_all(sqlglot.exp.Table):
+                table.set("catalog", sqlglot.exp.Identifier(this=catalog, quoted=True))
+                table.set("db", sqlglot.exp.Identifier(this=db, quoted=True))
+            # Then, try to optimize the SQL query.
+            sql_query_ast = sqlglot.optimizer.optimize(
+                sql_query_ast,
+                dialect=sql_dialect,
+                schema=cls._get_mapping_schema(schema_dict, sql_dialect),
+                db=db,
+                catalog=catalog,
+                error_level=sqlglot.ErrorLevel.IMMEDIATE,
+            )
+            return None, sql_query_ast.sql(sql_dialect)
+        except sqlglot.errors.SqlglotError as e:
+            return str(e), None
+
     @classmethod
     def _check_for_errors(
         cls,
@@ -293,6 +483,11 @@ class SqlTranslator:
     ) -> tuple[str | None, str]:
         """Checks for errors in the SQL query.
 
+        The result is cached for the SQL query and for its tokens, so a query is
+        only optimized once per schema, whatever its whitespace and comments.
+        Queries with errors are checked again unless written exactly the same, as
+        the errors give positions in the query.
+
         Args:
           sql_query: The SQL query to check for errors.
           sql_dialect: The SQL dialect of the SQL query.
@@ -306,30 +501,118 @@ class SqlTranslator:
           tuple of the errors in the SQL query, or None if there are no errors, and
           the SQL query after optimization.
         """
+        sql_dialect = sql_dialect.lower()
+        fingerprint = cls._get_schema_fingerprint(schema_dict) if schema_dict else None
+
+        def check_tokens() -> tuple[str | None, str]:
+            errors, optimized_sql_query, cached_sql_query = cls._tokens_cache.get(
+                (
+                    _get_query_key(sql_query, sql_dialect),
+                    sql_dialect,
+                    db,
+                    catalog,
+                    fingerprint,
+                ),
+                lambda: (
+                    *cls._optimize(sql_query, sql_dialect, db, catalog, schema_dict),
+                    sql_query,
+                ),
+            )
+            if errors and sql_query != cached_sql_query:
+                # The errors give positions in the SQL query as it was written.
+                errors, _ = cls._optimize(
+                    sql_query, sql_dialect, db, catalog, schema_dict
+                )
+            if errors:
+                return errors, sql_query
+            return None, optimized_sql_query
+
+        return cls._query_cache.get(
+            (sql_query, sql_dialect, db, catalog, fingerprint), check_tokens
+        )
+
+    @classmethod
+    def _is_query(cls, sql_query: str, sql_dialect: str) -> bool:
+        """Checks that the SQL query is a query, and not some other text."""
         try:
-            # First, try to parse the SQL query into a SQLGlot AST.
             sql_query_ast = sqlglot.parse_one(
                 sql=sql_query,
                 read=sql_dialect.lower(),
                 error_level=sqlglot.ErrorLevel.IMMEDIATE,
             )
-            # Then add the database and catalog information for each table to the AST.
-            for table in sql_query_ast.find_all(sqlglot.exp.Table):
-                table.set("catalog", sqlglot.exp.Identifier(this=catalog, quoted=True))
-                table.set("db", sqlglot.exp.Identifier(this=db, quoted=True))
-            # Then, try to optimize the SQL query.
-            sql_query_ast = sqlglot.optimizer.optimize(
-                sql_query_ast,
-                dialect=sql_dialect.lower(),
-                schema=schema_dict,
+        except sqlglot.errors.SqlglotError:
+            return False
+        return isinstance(sql_query_ast, sqlglot.exp.Query)
+
+    @classmethod
+    def select_candidate(
+        cls,
+        candidates: list[str | None],
+        sql_dialect: str,
+        db: str | None = None,
+        catalog: str | None = None,
+        schema_dict: SQLGlotSchemaType | None = None,
+        sample_database: SampleDatabase | None = None,
+    ) -> str | None:
+        """Selects the best of several candidate SQL queries.
+
+        The candidates without errors are grouped by their results on the sample
+        database, and the first candidate of the largest group is selected, so
+        that queries that agree with the most other candidates are preferred.
+        The results only decide when some candidates agree, or when most of the
+        candidates could run on the sample: candidates that SQLite cannot run,
+        e.g. with BigQuery functions, are not outvoted by the others.
+
+        Args:
+          candidates: The candidate SQL queries, None for failed generations.
+          sql_dialect: The SQL dialect of the candidates.
+          db: The database to use for the error checks. This field is optional.
+          catalog: The catalog to use for the error checks. This field is
+            optional.
+          schema_dict: The schema to check the candidates against, in the SQLGlot
+            format. This field is optional.
+          sample_database: The sample rows to run the candidates on. Without it,
+            the first candidate without errors is selected. This field is
+            optional.
+
+        Returns:
+          The selected candidate, the first candidate if all of them have errors,
+          or None if there are no candidates.
+        """
+        candidates = [c for c in candidates if c is not None]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        valid_candidates = [
+            candidate
+            for candidate in candidates
+            if cls._is_query(candidate, sql_dialect)
+            and cls._check_for_errors(
+                sql_query=candidate,
+                sql_dialect=sql_dialect,
                 db=db,
                 catalog=catalog,
-                error_level=sqlglot.ErrorLevel.IMMEDIATE,
-            )
-            sql_query = sql_query_ast.sql(sql_dialect.lower())
-        except sqlglot.errors.SqlglotError as e:
-            return str(e), sql_query
-        return None, sql_query
+                schema_dict=schema_dict,
+            )[0]
+            is None
+        ]
+        print(f"{len(valid_candidates)}/{len(candidates)} valid SQL candidates")
+        if not valid_candidates:
+            return candidates[0]
+        if sample_database is None:
+            return valid_candidates[0]
+        groups: dict[Any, list[str]] = {}
+        for candidate in valid_candidates:
+            signature = sample_database.get_result_signature(candidate, sql_dialect)
+            if signature is not None:
+                groups.setdefault(signature, []).append(candidate)
+        if not groups:
+            return valid_candidates[0]
+        # `max` keeps the first of the largest groups, so ties go to the earliest.
+        largest_group = max(groups.values(), key=len)
+        number_run = sum(len(group) for group in groups.values())
+        if len(largest_group) > 1 or 2 * number_run > len(valid_candidates):
+            return largest_group[0]
+        return valid_candidates[0]
 
     def _fix_errors(
         self,
@@ -339,7 +622,8 @@ class SqlTranslator:
         db: str | None = None,
         catalog: str | None = None,
         ddl_schema: str | SQLGlotSchemaType | BirdSampleType | None = None,
-        number_of_candidates: int = 1,
+        number_of_candidates: int | None = None,
+        schema_fingerprint: str | None = None,
     ) -> str:
         """Fixes errors in the SQL query.
 
@@ -353,7 +637,10 @@ class SqlTranslator:
           ddl_schema: The DDL schema to use for the translation. The DDL format can
             be the SQLGlot format, the DDL schema format, a Bird dataset example, or
             a string containing multiple DDL statements. This field is optional.
-          number_of_candidates: The number of candidates to generate, default is 1.
+          number_of_candidates: The number of candidates to generate, default is
+            the `number_of_candidates` of the translator.
+          schema_fingerprint: The `compute_schema_fingerprint` of the DDL schema.
+            This field is optional.
 
         Returns:
           str: The fixed SQL query.
@@ -362,7 +649,7 @@ class SqlTranslator:
             sql_query = self._apply_heuristics(sql_query)
         # Reformat the schema if provided. This will remove any comments and
         # `INSERT INTO` statements.
-        schema_dict = self.rewrite_schema_for_sqlglot(ddl_schema)
+        schema_dict = self.rewrite_schema_for_sqlglot(ddl_schema, schema_fingerprint)
         errors_and_sql: tuple[str | None, str] = self._check_for_errors(
             sql_query=sql_query,
             sql_dialect=self.OUTPUT_DIALECT,
@@ -385,20 +672,22 @@ class SqlTranslator:
                 sql_query=sql_query,
                 schema_insert=schema_insert,
             )
+            if number_of_candidates is None:
+                number_of_candidates = self._number_of_candidates
             requests: list[str] = [prompt for _ in range(number_of_candidates)]
             responses: list[str] = self._model.call_parallel(
                 requests, parser_func=self._parse_response
             )
-            if responses:
-                # We only use the first response. Therefore the `number_of_candidates`
-                # parameter is not used.
-                # pylint: disable=g-bad-todo
-                # pylint: enable=g-bad-todo
-                # First, find the first non-None response.
-                responses = [r for r in responses if r is not None]
-                if responses:
-                    # Then, return the first non-None response.
-                    responses = responses[0]
+            responses = self.select_candidate(
+                responses,
+                sql_dialect=self.OUTPUT_DIALECT,
+                db=db,
+                catalog=catalog,
+                schema_dict=schema_dict,
+                sample_database=self._sample_database,
+            )
+            if responses is None:
+                responses = sql_query
         return responses
 
     def translate(
@@ -407,6 +696,7 @@ class SqlTranslator:
         db: str | None = None,
         catalog: str | None = None,
         ddl_schema: str | SQLGlotSchemaType | BirdSampleType | None = None,
+        schema_fingerprint: str | None = None,
     ) -> str:
         """Translates the SQL query to the output SQL dialect.
 
@@ -417,6 +707,8 @@ class SqlTranslator:
             term for the project ID. This field is optional.
           ddl_schema: The DDL schema to use for the translation. The DDL format can
             be the SQLGlot format or the DDL schema format. This field is optional.
+          schema_fingerprint: The `compute_schema_fingerprint` of the DDL schema.
+            This field is optional.
 
         Returns:
           The translated SQL query.
@@ -429,6 +721,7 @@ class SqlTranslator:
                 catalog=catalog,
                 sql_dialect=self.OUTPUT_DIALECT,
                 ddl_schema=ddl_schema,
+                schema_fingerprint=schema_fingerprint,
                 apply_heuristics=True,
             )
         print("****** sql_query after fix_errors:", sql_query)
@@ -437,7 +730,9 @@ class SqlTranslator:
             read=self.INPUT_DIALECT,
             write=self.OUTPUT_DIALECT,
             error_level=sqlglot.ErrorLevel.IMMEDIATE,
-        )[0]  # Transpile returns a list of strings.
+        )[
+            0
+        ]  # Transpile returns a list of strings.
         print("****** sql_query after transpile:", sql_query)
         if self._tool_output_errors:
             sql_query = self._fix_errors(
@@ -446,6 +741,7 @@ class SqlTranslator:
                 catalog=catalog,
                 sql_dialect=self.OUTPUT_DIALECT,
                 ddl_schema=ddl_schema,
+                schema_fingerprint=schema_fingerprint,
                 apply_heuristics=True,
             )
 
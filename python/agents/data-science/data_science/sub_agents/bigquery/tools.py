@@ -1,5 +1,6 @@
 """This file contains the tools used by the database agent."""
 
+import concurrent.futures
 import datetime
 import logging
 import os
@@ -14,6 +15,9 @@ from google.genai import Client
 from google.genai.types import HttpOptions
 
 from .chase_sql import chase_constants
+from .chase_sql.sql_postprocessor.sql_translator import compute_schema_fingerprint
+from ...utils.schema_catalog import SchemaCatalog
+from ...utils.schema_index import prune_schema
 from ...utils.utils import USER_AGENT
 
 logger = logging.getLogger(__name__)
@@ -34,6 +38,8 @@ llm_client = Client(
 )
 
 MAX_NUM_ROWS = 10000
+# The number of tables whose sample rows are listed concurrently.
+MAX_SAMPLE_TABLE_WORKERS = 8
 
 
 def _serialize_value_for_sql(value):
@@ -65,64 +71,156 @@ def _serialize_value_for_sql(value):
 
 
 database_settings = None
+schema_catalog = None
+
+
+def get_schema_catalog():
+    """Get the on-disk catalog of the schemas of the dataset tables."""
+    global schema_catalog
+    if schema_catalog is None:
+        schema_catalog = SchemaCatalog(f"bigquery_{data_project}_{dataset_id}")
+    return schema_catalog
 
 
 def get_database_settings():
-    """Get database settings."""
+    """Get database settings.
+
+    The schema comes from the schema catalog on disk when there is one, so that
+    the agent starts without fetching it. Once stale, it is refreshed in the
+    background, and the next calls return the new settings.
+    """
     global database_settings
+    catalog = get_schema_catalog()
     if database_settings is None:
-        database_settings = update_database_settings()
+        if not catalog.tables:
+            return update_database_settings()
+        update_database_settings(_to_tables_context(catalog.tables))
+    if catalog.is_stale():
+        client = _get_client()
+        catalog.refresh_in_background(
+            get_versions=lambda: _get_table_versions(client),
+            get_table=lambda table_id: _get_table_context(client, table_id),
+            on_refresh=lambda tables: update_database_settings(
+                _to_tables_context(tables)
+            ),
+        )
     return database_settings
 
 
-def update_database_settings():
-    """Update database settings."""
+def update_database_settings(schema=None):
+    """Update database settings, fetching the schema if it is not given."""
     global database_settings
-    schema = get_bigquery_schema_and_samples()
+    if schema is None:
+        schema = get_bigquery_schema_and_samples()
     database_settings = {
         "data_project_id": get_env_var("BQ_DATA_PROJECT_ID"),
         "dataset_id": get_env_var("BQ_DATASET_ID"),
         "schema": schema,
+        # Computed once per schema, as the state is copied on every turn.
+        "schema_fingerprint": compute_schema_fingerprint(schema),
         # Include ChaseSQL-specific constants.
         **chase_constants.chase_sql_constants_dict,
     }
     return database_settings
 
 
+def _get_client():
+    return get_bigquery_client(
+        project=compute_project,
+        credentials=None,
+        user_agent=USER_AGENT,
+    )
+
+
+def _get_table_versions(client):
+    """Returns the last modification time of each table, in a single query."""
+    dataset_ref = bigquery.DatasetReference(data_project, dataset_id)
+    query = (
+        "SELECT table_id, last_modified_time"
+        f" FROM `{data_project}.{dataset_id}.__TABLES__`"
+    )
+    return {
+        str(dataset_ref.table(row.table_id)): str(row.last_modified_time)
+        for row in client.query(query).result()
+    }
+
+
+def _get_table_context(client, table_id):
+    """Returns the schema and sample values of a table, for the catalog."""
+    table_info = client.get_table(table_id)
+    table_schema = [
+        (schema_field.name, schema_field.field_type)
+        for schema_field in table_info.schema
+    ]
+    sample_values = []
+    if False:
+        sample_query = f"SELECT * FROM `{table_id}` LIMIT 5"
+        sample_values = client.query(sample_query).to_dataframe().to_dict(orient="list")
+        for key in sample_values:
+            sample_values[key] = [
+                _serialize_value_for_sql(v) for v in sample_values[key]
+            ]
+    return {
+        "table_schema": table_schema,
+        "example_values": sample_values,
+    }
+
+
+def _to_tables_context(tables):
+    """Restores the column tuples of the tables that JSON turned into lists."""
+    return {
+        table_id: {
+            **table_context,
+            "table_schema": [tuple(field) for field in table_context["table_schema"]],
+        }
+        for table_id, table_context in tables.items()
+    }
+
+
 def get_bigquery_schema_and_samples():
-    """Retrieves schema and sample values for the BigQuery dataset tables."""
+    """Retrieves schema and sample values for the BigQuery dataset tables.
+
+    Only the tables that changed since they were stored in the schema catalog
+    are fetched, concurrently.
+    """
+    client = _get_client()
+    tables = get_schema_catalog().refresh(
+        get_versions=lambda: _get_table_versions(client),
+        get_table=lambda table_id: _get_table_context(client, table_id),
+    )
+    return _to_tables_context(tables)
+
+
+def get_bigquery_sample_tables(
+    num_rows: int, table_ids: list[str] | None = None
+) -> dict[str, pd.DataFrame]:
+    """Retrieves the first rows of BigQuery dataset tables, by table name.
+
+    Args:
+        num_rows (int): The number of rows to retrieve from each table.
+        table_ids (list[str] | None): The full names of the tables, or None for
+            all the tables of the dataset. Their rows are listed concurrently.
+    """
     client = get_bigquery_client(
         project=compute_project,
         credentials=None,
         user_agent=USER_AGENT,
     )
-    dataset_ref = bigquery.DatasetReference(data_project, dataset_id)
-    tables_context = {}
-    for table in client.list_tables(dataset_ref):
-        table_info = client.get_table(
-            bigquery.TableReference(dataset_ref, table.table_id)
-        )
-        table_schema = [
-            (schema_field.name, schema_field.field_type)
-            for schema_field in table_info.schema
+    if table_ids is None:
+        dataset_ref = bigquery.DatasetReference(data_project, dataset_id)
+        table_ids = [
+            str(dataset_ref.table(table.table_id))
+            for table in client.list_tables(dataset_ref)
         ]
-        table_ref = dataset_ref.table(table.table_id)
-        sample_values = []
-        if False:
-            sample_query = f"SELECT * FROM `{table_ref}` LIMIT 5"
-            sample_values = (
-                client.query(sample_query).to_dataframe().to_dict(orient="list")
-            )
-            for key in sample_values:
-                sample_values[key] = [
-                    _serialize_value_for_sql(v) for v in sample_values[key]
-                ]
-        tables_context[str(table_ref)] = {
-            "table_schema": table_schema,
-            "example_values": sample_values,
-        }
 
-    return tables_context
+    def list_rows(table_id):
+        # Listing rows is free, unlike querying them.
+        return client.list_rows(table_id, max_results=num_rows).to_dataframe()
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=MAX_SAMPLE_TABLE_WORKERS
+    ) as executor:
+        return dict(zip(table_ids, executor.map(list_rows, table_ids)))
 
 
 def bigquery_nl2sql(
@@ -193,7 +291,11 @@ best practices outlined above to generate the correct BigQuery SQL.
 
    """
 
-    schema = tool_context.state["database_settings"]["bigquery"]["schema"]
+    bq_settings = tool_context.state["database_settings"]["bigquery"]
+    # Only the tables and columns relevant to the question.
+    schema = prune_schema(
+        bq_settings["schema"], question, bq_settings["schema_token_budget"]
+    )
 
     prompt = prompt_template.format(
         MAX_NUM_ROWS=MAX_NUM_ROWS, SCHEMA=schema, QUESTION=question
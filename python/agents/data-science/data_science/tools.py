@@ -6,6 +6,7 @@ from google.adk.tools import ToolContext
 from google.adk.tools.agent_tool import AgentTool
 
 from .sub_agents import alloydb_agent, analytics_agent, bigquery_agent
+from .utils import query_results
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,10 @@ async def call_analytics_agent(
         bigquery_data = tool_context.state["bigquery_query_result"]
     if "alloydb_query_result" in tool_context.state:
         alloydb_data = tool_context.state["alloydb_query_result"]
+    # The results are stored as Parquet artifacts, given to the code executor.
+    input_files = await query_results.load_query_result_files(
+        tool_context, [bigquery_data, alloydb_data]
+    )
 
     question_with_data = f"""
   Question to answer: {question}
@@ -94,19 +99,27 @@ async def call_analytics_agent(
   tables:
 
   <BIGQUERY>
-  {bigquery_data}
+  {query_results.format_query_result(bigquery_data)}
   </BIGQUERY>
 
   <ALLOYDB>
-  {alloydb_data}
+  {query_results.format_query_result(alloydb_data)}
   </ALLOYDB>
 
   """
 
     agent_tool = AgentTool(agent=analytics_agent)
 
-    analytics_agent_output = await agent_tool.run_async(
-        args={"request": question_with_data}, tool_context=tool_context
+    previous_input_files = query_results.add_code_executor_input_files(
+        tool_context, input_files
     )
+    try:
+        analytics_agent_output = await agent_tool.run_async(
+            args={"request": question_with_data}, tool_context=tool_context
+        )
+    finally:
+        tool_context.state[query_results.CODE_EXECUTOR_INPUT_FILES_KEY] = (
+            previous_input_files
+        )
     tool_context.state["analytics_agent_output"] = analytics_agent_output
     return analytics_agent_output
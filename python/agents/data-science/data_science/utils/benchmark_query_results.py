@@ -0,0 +1,101 @@
+"""Measures the hand-off of query results to the analytics agent.
+
+Compares keeping the rows of a query result in the session state and in the
+prompt of the analytics agent, as `run_alloydb_query` and `call_analytics_agent`
+used to do, with storing them as a Parquet artifact, with only their summary in
+the state and the prompt. The rows are those of the `ticket_sales_history`
+sample table, repeated up to the number of rows. No LLM or database call is
+made.
+
+Run from the agent directory, with the environment of the agent, with:
+
+  python -m data_science.utils.benchmark_query_results [num_rows]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import ToolContext
+
+from . import query_results
+from .schema_index import estimate_tokens
+
+SAMPLE_FILE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "..",
+    "flights_dataset",
+    "ticket_sales_history_table.csv",
+)
+STATE_KEY = "alloydb_query_result"
+
+
+async def get_tool_context():
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(app_name="benchmark", user_id="user")
+    invocation_context = InvocationContext(
+        session_service=session_service,
+        artifact_service=InMemoryArtifactService(),
+        invocation_id="benchmark",
+        agent=LlmAgent(name="benchmark"),
+        session=session,
+    )
+    return ToolContext(invocation_context)
+
+
+def get_rows(num_rows):
+    """Returns rows as the database tools return them, as a list of dicts."""
+    sample = pd.read_csv(SAMPLE_FILE)
+    rows = sample.sample(n=num_rows, replace=True, random_state=0)
+    return json.loads(rows.to_json(orient="records"))
+
+
+async def run_in_state(rows):
+    """Keeps the rows in the state and the prompt, as before."""
+    tool_context = await get_tool_context()
+    start = time.perf_counter()
+    tool_context.state[STATE_KEY] = rows
+    state = json.dumps(tool_context.state.to_dict())
+    prompt = str(tool_context.state[STATE_KEY])
+    return len(state), estimate_tokens(prompt), time.perf_counter() - start
+
+
+async def run_as_artifact(rows):
+    """Stores the rows as an artifact, and their summary in the state."""
+    tool_context = await get_tool_context()
+    start = time.perf_counter()
+    await query_results.save_query_result(tool_context, STATE_KEY, rows)
+    state = json.dumps(tool_context.state.to_dict())
+    prompt = query_results.format_query_result(tool_context.state[STATE_KEY])
+    files = await query_results.load_query_result_files(
+        tool_context, [tool_context.state[STATE_KEY]]
+    )
+    seconds = time.perf_counter() - start
+    df = query_results.to_dataframe(rows)
+    assert len(files) == 1, "Missing artifact."
+    assert tool_context.state[STATE_KEY]["num_rows"] == len(df)
+    return len(state), estimate_tokens(prompt), seconds
+
+
+async def main(num_rows):
+    rows = get_rows(num_rows)
+    print(f"{num_rows} rows")
+    print("result in    | state (KB) | prompt (tokens) | hand-off (ms)")
+    for name, run in (("state", run_in_state), ("artifact", run_as_artifact)):
+        state_size, prompt_tokens, seconds = await run(rows)
+        print(
+            f"{name:12} | {state_size / 1024:10.1f} | {prompt_tokens:15d} |"
+            f" {seconds * 1e3:13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
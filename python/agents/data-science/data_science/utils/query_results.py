@@ -0,0 +1,152 @@
+"""Hand-off of the results of the database sub-agents to the analytics agent.
+
+Query results are stored once, as Parquet artifacts, instead of as rows in the
+session state. The state only keeps a summary of each result: its artifact,
+number of rows, column types and first rows. The analytics agent gets the
+summaries in its prompt, and the Parquet files in its code executor, where
+they are loaded with `pd.read_parquet`.
+"""
+
+import base64
+import dataclasses
+import io
+import json
+import logging
+from typing import Any
+
+import pandas as pd
+from google.adk.code_executors.code_execution_utils import File
+from google.adk.tools import ToolContext
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+PARQUET_MIME_TYPE = "application/vnd.apache.parquet"
+# Number of rows of a result shown in the prompts.
+PREVIEW_ROWS = 5
+# Session state key of the input files of the code executors of ADK.
+CODE_EXECUTOR_INPUT_FILES_KEY = "_code_executor_input_files"
+
+
+def to_dataframe(rows: Any) -> pd.DataFrame:
+    """Returns the rows of a query result, as a list of dicts or JSON, as a frame."""
+    if isinstance(rows, str):
+        rows = json.loads(rows)
+    return pd.DataFrame.from_records(rows)
+
+
+def to_parquet(df: pd.DataFrame) -> bytes:
+    """Returns the frame as Parquet, with values of mixed types as strings."""
+    buffer = io.BytesIO()
+    try:
+        df.to_parquet(buffer, index=False)
+    except (TypeError, ValueError):
+        # Arrow rejects columns with values of mixed types, like numbers and
+        # strings.
+        buffer = io.BytesIO()
+        df.astype(
+            {column: str for column in df.columns if df[column].dtype == object}
+        ).to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def summarize(df: pd.DataFrame, artifact: str, version: int) -> dict[str, Any]:
+    """Returns the summary of a query result that is kept in the state."""
+    return {
+        "artifact": artifact,
+        "version": version,
+        "num_rows": len(df),
+        "columns": {column: str(dtype) for column, dtype in df.dtypes.items()},
+        "preview": json.loads(
+            df.head(PREVIEW_ROWS).to_json(orient="records", date_format="iso")
+        ),
+    }
+
+
+async def save_query_result(
+    tool_context: ToolContext, state_key: str, rows: Any
+) -> dict[str, Any] | list[Any]:
+    """Saves a query result as a Parquet artifact, and its summary in the state.
+
+    Args:
+        tool_context: The tool context of the tool that ran the query.
+        state_key: The state key of the result, also the name of its artifact.
+        rows: The rows of the result, as a list of dicts or as JSON.
+
+    Returns:
+        The summary of the result, or its rows if the artifact could not be
+        saved, e.g. without an artifact service. Either is stored in the state.
+    """
+    try:
+        df = to_dataframe(rows)
+        artifact = f"{state_key}.parquet"
+        version = await tool_context.save_artifact(
+            artifact,
+            types.Part.from_bytes(data=to_parquet(df), mime_type=PARQUET_MIME_TYPE),
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Keeping %s in the state: %s", state_key, e)
+        tool_context.state[state_key] = rows
+        return rows
+    summary = summarize(df, artifact, version)
+    tool_context.state[state_key] = summary
+    return summary
+
+
+def is_summary(result: Any) -> bool:
+    """Returns True if the result in the state is a summary of an artifact."""
+    return isinstance(result, dict) and "artifact" in result
+
+
+def format_query_result(result: Any) -> str:
+    """Returns the description of a query result for the analytics prompt."""
+    if not is_summary(result):
+        return str(result)
+    return (
+        f"The {result['num_rows']} rows are in the file `{result['artifact']}`."
+        " Load them with"
+        f" `df = pd.read_parquet(\"{result['artifact']}\")`.\n"
+        f"Columns and types: {json.dumps(result['columns'])}\n"
+        f"First rows: {json.dumps(result['preview'])}"
+    )
+
+
+async def load_query_result_files(
+    tool_context: ToolContext, results: list[Any]
+) -> list[File]:
+    """Returns the artifacts of the query results, as code executor files."""
+    files = []
+    for result in results:
+        if not is_summary(result):
+            continue
+        part = await tool_context.load_artifact(
+            result["artifact"], version=result["version"]
+        )
+        if part is None or part.inline_data is None:
+            logger.warning("Missing artifact %s", result["artifact"])
+            continue
+        files.append(
+            File(
+                name=result["artifact"],
+                content=base64.b64encode(part.inline_data.data).decode(),
+                mime_type=PARQUET_MIME_TYPE,
+            )
+        )
+    return files
+
+
+def add_code_executor_input_files(
+    tool_context: ToolContext, files: list[File]
+) -> list[dict[str, Any]]:
+    """Adds files to the code executors of the agents called by the tool.
+
+    Returns:
+        The previous input files, to restore once the agents are done, so that
+        the content of the files is not kept in the state of the session.
+    """
+    previous = tool_context.state.get(CODE_EXECUTOR_INPUT_FILES_KEY, [])
+    names = {f.name for f in files}
+    tool_context.state[CODE_EXECUTOR_INPUT_FILES_KEY] = [
+        f for f in previous if f["name"] not in names
+    ] + [dataclasses.asdict(f) for f in files]
+    return previous
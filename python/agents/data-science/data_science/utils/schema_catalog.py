@@ -0,0 +1,166 @@
+"""Persistent catalog of the table schemas of the datasets of the agent.
+
+The schema of each table is stored on disk with the version of the table it was
+fetched from, e.g. its last modification time. On refresh, only the tables
+whose version changed are fetched again, concurrently, so the agent starts
+without fetching the schemas and picks up schema changes while it runs.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Directory of the catalog files. Each dataset has its own file.
+SCHEMA_CATALOG_DIR = os.path.expanduser(
+    os.getenv("SCHEMA_CATALOG_DIR", "~/.cache/data_science_agent")
+)
+# Seconds after which the schemas are refreshed, in the background.
+SCHEMA_REFRESH_SECONDS = float(os.getenv("SCHEMA_REFRESH_SECONDS", "300"))
+# Maximum number of tables fetched at once.
+MAX_FETCH_WORKERS = 16
+
+CATALOG_FORMAT_VERSION = 1
+
+
+class SchemaCatalog:
+    """Schemas of the tables of one dataset, kept up to date on disk.
+
+    Attributes:
+        path (str): The path of the catalog file.
+        tables (dict): The schema of each table, by table name.
+        refreshed (float, optional): The `time.time` of the last refresh, or
+          None if the catalog was never refreshed.
+    """
+
+    def __init__(self, name: str):
+        """Loads the catalog of the dataset `name`, if it is on disk."""
+        self.path = os.path.join(SCHEMA_CATALOG_DIR, f"{name}.json")
+        self.tables: dict[str, Any] = {}
+        self.refreshed: float | None = None
+        self._versions: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refresh_thread_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable schema catalog %s: %s", self.path, e)
+            return
+        if catalog.get("format_version") != CATALOG_FORMAT_VERSION:
+            return
+        self._versions = catalog["versions"]
+        self.tables = catalog["tables"]
+        self.refreshed = catalog["refreshed"]
+
+    def _save(self):
+        """Writes the catalog atomically, so that readers never see half of it."""
+        os.makedirs(SCHEMA_CATALOG_DIR, exist_ok=True)
+        catalog = {
+            "format_version": CATALOG_FORMAT_VERSION,
+            "refreshed": self.refreshed,
+            "versions": self._versions,
+            "tables": self.tables,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=SCHEMA_CATALOG_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(catalog, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @property
+    def versions(self) -> dict[str, str]:
+        """The version of each table, by table name, as of the last refresh."""
+        return self._versions
+
+    def is_stale(self) -> bool:
+        """Returns True if the catalog is older than `SCHEMA_REFRESH_SECONDS`."""
+        return (
+            self.refreshed is None
+            or time.time() - self.refreshed > SCHEMA_REFRESH_SECONDS
+        )
+
+    def refresh(
+        self,
+        get_versions: Callable[[], dict[str, str]],
+        get_table: Callable[[str], Any],
+    ) -> dict[str, Any]:
+        """Fetches the schemas of the new and changed tables.
+
+        Args:
+            get_versions: Returns the version of each table, by table name.
+            get_table: Returns the schema of a table, given its name. It must
+              be JSON serializable.
+
+        Returns:
+            The schema of each table, by table name.
+        """
+        with self._lock:
+            versions = get_versions()
+            changed = [
+                name
+                for name, version in versions.items()
+                if self._versions.get(name) != version or name not in self.tables
+            ]
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(MAX_FETCH_WORKERS, len(changed)))
+            ) as executor:
+                fetched = dict(zip(changed, executor.map(get_table, changed)))
+            self.tables = {
+                name: fetched[name] if name in fetched else self.tables[name]
+                for name in versions
+            }
+            self._versions = dict(versions)
+            self.refreshed = time.time()
+            logger.info(
+                "Refreshed schema catalog %s: %d tables, %d fetched",
+                self.path,
+                len(versions),
+                len(changed),
+            )
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning("Could not save schema catalog %s: %s", self.path, e)
+            return self.tables
+
+    def refresh_in_background(
+        self,
+        get_versions: Callable[[], dict[str, str]],
+        get_table: Callable[[str], Any],
+        on_refresh: Callable[[dict[str, Any]], None],
+    ):
+        """Refreshes the catalog in a thread, unless a refresh is running.
+
+        Args:
+            get_versions: As for `refresh`.
+            get_table: As for `refresh`.
+            on_refresh: Called with the schema of each table once refreshed.
+        """
+
+        def run():
+            try:
+                on_refresh(self.refresh(get_versions, get_table))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning("Could not refresh schema catalog %s: %s", self.path, e)
+
+        with self._refresh_thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=run, daemon=True)
+            self._refresh_thread.start()
@@ -0,0 +1,251 @@
+"""Selection of the tables and columns of a schema relevant to a question.
+
+The NL2SQL prompts embed the schema of the dataset. On wide datasets, most of
+it is irrelevant to the question, and makes the prompts large and slow. The
+tables and columns are ranked by BM25 over their names, types and comments,
+and the most relevant ones are kept within a budget of prompt tokens.
+"""
+
+import collections
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from typing import Any
+
+# Maximum number of tokens of the schema in NL2SQL prompts. The schema is kept
+# whole when it fits.
+SCHEMA_TOKEN_BUDGET = int(os.getenv("NL2SQL_SCHEMA_TOKEN_BUDGET", "8000"))
+# Approximate number of characters per token of the model.
+CHARS_PER_TOKEN = 4
+
+# Number of schemas whose index is kept.
+MAX_CACHED_INDEXES = 8
+
+_WORD_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+_indexes: collections.OrderedDict[str, Any] = collections.OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns the approximate number of tokens of a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits names like `numSold` or `num_sold` into lowercase words.
+
+    Plurals are reduced to their singular, so that "countries" in a question
+    matches a `country` column.
+    """
+    words = []
+    for word in _WORD_PATTERN.findall(text):
+        word = word.lower()
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+class BM25:
+    """Okapi BM25 ranking of documents for a query."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [collections.Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / max(1, len(documents))
+        document_frequencies = collections.Counter(
+            term for counts in self.term_counts for term in counts
+        )
+        self.idf = {
+            term: math.log(1 + (len(documents) - n + 0.5) / (n + 0.5))
+            for term, n in document_frequencies.items()
+        }
+
+    def scores(self, query: list[str]) -> list[float]:
+        """Returns the score of each document for the query."""
+        query = set(query)
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            for term in query & counts.keys():
+                tf = counts[term]
+                score += (
+                    self.idf[term]
+                    * tf
+                    * (self.k1 + 1)
+                    / (
+                        tf
+                        + self.k1
+                        * (1 - self.b + self.b * length / max(1, self.average_length))
+                    )
+                )
+            scores.append(score)
+        return scores
+
+
+class TablesContextIndex:
+    """Index of the tables and columns of `get_bigquery_schema_and_samples`."""
+
+    def __init__(self, tables_context: dict[str, Any]):
+        self.tables_context = tables_context
+        self.table_ids = list(tables_context)
+        self.table_index = BM25(
+            [
+                tokenize(table_id.split(".")[-1])
+                + [
+                    word
+                    for name, field_type in context["table_schema"]
+                    for word in tokenize(f"{name} {field_type}")
+                ]
+                for table_id, context in tables_context.items()
+            ]
+        )
+        self.column_index = {
+            table_id: BM25(
+                [
+                    tokenize(f"{name} {field_type}")
+                    for name, field_type in context["table_schema"]
+                ]
+            )
+            for table_id, context in tables_context.items()
+        }
+
+    def _prune_table(self, table_id: str, question_words: list[str]) -> dict[str, Any]:
+        """Returns the context of the table with the columns in the question."""
+        context = self.tables_context[table_id]
+        scores = self.column_index[table_id].scores(question_words)
+        # The first column is kept, as it is usually the key of the table.
+        kept = [
+            column
+            for i, column in enumerate(context["table_schema"])
+            if i == 0 or scores[i] > 0
+        ]
+        kept_names = {name for name, _ in kept}
+        example_values = context.get("example_values") or {}
+        if isinstance(example_values, dict):
+            example_values = {
+                k: v for k, v in example_values.items() if k in kept_names
+            }
+        return {**context, "table_schema": kept, "example_values": example_values}
+
+    def prune(self, question: str, token_budget: int) -> dict[str, Any]:
+        """Returns the most relevant tables and columns within the budget.
+
+        The tables are added by decreasing relevance, whole if they fit and
+        with only their columns in the question otherwise. The most relevant
+        table is always kept, with at least its columns in the question.
+        """
+        if estimate_tokens(str(self.tables_context)) <= token_budget:
+            return self.tables_context
+        question_words = tokenize(question)
+        scores = self.table_index.scores(question_words)
+        order = sorted(range(len(self.table_ids)), key=lambda i: -scores[i])
+        pruned = {}
+        tokens = 0
+        for i in order:
+            table_id = self.table_ids[i]
+            context = self.tables_context[table_id]
+            table_tokens = estimate_tokens(str({table_id: context}))
+            if tokens + table_tokens > token_budget:
+                context = self._prune_table(table_id, question_words)
+                table_tokens = estimate_tokens(str({table_id: context}))
+            if not pruned or tokens + table_tokens <= token_budget:
+                pruned[table_id] = context
+                tokens += table_tokens
+        return pruned
+
+
+class TableListIndex:
+    """Index of the tables of the MCP Toolbox `list_tables` tool, as JSON."""
+
+    def __init__(self, tables: list[Any]):
+        self.tables = tables
+        self.index = BM25([tokenize(json.dumps(table)) for table in tables])
+
+    def prune(self, question: str, token_budget: int) -> list[Any]:
+        """Returns the most relevant tables within the budget, in their order."""
+        if estimate_tokens(json.dumps(self.tables)) <= token_budget:
+            return self.tables
+        scores = self.index.scores(tokenize(question))
+        kept = set()
+        tokens = 0
+        for i in sorted(range(len(self.tables)), key=lambda i: -scores[i]):
+            table_tokens = estimate_tokens(json.dumps(self.tables[i]))
+            if not kept or tokens + table_tokens <= token_budget:
+                kept.add(i)
+                tokens += table_tokens
+        return [table for i, table in enumerate(self.tables) if i in kept]
+
+
+def _is_tables_context(schema: Any) -> bool:
+    return (
+        isinstance(schema, dict)
+        and bool(schema)
+        and all(isinstance(v, dict) and "table_schema" in v for v in schema.values())
+    )
+
+
+def _index_schema(schema: Any):
+    """Returns the index of a schema, or None if it is of an unknown type.
+
+    Indexes are built once per schema, as the same schema is used for all the
+    questions of a session.
+    """
+    if _is_tables_context(schema):
+        schema_json = json.dumps(schema, sort_keys=True, default=str)
+        create_index = lambda: TablesContextIndex(schema)
+    elif isinstance(schema, str):
+        try:
+            tables = json.loads(schema)
+        except ValueError:
+            return None
+        if not isinstance(tables, list):
+            return None
+        schema_json = schema
+        create_index = lambda: TableListIndex(tables)
+    else:
+        return None
+    fingerprint = hashlib.sha256(schema_json.encode()).hexdigest()
+    with _indexes_lock:
+        if fingerprint in _indexes:
+            _indexes.move_to_end(fingerprint)
+            return _indexes[fingerprint]
+    index = create_index()
+    with _indexes_lock:
+        _indexes[fingerprint] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def prune_schema(
+    schema: Any, question: str, token_budget: int = SCHEMA_TOKEN_BUDGET
+) -> Any:
+    """Returns the part of the schema relevant to the question.
+
+    Args:
+        schema: The schema of `get_bigquery_schema_and_samples`, or the JSON
+          of the MCP Toolbox `list_tables` tool.
+        question: The natural language question.
+        token_budget: The maximum number of tokens of the schema.
+
+    Returns:
+        The schema, of the same type, with only the most relevant tables and
+        columns if it does not fit in the budget. Schemas of other types are
+        returned whole.
+    """
+    index = _index_schema(schema)
+    if index is None:
+        return schema
+    pruned = index.prune(question, token_budget)
+    if isinstance(schema, str):
+        return schema if pruned is index.tables else json.dumps(pruned)
+    return schema if pruned is index.tables_context else pruned
@@ -0,0 +1,145 @@
+"""Offline evaluation of the pruning of the schema in the NL2SQL prompts.
+
+For each question of `eval_data/schema_pruning.json` and each token budget,
+measures the size of the schema in the prompt, and whether the pruned schema
+still has all the columns of the reference SQL query. The schema and the rows
+of the tables come from the CSV files of the sample datasets, so no BigQuery
+call is made.
+
+With `--generate`, also generates a SQL query for each question with
+`bigquery_nl2sql`, and checks that it gives the same rows as the reference
+query on the CSV files.
+
+Run from the agent directory, with the environment of the agent, with:
+
+  python -m eval.schema_pruning_eval [--generate]
+"""
+
+import argparse
+import json
+import os
+import types
+
+import pandas as pd
+import sqlglot
+
+from data_science.sub_agents.bigquery import tools
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor.sample_database import (
+    SampleDatabase,
+)
+from data_science.utils.schema_index import estimate_tokens, prune_schema
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVAL_FILE = os.path.join(AGENT_DIR, "eval", "eval_data", "schema_pruning.json")
+TOKEN_BUDGETS = [None, 120, 80, 50, 30]
+DIALECT = "bigquery"
+
+_BIGQUERY_TYPES = {"i": "INTEGER", "u": "INTEGER", "f": "FLOAT", "b": "BOOLEAN"}
+
+
+def load_tables(eval_set):
+    """Returns the rows of each table, by full table name."""
+    return {
+        f"{eval_set['project']}.{eval_set['dataset']}.{table}": pd.read_csv(
+            os.path.join(AGENT_DIR, path)
+        )
+        for table, path in eval_set["tables"].items()
+    }
+
+
+def get_tables_context(tables):
+    """Returns the schema of the tables, as `get_bigquery_schema_and_samples`."""
+    return {
+        table_id: {
+            "table_schema": [
+                (column, _BIGQUERY_TYPES.get(rows[column].dtype.kind, "STRING"))
+                for column in rows.columns
+            ],
+            "example_values": [],
+        }
+        for table_id, rows in tables.items()
+    }
+
+
+def get_columns(sql):
+    """Returns the (table, column) pairs that a query on a single table uses.
+
+    The pair (table, None) stands for the table itself.
+    """
+    query = sqlglot.parse_one(sql, read=DIALECT)
+    table = query.find(sqlglot.exp.Table).name
+    return {(table, None)} | {
+        (table, column.name) for column in query.find_all(sqlglot.exp.Column)
+    }
+
+
+def has_columns(schema, columns):
+    """Returns True if the schema has all the given (table, column) pairs."""
+    schema_columns = set()
+    for table_id, context in schema.items():
+        table = table_id.split(".")[-1]
+        schema_columns.add((table, None))
+        schema_columns.update((table, name) for name, _ in context["table_schema"])
+    return columns <= schema_columns
+
+
+def generate_sql(question, schema, token_budget):
+    """Generates a SQL query with the baseline NL2SQL tool."""
+    tool_context = types.SimpleNamespace(
+        state={
+            "database_settings": {
+                "bigquery": {
+                    "schema": schema,
+                    "schema_token_budget": token_budget,
+                }
+            }
+        }
+    )
+    return tools.bigquery_nl2sql(question, tool_context)
+
+
+def main(generate):
+    with open(EVAL_FILE, "r", encoding="utf-8") as f:
+        eval_set = json.load(f)
+    tables = load_tables(eval_set)
+    schema = get_tables_context(tables)
+    sample_database = SampleDatabase(tables) if generate else None
+    full_tokens = estimate_tokens(str(schema))
+    questions = eval_set["questions"]
+
+    print(f"{len(questions)} questions, {full_tokens} schema tokens")
+    header = "budget | schema tokens | reduction | has columns"
+    print(header + (" | same rows" if generate else ""))
+    for token_budget in TOKEN_BUDGETS:
+        budget = full_tokens if token_budget is None else token_budget
+        tokens = 0
+        num_with_columns = 0
+        num_correct = 0
+        for item in questions:
+            pruned = prune_schema(schema, item["question"], budget)
+            tokens += estimate_tokens(str(pruned))
+            num_with_columns += has_columns(pruned, get_columns(item["sql"]))
+            if generate:
+                sql = generate_sql(item["question"], schema, budget)
+                expected = sample_database.get_result_signature(item["sql"], DIALECT)
+                actual = sample_database.get_result_signature(sql, DIALECT)
+                num_correct += actual is not None and actual == expected
+        average_tokens = tokens / len(questions)
+        line = (
+            f"{token_budget or 'none':>6} | {average_tokens:13.0f} |"
+            f" {1 - average_tokens / full_tokens:9.0%} |"
+            f" {num_with_columns / len(questions):11.0%}"
+        )
+        if generate:
+            line += f" | {num_correct / len(questions):9.0%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--generate",
+        action="store_true",
+        help="Also generate SQL queries with Gemini, and run them on the CSV files.",
+    )
+    main(parser.parse_args().generate)
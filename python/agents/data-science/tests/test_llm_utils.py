@@ -0,0 +1,111 @@
+"""Test cases for the LLM client of ChaseSQL, against a fake model."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import llm_utils
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Answers each prompt with its upper case, after the delays given for it.
+
+    Attributes:
+        delays: The delays of the successive requests of each prompt. A request
+          fails if its delay is None. Prompts without delays are answered at once.
+        requests: The prompts of all the requests made.
+        max_in_flight: The maximum number of requests that were in flight at once.
+    """
+
+    def __init__(self, delays=None):
+        self.delays = {prompt: list(d) for prompt, d in (delays or {}).items()}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.requests.append(prompt)
+        delays = self.delays.get(prompt)
+        delay = delays.pop(0) if delays else 0
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if delay is None:
+                raise RuntimeError(f"request for {prompt} failed")
+            await asyncio.sleep(delay)
+            return FakeResponse(prompt.upper())
+        finally:
+            self.in_flight -= 1
+
+
+class TestGeminiModel(unittest.TestCase):
+    """Test cases for the retries, hedging and concurrency of `GeminiModel`."""
+
+    def test_call_parallel_keeps_order_of_prompts(self):
+        fake = FakeModel({"a": [0.2], "b": [0.1]})
+        model = llm_utils.GeminiModel(model=fake)
+        responses = model.call_parallel(["a", "b", "c"], parser_func=str.strip)
+        self.assertEqual(responses, ["A", "B", "C"])
+        self.assertEqual(len(model.call_metrics), 3)
+
+    def test_retries_are_shared_by_prompts(self):
+        fake = FakeModel({"a": [None] * 10, "b": [None] * 10})
+        model = llm_utils.GeminiModel(model=fake)
+        responses = asyncio.run(
+            model.call_parallel_async(["a", "b", "c"], max_retries=3, timeout=30)
+        )
+        self.assertTrue(responses[0].startswith("Error after retries"))
+        self.assertTrue(responses[1].startswith("Error after retries"))
+        self.assertEqual(responses[2], "C")
+        # One request per prompt, and 3 retries in all.
+        self.assertEqual(len(fake.requests), 6)
+        self.assertIsNotNone(model.call_metrics[0].error)
+
+    def test_call_parallel_stops_at_timeout(self):
+        fake = FakeModel({"a": [10]})
+        model = llm_utils.GeminiModel(model=fake)
+        responses = model.call_parallel(["a", "b"], timeout=0.5)
+        self.assertEqual(responses, ["Timeout", "B"])
+        self.assertLess(model.call_metrics[0].latency, 2)
+
+    def test_call_retries_failed_request(self):
+        fake = FakeModel({"a": [None, 0]})
+        model = llm_utils.GeminiModel(model=fake)
+        self.assertEqual(model.call("a"), "A")
+        self.assertEqual(model.call_metrics[0].attempts, 2)
+
+    def test_hedged_request_cuts_latency(self):
+        fake = FakeModel({"a": [10, 0.1]})
+        model = llm_utils.GeminiModel(model=fake, hedge_delay=0.1)
+        self.assertEqual(model.call("a"), "A")
+        metrics = model.call_metrics[0]
+        self.assertTrue(metrics.hedged)
+        self.assertEqual(metrics.attempts, 1)
+        self.assertLess(metrics.latency, 2)
+
+    def test_requests_share_concurrency_limit(self):
+        prompts = [f"p{i}" for i in range(3 * llm_utils.MAX_CONCURRENT_REQUESTS)]
+        fake = FakeModel({prompt: [0.05] for prompt in prompts})
+        models = [llm_utils.GeminiModel(model=fake) for _ in range(2)]
+        loop = llm_utils.get_event_loop()
+
+        async def call_both():
+            return await asyncio.gather(
+                *(model.call_parallel_async(prompts) for model in models)
+            )
+
+        for responses in asyncio.run_coroutine_threadsafe(call_both(), loop).result():
+            self.assertEqual(responses, [prompt.upper() for prompt in prompts])
+        self.assertEqual(fake.max_in_flight, llm_utils.MAX_CONCURRENT_REQUESTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
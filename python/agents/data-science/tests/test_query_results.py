@@ -0,0 +1,149 @@
+"""Test cases for handing query results to the analytics agent as artifacts."""
+
+import base64
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pandas as pd
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import ToolContext
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science import tools
+from data_science.utils import query_results
+
+ROWS = [
+    {"city": "Paris", "tickets": 3, "price": 12.5},
+    {"city": "Lyon", "tickets": 1, "price": 8.0},
+    {"city": "Nice", "tickets": None, "price": 9.75},
+]
+
+
+async def get_tool_context(artifact_service=None):
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(app_name="test", user_id="user")
+    invocation_context = InvocationContext(
+        session_service=session_service,
+        artifact_service=artifact_service,
+        invocation_id="test",
+        agent=LlmAgent(name="test"),
+        session=session,
+    )
+    return ToolContext(invocation_context)
+
+
+class TestQueryResults(unittest.IsolatedAsyncioTestCase):
+    """Test cases for saving, describing and loading query results."""
+
+    async def test_result_is_saved_as_parquet_with_its_summary(self):
+        tool_context = await get_tool_context(InMemoryArtifactService())
+        summary = await query_results.save_query_result(
+            tool_context, "bigquery_query_result", ROWS
+        )
+        self.assertEqual(tool_context.state["bigquery_query_result"], summary)
+        self.assertEqual(
+            summary,
+            {
+                "artifact": "bigquery_query_result.parquet",
+                "version": 0,
+                "num_rows": 3,
+                "columns": {
+                    "city": str(pd.DataFrame.from_records(ROWS)["city"].dtype),
+                    "tickets": "float64",
+                    "price": "float64",
+                },
+                "preview": [
+                    {"city": "Paris", "tickets": 3.0, "price": 12.5},
+                    {"city": "Lyon", "tickets": 1.0, "price": 8.0},
+                    {"city": "Nice", "tickets": None, "price": 9.75},
+                ],
+            },
+        )
+        description = query_results.format_query_result(summary)
+        self.assertIn(
+            "The 3 rows are in the file `bigquery_query_result.parquet`", description
+        )
+        self.assertIn('pd.read_parquet("bigquery_query_result.parquet")', description)
+
+        (file,) = await query_results.load_query_result_files(
+            tool_context, [summary, ""]
+        )
+        self.assertEqual(file.name, "bigquery_query_result.parquet")
+        self.assertEqual(file.mime_type, query_results.PARQUET_MIME_TYPE)
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(io.BytesIO(base64.b64decode(file.content))),
+            pd.DataFrame.from_records(ROWS),
+        )
+
+    async def test_rows_of_mixed_types_are_saved_as_strings(self):
+        tool_context = await get_tool_context(InMemoryArtifactService())
+        summary = await query_results.save_query_result(
+            tool_context, "alloydb_query_result", '[{"id": 1}, {"id": "a"}]'
+        )
+        self.assertEqual(summary["columns"], {"id": "object"})
+        (file,) = await query_results.load_query_result_files(tool_context, [summary])
+        self.assertEqual(
+            pd.read_parquet(io.BytesIO(base64.b64decode(file.content)))["id"].tolist(),
+            ["1", "a"],
+        )
+
+    async def test_rows_are_kept_in_the_state_without_artifact_service(self):
+        tool_context = await get_tool_context()
+        result = await query_results.save_query_result(
+            tool_context, "bigquery_query_result", ROWS
+        )
+        self.assertIs(result, ROWS)
+        self.assertEqual(tool_context.state["bigquery_query_result"], ROWS)
+        self.assertFalse(query_results.is_summary(result))
+        self.assertEqual(query_results.format_query_result(result), str(ROWS))
+        self.assertEqual(
+            await query_results.load_query_result_files(tool_context, [result]), []
+        )
+
+    async def test_analytics_agent_input_files_are_restored(self):
+        tool_context = await get_tool_context(InMemoryArtifactService())
+        await query_results.save_query_result(
+            tool_context, "bigquery_query_result", ROWS
+        )
+        previous_files = [{"name": "other.csv", "content": "", "mime_type": "text/csv"}]
+        tool_context.state[query_results.CODE_EXECUTOR_INPUT_FILES_KEY] = previous_files
+        input_files = []
+
+        class FakeAgentTool:
+            def __init__(self, agent):
+                self.agent = agent
+
+            async def run_async(self, args, tool_context):
+                input_files.extend(
+                    tool_context.state[query_results.CODE_EXECUTOR_INPUT_FILES_KEY]
+                )
+                if "fail" in args["request"]:
+                    raise RuntimeError("analytics agent failed")
+                return "done"
+
+        with mock.patch.object(tools, "AgentTool", FakeAgentTool):
+            self.assertEqual(
+                await tools.call_analytics_agent("Plot the sales", tool_context),
+                "done",
+            )
+            with self.assertRaises(RuntimeError):
+                await tools.call_analytics_agent("fail", tool_context)
+        self.assertEqual(
+            [f["name"] for f in input_files],
+            ["other.csv", "bigquery_query_result.parquet"] * 2,
+        )
+        self.assertEqual(
+            tool_context.state[query_results.CODE_EXECUTOR_INPUT_FILES_KEY],
+            previous_files,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Test cases for the sample rows that ChaseSQL runs candidate queries on."""
+
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import chase_db_tools
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sample_database,
+)
+
+ORDERS = pd.DataFrame(
+    {
+        "id": [1, 2, 3],
+        "amount": [1.5, 2.25, 10.0],
+        "tags": [["a"], [], ["b", "c"]],
+    }
+)
+
+
+class TestSampleDatabase(unittest.TestCase):
+    """Test cases for running BigQuery queries on the sample rows."""
+
+    def setUp(self):
+        self.database = sample_database.SampleDatabase({"proj.ds.orders": ORDERS})
+
+    def get_result_signature(self, sql_query):
+        return self.database.get_result_signature(sql_query, "bigquery")
+
+    def test_rows_are_sorted_unless_ordered(self):
+        self.assertEqual(
+            self.get_result_signature(
+                "SELECT id FROM `proj.ds.orders` WHERE amount > 2"
+            ),
+            self.get_result_signature(
+                "SELECT id FROM `proj.ds.orders` WHERE amount >= 2.25 ORDER BY 1 DESC"
+            )[::-1],
+        )
+        self.assertEqual(
+            self.get_result_signature("SELECT id FROM `proj.ds.orders` ORDER BY id"),
+            ((1,), (2,), (3,)),
+        )
+
+    def test_floats_are_rounded(self):
+        self.assertEqual(
+            self.get_result_signature("SELECT AVG(amount) / 3 FROM `proj.ds.orders`"),
+            ((1.527778,),),
+        )
+
+    def test_arrays_are_stored_as_strings(self):
+        self.assertEqual(
+            self.get_result_signature("SELECT tags FROM `proj.ds.orders` WHERE id = 3"),
+            (("['b', 'c']",),),
+        )
+
+    def test_failed_queries_have_no_signature(self):
+        self.assertIsNone(self.get_result_signature("SELECT * FROM `proj.ds.users`"))
+        self.assertIsNone(self.get_result_signature("SELECT FROM WHERE"))
+
+
+class TestGetSampleDatabase(unittest.TestCase):
+    """Test cases for copying the sample rows once per version of the tables."""
+
+    def setUp(self):
+        self.catalog = types.SimpleNamespace(
+            versions={"proj.ds.orders": "1", "proj.ds.users": "1"}
+        )
+        self.get_sample_tables = mock.Mock(
+            side_effect=lambda num_rows, table_ids: {
+                table_id: ORDERS for table_id in table_ids
+            }
+        )
+        for target, value in (
+            ("get_schema_catalog", lambda: self.catalog),
+            ("get_bigquery_sample_tables", self.get_sample_tables),
+        ):
+            patcher = mock.patch.object(chase_db_tools.tools, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, value in (
+            ("sample_tables", {}),
+            ("sample_database", None),
+            ("sample_database_key", None),
+        ):
+            patcher = mock.patch.object(chase_db_tools, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_sample_database(self, sql_query="SELECT id FROM `proj.ds.orders`"):
+        return chase_db_tools.get_sample_database(10, [sql_query, None])
+
+    def test_sample_is_copied_again_for_new_versions(self):
+        database = self.get_sample_database()
+        self.assertIsInstance(database, sample_database.SampleDatabase)
+        self.assertIs(self.get_sample_database(), database)
+        self.catalog.versions = {"proj.ds.orders": "2", "proj.ds.users": "1"}
+        self.assertIsNot(self.get_sample_database(), database)
+        self.assertEqual(self.get_sample_tables.call_count, 2)
+
+    def test_only_the_tables_of_the_queries_are_copied(self):
+        self.get_sample_database()
+        self.get_sample_tables.assert_called_once_with(10, ["proj.ds.orders"])
+        database = self.get_sample_database(
+            "SELECT o.id FROM `proj.ds.orders` o JOIN `proj.ds.users` u USING (id)"
+        )
+        # The rows of `orders` are kept, only `users` is copied.
+        self.get_sample_tables.assert_called_with(10, ["proj.ds.users"])
+        self.assertIsNotNone(
+            database.get_result_signature("SELECT id FROM users", "sqlite")
+        )
+        self.assertIsNone(self.get_sample_database("SELECT FROM WHERE"))
+        self.assertEqual(self.get_sample_tables.call_count, 2)
+
+    def test_errors_are_cached_until_new_versions(self):
+        self.get_sample_tables.side_effect = RuntimeError("quota exceeded")
+        self.assertIsNone(self.get_sample_database())
+        self.assertIsNone(self.get_sample_database())
+        self.assertEqual(self.get_sample_tables.call_count, 1)
+        self.get_sample_tables.side_effect = lambda num_rows, table_ids: {
+            table_id: ORDERS for table_id in table_ids
+        }
+        self.catalog.versions = {"proj.ds.orders": "2"}
+        self.assertIsNotNone(self.get_sample_database())
+
+
+if __name__ == "__main__":
+    unittest.main()
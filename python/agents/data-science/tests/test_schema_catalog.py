@@ -0,0 +1,101 @@
+"""Test cases for the on-disk catalog of the table schemas."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.utils import schema_catalog
+
+
+def get_table(table_id):
+    return {"table_schema": [["id", "INT64"], [f"{table_id}_name", "STRING"]]}
+
+
+class TestSchemaCatalog(unittest.TestCase):
+    """Test cases for refreshing, saving and loading the catalog."""
+
+    def setUp(self):
+        catalog_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(catalog_dir.cleanup)
+        self.catalog_dir = catalog_dir.name
+        patcher = mock.patch.object(
+            schema_catalog, "SCHEMA_CATALOG_DIR", self.catalog_dir
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.get_table = mock.Mock(side_effect=get_table)
+
+    def refresh(self, catalog, versions):
+        return catalog.refresh(lambda: versions, self.get_table)
+
+    def fetched(self):
+        return sorted(call.args[0] for call in self.get_table.call_args_list)
+
+    def test_refresh_fetches_only_new_and_changed_tables(self):
+        catalog = schema_catalog.SchemaCatalog("dataset")
+        self.assertTrue(catalog.is_stale())
+        tables = self.refresh(catalog, {"a": "1", "b": "1", "c": "1"})
+        self.assertEqual(tables, {name: get_table(name) for name in "abc"})
+        self.assertEqual(self.fetched(), ["a", "b", "c"])
+        self.assertFalse(catalog.is_stale())
+
+        self.get_table.reset_mock()
+        tables = self.refresh(catalog, {"a": "1", "b": "2", "d": "1"})
+        self.assertEqual(self.fetched(), ["b", "d"])
+        self.assertEqual(list(tables), ["a", "b", "d"])
+        self.assertEqual(catalog.versions, {"a": "1", "b": "2", "d": "1"})
+
+    def test_catalog_is_loaded_from_disk(self):
+        catalog = schema_catalog.SchemaCatalog("dataset")
+        self.refresh(catalog, {"a": "1", "b": "1"})
+        loaded = schema_catalog.SchemaCatalog("dataset")
+        self.assertEqual(loaded.tables, catalog.tables)
+        self.assertEqual(loaded.versions, catalog.versions)
+        self.assertEqual(loaded.refreshed, catalog.refreshed)
+        # Only the changed tables are fetched after a restart.
+        self.get_table.reset_mock()
+        self.refresh(loaded, {"a": "1", "b": "2"})
+        self.assertEqual(self.fetched(), ["b"])
+        self.assertEqual(schema_catalog.SchemaCatalog("other").tables, {})
+
+    def test_failed_save_keeps_the_previous_catalog(self):
+        catalog = schema_catalog.SchemaCatalog("dataset")
+        self.refresh(catalog, {"a": "1"})
+        with open(catalog.path, encoding="utf-8") as f:
+            saved = f.read()
+        with mock.patch.object(
+            schema_catalog.os, "replace", side_effect=OSError("disk full")
+        ):
+            tables = self.refresh(catalog, {"a": "1", "b": "1"})
+        self.assertEqual(list(tables), ["a", "b"])
+        with open(catalog.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), saved)
+        self.assertEqual(os.listdir(self.catalog_dir), ["dataset.json"])
+
+    def test_unreadable_or_old_catalogs_are_ignored(self):
+        path = os.path.join(self.catalog_dir, "dataset.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"format_version": ')
+        self.assertEqual(schema_catalog.SchemaCatalog("dataset").tables, {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "format_version": schema_catalog.CATALOG_FORMAT_VERSION - 1,
+                    "refreshed": 0.0,
+                    "versions": {"a": "1"},
+                    "tables": {"a": get_table("a")},
+                },
+                f,
+            )
+        catalog = schema_catalog.SchemaCatalog("dataset")
+        self.assertEqual(catalog.tables, {})
+        self.assertIsNone(catalog.refreshed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Test cases for pruning the schema in the NL2SQL prompts."""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.utils import schema_index
+
+
+def table(*columns):
+    return {
+        "table_schema": [(column, "STRING") for column in columns],
+        "example_values": {column: ["x"] for column in columns},
+    }
+
+
+# About 59, 62 and 84 tokens per table, 205 in total.
+SCHEMA = {
+    "proj.ds.customers": table("customer_id", "country", "city", "signup_date"),
+    "proj.ds.orders": table("order_id", "customer_id", "total_amount", "order_date"),
+    "proj.ds.products": table(
+        "product_id", "product_name", "category", "unit_price", "supplier_id", "weight"
+    ),
+}
+QUESTION = "Which countries have the most customers?"
+
+
+def columns(schema):
+    return {
+        table_id: [name for name, _ in context["table_schema"]]
+        for table_id, context in schema.items()
+    }
+
+
+class TestPruneSchema(unittest.TestCase):
+    """Test cases for keeping the relevant tables and columns within a budget."""
+
+    def test_tokenize_splits_names_into_singular_words(self):
+        self.assertEqual(
+            schema_index.tokenize("numSold num_sold countries URLPath"),
+            ["num", "sold", "num", "sold", "country", "url", "path"],
+        )
+
+    def test_schema_within_budget_is_kept_whole(self):
+        self.assertIs(schema_index.prune_schema(SCHEMA, QUESTION, 1000), SCHEMA)
+
+    def test_tables_are_kept_whole_while_they_fit(self):
+        pruned = schema_index.prune_schema(SCHEMA, QUESTION, 150)
+        self.assertEqual(
+            columns(pruned),
+            {
+                "proj.ds.customers": ["customer_id", "country", "city", "signup_date"],
+                "proj.ds.orders": [
+                    "order_id",
+                    "customer_id",
+                    "total_amount",
+                    "order_date",
+                ],
+                # Only the first column, as no other is in the question.
+                "proj.ds.products": ["product_id"],
+            },
+        )
+        self.assertEqual(
+            pruned["proj.ds.products"]["example_values"], {"product_id": ["x"]}
+        )
+
+    def test_tables_that_do_not_fit_keep_their_columns_in_the_question(self):
+        pruned = schema_index.prune_schema(SCHEMA, QUESTION, 100)
+        self.assertEqual(
+            columns(pruned),
+            {
+                "proj.ds.customers": ["customer_id", "country", "city", "signup_date"],
+                "proj.ds.orders": ["order_id", "customer_id"],
+            },
+        )
+        self.assertLessEqual(schema_index.estimate_tokens(str(pruned)), 100)
+
+    def test_most_relevant_table_is_always_kept(self):
+        self.assertEqual(
+            columns(schema_index.prune_schema(SCHEMA, QUESTION, 10)),
+            {"proj.ds.customers": ["customer_id", "country"]},
+        )
+
+    def test_table_list_is_pruned_in_its_order(self):
+        tables = [
+            {"name": "products", "columns": ["product_id", "category", "unit_price"]},
+            {"name": "customers", "columns": ["customer_id", "country"]},
+            {"name": "orders", "columns": ["order_id", "customer_id", "amount"]},
+        ]
+        schema = json.dumps(tables)
+        self.assertIs(schema_index.prune_schema(schema, QUESTION, 1000), schema)
+        budget = schema_index.estimate_tokens(json.dumps(tables[1:]))
+        self.assertEqual(
+            json.loads(schema_index.prune_schema(schema, QUESTION, budget)),
+            tables[1:],
+        )
+
+    def test_other_schemas_are_kept_whole(self):
+        ddl = "CREATE TABLE orders (order_id INT64);"
+        self.assertIs(schema_index.prune_schema(ddl, QUESTION, 1), ddl)
+        self.assertEqual(schema_index.prune_schema({}, QUESTION, 1), {})
+
+    def test_index_is_built_once_per_schema(self):
+        index = schema_index._index_schema(SCHEMA)
+        self.assertIs(schema_index._index_schema(dict(SCHEMA)), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""Test cases for the selection and checks of SQL queries of ChaseSQL."""
+
+import copy
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sample_database,
+    sql_translator,
+)
+
+SqlTranslator = sql_translator.SqlTranslator
+
+SCHEMA = {
+    "proj": {
+        "ds": {
+            "orders": {"id": "INT64", "amount": "FLOAT64"},
+            "users": {"id": "INT64"},
+        }
+    }
+}
+DDL_SCHEMA = [("proj.ds.orders", [("id", "INT64"), ("amount", "FLOAT64")])]
+# The sample has no rows of `users`, so its queries cannot run on the sample.
+SAMPLE_DATABASE = sample_database.SampleDatabase(
+    {"proj.ds.orders": pd.DataFrame({"id": [1, 2, 3], "amount": [1.5, 2.5, 10.0]})}
+)
+
+LARGE_ORDERS = "SELECT id FROM `proj.ds.orders` WHERE amount > 2"
+LARGE_ORDERS_2 = "SELECT id FROM `proj.ds.orders` WHERE amount >= 2.5"
+SMALL_ORDERS = "SELECT id FROM `proj.ds.orders` WHERE amount < 2"
+USERS = "SELECT COUNT(*) FROM `proj.ds.users`"
+UNKNOWN_COLUMN = "SELECT total FROM `proj.ds.orders`"
+
+
+class TestSelectCandidate(unittest.TestCase):
+    """Test cases for selecting among candidate SQL queries."""
+
+    def select_candidate(self, candidates, sample_database=SAMPLE_DATABASE):
+        return SqlTranslator.select_candidate(
+            candidates,
+            sql_dialect="bigquery",
+            db="ds",
+            catalog="proj",
+            schema_dict=SCHEMA,
+            sample_database=sample_database,
+        )
+
+    def test_candidates_with_the_same_results_are_preferred(self):
+        self.assertEqual(
+            self.select_candidate([SMALL_ORDERS, LARGE_ORDERS, LARGE_ORDERS_2]),
+            LARGE_ORDERS,
+        )
+
+    def test_candidates_with_errors_are_skipped(self):
+        self.assertEqual(
+            self.select_candidate([None, UNKNOWN_COLUMN, "not a query", SMALL_ORDERS]),
+            SMALL_ORDERS,
+        )
+
+    def test_first_candidate_if_all_have_errors(self):
+        self.assertEqual(
+            self.select_candidate([UNKNOWN_COLUMN, "not a query"]), UNKNOWN_COLUMN
+        )
+        self.assertIsNone(self.select_candidate([None, None]))
+
+    def test_first_valid_candidate_without_sample_database(self):
+        self.assertEqual(
+            self.select_candidate(
+                [UNKNOWN_COLUMN, SMALL_ORDERS, LARGE_ORDERS, LARGE_ORDERS_2],
+                sample_database=None,
+            ),
+            SMALL_ORDERS,
+        )
+
+    def test_candidates_that_cannot_run_are_not_outvoted(self):
+        # Only half of the candidates ran, and none agree.
+        self.assertEqual(self.select_candidate([USERS, SMALL_ORDERS]), USERS)
+        # Most of the candidates ran.
+        self.assertEqual(
+            self.select_candidate([USERS, SMALL_ORDERS, LARGE_ORDERS]), SMALL_ORDERS
+        )
+        # Some candidates agree.
+        self.assertEqual(
+            self.select_candidate([USERS, USERS, LARGE_ORDERS, LARGE_ORDERS_2]),
+            LARGE_ORDERS,
+        )
+
+
+class TestCaches(unittest.TestCase):
+    """Test cases for processing each schema and SQL query only once."""
+
+    def setUp(self):
+        SqlTranslator.clear_caches()
+        self.addCleanup(SqlTranslator.clear_caches)
+
+    def check_for_errors(self, sql_query, schema_dict=SCHEMA):
+        return SqlTranslator._check_for_errors(
+            sql_query,
+            sql_dialect="bigquery",
+            db="ds",
+            catalog="proj",
+            schema_dict=schema_dict,
+        )
+
+    def test_schema_is_rewritten_once(self):
+        schema_dict = SqlTranslator.rewrite_schema_for_sqlglot(DDL_SCHEMA)
+        self.assertEqual(
+            schema_dict,
+            {"proj": {"ds": {"orders": {"id": "INT64", "amount": "FLOAT64"}}}},
+        )
+        self.assertIs(SqlTranslator.rewrite_schema_for_sqlglot(DDL_SCHEMA), schema_dict)
+        # An equal schema gets the same rewritten schema.
+        self.assertIs(
+            SqlTranslator.rewrite_schema_for_sqlglot(list(DDL_SCHEMA)), schema_dict
+        )
+        self.assertIsNone(SqlTranslator.rewrite_schema_for_sqlglot(None))
+
+    def test_schema_is_hashed_once_per_load(self):
+        # The fingerprint of the database settings, computed once per load.
+        fingerprint = sql_translator.compute_schema_fingerprint(DDL_SCHEMA)
+        with mock.patch.object(
+            sql_translator,
+            "compute_schema_fingerprint",
+            wraps=sql_translator.compute_schema_fingerprint,
+        ) as compute_fingerprint:
+            for _ in range(3):
+                # The state, and its schema, are copied on every turn.
+                schema_dict = SqlTranslator.rewrite_schema_for_sqlglot(
+                    copy.deepcopy(DDL_SCHEMA), fingerprint
+                )
+                self.check_for_errors(LARGE_ORDERS, schema_dict=schema_dict)
+            self.assertEqual(compute_fingerprint.call_count, 0)
+            # Without its fingerprint, a schema is hashed.
+            self.assertIs(
+                SqlTranslator.rewrite_schema_for_sqlglot(copy.deepcopy(DDL_SCHEMA)),
+                schema_dict,
+            )
+            self.assertEqual(compute_fingerprint.call_count, 1)
+
+    def test_query_is_checked_once_whatever_its_whitespace(self):
+        with mock.patch.object(
+            SqlTranslator, "_optimize", wraps=SqlTranslator._optimize
+        ) as optimize:
+            errors, optimized = self.check_for_errors(LARGE_ORDERS)
+            self.assertIsNone(errors)
+            self.assertEqual(
+                self.check_for_errors(
+                    "SELECT id\n  FROM `proj.ds.orders` -- Large orders.\n"
+                    "  WHERE amount > 2"
+                ),
+                (None, optimized),
+            )
+            self.assertEqual(optimize.call_count, 1)
+            # Another schema is another check.
+            self.check_for_errors(LARGE_ORDERS, schema_dict=None)
+            self.assertEqual(optimize.call_count, 2)
+
+    def test_errors_give_positions_in_the_query_as_written(self):
+        errors, _ = self.check_for_errors(UNKNOWN_COLUMN)
+        self.assertIn("Col: 12", errors)
+        errors, sql_query = self.check_for_errors(
+            "SELECT   total FROM `proj.ds.orders`"
+        )
+        self.assertIn("Col: 14", errors)
+        self.assertEqual(sql_query, "SELECT   total FROM `proj.ds.orders`")
+
+    def test_mapping_schema_is_built_once(self):
+        mapping_schema = SqlTranslator._get_mapping_schema(SCHEMA, "bigquery")
+        self.assertIs(
+            SqlTranslator._get_mapping_schema(SCHEMA, "bigquery"), mapping_schema
+        )
+        self.assertIsNot(
+            SqlTranslator._get_mapping_schema(SCHEMA, "sqlite"), mapping_schema
+        )
+        SqlTranslator.clear_caches()
+        self.assertIsNot(
+            SqlTranslator._get_mapping_schema(SCHEMA, "bigquery"), mapping_schema
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,7 @@ from machine_learning_engineering.sub_agents.submission import (
 )
 
 from machine_learning_engineering import prompt
+from machine_learning_engineering.shared_libraries import telemetry
 
 
 def save_state(
@@ -32,9 +33,22 @@ def save_state(
     run_cwd = os.path.join(workspace_dir, task_name)
     with open(os.path.join(run_cwd, "final_state.json"), "w") as f:
         json.dump(callback_context.state.to_dict(), f, indent=2)
+    telemetry.save_summary(callback_context)
     return None
 
 
+def get_global_instruction(
+    context: callback_context_module.ReadonlyContext,
+) -> str:
+    """Gets the global instruction, with the Parquet input files if any."""
+    columnar_inputs = context.state.get("columnar_inputs", [])
+    if not columnar_inputs:
+        return prompt.SYSTEM_INSTRUCTION
+    return prompt.SYSTEM_INSTRUCTION + prompt.COLUMNAR_INPUTS_INSTR.format(
+        columnar_inputs=", ".join(f"`./{path}`" for path in columnar_inputs),
+    )
+
+
 mle_pipeline_agent = agents.SequentialAgent(
     name="mle_pipeline_agent",
     sub_agents=[
@@ -52,7 +66,11 @@ root_agent = agents.Agent(
     model=os.getenv("ROOT_AGENT_GOOGLE_MODEL_NAME"),
     name="mle_frontdoor_agent",
     instruction=prompt.FRONTDOOR_INSTRUCTION,
-    global_instruction=prompt.SYSTEM_INSTRUCTION,
+    global_instruction=get_global_instruction,
     sub_agents=[mle_pipeline_agent],
     generate_content_config=types.GenerateContentConfig(temperature=0.01),
 )
+
+for stage_agent in mle_pipeline_agent.sub_agents:
+    telemetry.instrument_agent(stage_agent, stage=stage_agent.name)
+telemetry.instrument_agent(root_agent, stage=root_agent.name)
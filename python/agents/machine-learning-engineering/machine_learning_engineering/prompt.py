@@ -3,6 +3,12 @@
 SYSTEM_INSTRUCTION = """You are a Machine Learning Engineering Multi Agent System.
 """
 
+COLUMNAR_INPUTS_INSTR = """
+# Columnar input files
+- The CSV input files are also available as Parquet files: {columnar_inputs}.
+- Loading a Parquet file with `pd.read_parquet` is faster than loading the CSV file with `pd.read_csv`, and gives the same data.
+"""
+
 FRONTDOOR_INSTRUCTION = """
 You are a machine learning engineer given a machine learning task for which to engineer a solution.
 
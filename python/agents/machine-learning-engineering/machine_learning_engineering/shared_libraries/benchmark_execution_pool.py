@@ -0,0 +1,101 @@
+"""Measures the speedup of running candidate scripts in the execution pool.
+
+Runs the same candidate scripts on the `california-housing-prices` task, one
+after the other with `code_util.run_python_code`, as the agents did before the
+execution pool, then concurrently in the pool, as the agents of a
+`ParallelAgent` do. Each script trains a different scikit-learn model with
+5-fold cross-validation, as the candidate solutions do. No LLM call is made.
+
+Run from the agent directory, with the environment of the agent, with:
+
+  python -m machine_learning_engineering.shared_libraries.benchmark_execution_pool [num_scripts]
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from machine_learning_engineering.shared_libraries import code_util
+from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import execution_pool
+
+TASK_NAME = "california-housing-prices"
+MODELS = [
+    "RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=1)",
+    "GradientBoostingRegressor(n_estimators=300, random_state=42)",
+    "ExtraTreesRegressor(n_estimators=300, random_state=42, n_jobs=1)",
+    "HistGradientBoostingRegressor(max_iter=300, random_state=42)",
+]
+CANDIDATE_CODE = """
+import numpy as np
+import pandas as pd
+from sklearn import ensemble
+from sklearn.model_selection import cross_val_score
+
+train = pd.read_csv("./input/train.csv")
+X = train.drop(columns=["median_house_value"]).fillna(0)
+y = train["median_house_value"]
+model = ensemble.{model}
+scores = cross_val_score(model, X, y, cv=5, scoring="neg_root_mean_squared_error")
+print(f"Final Validation Performance: {{-np.mean(scores)}}")
+"""
+
+
+def create_workspaces(root: str, num_scripts: int) -> list[str]:
+    """Creates a workspace with the input files of the task for each script."""
+    task_dir = os.path.join(config.CONFIG.data_dir, TASK_NAME)
+    run_cwds = []
+    for i in range(num_scripts):
+        run_cwd = os.path.join(root, str(i))
+        shutil.copytree(task_dir, os.path.join(run_cwd, "input"))
+        run_cwds.append(run_cwd)
+    return run_cwds
+
+
+def get_code(i: int) -> str:
+    return CANDIDATE_CODE.format(model=MODELS[i % len(MODELS)])
+
+
+def run_sequentially(run_cwds: list[str]) -> list[dict]:
+    return [
+        code_util.run_python_code(get_code(i), run_cwd, "candidate.py", 600)
+        for i, run_cwd in enumerate(run_cwds)
+    ]
+
+
+async def run_in_pool(run_cwds: list[str], max_workers: int) -> list[dict]:
+    pool = execution_pool.ExecutionPool(max_workers=max_workers, num_threads=1)
+    return await asyncio.gather(
+        *[
+            pool.run(get_code(i), run_cwd, "candidate.py", 600)
+            for i, run_cwd in enumerate(run_cwds)
+        ]
+    )
+
+
+def main(num_scripts: int) -> None:
+    max_workers = os.cpu_count() or 1
+    print(f"{num_scripts} scripts, {max_workers} CPUs")
+    print("run in       | wall-clock (s) | speedup")
+    with tempfile.TemporaryDirectory() as root:
+        run_cwds = create_workspaces(root, num_scripts)
+        start = time.time()
+        sequential_results = run_sequentially(run_cwds)
+        sequential_time = time.time() - start
+        start = time.time()
+        pool_results = asyncio.run(run_in_pool(run_cwds, max_workers))
+        pool_time = time.time() - start
+    for results in (sequential_results, pool_results):
+        for result in results:
+            assert result["returncode"] == 0, result["stderr"]
+    for sequential_result, pool_result in zip(sequential_results, pool_results):
+        assert sequential_result["stdout"] == pool_result["stdout"]
+    print(f"sequence     | {sequential_time:14.1f} | {1:7.1f}")
+    print(f"pool         | {pool_time:14.1f} | {sequential_time / pool_time:7.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,78 @@
+"""Measures the startup latency of the scripts in the warm worker.
+
+Runs the same short script on the `california-housing-prices` task, which
+imports pandas, numpy and scikit-learn and reads the training data, as the
+scripts of the debug rounds do, in new Python processes and in processes forked
+from the warm worker. No LLM call is made.
+
+Run from the agent directory, with the environment of the agent, with:
+
+  python -m machine_learning_engineering.shared_libraries.benchmark_warm_worker [num_runs]
+"""
+
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import execution_pool
+
+TASK_NAME = "california-housing-prices"
+SCRIPT_CODE = """
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+train = pd.read_csv("./input/train.csv")
+X_train, X_valid = train_test_split(train, test_size=0.2, random_state=42)
+print(X_train.shape, X_valid.shape, np.round(train["median_income"].mean(), 4))
+"""
+
+
+async def measure(pool: execution_pool.ExecutionPool, run_cwd: str, num_runs: int):
+    """Returns the latencies of the runs of the script, and its output."""
+    latencies = []
+    stdout = None
+    for i in range(num_runs):
+        start = time.time()
+        result = await pool.run(SCRIPT_CODE, run_cwd, f"script{i}.py", 600)
+        latencies.append(time.time() - start)
+        assert result["returncode"] == 0, result["stderr"]
+        assert stdout in (None, result["stdout"])
+        stdout = result["stdout"]
+    return latencies, stdout
+
+
+async def main(num_runs: int) -> None:
+    task_dir = os.path.abspath(os.path.join(config.CONFIG.data_dir, TASK_NAME))
+    with tempfile.TemporaryDirectory() as run_cwd:
+        shutil.copytree(task_dir, os.path.join(run_cwd, "input"))
+        pool = execution_pool.ExecutionPool(max_workers=1)
+        cold_latencies, cold_stdout = await measure(pool, run_cwd, num_runs)
+        pool = execution_pool.ExecutionPool(
+            max_workers=1, use_warm_worker=True, preload_dir=task_dir
+        )
+        start = time.time()
+        await pool.start_warm_worker()
+        start_time = time.time() - start
+        warm_latencies, warm_stdout = await measure(pool, run_cwd, num_runs)
+        await pool.close()
+    assert cold_stdout == warm_stdout, "The outputs differ."
+    print(f"{num_runs} runs, warm worker started in {start_time:.2f}s")
+    print("run in       | median (ms) | max (ms)")
+    for name, latencies in (
+        ("process", cold_latencies),
+        ("warm worker", warm_latencies),
+    ):
+        print(
+            f"{name:12} | {statistics.median(latencies) * 1e3:11.0f} |"
+            f" {max(latencies) * 1e3:8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
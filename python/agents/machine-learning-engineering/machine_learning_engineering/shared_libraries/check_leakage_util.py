@@ -128,7 +128,7 @@ def check_extract_status(
     return None
 
 
-def replace_leakage_code(
+async def replace_leakage_code(
     callback_context: callback_context_module.CallbackContext,
     llm_response: llm_response_module.LlmResponse,
     prefix: str,
@@ -151,7 +151,7 @@ def replace_leakage_code(
     code = callback_context.state.get(code_state_key, "")
     refined_code = code.replace(code_block, refined_code_block)
     callback_context.state[code_state_key] = refined_code
-    code_util.evaluate_code(callback_context=callback_context)
+    await code_util.evaluate_code(callback_context=callback_context)
     return None
 
 
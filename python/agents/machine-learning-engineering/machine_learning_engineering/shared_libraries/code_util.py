@@ -1,12 +1,17 @@
 """Code related utility functions."""
 
 from typing import Any
+import asyncio
 import subprocess
 import os
 import time
 
 from google.adk.agents import callback_context as callback_context_module
 
+from machine_learning_engineering.shared_libraries import execution_pool
+from machine_learning_engineering.shared_libraries import result_cache
+from machine_learning_engineering.shared_libraries import telemetry
+
 
 class Result:
     def __init__(self, returncode, stdout, stderr):
@@ -188,10 +193,63 @@ def get_run_code_condition(
     return False
 
 
-def evaluate_code(
+def _increment_state(
     callback_context: callback_context_module.CallbackContext,
+    key: str,
 ) -> None:
-    """Evaluates the given code."""
+    """Increments a counter in the state."""
+    callback_context.state[key] = callback_context.state.get(key, 0) + 1
+
+
+async def _run_and_score(
+    callback_context: callback_context_module.CallbackContext,
+    agent_name: str,
+    raw_code: str,
+    run_cwd: str,
+    py_filepath: str,
+    exec_timeout: int,
+    lower: bool,
+) -> dict[str, Any]:
+    """Runs the code in the execution pool, and gets its score."""
+    data_dir = callback_context.state.get("data_dir", "")
+    task_name = callback_context.state.get("task_name", "")
+    pool = execution_pool.get_execution_pool(
+        max_workers=callback_context.state.get("exec_max_workers", 0),
+        num_threads=callback_context.state.get("exec_num_threads", 0),
+        memory_limit_mb=callback_context.state.get("exec_memory_limit_mb", 0),
+        cpu_time_limit=callback_context.state.get("exec_cpu_time_limit", 0),
+        use_warm_worker=callback_context.state.get("exec_use_warm_worker", False),
+        preload_dir=os.path.abspath(os.path.join(data_dir, task_name)),
+    )
+    result_dict = await pool.run(
+        code_text=raw_code,
+        run_cwd=run_cwd,
+        py_filepath=py_filepath,
+        exec_timeout=exec_timeout,
+    )
+    if agent_name.startswith("ablation"):
+        if result_dict["returncode"] == 0:
+            ablation_result = result_dict.get("stdout", "None")
+        else:
+            ablation_result = "None"
+        result_dict["ablation_result"] = ablation_result
+    else:
+        if result_dict.get("returncode", 1) == 0:
+            try:
+                score = extract_performance_from_text(result_dict.get("stdout", ""))
+                score = float(score)
+            except:
+                score = 1e9 if lower else 0
+        else:
+            score = 1e9 if lower else 0
+        result_dict["score"] = score
+    return result_dict
+
+
+async def evaluate_code(
+    callback_context: callback_context_module.CallbackContext,
+) -> None:
+    """Evaluates the given code, in the execution pool."""
     lower = callback_context.state.get("lower", True)
     exec_timeout = callback_context.state.get("exec_timeout", 1800)
     agent_name = callback_context.agent_name
@@ -236,28 +294,73 @@ def evaluate_code(
         workspace_dir = callback_context.state.get("workspace_dir", "")
         task_name = callback_context.state.get("task_name", "")
         run_cwd = os.path.join(workspace_dir, task_name, task_id)
-        result_dict = run_python_code(
-            code_text=raw_code,
-            run_cwd=run_cwd,
+        start_time = time.time()
+        cache, cache_key = None, None
+        if callback_context.state.get("exec_use_cache", False):
+            cache = result_cache.get_result_cache(
+                callback_context.state.get("exec_cache_dir", "")
+            )
+            # The result of a script is either a score or an ablation result.
+            is_ablation = agent_name.startswith("ablation")
+            state = callback_context.state
+            # Hashing the new input files blocks, so it is done in a thread.
+            cache_key = await asyncio.to_thread(
+                cache.get_key,
+                code_text=raw_code,
+                input_dir=os.path.join(run_cwd, "input"),
+                seed=callback_context.state.get("seed", 0),
+                variant="ablation" if is_ablation else f"lower={lower}",
+                # The output of a run may change with its limits.
+                settings={
+                    "exec_timeout": exec_timeout,
+                    "exec_num_threads": state.get("exec_num_threads", 0),
+                    "exec_memory_limit_mb": state.get("exec_memory_limit_mb", 0),
+                    "exec_cpu_time_limit": state.get("exec_cpu_time_limit", 0),
+                },
+                source_dir=os.path.join(state.get("data_dir", ""), task_name),
+            )
+        result_dict = None
+        cached = False
+        # The submission script is always run, for the files it writes.
+        if cache is not None and (
+            callback_context.state.get("exec_cache_bypass", False)
+            or agent_name.startswith("submission")
+        ):
+            cache.bypass()
+            _increment_state(callback_context, "exec_cache_bypassed")
+        elif cache is not None:
+            result_dict = cache.get(cache_key)
+            cached = result_dict is not None
+            _increment_state(
+                callback_context,
+                "exec_cache_misses" if result_dict is None else "exec_cache_hits",
+            )
+        if result_dict is None:
+            result_dict = await _run_and_score(
+                callback_context=callback_context,
+                agent_name=agent_name,
+                raw_code=raw_code,
+                run_cwd=run_cwd,
+                py_filepath=py_filepath,
+                exec_timeout=exec_timeout,
+                lower=lower,
+            )
+            # Failed runs are not stored, as they may not fail again, e.g. when
+            # they ran out of memory or time next to other scripts.
+            if cache is not None and result_dict["returncode"] == 0:
+                cache.put(cache_key, result_dict)
+        telemetry.record_event(
+            callback_context,
+            "script",
+            start=start_time,
+            end=time.time(),
             py_filepath=py_filepath,
-            exec_timeout=exec_timeout,
+            cached=cached,
+            returncode=result_dict["returncode"],
+            wall_time=result_dict["execution_time"],
+            cpu_time=result_dict.get("cpu_time"),
+            peak_rss_mb=result_dict.get("peak_rss_mb"),
         )
-        if agent_name.startswith("ablation"):
-            if result_dict["returncode"] == 0:
-                ablation_result = result_dict.get("stdout", "None")
-            else:
-                ablation_result = "None"
-            result_dict["ablation_result"] = ablation_result
-        else:
-            if result_dict.get("returncode", 1) == 0:
-                try:
-                    score = extract_performance_from_text(result_dict.get("stdout", ""))
-                    score = float(score)
-                except:
-                    score = 1e9 if lower else 0
-            else:
-                score = 1e9 if lower else 0
-            result_dict["score"] = score
     else:
         result_dict = {}
     code_execution_result_state_key = get_code_execution_result_state_key(
@@ -23,6 +23,14 @@ class DefaultConfig:
         42  # The random seed value used to ensure reproducibility of experiments.
     )
     exec_timeout: int = 600  # The maximum time in seconds allowed to complete the task.
+    exec_max_workers: int = 0  # The maximum number of scripts run concurrently, or 0 for the number of CPUs.
+    exec_num_threads: int = 0  # The number of threads of the numerical libraries (OpenMP, BLAS) of each script, or 0 to leave them unchanged.
+    exec_memory_limit_mb: int = 0  # The maximum memory in MB of each script, or 0 for no limit.
+    exec_cpu_time_limit: int = 0  # The maximum CPU time in seconds of each script, or 0 for no limit.
+    exec_use_warm_worker: bool = True  # Fork the scripts from a worker that has already imported pandas, numpy and scikit-learn, and read the input files of the task.
+    exec_use_cache: bool = True  # Reuse the stored result of a script run before with the same code, input files and seed.
+    exec_cache_bypass: bool = False  # Run the scripts even if their result is stored, and store the new results.
+    exec_cache_dir: str = "./machine_learning_engineering/workspace/.exec_cache/"  # Directory where the results of the scripts are stored.
     num_solutions: int = 2  # The number of different solutions to generate or attempt for the given task.
     num_model_candidates: int = 2  # The number of different model architectures or hyperparameter sets to consider as candidates.
     max_retry: int = 10  # The maximum number of times to retry a failed operation.
@@ -38,6 +46,9 @@ class DefaultConfig:
     )
     use_data_leakage_checker: bool = False  # Enable (`True`) or disable (`False`) a check for data leakage in the machine learning pipeline.
     use_data_usage_checker: bool = False  # Enable (`True`) or disable (`False`) a check for how data is being used, potentially for compliance or best practices.
+    use_columnar_inputs: bool = False  # Convert the CSV input files to Parquet once (requires pyarrow), and tell the agents that scripts can read them with `pd.read_parquet`.
+    use_private_inputs: bool = False  # Give each workspace its own copies of the input files, so that a script that writes one does not change the other workspaces. Otherwise, where the file system cannot clone files, the workspaces share read-only links to the input files.
+    use_telemetry: bool = True  # Write a timeline of the LLM calls, scripts and rollbacks of each run, and its summary per stage, to `<workspace_dir>/<task_name>/telemetry/`.
 
 
 CONFIG = DefaultConfig()
@@ -2,6 +2,7 @@
 
 from typing import Optional
 import functools
+import time
 
 from google.adk import agents
 from google.adk.agents import callback_context as callback_context_module
@@ -15,6 +16,7 @@ from machine_learning_engineering.shared_libraries import code_util
 from machine_learning_engineering.shared_libraries import common_util
 from machine_learning_engineering.shared_libraries import check_leakage_util
 from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import telemetry
 
 
 def check_rollback(
@@ -33,6 +35,8 @@ def check_rollback(
     if result_dict.get("returncode", 1) == 1:
         # Rollback is needed
         callback_context.state[code_execution_result_state_key] = {}
+        now = time.time()
+        telemetry.record_event(callback_context, "rollback", start=now, end=now)
     return None
 
 
@@ -162,7 +166,7 @@ def get_debug_agent_instruction(
     )
 
 
-def get_code_from_response(
+async def get_code_from_response(
     callback_context: callback_context_module.CallbackContext,
     llm_response: llm_response_module.LlmResponse,
     do_eval: bool = True,
@@ -201,7 +205,7 @@ def get_code_from_response(
         new_code = code
     callback_context.state[code_state_key] = new_code
     if do_eval:
-        code_util.evaluate_code(callback_context=callback_context)
+        await code_util.evaluate_code(callback_context=callback_context)
     return None
 
 
@@ -0,0 +1,395 @@
+"""Pool of processes that run the Python scripts of the agents.
+
+Each script runs in its own process without blocking the event loop, so that
+the scripts of the agents of a `ParallelAgent`, like the `num_solutions`
+solutions, run concurrently. The number of concurrent scripts is bounded, and
+each script runs with caps on its threads, CPU time and memory.
+
+Scripts run in new Python processes, or in processes forked from a warm worker
+that has already imported the libraries and read the input files of the task
+(see `warm_worker`).
+"""
+
+from typing import Any, Callable, Optional
+import asyncio
+import codecs
+import contextlib
+import functools
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+import weakref
+
+from machine_learning_engineering.shared_libraries import warm_worker
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where no caps are applied.
+    resource = None
+
+# Environment variables of the thread pools of the numerical libraries.
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+# Size of the chunks read from the outputs of the scripts.
+READ_CHUNK_SIZE = 64 * 1024
+
+OutputCallback = Callable[[str, str], None]
+
+logger = logging.getLogger(__name__)
+
+
+class _SubprocessJob:
+    """A script run in a new Python process."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.stdout = process.stdout
+        self.stderr = process.stderr
+        # Not measured: the process is reaped by the event loop.
+        self.resource_usage: Optional[dict[str, float]] = None
+
+    async def wait(self) -> int:
+        return await self.process.wait()
+
+    def kill(self) -> None:
+        """Kills the script and the processes it started."""
+        if self.process.returncode is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except ProcessLookupError:
+            pass
+
+
+class _MeasuredSubprocessJob(_SubprocessJob):
+    """A script run in a new Python process, reaped by a thread to measure it.
+
+    The thread waits for the process with `os.wait4`, which gives its CPU time
+    and peak RSS, and the event loop reads its outputs.
+    """
+
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+    ):
+        self.process = process
+        self.stdout = stdout
+        self.stderr = stderr
+        self.resource_usage = None
+        loop = asyncio.get_running_loop()
+        self._returncode: asyncio.Future[int] = loop.create_future()
+        threading.Thread(target=self._reap, args=(loop,), daemon=True).start()
+
+    def _reap(self, loop: asyncio.AbstractEventLoop) -> None:
+        _, status, rusage = os.wait4(self.process.pid, 0)
+        self.resource_usage = {
+            "cpu_time": rusage.ru_utime + rusage.ru_stime,
+            "peak_rss_mb": rusage.ru_maxrss / 1024,
+        }
+        # Also keeps `Popen` from waiting for the pid, which may be reused.
+        self.process.returncode = os.waitstatus_to_exitcode(status)
+        with contextlib.suppress(RuntimeError):  # The event loop is closed.
+            loop.call_soon_threadsafe(self._set_returncode)
+
+    def _set_returncode(self) -> None:
+        if not self._returncode.done():
+            self._returncode.set_result(self.process.returncode)
+
+    async def wait(self) -> int:
+        # Shielded, so that a cancelled waiter does not cancel the others.
+        return await asyncio.shield(self._returncode)
+
+
+class ExecutionPool:
+    """Runs Python scripts in subprocesses, at most `max_workers` at a time."""
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        num_threads: int = 0,
+        memory_limit_mb: int = 0,
+        cpu_time_limit: int = 0,
+        use_warm_worker: bool = False,
+        preload_dir: Optional[str] = None,
+    ):
+        """Initializes the pool.
+
+        Args:
+            max_workers: The maximum number of scripts run concurrently, or 0
+              for the number of CPUs.
+            num_threads: The number of threads of the numerical libraries of
+              each script, or 0 to leave them unchanged.
+            memory_limit_mb: The maximum address space of each script in MB,
+              or 0 for no limit.
+            cpu_time_limit: The maximum CPU time of each script in seconds, or
+              0 for no limit.
+            use_warm_worker: Whether to fork the scripts from a warm worker,
+              where supported. The memory limit then includes the memory of
+              the preloaded libraries.
+            preload_dir: The directory of the input files that the warm worker
+              reads once.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.num_threads = num_threads
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_time_limit = cpu_time_limit
+        self.use_warm_worker = use_warm_worker and warm_worker.is_supported()
+        self.preload_dir = preload_dir
+        # Semaphores and warm workers are bound to the event loop they are used
+        # in.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._workers: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, warm_worker.WarmWorker
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+        return self._semaphores[loop]
+
+    def _get_env(self) -> dict[str, str]:
+        env = dict(os.environ)
+        if self.num_threads > 0:
+            for name in THREAD_ENV_VARS:
+                env[name] = str(self.num_threads)
+        return env
+
+    def _set_limits(self) -> None:
+        """Sets the resource limits of a script, in its process before exec."""
+        if resource is None:
+            return
+        if self.memory_limit_mb > 0:
+            limit = self.memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if self.cpu_time_limit > 0:
+            resource.setrlimit(
+                resource.RLIMIT_CPU, (self.cpu_time_limit, self.cpu_time_limit)
+            )
+
+    def _get_worker(self) -> warm_worker.WarmWorker:
+        loop = asyncio.get_running_loop()
+        worker = self._workers.get(loop)
+        if worker is None or worker.stopped:
+            worker = warm_worker.WarmWorker(self.preload_dir, self._get_env())
+            self._workers[loop] = worker
+        return worker
+
+    async def start_warm_worker(self) -> None:
+        """Starts the warm worker ahead of the first script, if it is used."""
+        if not self.use_warm_worker:
+            return
+        try:
+            await self._get_worker().start()
+        except (OSError, TimeoutError) as e:
+            logger.warning("Running scripts without a warm worker: %s", e)
+            self.use_warm_worker = False
+
+    async def close(self) -> None:
+        """Stops the warm worker of the event loop, if any."""
+        worker = self._workers.pop(asyncio.get_running_loop(), None)
+        if worker is not None:
+            await worker.close()
+
+    async def _start_job(self, run_cwd: str, py_filepath: str):
+        """Starts a script in the warm worker, or else in a new process."""
+        if self.use_warm_worker:
+            await self.start_warm_worker()
+        if self.use_warm_worker:
+            try:
+                return await self._get_worker().run(
+                    run_cwd,
+                    py_filepath,
+                    memory_limit_mb=self.memory_limit_mb,
+                    cpu_time_limit=self.cpu_time_limit,
+                )
+            except OSError as e:
+                logger.warning("Running a script without the warm worker: %s", e)
+        if hasattr(os, "wait4"):
+            return await self._start_measured_process(run_cwd, py_filepath)
+        process = await asyncio.create_subprocess_exec(
+            "python",
+            py_filepath,
+            cwd=run_cwd,
+            env=self._get_env(),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            preexec_fn=self._set_limits if resource is not None else None,
+            start_new_session=True,
+        )
+        return _SubprocessJob(process)
+
+    async def _start_measured_process(
+        self, run_cwd: str, py_filepath: str
+    ) -> _MeasuredSubprocessJob:
+        """Starts a script in a new process, reaped by a thread to measure it."""
+        loop = asyncio.get_running_loop()
+        process = subprocess.Popen(
+            ["python", py_filepath],
+            cwd=run_cwd,
+            env=self._get_env(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=self._set_limits,
+            start_new_session=True,
+        )
+        job = _MeasuredSubprocessJob(
+            process, asyncio.StreamReader(), asyncio.StreamReader()
+        )
+        try:
+            for pipe, stream in (
+                (process.stdout, job.stdout),
+                (process.stderr, job.stderr),
+            ):
+                await loop.connect_read_pipe(
+                    functools.partial(asyncio.StreamReaderProtocol, stream), pipe
+                )
+        except BaseException:
+            job.kill()
+            raise
+        return job
+
+    async def _read_stream(
+        self,
+        stream: asyncio.StreamReader,
+        name: str,
+        chunks: list[str],
+        on_output: Optional[OutputCallback],
+    ) -> None:
+        """Reads an output of a script as it is written."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            data = await stream.read(READ_CHUNK_SIZE)
+            text = decoder.decode(data, final=not data)
+            if text:
+                chunks.append(text)
+                if on_output is not None:
+                    on_output(name, text)
+            if not data:
+                return
+
+    async def run(
+        self,
+        code_text: str,
+        run_cwd: str,
+        py_filepath: str,
+        exec_timeout: int,
+        on_output: Optional[OutputCallback] = None,
+    ) -> dict[str, Any]:
+        """Runs a Python script, once a worker of the pool is free.
+
+        Args:
+            code_text: The code of the script.
+            run_cwd: The directory the script is written to and run in.
+            py_filepath: The file name of the script, relative to `run_cwd`.
+            exec_timeout: The maximum time in seconds the script can run.
+            on_output: A function called with the name of the stream, "stdout"
+              or "stderr", and the text, as the script writes its outputs.
+
+        Returns:
+            The result, as `code_util.run_python_code`: the return code, the
+            outputs and the execution time of the script, and its CPU time in
+            seconds and peak RSS in MB, or None where they cannot be measured
+            (on Windows, or when the script could not be started). The outputs written before a timeout are kept. If the calling
+            task is cancelled, the script is killed.
+        """
+        async with self._get_semaphore():
+            return await self._run(
+                code_text, run_cwd, py_filepath, exec_timeout, on_output
+            )
+
+    async def _run(
+        self,
+        code_text: str,
+        run_cwd: str,
+        py_filepath: str,
+        exec_timeout: int,
+        on_output: Optional[OutputCallback],
+    ) -> dict[str, Any]:
+        start_time = time.time()
+        args = ["python", py_filepath]
+        stdout: list[str] = []
+        stderr: list[str] = []
+        try:
+            with open(os.path.join(run_cwd, py_filepath), "w", encoding="utf-8") as f:
+                f.write(code_text)
+            job = await self._start_job(run_cwd, py_filepath)
+        except Exception as e:
+            return {
+                "returncode": 1,
+                "stdout": "",
+                "stderr": str(e),
+                "execution_time": time.time() - start_time,
+                "cpu_time": None,
+                "peak_rss_mb": None,
+            }
+        try:
+            async with asyncio.timeout(exec_timeout):
+                await asyncio.gather(
+                    self._read_stream(job.stdout, "stdout", stdout, on_output),
+                    self._read_stream(job.stderr, "stderr", stderr, on_output),
+                    job.wait(),
+                )
+            returncode = await job.wait()
+            if returncode < 0:
+                stderr.append(
+                    f"\nProcess killed by signal {signal.Signals(-returncode).name}."
+                )
+        except TimeoutError:
+            job.kill()
+            with contextlib.suppress(ConnectionError):
+                await job.wait()
+            returncode = 1
+            stderr = [str(subprocess.TimeoutExpired(args, exec_timeout))]
+        except ConnectionError as e:
+            returncode = 1
+            stderr.append(f"\n{e}")
+        finally:
+            # Also kills the script when the calling task is cancelled.
+            job.kill()
+        resource_usage = job.resource_usage or {}
+        return {
+            "returncode": returncode,
+            "stdout": "".join(stdout),
+            "stderr": "".join(stderr),
+            "execution_time": time.time() - start_time,
+            "cpu_time": resource_usage.get("cpu_time"),
+            "peak_rss_mb": resource_usage.get("peak_rss_mb"),
+        }
+
+
+@functools.cache
+def get_execution_pool(
+    max_workers: int = 0,
+    num_threads: int = 0,
+    memory_limit_mb: int = 0,
+    cpu_time_limit: int = 0,
+    use_warm_worker: bool = False,
+    preload_dir: Optional[str] = None,
+) -> ExecutionPool:
+    """Returns the pool with the given settings, shared by all the agents."""
+    return ExecutionPool(
+        max_workers=max_workers,
+        num_threads=num_threads,
+        memory_limit_mb=memory_limit_mb,
+        cpu_time_limit=cpu_time_limit,
+        use_warm_worker=use_warm_worker,
+        preload_dir=preload_dir,
+    )
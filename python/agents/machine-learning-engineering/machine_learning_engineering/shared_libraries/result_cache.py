@@ -0,0 +1,159 @@
+"""Persistent cache of the results of the scripts of the agents.
+
+The pipeline often runs the same script on the same inputs again: after a
+rollback of the debug loop, in the data usage check, or when a session is
+resumed. The results are stored on disk, keyed by the hash of the code, of the
+digests of the input files, of the seed, of the settings of the run and of the
+Python version, so that the same run returns the stored result instantly.
+"""
+
+from typing import Any, Optional
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# Version of the format of the entries, part of their key.
+FORMAT_VERSION = 2
+
+
+class ResultCache:
+    """Results of scripts, stored as one JSON file per key in a directory."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        # Digests of the input files, by device, inode, size and modification
+        # time, so that the links to a file share its digest.
+        self._digests: dict[tuple[int, int, int, int], str] = {}
+
+    def _file_digest(self, path: str, source_path: Optional[str] = None) -> str:
+        """Returns the digest of a file, hashing it once per version.
+
+        A file with the size and modification time of `source_path`, the file
+        it was cloned or copied from, has the digest of that file.
+        """
+        stat = os.stat(path)
+        if source_path is not None:
+            try:
+                source_stat = os.stat(source_path)
+            except OSError:
+                source_stat = None
+            if source_stat is not None and (
+                source_stat.st_size,
+                source_stat.st_mtime_ns,
+            ) == (stat.st_size, stat.st_mtime_ns):
+                path, stat = source_path, source_stat
+        file_key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(file_key)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            with self._lock:
+                self._digests[file_key] = digest
+        return digest
+
+    def get_key(
+        self,
+        code_text: str,
+        input_dir: str,
+        seed: int,
+        variant: str = "",
+        settings: Optional[dict[str, Any]] = None,
+        source_dir: Optional[str] = None,
+    ) -> str:
+        """Returns the key of the run of a script.
+
+        The input files are hashed, so this blocks: call it from a thread in
+        async code.
+
+        Args:
+            code_text: The code of the script.
+            input_dir: The directory of the input files of the script.
+            seed: The random seed of the run.
+            variant: How the result is interpreted, e.g. as a score or as an
+              ablation result.
+            settings: The settings the result depends on, e.g. the timeout and
+              the resource limits of the run.
+            source_dir: The directory the input files were cloned, linked or
+              copied from, whose files are hashed instead of their unchanged
+              copies, once for all the workspaces.
+        """
+        inputs = []
+        for root, _, files in os.walk(input_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, input_dir)
+                source_path = (
+                    None if source_dir is None else os.path.join(source_dir, relpath)
+                )
+                inputs.append((relpath, self._file_digest(path, source_path)))
+        key = json.dumps(
+            {
+                "format_version": FORMAT_VERSION,
+                "code": code_text,
+                "inputs": sorted(inputs),
+                "seed": seed,
+                "variant": variant,
+                "settings": settings or {},
+                "python_version": sys.version,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Returns the stored result of a run, or None, and counts the lookup."""
+        try:
+            with open(self._get_path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        """Stores the result of a run, atomically."""
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def bypass(self) -> None:
+        """Counts a run that did not look up the cache."""
+        with self._lock:
+            self.bypassed += 1
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+            }
+
+
+@functools.cache
+def get_result_cache(cache_dir: str) -> ResultCache:
+    """Returns the cache of a directory, shared by all the agents."""
+    return ResultCache(os.path.abspath(cache_dir))
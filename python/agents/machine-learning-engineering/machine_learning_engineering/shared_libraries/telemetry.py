@@ -0,0 +1,227 @@
+"""Telemetry of the stages of a run of the agents.
+
+The LLM calls of the agents, the runs of their scripts and the rollbacks of
+the debug loops are written as events, one JSON line each, to a timeline file
+per run (per invocation) in `<workspace_dir>/<task_name>/telemetry/`. At the
+end of the run, the timeline is summarized per stage and per agent, to see
+where the time of a run goes and tune `exec_timeout`, `max_debug_round` and the
+parallelism.
+
+Each event has its `type` ("llm", "script" or "rollback"), the `agent` and the
+`stage` it belongs to (the sub-agent of the pipeline, like
+"initialization_agent"), and its `start` and `end` times.
+"""
+
+from typing import Any, Optional
+import collections
+import json
+import os
+import time
+
+from google.adk import agents
+from google.adk.agents import callback_context as callback_context_module
+from google.adk.models import llm_request as llm_request_module
+from google.adk.models import llm_response as llm_response_module
+
+from machine_learning_engineering.shared_libraries import config
+
+# Stages of the agents, by name.
+_STAGES: dict[str, str] = {}
+# Start times of the pending LLM calls, by invocation and agent.
+_LLM_START_TIMES: dict[tuple[str, str], float] = {}
+
+
+def _is_enabled(context: callback_context_module.ReadonlyContext) -> bool:
+    return context.state.get("use_telemetry", config.CONFIG.use_telemetry)
+
+
+def get_telemetry_dir(context: callback_context_module.ReadonlyContext) -> str:
+    """Gets the directory of the timelines of the task."""
+    workspace_dir = context.state.get("workspace_dir", config.CONFIG.workspace_dir)
+    task_name = context.state.get("task_name", config.CONFIG.task_name)
+    return os.path.join(workspace_dir, task_name, "telemetry")
+
+
+def get_timeline_path(context: callback_context_module.ReadonlyContext) -> str:
+    """Gets the path of the timeline of the current run."""
+    return os.path.join(get_telemetry_dir(context), f"{context.invocation_id}.jsonl")
+
+
+def record_event(
+    context: callback_context_module.ReadonlyContext,
+    event_type: str,
+    start: float,
+    end: float,
+    **fields: Any,
+) -> None:
+    """Appends an event to the timeline of the current run."""
+    if not _is_enabled(context):
+        return
+    event = {
+        "type": event_type,
+        "agent": context.agent_name,
+        "stage": _STAGES.get(context.agent_name, context.agent_name),
+        "start": start,
+        "end": end,
+        **fields,
+    }
+    path = get_timeline_path(context)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def _start_llm_call(
+    callback_context: callback_context_module.CallbackContext,
+    llm_request: llm_request_module.LlmRequest,
+) -> Optional[llm_response_module.LlmResponse]:
+    """Records the start time of an LLM call."""
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    _LLM_START_TIMES[key] = time.time()
+    return None
+
+
+def _end_llm_call(
+    callback_context: callback_context_module.CallbackContext,
+    llm_response: llm_response_module.LlmResponse,
+) -> Optional[llm_response_module.LlmResponse]:
+    """Records an LLM call, with its latency and tokens."""
+    end = time.time()
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    start = _LLM_START_TIMES.pop(key, end)
+    usage = llm_response.usage_metadata
+    record_event(
+        callback_context,
+        "llm",
+        start=start,
+        end=end,
+        prompt_tokens=(usage and usage.prompt_token_count) or 0,
+        output_tokens=(usage and usage.candidates_token_count) or 0,
+        thoughts_tokens=(usage and usage.thoughts_token_count) or 0,
+    )
+    return None
+
+
+def _as_list(callback: Any) -> list[Any]:
+    if callback is None:
+        return []
+    if isinstance(callback, list):
+        return callback
+    return [callback]
+
+
+def instrument_agent(agent: agents.BaseAgent, stage: str) -> None:
+    """Records the LLM calls of an agent and of its sub-agents, as a stage.
+
+    The start time of a call is recorded after the other `before_model`
+    callbacks, which may skip the call, and the call is recorded before the
+    other `after_model` callbacks, which may run the code of the response.
+    Agents that are already instrumented keep their stage.
+    """
+    if agent.name in _STAGES:
+        return
+    _STAGES[agent.name] = stage
+    if isinstance(agent, agents.LlmAgent):
+        agent.before_model_callback = _as_list(agent.before_model_callback) + [
+            _start_llm_call
+        ]
+        agent.after_model_callback = [_end_llm_call] + _as_list(
+            agent.after_model_callback
+        )
+    for sub_agent in agent.sub_agents:
+        instrument_agent(sub_agent, stage)
+
+
+def _new_totals() -> dict[str, Any]:
+    return {
+        "wall_time": 0.0,
+        "llm_calls": 0,
+        "llm_latency": 0.0,
+        "prompt_tokens": 0,
+        "output_tokens": 0,
+        "thoughts_tokens": 0,
+        "scripts": 0,
+        "cached_scripts": 0,
+        "failed_scripts": 0,
+        "script_wall_time": 0.0,
+        # None until a script is measured.
+        "script_cpu_time": None,
+        "peak_rss_mb": None,
+        "unmeasured_scripts": 0,
+        "debug_rounds": 0,
+        "rollbacks": 0,
+    }
+
+
+def _add_event(totals: dict[str, Any], event: dict[str, Any]) -> None:
+    if event["type"] == "llm":
+        totals["llm_calls"] += 1
+        totals["llm_latency"] += event["end"] - event["start"]
+        totals["prompt_tokens"] += event["prompt_tokens"]
+        totals["output_tokens"] += event["output_tokens"]
+        totals["thoughts_tokens"] += event["thoughts_tokens"]
+        # Each response of a debug agent is a debug round.
+        if "debug_agent" in event["agent"]:
+            totals["debug_rounds"] += 1
+    elif event["type"] == "script":
+        totals["scripts"] += 1
+        if event["cached"]:
+            totals["cached_scripts"] += 1
+            return
+        if event["returncode"] != 0:
+            totals["failed_scripts"] += 1
+        totals["script_wall_time"] += event["wall_time"]
+        cpu_time, peak_rss_mb = event.get("cpu_time"), event.get("peak_rss_mb")
+        if cpu_time is None or peak_rss_mb is None:
+            # Missing from the totals rather than counted as 0.
+            totals["unmeasured_scripts"] += 1
+            return
+        totals["script_cpu_time"] = (totals["script_cpu_time"] or 0.0) + cpu_time
+        totals["peak_rss_mb"] = max(totals["peak_rss_mb"] or 0.0, peak_rss_mb)
+    elif event["type"] == "rollback":
+        totals["rollbacks"] += 1
+
+
+def summarize(timeline_path: str) -> dict[str, Any]:
+    """Summarizes a timeline, in total, per stage and per agent.
+
+    The wall time of a stage is the time between its first and last events;
+    the other times are summed over the events, so that they exceed the wall
+    time when the agents run in parallel. The CPU time and peak RSS are over
+    the measured scripts, and None if no script was measured.
+    """
+    with open(timeline_path, "r", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    total = _new_totals()
+    stages = collections.defaultdict(_new_totals)
+    agent_totals = collections.defaultdict(_new_totals)
+    # First start and last end, by totals.
+    spans: dict[int, tuple[float, float]] = {}
+    for event in events:
+        for totals in (total, stages[event["stage"]], agent_totals[event["agent"]]):
+            _add_event(totals, event)
+            start, end = spans.get(id(totals), (event["start"], event["end"]))
+            spans[id(totals)] = (min(start, event["start"]), max(end, event["end"]))
+    for totals in [total, *stages.values(), *agent_totals.values()]:
+        start, end = spans.get(id(totals), (0.0, 0.0))
+        totals["wall_time"] = end - start
+    return {
+        "total": total,
+        "stages": dict(stages),
+        "agents": dict(agent_totals),
+    }
+
+
+def save_summary(context: callback_context_module.ReadonlyContext) -> Optional[str]:
+    """Saves the summary of the timeline of the current run, next to it.
+
+    Returns:
+        The path of the summary, or None without a timeline.
+    """
+    timeline_path = get_timeline_path(context)
+    if not _is_enabled(context) or not os.path.exists(timeline_path):
+        return None
+    summary_path = timeline_path[: -len(".jsonl")] + "_summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summarize(timeline_path), f, indent=2)
+    return summary_path
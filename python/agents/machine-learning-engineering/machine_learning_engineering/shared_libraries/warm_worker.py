@@ -0,0 +1,454 @@
+"""Warm worker that runs the Python scripts of the agents in forked processes.
+
+Starting a Python process for each script re-imports pandas, numpy and
+scikit-learn, and re-parses the input files of the task, which dominates the
+run time of the short scripts of the debug rounds. The warm worker is a server
+process that imports the libraries and reads the CSV input files of the task
+once, then forks a child process for each script, like the forkserver of
+`multiprocessing`. In the children, `pd.read_csv` of an input file, with no
+other argument, returns a copy of the preloaded frame.
+
+The child runs the script as `python <script>` would: as the `__main__`
+module, in its own session, with its own stdout and stderr, and exits with the
+same return code. This module only depends on the standard library, and runs
+as a script for the server.
+"""
+
+from typing import Any, Optional
+import asyncio
+import atexit
+import builtins
+import hashlib
+import importlib
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import traceback
+import types
+import warnings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where no caps are applied.
+    resource = None
+
+# Libraries imported by the server, if installed.
+PRELOAD_MODULES = (
+    "numpy",
+    "pandas",
+    "scipy",
+    "sklearn",
+    "sklearn.ensemble",
+    "sklearn.linear_model",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "sklearn.preprocessing",
+    "lightgbm",
+    "xgboost",
+)
+# Maximum size of a request to the server.
+MAX_REQUEST_SIZE = 64 * 1024
+# Maximum time in seconds to import the libraries and read the input files.
+START_TIMEOUT = 300
+
+
+def is_supported() -> bool:
+    """Returns True if warm workers can run on this platform.
+
+    Forking a process that has loaded the numerical libraries is only safe on
+    Linux: on macOS, the system frameworks they use do not support it.
+    """
+    return sys.platform.startswith("linux") and hasattr(socket, "SOCK_SEQPACKET")
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _preload_inputs(preload_dir: str) -> None:
+    """Reads the CSV files of a directory, and serves them from `pd.read_csv`.
+
+    The frames are keyed by the digest of their file, as each task reads a
+    copy of the input files in its own workspace.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    frames = {}
+    sizes = set()
+    for name in sorted(os.listdir(preload_dir)):
+        path = os.path.join(preload_dir, name)
+        if not name.endswith(".csv") or not os.path.isfile(path):
+            continue
+        try:
+            frames[_file_digest(path)] = pd.read_csv(path)
+        except Exception:  # pylint: disable=broad-exception-caught
+            continue
+        sizes.add(os.path.getsize(path))
+    if not frames:
+        return
+    read_csv = pd.read_csv
+
+    def read_csv_from_cache(*args, **kwargs):
+        path = args[0] if args else kwargs.get("filepath_or_buffer")
+        if len(args) + len(kwargs) == 1 and isinstance(path, (str, os.PathLike)):
+            try:
+                if os.path.getsize(path) in sizes:
+                    frame = frames.get(_file_digest(path))
+                    if frame is not None:
+                        return frame.copy()
+            except OSError:
+                pass
+        return read_csv(*args, **kwargs)
+
+    pd.read_csv = read_csv_from_cache
+
+
+def _get_exit_status(e: SystemExit) -> int:
+    """Returns the return code of `sys.exit`, as the interpreter does."""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _exec_script(py_filepath: str) -> int:
+    """Runs a script as the `__main__` module, and returns its return code."""
+    path = os.path.abspath(py_filepath)
+    sys.argv = [py_filepath]
+    sys.path[0] = os.path.dirname(path)
+    main = types.ModuleType("__main__")
+    main.__file__ = path
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+    try:
+        with open(path, "rb") as f:
+            code = compile(f.read(), path, "exec")
+        exec(code, main.__dict__)  # pylint: disable=exec-used
+        status = 0
+    except SystemExit as e:
+        status = _get_exit_status(e)
+    except BaseException as e:  # pylint: disable=broad-exception-caught
+        # Skips the frame of this function, as in the traceback of `python`.
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        status = 1
+    try:
+        atexit._run_exitfuncs()  # pylint: disable=protected-access
+    except SystemExit as e:
+        status = _get_exit_status(e)
+    return status
+
+
+def _run_child(request: dict[str, Any], fds: list[int], response_fd: int) -> None:
+    """Runs a script in the forked child, and exits with its return code."""
+    status = 1
+    try:
+        os.close(response_fd)
+        os.setsid()
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for fd in fds:
+            os.close(fd)
+        os.chdir(request["run_cwd"])
+        # The children would otherwise share the random state that numpy had in
+        # the server, unlike fresh processes; `random` reseeds itself on fork.
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+        if resource is not None:
+            if request.get("memory_limit_mb", 0) > 0:
+                limit = request["memory_limit_mb"] * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            if request.get("cpu_time_limit", 0) > 0:
+                limit = request["cpu_time_limit"]
+                resource.setrlimit(resource.RLIMIT_CPU, (limit, limit))
+        status = _exec_script(request["py_filepath"])
+    except BaseException:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(status & 0xFF)  # pylint: disable=protected-access
+
+
+def serve(sock: socket.socket, preload_dir: Optional[str]) -> None:
+    """Runs the server, until the pool closes its socket.
+
+    The server reads the requests of the pool on the socket, with the write
+    ends of the stdout and stderr pipes of the script, and writes JSON lines
+    to its stdout: when it is ready, and the pid and the return code of the
+    child process of each request. It is single-threaded, so that forking is
+    safe.
+    """
+    response_fd = sys.stdout.fileno()
+    request_ids: dict[int, int] = {}
+
+    def respond(response: dict[str, Any]) -> None:
+        os.write(response_fd, (json.dumps(response) + "\n").encode())
+
+    # The libraries of the server may start native threads, which the children
+    # do not use.
+    warnings.filterwarnings("ignore", r".*use of fork\(\)", DeprecationWarning)
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+    if preload_dir:
+        _preload_inputs(preload_dir)
+
+    # SIGCHLD wakes up the selector, to reap the children.
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wakeup_read, selectors.EVENT_READ)
+    respond({"ready": True})
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == wakeup_read:
+                os.read(wakeup_read, 4096)
+                continue
+            try:
+                message, fds, _, _ = socket.recv_fds(sock, MAX_REQUEST_SIZE, 2)
+            except OSError:
+                return
+            if not message:
+                return
+            request = json.loads(message)
+            pid = os.fork()
+            if pid == 0:
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                selector.close()
+                sock.close()
+                os.close(wakeup_read)
+                os.close(wakeup_write)
+                _run_child(request, fds, response_fd)
+            for fd in fds:
+                os.close(fd)
+            request_ids[pid] = request["id"]
+            respond({"id": request["id"], "pid": pid})
+        while request_ids:
+            pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            respond(
+                {
+                    "id": request_ids.pop(pid),
+                    "returncode": os.waitstatus_to_exitcode(status),
+                    # Of the script and of the processes it waited for.
+                    "cpu_time": rusage.ru_utime + rusage.ru_stime,
+                    "peak_rss_mb": rusage.ru_maxrss / 1024,
+                }
+            )
+
+
+class WarmJob:
+    """A script run by the warm worker."""
+
+    def __init__(self, stdout: asyncio.StreamReader, stderr: asyncio.StreamReader):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        self.resource_usage: Optional[dict[str, float]] = None
+        self.killed = False
+        self._done = asyncio.get_running_loop().create_future()
+
+    def started(self, pid: int) -> None:
+        self.pid = pid
+        if self.killed:
+            self._kill_pid()
+
+    def finished(
+        self,
+        returncode: Optional[int],
+        error: Optional[str] = None,
+        resource_usage: Optional[dict[str, float]] = None,
+    ) -> None:
+        if self._done.done():
+            return
+        if error is not None:
+            self._done.set_exception(ConnectionError(error))
+        else:
+            self.returncode = returncode
+            self.resource_usage = resource_usage
+            self._done.set_result(returncode)
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._done)
+
+    def _kill_pid(self) -> None:
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def kill(self) -> None:
+        """Kills the script and the processes it started, once it has a pid."""
+        if self.returncode is not None:
+            return
+        self.killed = True
+        if self.pid is not None:
+            self._kill_pid()
+
+
+async def _open_reader(fd: int) -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0)
+    )
+    return reader
+
+
+class WarmWorker:
+    """Client of a warm worker server, in the event loop of the pool."""
+
+    def __init__(self, preload_dir: Optional[str], env: dict[str, str]):
+        self.preload_dir = preload_dir
+        self.env = env
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._sock: Optional[socket.socket] = None
+        self._jobs: dict[int, WarmJob] = {}
+        self._next_id = 0
+        self._ready: Optional[asyncio.Future] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @property
+    def stopped(self) -> bool:
+        """Returns True if the server failed to start, or has exited."""
+        if self._ready is None or not self._ready.done():
+            return False
+        return self._process is None or self._process.returncode is not None
+
+    async def start(self) -> None:
+        """Starts the server, and waits for it to import the libraries."""
+        if self._ready is not None:
+            await asyncio.shield(self._ready)
+            return
+        self._ready = asyncio.get_running_loop().create_future()
+        try:
+            self._sock, server_sock = socket.socketpair(
+                socket.AF_UNIX, socket.SOCK_SEQPACKET
+            )
+            args = [__file__, str(server_sock.fileno())]
+            if self.preload_dir:
+                args.append(self.preload_dir)
+            try:
+                self._process = await asyncio.create_subprocess_exec(
+                    "python",
+                    *args,
+                    env=self.env,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    pass_fds=[server_sock.fileno()],
+                )
+            finally:
+                server_sock.close()
+            self._reader_task = asyncio.create_task(self._read_responses())
+            await asyncio.wait_for(asyncio.shield(self._ready), START_TIMEOUT)
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(ConnectionError(str(e)))
+            if self._process is not None and self._process.returncode is None:
+                self._process.kill()
+            await self.close()
+            raise
+
+    async def _read_responses(self) -> None:
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                if response.get("ready"):
+                    if not self._ready.done():
+                        self._ready.set_result(True)
+                    continue
+                job = self._jobs.get(response["id"])
+                if job is None:
+                    continue
+                if "pid" in response:
+                    job.started(response["pid"])
+                else:
+                    del self._jobs[response["id"]]
+                    job.finished(
+                        response["returncode"],
+                        resource_usage={
+                            "cpu_time": response["cpu_time"],
+                            "peak_rss_mb": response["peak_rss_mb"],
+                        },
+                    )
+        finally:
+            error = "The warm worker has stopped."
+            if not self._ready.done():
+                self._ready.set_exception(ConnectionError(error))
+            for job in self._jobs.values():
+                job.finished(None, error)
+            self._jobs.clear()
+
+    async def run(
+        self,
+        run_cwd: str,
+        py_filepath: str,
+        memory_limit_mb: int = 0,
+        cpu_time_limit: int = 0,
+    ) -> WarmJob:
+        """Starts a script in a child process of the server.
+
+        Returns:
+            The job of the script, with its stdout and stderr streams.
+        """
+        await self.start()
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        try:
+            job = WarmJob(
+                await _open_reader(stdout_read), await _open_reader(stderr_read)
+            )
+            self._next_id += 1
+            self._jobs[self._next_id] = job
+            request = {
+                "id": self._next_id,
+                "run_cwd": os.path.abspath(run_cwd),
+                "py_filepath": py_filepath,
+                "memory_limit_mb": memory_limit_mb,
+                "cpu_time_limit": cpu_time_limit,
+            }
+            socket.send_fds(
+                self._sock, [json.dumps(request).encode()], [stdout_write, stderr_write]
+            )
+        finally:
+            os.close(stdout_write)
+            os.close(stderr_write)
+        return job
+
+    async def close(self) -> None:
+        """Stops the server. The running scripts are not killed."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._process is not None:
+            await self._process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    # Started by `WarmWorker.start`, with the fd of its socket, and the
+    # directory of the input files to preload.
+    serve(
+        socket.socket(fileno=int(sys.argv[1])),
+        sys.argv[2] if len(sys.argv) > 2 else None,
+    )
@@ -0,0 +1,258 @@
+"""Workspaces of the tasks, with the input files of the task.
+
+Each solution and the ensemble run their scripts in their own workspace, with
+the input files of the task in `./input`. Instead of copying the input files
+from the task directory into each workspace, they are copied once into a shared
+read-only directory of the workspace directory, and each `./input` directory
+has reflinks (copy-on-write clones) of them where the file system supports
+them, e.g. btrfs or XFS. Elsewhere, e.g. on ext4 or overlayfs, it has read-only
+hard links to them, or symbolic links if hard links are not supported, so that
+the data is not copied again for each workspace.
+
+Linked files are shared by the workspaces, and read-only permissions do not
+stop scripts run as root. With `private=True`, each workspace gets its own
+copies instead, cloned or copied from the task directory, so that a script
+that writes an input file does not change the other workspaces.
+
+The CSV input files can also be converted once to Parquet, in
+`./input/.columnar`, which scripts can read faster with `pd.read_parquet`.
+"""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where files are copied.
+    fcntl = None
+
+# Directory of the workspace directory with the shared files of the tasks.
+SHARED_DIR_NAME = ".shared"
+# Directory of the Parquet copies of the CSV input files, in `./input`.
+COLUMNAR_DIR_NAME = ".columnar"
+# `ioctl` request of Linux to clone a file, e.g. on btrfs and XFS.
+FICLONE = 0x40049409
+
+_READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+_WRITABLE = _READ_ONLY | stat.S_IWUSR
+
+
+def _clone_file(source_path: str, target_path: str) -> bool:
+    """Clones a file with a reflink, and returns False if not supported."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+    except OSError:
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        return False
+    shutil.copystat(source_path, target_path)
+    return True
+
+
+def _copy_file(source_path: str, target_path: str, mode: int = _READ_ONLY) -> None:
+    """Copies a file atomically, with a reflink if possible."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        if not _clone_file(source_path, tmp_path):
+            shutil.copy2(source_path, tmp_path)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _link_file(source_path: str, target_path: str) -> None:
+    """Clones a file with a reflink if possible, links it otherwise."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    if _clone_file(source_path, target_path):
+        os.chmod(target_path, _WRITABLE)
+        return
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        os.symlink(os.path.abspath(source_path), target_path)
+
+
+def _get_version(path: str) -> list[int]:
+    """Returns the size and modification time of a file."""
+    file_stat = os.stat(path)
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def _list_files(directory: str) -> list[str]:
+    """Lists the files of a directory, as paths relative to it."""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory)
+        for root, _, files in os.walk(directory)
+        for name in files
+    )
+
+
+def _list_input_files(task_dir: str) -> list[str]:
+    """Lists the input files of a task, as paths relative to its directory.
+
+    Files at the top of the task directory with "answer" in their name are not
+    inputs.
+    """
+    return [
+        path for path in _list_files(task_dir) if os.sep in path or "answer" not in path
+    ]
+
+
+def get_shared_dir(workspace_dir: str, task_name: str) -> str:
+    """Returns the directory of the shared files of a task."""
+    return os.path.join(workspace_dir, SHARED_DIR_NAME, task_name)
+
+
+def sync_shared_inputs(data_dir: str, workspace_dir: str, task_name: str) -> str:
+    """Updates the shared read-only copy of the input files of a task.
+
+    Only the files that changed since the last update are copied.
+
+    Returns:
+        The shared directory of the input files.
+    """
+    task_dir = os.path.join(data_dir, task_name)
+    shared_input_dir = os.path.join(get_shared_dir(workspace_dir, task_name), "input")
+    paths = _list_input_files(task_dir)
+    for path in paths:
+        source_path = os.path.join(task_dir, path)
+        shared_path = os.path.join(shared_input_dir, path)
+        # `copy2` keeps the modification time of the source file.
+        if os.path.exists(shared_path) and _get_version(shared_path) == _get_version(
+            source_path
+        ):
+            continue
+        _copy_file(source_path, shared_path)
+    if os.path.isdir(shared_input_dir):
+        for path in set(_list_files(shared_input_dir)) - set(paths):
+            os.remove(os.path.join(shared_input_dir, path))
+    return shared_input_dir
+
+
+def convert_to_columnar(data_dir: str, workspace_dir: str, task_name: str) -> list[str]:
+    """Converts the CSV input files to shared Parquet files, once per version.
+
+    Returns:
+        The paths of the Parquet files, relative to the shared directory of the
+        Parquet files. The conversion is skipped without a Parquet engine of
+        pandas, like pyarrow.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    task_dir = os.path.join(data_dir, task_name)
+    columnar_dir = os.path.join(get_shared_dir(workspace_dir, task_name), "columnar")
+    manifest_path = os.path.join(columnar_dir, "manifest.json")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    converted = {}
+    for path in _list_input_files(task_dir):
+        if not path.endswith(".csv"):
+            continue
+        csv_path = os.path.join(task_dir, path)
+        parquet_path = path[: -len(".csv")] + ".parquet"
+        version = _get_version(csv_path)
+        if manifest.get(path) == version and os.path.exists(
+            os.path.join(columnar_dir, parquet_path)
+        ):
+            converted[path] = version
+            continue
+        os.makedirs(
+            os.path.dirname(os.path.join(columnar_dir, parquet_path)), exist_ok=True
+        )
+        fd, tmp_path = tempfile.mkstemp(dir=columnar_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            pd.read_csv(csv_path).to_parquet(tmp_path, index=False)
+        except ImportError:
+            os.remove(tmp_path)
+            return []
+        except (ValueError, TypeError, pd.errors.ParserError):
+            # Not a table, or with values Parquet cannot store.
+            os.remove(tmp_path)
+            continue
+        os.chmod(tmp_path, _READ_ONLY)
+        os.replace(tmp_path, os.path.join(columnar_dir, parquet_path))
+        converted[path] = version
+    if converted != manifest:
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(converted, f)
+    return sorted(path[: -len(".csv")] + ".parquet" for path in converted)
+
+
+def create_workspace(
+    data_dir: str,
+    workspace_dir: str,
+    task_name: str,
+    task_id: str,
+    subdirs: tuple[str, ...] = (),
+    use_columnar_inputs: bool = False,
+    private: bool = False,
+) -> list[str]:
+    """Creates the workspace of a task, with clones or links of its input files.
+
+    Args:
+        data_dir: The directory of the tasks.
+        workspace_dir: The directory of the workspaces.
+        task_name: The name of the task.
+        task_id: The id of the solution, or "ensemble".
+        subdirs: The other directories to create in the workspace.
+        use_columnar_inputs: Whether to add Parquet copies of the CSV input
+          files in `./input/.columnar`.
+        private: Whether to give the workspace its own copies of the input
+          files, instead of links to the shared files where they cannot be
+          cloned.
+
+    Returns:
+        The paths of the Parquet input files in the workspace, relative to it.
+    """
+    run_cwd = os.path.join(workspace_dir, task_name, task_id)
+    if os.path.exists(run_cwd):
+        shutil.rmtree(run_cwd)
+    input_dir = os.path.join(run_cwd, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    for subdir in subdirs:
+        os.makedirs(os.path.join(run_cwd, subdir), exist_ok=True)
+    if private:
+        # Cloned or copied from the task directory, without a shared copy.
+        task_dir = os.path.join(data_dir, task_name)
+        for path in _list_input_files(task_dir):
+            _copy_file(
+                os.path.join(task_dir, path),
+                os.path.join(input_dir, path),
+                mode=_WRITABLE,
+            )
+    else:
+        shared_input_dir = sync_shared_inputs(data_dir, workspace_dir, task_name)
+        for path in _list_files(shared_input_dir):
+            _link_file(
+                os.path.join(shared_input_dir, path), os.path.join(input_dir, path)
+            )
+    columnar_inputs = []
+    if use_columnar_inputs:
+        columnar_dir = os.path.join(
+            get_shared_dir(workspace_dir, task_name), "columnar"
+        )
+        for path in convert_to_columnar(data_dir, workspace_dir, task_name):
+            source_path = os.path.join(columnar_dir, path)
+            target_path = os.path.join(input_dir, COLUMNAR_DIR_NAME, path)
+            if private:
+                _copy_file(source_path, target_path, mode=_WRITABLE)
+            else:
+                _link_file(source_path, target_path)
+            columnar_inputs.append(os.path.relpath(target_path, run_cwd))
+    return columnar_inputs
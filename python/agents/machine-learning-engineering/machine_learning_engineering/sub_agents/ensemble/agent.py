@@ -2,7 +2,6 @@
 
 from typing import Optional
 import os
-import shutil
 import numpy as np
 
 from google.adk import agents
@@ -15,6 +14,7 @@ from machine_learning_engineering.sub_agents.ensemble import prompt
 from machine_learning_engineering.shared_libraries import debug_util
 from machine_learning_engineering.shared_libraries import common_util
 from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import workspace_util
 
 
 def update_ensemble_loop_states(
@@ -154,31 +154,17 @@ def create_workspace(
     data_dir = callback_context.state.get("data_dir", "")
     workspace_dir = callback_context.state.get("workspace_dir", "")
     task_name = callback_context.state.get("task_name", "")
-    run_cwd = os.path.join(workspace_dir, task_name, "ensemble")
-    if os.path.exists(run_cwd):
-        shutil.rmtree(run_cwd)
-    # make required directories
-    os.makedirs(os.path.join(workspace_dir, task_name, "ensemble"), exist_ok=True)
-    os.makedirs(
-        os.path.join(workspace_dir, task_name, "ensemble", "input"), exist_ok=True
+    # clone or link the shared input files, unless private copies are asked for
+    columnar_inputs = workspace_util.create_workspace(
+        data_dir=data_dir,
+        workspace_dir=workspace_dir,
+        task_name=task_name,
+        task_id="ensemble",
+        subdirs=("final",),
+        use_columnar_inputs=callback_context.state.get("use_columnar_inputs", False),
+        private=callback_context.state.get("use_private_inputs", False),
     )
-    os.makedirs(
-        os.path.join(workspace_dir, task_name, "ensemble", "final"), exist_ok=True
-    )
-    # copy files to input directory
-    files = os.listdir(os.path.join(data_dir, task_name))
-    for file in files:
-        if os.path.isdir(os.path.join(data_dir, task_name, file)):
-            shutil.copytree(
-                os.path.join(data_dir, task_name, file),
-                os.path.join(workspace_dir, task_name, "ensemble", "input", file),
-            )
-        else:
-            if "answer" not in file:
-                common_util.copy_file(
-                    os.path.join(data_dir, task_name, file),
-                    os.path.join(workspace_dir, task_name, "ensemble", "input"),
-                )
+    callback_context.state["columnar_inputs"] = columnar_inputs
     return None
 
 
@@ -3,7 +3,6 @@
 from typing import Optional
 import dataclasses
 import os
-import shutil
 import time
 import ast
 
@@ -18,6 +17,7 @@ from machine_learning_engineering.sub_agents.initialization import prompt
 from machine_learning_engineering.shared_libraries import debug_util
 from machine_learning_engineering.shared_libraries import common_util
 from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import workspace_util
 
 
 def get_model_candidates(
@@ -275,30 +275,17 @@ def create_workspace(
     workspace_dir = callback_context.state.get("workspace_dir", "")
     task_name = callback_context.state.get("task_name", "")
     task_id = callback_context.agent_name.split("_")[-1]
-    run_cwd = os.path.join(workspace_dir, task_name, task_id)
-    if os.path.exists(run_cwd):
-        shutil.rmtree(run_cwd)
-    # make required directories
-    os.makedirs(os.path.join(workspace_dir, task_name, task_id), exist_ok=True)
-    os.makedirs(os.path.join(workspace_dir, task_name, task_id, "input"), exist_ok=True)
-    os.makedirs(
-        os.path.join(workspace_dir, task_name, task_id, "model_candidates"),
-        exist_ok=True,
+    # clone or link the shared input files, unless private copies are asked for
+    columnar_inputs = workspace_util.create_workspace(
+        data_dir=data_dir,
+        workspace_dir=workspace_dir,
+        task_name=task_name,
+        task_id=task_id,
+        subdirs=("model_candidates",),
+        use_columnar_inputs=callback_context.state.get("use_columnar_inputs", False),
+        private=callback_context.state.get("use_private_inputs", False),
     )
-    # copy files to input directory
-    files = os.listdir(os.path.join(data_dir, task_name))
-    for file in files:
-        if os.path.isdir(os.path.join(data_dir, task_name, file)):
-            shutil.copytree(
-                os.path.join(data_dir, task_name, file),
-                os.path.join(workspace_dir, task_name, task_id, "input", file),
-            )
-        else:
-            if "answer" not in file:
-                common_util.copy_file(
-                    os.path.join(data_dir, task_name, file),
-                    os.path.join(workspace_dir, task_name, task_id, "input"),
-                )
+    callback_context.state["columnar_inputs"] = columnar_inputs
     return None
 
 
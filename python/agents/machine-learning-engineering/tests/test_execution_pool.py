@@ -0,0 +1,212 @@
+"""Test cases for the pool of processes that run the scripts of the agents."""
+
+import asyncio
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import code_util
+from machine_learning_engineering.shared_libraries import execution_pool
+from machine_learning_engineering.shared_libraries import warm_worker
+
+SCRIPTS = {
+    "exit_code": textwrap.dedent("""
+        import sys
+        print("Final Validation Performance: 0.5")
+        print("warning", file=sys.stderr)
+        sys.exit(3)
+    """),
+    "exception": textwrap.dedent("""
+        def train():
+            raise ValueError("No training data.")
+
+        print("Training")
+        train()
+    """),
+    "syntax_error": "def train(:\n    pass\n",
+    "exit_message": "import sys\nsys.exit('Stopped.')\n",
+    "main": textwrap.dedent("""
+        import sys
+        if __name__ == "__main__":
+            print(__file__, sys.argv, sys.path[0])
+    """),
+}
+
+WARM_WORKER_OPTIONS = [
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            not warm_worker.is_supported(), reason="No warm workers."
+        ),
+    ),
+]
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+@pytest.mark.parametrize("name", SCRIPTS)
+async def test_same_result_as_run_python_code(tmp_path, name, use_warm_worker):
+    """Runs a script and expects the result of `run_python_code`."""
+    pool = execution_pool.ExecutionPool(use_warm_worker=use_warm_worker)
+    result = await pool.run(SCRIPTS[name], str(tmp_path), f"{name}.py", 60)
+    await pool.close()
+    expected = code_util.run_python_code(SCRIPTS[name], str(tmp_path), f"{name}.py", 60)
+    for key in ("returncode", "stdout", "stderr"):
+        assert result[key] == expected[key]
+    assert result["execution_time"] > 0
+
+
+async def test_warm_worker_reads_preloaded_inputs(tmp_path):
+    """Expects the frame of a preloaded input file from `pd.read_csv`."""
+    if not warm_worker.is_supported():
+        pytest.skip("No warm workers.")
+    data_dir = tmp_path / "data"
+    input_dir = tmp_path / "run" / "input"
+    for directory in (data_dir, input_dir):
+        directory.mkdir(parents=True)
+        (directory / "train.csv").write_text("x,y\n1,a\n2,b\n")
+    code = textwrap.dedent("""
+        import pandas as pd
+        df = pd.read_csv("./input/train.csv")
+        df["x"] += 1
+        print(df.to_dict(), pd.read_csv("./input/train.csv").to_dict())
+        print(pd.read_csv.__name__)
+    """)
+    pool = execution_pool.ExecutionPool(use_warm_worker=True, preload_dir=str(data_dir))
+    result = await pool.run(code, str(tmp_path / "run"), "train.py", 60)
+    await pool.close()
+    expected = code_util.run_python_code(code, str(tmp_path / "run"), "train.py", 60)
+    assert result["returncode"] == 0
+    first_line = result["stdout"].splitlines()[0]
+    assert first_line == expected["stdout"].splitlines()[0]
+    assert result["stdout"].splitlines()[1] == "read_csv_from_cache"
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+async def test_resource_usage_is_measured(tmp_path, use_warm_worker):
+    """Runs a script using CPU and memory, and expects them in the result."""
+    if not hasattr(os, "wait4"):
+        pytest.skip("No resource usage of the processes.")
+    code = textwrap.dedent("""
+        import time
+        data = b"x" * (256 * 1024 * 1024)
+        start = time.process_time()
+        while time.process_time() - start < 0.5:
+            pass
+    """)
+    pool = execution_pool.ExecutionPool(use_warm_worker=use_warm_worker)
+    result = await pool.run(code, str(tmp_path), "usage.py", 60)
+    await pool.close()
+    assert result["returncode"] == 0
+    assert result["cpu_time"] >= 0.5
+    assert result["peak_rss_mb"] >= 256
+
+
+async def test_warm_worker_reseeds_numpy(tmp_path):
+    """Runs unseeded scripts, and expects different random numbers."""
+    if not warm_worker.is_supported():
+        pytest.skip("No warm workers.")
+    code = "import numpy as np\nprint(np.random.randint(2**31))\n"
+    pool = execution_pool.ExecutionPool(use_warm_worker=True)
+    results = [await pool.run(code, str(tmp_path), "random.py", 60) for _ in range(3)]
+    await pool.close()
+    assert all(result["returncode"] == 0 for result in results)
+    assert len({result["stdout"] for result in results}) == 3
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+async def test_scripts_run_concurrently_up_to_max_workers(tmp_path, use_warm_worker):
+    """Runs 4 scripts of 1s with 2 workers, and expects them to take 2s."""
+    pool = execution_pool.ExecutionPool(max_workers=2, use_warm_worker=use_warm_worker)
+    await pool.start_warm_worker()
+    code = "import time\ntime.sleep(1)\n"
+    start = time.time()
+    results = await asyncio.gather(
+        *[pool.run(code, str(tmp_path), f"sleep{i}.py", 60) for i in range(4)]
+    )
+    elapsed = time.time() - start
+    await pool.close()
+    assert all(result["returncode"] == 0 for result in results)
+    assert 2 <= elapsed < 3.5
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+async def test_timeout_keeps_output(tmp_path, use_warm_worker):
+    """Runs a script past its timeout, and expects its first output."""
+    pool = execution_pool.ExecutionPool(use_warm_worker=use_warm_worker)
+    await pool.start_warm_worker()
+    code = "import time\nprint('started', flush=True)\ntime.sleep(60)\n"
+    result = await pool.run(code, str(tmp_path), "slow.py", exec_timeout=1)
+    await pool.close()
+    assert result["returncode"] == 1
+    assert result["stdout"] == "started\n"
+    assert "timed out after 1 seconds" in result["stderr"]
+    assert result["execution_time"] < 10
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+async def test_output_is_streamed(tmp_path, use_warm_worker):
+    """Expects the output of a script before it ends."""
+    pool = execution_pool.ExecutionPool(use_warm_worker=use_warm_worker)
+    await pool.start_warm_worker()
+    code = "import time\nprint('step 1', flush=True)\ntime.sleep(1)\nprint('step 2')\n"
+    received = []
+    start = time.time()
+
+    def on_output(stream, text):
+        received.append((stream, text, time.time() - start))
+
+    result = await pool.run(code, str(tmp_path), "steps.py", 60, on_output=on_output)
+    await pool.close()
+    assert result["stdout"] == "step 1\nstep 2\n"
+    assert received[0][0] == "stdout"
+    assert received[0][1].startswith("step 1")
+    assert received[0][2] < result["execution_time"] - 0.5
+
+
+@pytest.mark.skipif(execution_pool.resource is None, reason="No resource limits.")
+async def test_memory_limit(tmp_path):
+    """Runs a script using more memory than its limit, and expects an error."""
+    pool = execution_pool.ExecutionPool(memory_limit_mb=512)
+    code = "data = bytearray(1024 * 1024 * 1024)\n"
+    result = await pool.run(code, str(tmp_path), "memory.py", exec_timeout=60)
+    assert result["returncode"] != 0
+    assert "MemoryError" in result["stderr"]
+
+
+@pytest.mark.parametrize("use_warm_worker", WARM_WORKER_OPTIONS)
+async def test_cancel_kills_script(tmp_path, use_warm_worker):
+    """Cancels the run of a script, and expects the script to be killed."""
+    pool = execution_pool.ExecutionPool(use_warm_worker=use_warm_worker)
+    code = (
+        "import os, time\n"
+        "open('pid', 'w').write(str(os.getpid()))\n"
+        "time.sleep(60)\n"
+    )
+    task = asyncio.create_task(pool.run(code, str(tmp_path), "cancel.py", 60))
+    pid_file = tmp_path / "pid"
+    while not pid_file.exists() or not pid_file.read_text():
+        await asyncio.sleep(0.05)
+    pid = int(pid_file.read_text())
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    for _ in range(50):
+        if not _is_running(pid):
+            break
+        await asyncio.sleep(0.1)
+    await pool.close()
+    assert not _is_running(pid)
@@ -0,0 +1,162 @@
+"""Test cases for the cache of the results of the scripts of the agents."""
+
+import os
+import shutil
+import sys
+import types
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import code_util
+from machine_learning_engineering.shared_libraries import result_cache
+
+CODE = """
+import os
+with open("runs.txt", "a") as f:
+    f.write("run\\n")
+print("Final Validation Performance: 0.25")
+"""
+
+
+def _get_callback_context(tmp_path, agent_name, **state):
+    run_cwd = tmp_path / "workspace" / "task" / "1"
+    (run_cwd / "input").mkdir(parents=True, exist_ok=True)
+    (run_cwd / "input" / "train.csv").write_text("x,y\n1,2\n")
+    return types.SimpleNamespace(
+        agent_name=agent_name,
+        invocation_id="e-1",
+        state={
+            "workspace_dir": str(tmp_path / "workspace"),
+            "task_name": "task",
+            "exec_timeout": 60,
+            "seed": 42,
+            "exec_use_cache": True,
+            "exec_cache_dir": str(tmp_path / "cache"),
+            "init_code_1_1": CODE,
+            **state,
+        },
+    )
+
+
+def test_key_depends_on_code_inputs_and_seed(tmp_path):
+    """Expects a new key when the code, an input file or the seed changes."""
+    cache = result_cache.ResultCache(str(tmp_path / "cache"))
+    (tmp_path / "input").mkdir()
+    (tmp_path / "input" / "train.csv").write_text("x\n1\n")
+    key = cache.get_key("print(1)", str(tmp_path / "input"), seed=42)
+    assert key == cache.get_key("print(1)", str(tmp_path / "input"), seed=42)
+    assert key != cache.get_key("print(2)", str(tmp_path / "input"), seed=42)
+    assert key != cache.get_key("print(1)", str(tmp_path / "input"), seed=0)
+    (tmp_path / "input" / "train.csv").write_text("x\n2\n")
+    assert key != cache.get_key("print(1)", str(tmp_path / "input"), seed=42)
+
+
+def test_inputs_are_hashed_once_for_all_workspaces(tmp_path, monkeypatch):
+    """Expects unchanged copies of an input file to have the digest of its source."""
+    hashed = []
+    file_digest = result_cache.hashlib.file_digest
+
+    def counting_file_digest(f, digest):
+        hashed.append(f.name)
+        return file_digest(f, digest)
+
+    monkeypatch.setattr(result_cache.hashlib, "file_digest", counting_file_digest)
+    cache = result_cache.ResultCache(str(tmp_path / "cache"))
+    source_dir = tmp_path / "task"
+    source_dir.mkdir()
+    (source_dir / "train.csv").write_text("x\n1\n")
+    keys = []
+    for task_id in ("1", "2"):
+        input_dir = tmp_path / task_id / "input"
+        input_dir.mkdir(parents=True)
+        shutil.copy2(source_dir / "train.csv", input_dir / "train.csv")
+        keys.append(
+            cache.get_key("print(1)", str(input_dir), 42, source_dir=str(source_dir))
+        )
+    assert keys[0] == keys[1]
+    assert hashed == [str(source_dir / "train.csv")]
+    # A changed copy is hashed itself.
+    (tmp_path / "2" / "input" / "train.csv").write_text("x\n2\n")
+    key = cache.get_key(
+        "print(1)", str(tmp_path / "2" / "input"), 42, source_dir=str(source_dir)
+    )
+    assert key != keys[0]
+    assert hashed[1:] == [str(tmp_path / "2" / "input" / "train.csv")]
+
+
+def test_results_persist_across_caches(tmp_path):
+    """Stores a result, and expects it from another cache of the directory."""
+    result = {"returncode": 0, "stdout": "ok", "stderr": "", "score": 0.5}
+    result_cache.ResultCache(str(tmp_path)).put("abc", result)
+    cache = result_cache.ResultCache(str(tmp_path))
+    assert cache.get("abc") == result
+    assert cache.get("def") is None
+    assert cache.get_stats() == {"hits": 1, "misses": 1, "bypassed": 0}
+
+
+async def test_evaluate_code_reuses_result(tmp_path):
+    """Evaluates the same code twice, and expects a single run."""
+    callback_context = _get_callback_context(tmp_path, "model_eval_agent_1_1")
+    await code_util.evaluate_code(callback_context=callback_context)
+    first_result = callback_context.state["init_code_exec_result_1_1"]
+    await code_util.evaluate_code(callback_context=callback_context)
+    run_cwd = tmp_path / "workspace" / "task" / "1"
+    assert (run_cwd / "runs.txt").read_text() == "run\n"
+    assert callback_context.state["init_code_exec_result_1_1"] == first_result
+    assert first_result["score"] == 0.25
+    assert callback_context.state["exec_cache_misses"] == 1
+    assert callback_context.state["exec_cache_hits"] == 1
+
+
+async def test_evaluate_code_bypasses_cache(tmp_path):
+    """Evaluates the same code twice with the bypass flag, and expects 2 runs."""
+    callback_context = _get_callback_context(
+        tmp_path, "model_eval_agent_1_1", exec_cache_bypass=True
+    )
+    await code_util.evaluate_code(callback_context=callback_context)
+    await code_util.evaluate_code(callback_context=callback_context)
+    run_cwd = tmp_path / "workspace" / "task" / "1"
+    assert (run_cwd / "runs.txt").read_text() == "run\nrun\n"
+    assert callback_context.state["exec_cache_bypassed"] == 2
+
+
+def test_key_depends_on_settings_and_python_version(tmp_path, monkeypatch):
+    """Expects a new key when a limit of the run or the Python version changes."""
+    cache = result_cache.ResultCache(str(tmp_path / "cache"))
+    (tmp_path / "input").mkdir()
+    settings = {"exec_timeout": 60, "exec_memory_limit_mb": 0}
+    key = cache.get_key("print(1)", str(tmp_path / "input"), 42, settings=settings)
+    other_settings = {"exec_timeout": 60, "exec_memory_limit_mb": 512}
+    assert key != cache.get_key(
+        "print(1)", str(tmp_path / "input"), 42, settings=other_settings
+    )
+    monkeypatch.setattr(result_cache.sys, "version", "0.0.0")
+    assert key != cache.get_key(
+        "print(1)", str(tmp_path / "input"), 42, settings=settings
+    )
+
+
+async def test_evaluate_code_reruns_with_other_limits(tmp_path):
+    """Evaluates the same code with another timeout, and expects 2 runs."""
+    callback_context = _get_callback_context(tmp_path, "model_eval_agent_1_1")
+    await code_util.evaluate_code(callback_context=callback_context)
+    callback_context.state["exec_timeout"] = 120
+    await code_util.evaluate_code(callback_context=callback_context)
+    run_cwd = tmp_path / "workspace" / "task" / "1"
+    assert (run_cwd / "runs.txt").read_text() == "run\nrun\n"
+    assert callback_context.state["exec_cache_misses"] == 2
+
+
+async def test_evaluate_code_does_not_store_failures(tmp_path):
+    """Evaluates the same failing code twice, and expects 2 runs."""
+    callback_context = _get_callback_context(
+        tmp_path,
+        "model_eval_agent_1_1",
+        init_code_1_1=CODE + "raise SystemExit(1)\n",
+    )
+    await code_util.evaluate_code(callback_context=callback_context)
+    await code_util.evaluate_code(callback_context=callback_context)
+    run_cwd = tmp_path / "workspace" / "task" / "1"
+    assert (run_cwd / "runs.txt").read_text() == "run\nrun\n"
+    assert callback_context.state["init_code_exec_result_1_1"]["returncode"] == 1
+    assert callback_context.state["exec_cache_misses"] == 2
@@ -0,0 +1,142 @@
+"""Test cases for the telemetry of the runs of the agents."""
+
+import json
+import os
+import sys
+import types
+
+from google.adk import agents
+from google.adk.models import llm_response as llm_response_module
+from google.genai import types as genai_types
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import code_util
+from machine_learning_engineering.shared_libraries import telemetry
+
+
+def _get_callback_context(tmp_path, agent_name, **state):
+    return types.SimpleNamespace(
+        agent_name=agent_name,
+        invocation_id="e-1",
+        state={
+            "workspace_dir": str(tmp_path / "workspace"),
+            "task_name": "task",
+            **state,
+        },
+    )
+
+
+def _read_timeline(tmp_path):
+    path = tmp_path / "workspace" / "task" / "telemetry" / "e-1.jsonl"
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_instrumented_agent_records_llm_calls(tmp_path):
+    """Instruments an agent, and expects its LLM calls in the timeline."""
+
+    def skip_model(callback_context, llm_request):
+        return None
+
+    model_agent = agents.Agent(
+        model="gemini-2.0-flash",
+        name="telemetry_test_model_agent",
+        before_model_callback=skip_model,
+    )
+    stage_agent = agents.SequentialAgent(
+        name="telemetry_test_stage_agent", sub_agents=[model_agent]
+    )
+    telemetry.instrument_agent(stage_agent, stage=stage_agent.name)
+    before_callbacks = model_agent.canonical_before_model_callbacks
+    after_callbacks = model_agent.canonical_after_model_callbacks
+    assert before_callbacks[0] == skip_model
+    callback_context = _get_callback_context(tmp_path, model_agent.name)
+    before_callbacks[-1](callback_context, None)
+    after_callbacks[0](
+        callback_context,
+        llm_response_module.LlmResponse(
+            usage_metadata=genai_types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=100, candidates_token_count=20
+            )
+        ),
+    )
+    (event,) = _read_timeline(tmp_path)
+    assert event["type"] == "llm"
+    assert event["stage"] == "telemetry_test_stage_agent"
+    assert event["prompt_tokens"] == 100
+    assert event["output_tokens"] == 20
+    assert event["end"] >= event["start"]
+
+
+async def test_summary_of_scripts_and_rollbacks(tmp_path):
+    """Evaluates code and rolls back, and expects them in the summary."""
+    callback_context = _get_callback_context(
+        tmp_path,
+        "model_eval_agent_1_1",
+        exec_timeout=60,
+        init_code_1_1="import sys\nsys.exit(1)\n# Final Validation Performance",
+    )
+    (tmp_path / "workspace" / "task" / "1").mkdir(parents=True)
+    await code_util.evaluate_code(callback_context=callback_context)
+    telemetry.record_event(callback_context, "rollback", start=1.0, end=1.0)
+    callback_context.agent_name = "model_eval_debug_agent_1_1"
+    telemetry.record_event(
+        callback_context,
+        "llm",
+        start=0.0,
+        end=2.0,
+        prompt_tokens=10,
+        output_tokens=5,
+        thoughts_tokens=0,
+    )
+    script_event = _read_timeline(tmp_path)[0]
+    assert script_event["type"] == "script"
+    assert script_event["py_filepath"] == "init_code_1.py"
+    assert script_event["returncode"] == 1
+    summary_path = telemetry.save_summary(callback_context)
+    with open(summary_path, encoding="utf-8") as f:
+        summary = json.load(f)
+    total = summary["total"]
+    assert total["scripts"] == total["failed_scripts"] == 1
+    assert total["script_wall_time"] == script_event["wall_time"]
+    assert total["script_cpu_time"] == script_event["cpu_time"] > 0
+    assert total["unmeasured_scripts"] == 0
+    assert total["rollbacks"] == 1
+    assert total["llm_calls"] == total["debug_rounds"] == 1
+    assert total["llm_latency"] == 2.0
+    assert summary["agents"]["model_eval_agent_1_1"]["rollbacks"] == 1
+    assert summary["agents"]["model_eval_debug_agent_1_1"]["prompt_tokens"] == 10
+
+
+def test_unmeasured_scripts_are_missing_from_the_summary(tmp_path):
+    """Records a script without resource usage, and expects no CPU time for it."""
+    callback_context = _get_callback_context(tmp_path, "model_eval_agent_1_1")
+    for cpu_time, peak_rss_mb in ((None, None), (2.0, 300.0)):
+        telemetry.record_event(
+            callback_context,
+            "script",
+            start=0.0,
+            end=3.0,
+            wall_time=3.0,
+            returncode=0,
+            cached=False,
+            cpu_time=cpu_time,
+            peak_rss_mb=peak_rss_mb,
+        )
+        summary = telemetry.summarize(telemetry.get_timeline_path(callback_context))
+        total = summary["total"]
+        assert total["unmeasured_scripts"] == 1
+        assert total["script_cpu_time"] == cpu_time
+        assert total["peak_rss_mb"] == peak_rss_mb
+    assert total["scripts"] == 2
+    assert total["script_wall_time"] == 6.0
+
+
+def test_disabled_telemetry_writes_nothing(tmp_path):
+    """Records an event with the telemetry disabled, and expects no timeline."""
+    callback_context = _get_callback_context(
+        tmp_path, "model_eval_agent_1_1", use_telemetry=False
+    )
+    telemetry.record_event(callback_context, "rollback", start=1.0, end=1.0)
+    assert not (tmp_path / "workspace" / "task" / "telemetry").exists()
+    assert telemetry.save_summary(callback_context) is None
@@ -0,0 +1,125 @@
+"""Test cases for the workspaces of the tasks."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import workspace_util
+
+
+def _create_task(tmp_path):
+    task_dir = tmp_path / "tasks" / "task"
+    (task_dir / "images").mkdir(parents=True)
+    (task_dir / "train.csv").write_text("x,y\n1,2\n3,4\n")
+    (task_dir / "answer.csv").write_text("y\n5\n")
+    (task_dir / "images" / "answer_1.png").write_bytes(b"png")
+    return str(tmp_path / "tasks"), str(tmp_path / "workspace")
+
+
+def test_create_workspace_links_inputs(tmp_path, monkeypatch):
+    """Creates 2 workspaces without reflinks, and expects links to a shared copy."""
+    monkeypatch.setattr(workspace_util, "_clone_file", lambda *args: False)
+    data_dir, workspace_dir = _create_task(tmp_path)
+    for task_id in ("1", "2"):
+        workspace_util.create_workspace(
+            data_dir, workspace_dir, "task", task_id, subdirs=("model_candidates",)
+        )
+    shared_dir = workspace_util.get_shared_dir(workspace_dir, "task")
+    shared_path = os.path.join(shared_dir, "input", "train.csv")
+    assert os.stat(shared_path).st_mode & 0o222 == 0
+    for task_id in ("1", "2"):
+        run_cwd = os.path.join(workspace_dir, "task", task_id)
+        path = os.path.join(run_cwd, "input", "train.csv")
+        assert os.path.samefile(path, shared_path)
+        assert os.stat(path).st_mode & 0o222 == 0
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == "x,y\n1,2\n3,4\n"
+        assert os.path.isdir(os.path.join(run_cwd, "model_candidates"))
+        # Only the "answer" files at the top of the task are not inputs.
+        assert not os.path.exists(os.path.join(run_cwd, "input", "answer.csv"))
+        assert os.path.exists(os.path.join(run_cwd, "input", "images", "answer_1.png"))
+
+
+def test_create_workspace_links_inputs_symbolically(tmp_path, monkeypatch):
+    """Expects symbolic links where hard links are not supported."""
+
+    def link(source_path, target_path):
+        raise PermissionError(source_path)
+
+    monkeypatch.setattr(workspace_util, "_clone_file", lambda *args: False)
+    monkeypatch.setattr(workspace_util.os, "link", link)
+    data_dir, workspace_dir = _create_task(tmp_path)
+    workspace_util.create_workspace(data_dir, workspace_dir, "task", "1")
+    path = os.path.join(workspace_dir, "task", "1", "input", "train.csv")
+    assert os.path.islink(path)
+    shared_dir = workspace_util.get_shared_dir(workspace_dir, "task")
+    assert os.path.samefile(path, os.path.join(shared_dir, "input", "train.csv"))
+
+
+def test_writing_a_private_input_file_changes_only_its_workspace(tmp_path):
+    """Writes a private input file, and expects the other workspaces unchanged."""
+    data_dir, workspace_dir = _create_task(tmp_path)
+    for task_id in ("1", "2"):
+        workspace_util.create_workspace(
+            data_dir, workspace_dir, "task", task_id, private=True
+        )
+    path = os.path.join(workspace_dir, "task", "1", "input", "train.csv")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("5,6\n")
+    for other_path in (
+        os.path.join(workspace_dir, "task", "2", "input", "train.csv"),
+        os.path.join(data_dir, "task", "train.csv"),
+    ):
+        with open(other_path, encoding="utf-8") as f:
+            assert f.read() == "x,y\n1,2\n3,4\n"
+    # The private copies are made from the task directory, without a shared copy.
+    shared_dir = workspace_util.get_shared_dir(workspace_dir, "task")
+    assert not os.path.exists(os.path.join(shared_dir, "input"))
+
+
+def test_sync_shared_inputs_updates_changed_files(tmp_path):
+    """Changes and removes input files, and expects them in the shared copy."""
+    data_dir, workspace_dir = _create_task(tmp_path)
+    shared_input_dir = workspace_util.sync_shared_inputs(
+        data_dir, workspace_dir, "task"
+    )
+    with open(os.path.join(data_dir, "task", "train.csv"), "a") as f:
+        f.write("5,6\n")
+    os.remove(os.path.join(data_dir, "task", "images", "answer_1.png"))
+    workspace_util.create_workspace(data_dir, workspace_dir, "task", "1")
+    with open(os.path.join(shared_input_dir, "train.csv"), encoding="utf-8") as f:
+        assert f.read().endswith("5,6\n")
+    assert not os.path.exists(os.path.join(shared_input_dir, "images", "answer_1.png"))
+    path = os.path.join(workspace_dir, "task", "1", "input", "train.csv")
+    with open(path, encoding="utf-8") as f:
+        assert f.read().endswith("5,6\n")
+
+
+def test_create_workspace_with_columnar_inputs(tmp_path):
+    """Expects the CSV input files as Parquet files in `./input/.columnar`."""
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    data_dir, workspace_dir = _create_task(tmp_path)
+    columnar_inputs = workspace_util.create_workspace(
+        data_dir, workspace_dir, "task", "1", use_columnar_inputs=True
+    )
+    assert columnar_inputs == [os.path.join("input", ".columnar", "train.parquet")]
+    run_cwd = os.path.join(workspace_dir, "task", "1")
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(os.path.join(run_cwd, columnar_inputs[0])),
+        pd.read_csv(os.path.join(run_cwd, "input", "train.csv")),
+    )
+    # The conversion is done once, until the CSV file changes.
+    manifest_path = os.path.join(
+        workspace_util.get_shared_dir(workspace_dir, "task"),
+        "columnar",
+        "manifest.json",
+    )
+    mtime_ns = os.stat(manifest_path).st_mtime_ns
+    workspace_util.create_workspace(
+        data_dir, workspace_dir, "task", "2", use_columnar_inputs=True
+    )
+    assert os.stat(manifest_path).st_mtime_ns == mtime_ns
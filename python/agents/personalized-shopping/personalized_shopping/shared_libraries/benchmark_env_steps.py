@@ -0,0 +1,78 @@
+"""Measures the steps per second of the `search` and `click` tools.
+
+Replays the same episodes with the `html` and `text` page formats of the
+WebShop server, doing what the tools do on every call: a step, the text
+observation and the HTML of the page for the UI artifact. Checks that both
+page formats produce the same observations.
+
+Run from this directory, once the product data is downloaded and indexed, with:
+
+  python benchmark_env_steps.py [num_products]
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "./")
+
+from web_agent_site.envs.web_agent_text_env import WebAgentTextEnv
+
+NUM_EPISODES = 50
+QUERY_WORDS = 4
+
+
+def tool_call(env, action):
+    """Does what the `search` and `click` tools do with the environment."""
+    env.step(action)
+    observation = env.observation
+    env.state["html"]  # Saved as an artifact by the tools.
+    return observation
+
+
+def run_episodes(env):
+    """Returns the observations and the time spent in each tool."""
+    rng = random.Random(0)
+    observations = []
+    seconds = {"search": 0.0, "click": 0.0}
+    steps = {"search": 0, "click": 0}
+    for episode in range(NUM_EPISODES):
+        env.reset(session=episode)
+        words = env.instruction_text.split()
+        keywords = " ".join(rng.sample(words, min(QUERY_WORDS, len(words))))
+        actions = [f"search[{keywords}]"]
+        for _ in range(6):
+            if not actions:
+                clickables = env.get_available_actions()["clickables"]
+                clickables = [c for c in clickables if c not in ("buy now", "search")]
+                if not clickables:
+                    break
+                actions.append(f"click[{rng.choice(clickables)}]")
+            action = actions.pop()
+            tool = action.split("[")[0]
+            start = time.perf_counter()
+            observations.append(tool_call(env, action))
+            seconds[tool] += time.perf_counter() - start
+            steps[tool] += 1
+    return observations, {tool: steps[tool] / seconds[tool] for tool in steps}
+
+
+def main(num_products):
+    env = WebAgentTextEnv(observation_mode="text", num_products=num_products)
+    results = {}
+    for page_format in ("html", "text"):
+        env.server.page_format = page_format
+        results[page_format] = run_episodes(env)
+    assert results["html"][0] == results["text"][0], "Observations differ."
+
+    print(f"{num_products} products, {NUM_EPISODES} episodes")
+    print("page format | search steps/s | click steps/s")
+    for page_format, (_, steps_per_second) in results.items():
+        print(
+            f"{page_format:11} | {steps_per_second['search']:14.1f} |"
+            f" {steps_per_second['click']:13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
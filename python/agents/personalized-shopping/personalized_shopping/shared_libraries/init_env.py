@@ -1,3 +1,8 @@
+import collections
+import os
+import threading
+import time
+
 import gym
 
 gym.envs.registration.register(
@@ -7,25 +12,98 @@ gym.envs.registration.register(
     ),
 )
 
+# Bounds of the pool of per-session environments.
+ENV_POOL_SIZE = int(os.environ.get("WEBSHOP_ENV_POOL_SIZE", 256))
+ENV_IDLE_TIMEOUT = float(os.environ.get("WEBSHOP_ENV_IDLE_TIMEOUT", 30 * 60))
+
 
 def init_env(num_products):
     env = gym.make(
         "WebAgentTextEnv-v0",
         observation_mode="text",
         num_products=num_products,
+        # Text observations are rendered without going through HTML.
+        page_format="text",
     )
     return env
 
 
+class WebShopEnvPool:
+    """Environments of the shopping sessions, keyed by session ID.
+
+    The environments are views of a base environment: each has its own browser
+    and user sessions, and shares the products, search engine and goals of the
+    base environment, which are only read. At most `max_size` environments are
+    kept, and environments unused for `idle_timeout` seconds are dropped; a
+    session that comes back after that starts from a new environment.
+    """
+
+    def __init__(self, base_env, max_size=ENV_POOL_SIZE, idle_timeout=ENV_IDLE_TIMEOUT):
+        self.base_env = base_env
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # Session ID -> (environment, last access time), least recent first.
+        self._envs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._envs)
+
+    def get(self, session_id):
+        """Returns the environment of a session, creating it if needed."""
+        env = self._touch(session_id)
+        if env is not None:
+            return env
+        # Created without the lock, as creating an environment resets it and
+        # the other sessions should not wait for that.
+        base_env = self.base_env.unwrapped
+        env = type(base_env)(
+            observation_mode=base_env.observation_mode,
+            server=base_env.server.clone(),
+        )
+        # Another call may have created an environment for the session since.
+        return self._touch(session_id, env)
+
+    def _touch(self, session_id, new_env=None):
+        """Marks the environment of a session as used, adding `new_env` if none."""
+        now = time.monotonic()
+        with self._lock:
+            env, _ = self._envs.pop(session_id, (new_env, None))
+            self._evict(now)
+            if env is not None:
+                self._envs[session_id] = (env, now)
+        return env
+
+    def _evict(self, now):
+        """Drops the idle environments, then the least recently used ones."""
+        while self._envs:
+            _, last_access = next(iter(self._envs.values()))
+            if now - last_access < self.idle_timeout:
+                break
+            self._envs.popitem(last=False)
+        while len(self._envs) >= self.max_size:
+            self._envs.popitem(last=False)
+
+
 num_product_items = 50000
 _webshop_env = None
+_webshop_env_pool = None
+_webshop_env_lock = threading.Lock()
+
 
+def get_webshop_env(session_id=None):
+    """Lazy-load the webshop environment on first access.
 
-def get_webshop_env():
-    """Lazy-load the webshop environment on first access."""
-    global _webshop_env
-    if _webshop_env is None:
-        _webshop_env = init_env(num_product_items)
-        _webshop_env.reset()
-        print(f"Finished initializing WebshopEnv with {num_product_items} items.")
-    return _webshop_env
+    With a `session_id`, returns the environment of that session, from a pool
+    that shares the products and search engine of the webshop environment.
+    """
+    global _webshop_env, _webshop_env_pool
+    with _webshop_env_lock:
+        if _webshop_env is None:
+            _webshop_env = init_env(num_product_items)
+            _webshop_env.reset()
+            _webshop_env_pool = WebShopEnvPool(_webshop_env)
+            print(f"Finished initializing WebshopEnv with {num_product_items} items.")
+    if session_id is None:
+        return _webshop_env
+    return _webshop_env_pool.get(session_id)
@@ -0,0 +1,134 @@
+"""Load test of the pool of per-session environments of the shopping tools.
+
+Runs many shopping sessions at once, on a pool of threads, each doing what the
+`search` and `click` tools do on every call. Checks that every session sees the
+same observations as when it runs alone, which sessions sharing the single
+webshop environment do not, and measures the throughput and the latency of the
+tool calls.
+
+Run from the agent directory, once the product data is downloaded and indexed,
+with:
+
+  python -m personalized_shopping.shared_libraries.load_test_env_pool \
+    [num_sessions] [num_threads] [num_products]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import random
+import sys
+import time
+
+from .init_env import WebShopEnvPool, init_env
+
+STEPS_PER_SESSION = 8
+QUERY_WORDS = 4
+
+
+def tool_call(env, action, instruction_text):
+    """Does what the `search` and `click` tools do with the environment."""
+    env.server.assigned_instruction_text = instruction_text
+    env.step(action)
+    observation = env.observation
+    env.state["html"]  # Saved as an artifact by the tools.
+    return observation
+
+
+class Shopper:
+    """A session that searches and clicks at random, reproducibly."""
+
+    def __init__(self, session, goals):
+        self.session = session
+        self.rng = random.Random(session)
+        words = goals[session % len(goals)]["instruction_text"].split()
+        keywords = " ".join(self.rng.sample(words, min(QUERY_WORDS, len(words))))
+        self.instruction_text = f"Find me {keywords}."
+        self.actions = [f"search[{keywords}]"]
+        self.observations = []
+        self.latencies = []
+
+    def step(self, env):
+        """Takes the next action, returns False once the session is over."""
+        if len(self.observations) == STEPS_PER_SESSION:
+            return False
+        if not self.actions:
+            clickables = env.get_available_actions()["clickables"]
+            clickables = [c for c in clickables if c not in ("buy now", "search")]
+            if not clickables:
+                return False
+            self.actions.append(f"click[{self.rng.choice(clickables)}]")
+        start = time.perf_counter()
+        observation = tool_call(env, self.actions.pop(), self.instruction_text)
+        self.latencies.append(time.perf_counter() - start)
+        self.observations.append(observation)
+        return True
+
+
+def run_alone(pool, num_sessions, goals):
+    """Runs the sessions one after the other."""
+    shoppers = [Shopper(session, goals) for session in range(num_sessions)]
+    for shopper in shoppers:
+        while shopper.step(pool.get(f"alone-{shopper.session}")):
+            pass
+    return shoppers
+
+
+def run_interleaved(get_env, num_sessions, goals):
+    """Runs the sessions one step at a time each, in turn."""
+    shoppers = [Shopper(session, goals) for session in range(num_sessions)]
+    running = list(shoppers)
+    while running:
+        running = [s for s in running if s.step(get_env(s.session))]
+    return shoppers
+
+
+def run_concurrently(pool, num_sessions, num_threads, goals):
+    """Runs the sessions on a pool of threads, one tool call per task."""
+    shoppers = [Shopper(session, goals) for session in range(num_sessions)]
+
+    def run(shopper):
+        while shopper.step(pool.get(f"concurrent-{shopper.session}")):
+            time.sleep(0)  # Lets the other sessions in between tool calls.
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(num_threads) as executor:
+        list(executor.map(run, shoppers))
+    return shoppers, time.perf_counter() - start
+
+
+def num_clobbered(shoppers, expected):
+    return sum(s.observations != e.observations for s, e in zip(shoppers, expected))
+
+
+def main(num_sessions, num_threads, num_products):
+    base_env = init_env(num_products)
+    base_env.reset()
+    goals = base_env.unwrapped.server.goals
+    pool = WebShopEnvPool(base_env, max_size=num_sessions)
+    expected = run_alone(pool, num_sessions, goals)
+
+    shared = run_interleaved(lambda session: base_env, num_sessions, goals)
+    pooled = run_interleaved(
+        lambda session: pool.get(f"interleaved-{session}"), num_sessions, goals
+    )
+    print(f"{num_sessions} sessions of up to {STEPS_PER_SESSION} tool calls")
+    print(f"clobbered sessions, shared environment: {num_clobbered(shared, expected)}")
+    print(f"clobbered sessions, pooled environments: {num_clobbered(pooled, expected)}")
+    assert num_clobbered(pooled, expected) == 0, "Sessions clobbered each other."
+
+    concurrent, seconds = run_concurrently(pool, num_sessions, num_threads, goals)
+    assert num_clobbered(concurrent, expected) == 0, "Sessions clobbered each other."
+    assert len(pool) <= pool.max_size
+    latencies = sorted(t for s in concurrent for t in s.latencies)
+    print(
+        f"{num_threads} threads: {len(latencies) / seconds:.1f} tool calls/s,"
+        f" p50 {latencies[len(latencies) // 2] * 1e3:.1f} ms,"
+        f" p95 {latencies[int(len(latencies) * 0.95)] * 1e3:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 50000,
+    )
@@ -0,0 +1,67 @@
+"""Compares the start-up time of loading the catalog from JSON and from a snapshot.
+
+Loads the products and goals with `load_products` and `get_goals`, writes them
+to a temporary snapshot, then loads the snapshot and accesses the products of
+a search results page. Checks that the snapshot gives back the same data.
+
+Run from this directory, after downloading the product data, with:
+
+  python benchmark_catalog_startup.py [num_products]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine.catalog import load_snapshot, write_snapshot
+from web_agent_site.engine.engine import SEARCH_RETURN_N, load_products
+from web_agent_site.engine.goal import get_goals
+from web_agent_site.utils import DEFAULT_FILE_PATH
+
+
+def main(num_products):
+    start = time.perf_counter()
+    all_products, product_item_dict, product_prices, product_indexes = load_products(
+        DEFAULT_FILE_PATH, num_products=num_products, human_goals=False
+    )
+    goals = get_goals(all_products, product_prices, human_goals=False)
+    json_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "catalog.snapshot")
+        start = time.perf_counter()
+        write_snapshot(path, all_products, product_prices, goals, product_indexes)
+        write_seconds = time.perf_counter() - start
+        snapshot_mib = os.path.getsize(path) / 2**20
+
+        start = time.perf_counter()
+        snapshot = load_snapshot(path)
+        load_seconds = time.perf_counter() - start
+        asins = random.Random(0).sample(list(product_item_dict), SEARCH_RETURN_N)
+        start = time.perf_counter()
+        products = [snapshot[1][asin] for asin in asins]
+        page_seconds = time.perf_counter() - start
+
+        assert products == [product_item_dict[asin] for asin in asins]
+        assert list(snapshot[0]) == all_products
+        assert snapshot[2] == product_prices
+        assert snapshot[4] == goals
+        for grouping, snapshot_grouping in zip(
+            product_indexes, snapshot[3], strict=True
+        ):
+            assert dict(snapshot_grouping) == grouping
+
+    print(f"{len(all_products)} products, {len(goals)} goals")
+    print(f"JSON load_products + get_goals: {json_seconds:8.2f} s")
+    print(f"snapshot write:                 {write_seconds:8.2f} s")
+    print(f"snapshot size:                  {snapshot_mib:8.1f} MiB")
+    print(f"snapshot load:                  {load_seconds:8.3f} s")
+    print(f"first {SEARCH_RETURN_N} products:              {page_seconds:8.4f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,110 @@
+"""Compares the Lucene (pyserini) and in-process BM25 search backends.
+
+Reports, for each backend, the start-up time, the resident memory of the
+process after start-up, the queries per second on queries made of product
+titles, and how many of the top 10 Lucene hits the BM25 backend also returns.
+Each backend runs in its own process, so that memory is not shared.
+
+Run from this directory, after `convert_product_file_format.py` and
+`run_indexing.sh`, with:
+
+  python benchmark_search_backends.py [num_products]
+"""
+
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, "../")
+
+NUM_QUERIES = 1000
+QUERY_WORDS = 6
+TOP_K = 10
+
+
+def get_queries(suffix):
+    with open(f"./resources_{suffix}/documents.jsonl") as f:
+        titles = [json.loads(line)["product"]["Title"] for line in f]
+    random.seed(0)
+    return [
+        " ".join(title.lower().split()[:QUERY_WORDS])
+        for title in random.choices(titles, k=NUM_QUERIES)
+    ]
+
+
+def run_backend(num_products, search_backend):
+    from web_agent_site.engine.engine import (
+        get_search_engine_suffix,
+        init_search_engine,
+    )
+
+    queries = get_queries(get_search_engine_suffix(num_products))
+    start = time.perf_counter()
+    search_engine = init_search_engine(num_products, search_backend)
+    search_engine.search(queries[0], k=TOP_K)
+    startup_seconds = time.perf_counter() - start
+    # `ru_maxrss` is in KiB on Linux.
+    rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start = time.perf_counter()
+    hits = [
+        [hit.docid for hit in search_engine.search(query, k=TOP_K)] for query in queries
+    ]
+    queries_per_second = len(queries) / (time.perf_counter() - start)
+    print(
+        json.dumps(
+            {
+                "startup_seconds": startup_seconds,
+                "rss_mib": rss_mib,
+                "queries_per_second": queries_per_second,
+                "hits": hits,
+            }
+        )
+    )
+
+
+def run_in_subprocess(num_products, search_backend):
+    output = subprocess.run(
+        [sys.executable, __file__, str(num_products), search_backend],
+        capture_output=True,
+        text=True,
+    )
+    if output.returncode != 0:
+        print(f"{search_backend}: failed\n{output.stderr.strip()}\n")
+        return None
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(num_products):
+    results = {}
+    for search_backend in ("lucene", "bm25"):
+        # The first run of the BM25 backend builds and saves its index.
+        run_in_subprocess(num_products, search_backend)
+        results[search_backend] = run_in_subprocess(num_products, search_backend)
+
+    print(f"{num_products} products, {NUM_QUERIES} queries")
+    print("backend | startup (s) | RSS (MiB) | queries/s")
+    for search_backend, result in results.items():
+        if result is not None:
+            print(
+                f"{search_backend:7} | {result['startup_seconds']:11.2f} |"
+                f" {result['rss_mib']:9.1f} | {result['queries_per_second']:9.1f}"
+            )
+    if all(result is not None for result in results.values()):
+        overlaps = [
+            len(set(lucene_hits) & set(bm25_hits)) / max(len(lucene_hits), 1)
+            for lucene_hits, bm25_hits in zip(
+                results["lucene"]["hits"], results["bm25"]["hits"], strict=True
+            )
+        ]
+        print(f"overlap@{TOP_K} with lucene: {sum(overlaps) / len(overlaps):.3f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        run_backend(int(sys.argv[1]), sys.argv[2])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
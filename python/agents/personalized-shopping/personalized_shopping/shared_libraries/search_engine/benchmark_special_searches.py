@@ -0,0 +1,106 @@
+"""Measures the latency of `<a>`, `<c>` and `<q>` searches.
+
+Compares the linear scans of all products that these searches used to do with
+the indexes built by `load_products`, on a synthetic catalog with the size and
+shape of the 50k products one, so that no product data is needed.
+
+Run from this directory with:
+
+  python benchmark_special_searches.py [num_products]
+"""
+
+import random
+import sys
+import timeit
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine.engine import (
+    build_product_indexes,
+    get_top_n_product_from_keywords,
+)
+
+NUM_CATEGORIES = 5
+NUM_QUERIES = 300
+NUM_ATTRIBUTES = 2000
+ATTRIBUTES_PER_PRODUCT = 5
+NUM_SEARCHES = 100
+
+
+def make_products(num_products):
+    random.seed(0)
+    return [
+        {
+            "asin": f"B{i:09d}",
+            "category": f"category {random.randrange(NUM_CATEGORIES)}",
+            "query": f"query {random.randrange(NUM_QUERIES)}",
+            "Attributes": [
+                f"attribute {a}"
+                for a in random.sample(range(NUM_ATTRIBUTES), ATTRIBUTES_PER_PRODUCT)
+            ],
+        }
+        for i in range(num_products)
+    ]
+
+
+def linear_scan(keywords, all_products, attribute_to_asins):
+    if keywords[0] == "<a>":
+        attribute = " ".join(keywords[1:]).strip()
+        asins = attribute_to_asins[attribute]
+        return [p for p in all_products if p["asin"] in asins]
+    elif keywords[0] == "<c>":
+        category = keywords[1].strip()
+        return [p for p in all_products if p["category"] == category]
+    else:
+        query = " ".join(keywords[1:]).strip()
+        return [p for p in all_products if p["query"] == query]
+
+
+def main(num_products):
+    all_products = make_products(num_products)
+    product_item_dict = {p["asin"]: p for p in all_products}
+    attribute_to_asins = {}
+    for p in all_products:
+        for a in p["Attributes"]:
+            attribute_to_asins.setdefault(a, set()).add(p["asin"])
+    product_indexes = build_product_indexes(all_products)
+
+    print(f"{num_products} products, {NUM_SEARCHES} searches of each kind")
+    print("search | scan (ms) | index (ms) | speedup")
+    for keywords in (
+        ["<a>", "attribute", "7"],
+        ["<c>", "category 3"],
+        ["<q>", "query", "42"],
+    ):
+        expected = linear_scan(keywords, all_products, attribute_to_asins)
+        actual = get_top_n_product_from_keywords(
+            keywords, None, all_products, product_item_dict, product_indexes
+        )
+        assert actual == expected, keywords
+
+        scan_ms = (
+            timeit.timeit(
+                lambda: linear_scan(keywords, all_products, attribute_to_asins),
+                number=NUM_SEARCHES,
+            )
+            / NUM_SEARCHES
+            * 1e3
+        )
+        index_ms = (
+            timeit.timeit(
+                lambda: get_top_n_product_from_keywords(
+                    keywords, None, all_products, product_item_dict, product_indexes
+                ),
+                number=NUM_SEARCHES,
+            )
+            / NUM_SEARCHES
+            * 1e3
+        )
+        print(
+            f"{keywords[0]:6} | {scan_ms:9.3f} | {index_ms:10.3f} |"
+            f" {scan_ms / index_ms:6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
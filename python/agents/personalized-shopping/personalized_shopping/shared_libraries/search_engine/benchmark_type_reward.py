@@ -0,0 +1,76 @@
+"""Measures the time spent in `get_type_reward` over many episodes.
+
+Compares parsing both names with spaCy on every reward, as `get_type_reward`
+used to do, with the nouns parsed once per name, and with the nouns of all
+product names parsed beforehand in batches by `parse_name_nouns` (as done when
+writing a catalog snapshot). Checks that all of them give the same rewards.
+
+Run from this directory, after downloading the product data, with:
+
+  python benchmark_type_reward.py [num_products] [num_episodes]
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine import goal as goal_module
+from web_agent_site.engine.engine import load_products
+from web_agent_site.utils import DEFAULT_FILE_PATH
+
+
+def parse_nouns(name):
+    return goal_module._get_nouns(goal_module.nlp(name))
+
+
+def main(num_products, num_episodes):
+    all_products, _, product_prices, _ = load_products(
+        DEFAULT_FILE_PATH, num_products=num_products, human_goals=False
+    )
+    goals = goal_module.get_goals(all_products, product_prices, human_goals=False)
+    rng = random.Random(0)
+    episodes = [
+        (rng.choice(all_products), rng.choice(goals)) for _ in range(num_episodes)
+    ]
+
+    def run():
+        start = time.perf_counter()
+        rewards = [goal_module.get_type_reward(p, g) for p, g in episodes]
+        return rewards, time.perf_counter() - start
+
+    # Parsing on every reward, as before.
+    get_name_nouns = goal_module.get_name_nouns
+    goal_module.get_name_nouns = parse_nouns
+    expected, uncached_seconds = run()
+    goal_module.get_name_nouns = get_name_nouns
+
+    goal_module._name_nouns.clear()
+    cached, cached_seconds = run()
+
+    goal_module._name_nouns.clear()
+    start = time.perf_counter()
+    goal_module.parse_name_nouns(
+        [p["name"] for p in all_products] + [g["name"] for g in goals]
+    )
+    parse_seconds = time.perf_counter() - start
+    parsed, parsed_seconds = run()
+    assert cached == expected and parsed == expected, "Rewards differ."
+
+    print(f"{num_products} products, {num_episodes} episodes")
+    print("nouns              | rewards (s) | rewards/s")
+    for name, seconds in (
+        ("parsed every time", uncached_seconds),
+        ("parsed once", cached_seconds),
+        ("parsed beforehand", parsed_seconds),
+    ):
+        print(f"{name:18} | {seconds:11.2f} | {num_episodes / seconds:9.0f}")
+    print(f"parsing all names beforehand took {parse_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+    )
@@ -0,0 +1,39 @@
+"""Writes the product catalog snapshot loaded by the WebShop server.
+
+Run from this directory, after downloading the product data, with:
+
+  python write_catalog_snapshot.py [num_products] [--human_goals]
+
+`num_products` must match the one of the environment (50000 for the agent).
+"""
+
+import argparse
+import sys
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine.catalog import (
+    get_snapshot_path,
+    get_source_versions,
+    write_snapshot,
+)
+from web_agent_site.engine.engine import load_products
+from web_agent_site.engine.goal import get_goals
+from web_agent_site.utils import DEFAULT_FILE_PATH
+
+parser = argparse.ArgumentParser()
+parser.add_argument("num_products", type=int, nargs="?", default=50000)
+parser.add_argument("--human_goals", action="store_true")
+args = parser.parse_args()
+
+# Read before the files, so that a change while they are loaded is not missed.
+source_versions = get_source_versions(DEFAULT_FILE_PATH)
+all_products, _, product_prices, product_indexes = load_products(
+    DEFAULT_FILE_PATH, num_products=args.num_products, human_goals=args.human_goals
+)
+goals = get_goals(all_products, product_prices, args.human_goals)
+path = get_snapshot_path(DEFAULT_FILE_PATH, args.num_products, args.human_goals)
+write_snapshot(
+    path, all_products, product_prices, goals, product_indexes, source_versions
+)
+print(f"Wrote {len(all_products)} products and {len(goals)} goals to {path}.")
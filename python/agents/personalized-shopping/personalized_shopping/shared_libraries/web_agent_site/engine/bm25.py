@@ -0,0 +1,169 @@
+"""In-process BM25 search over the WebShop product documents.
+
+A drop-in replacement for pyserini's `LuceneSearcher` that needs neither a JVM
+nor a Lucene index: the inverted index is built with NumPy from the same
+`documents.jsonl` files that are indexed by `run_indexing.sh`, and search hits
+carry the product ASIN directly.
+"""
+
+import json
+import re
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+# Same defaults as pyserini's `LuceneSearcher`.
+DEFAULT_K1 = 0.9
+DEFAULT_B = 0.4
+
+# Stop words of Lucene's `EnglishAnalyzer`, which pyserini uses by default.
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such"
+    " that the their then there these they this to was will with".split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_POSSESSIVE_PATTERN = re.compile(r"'s\b")
+
+
+class SearchHit(NamedTuple):
+    docid: str
+    """The ASIN of the product, as in the `id` field of the documents."""
+    score: float
+
+
+def stem(token):
+    """Strips plural suffixes (Harman's S-stemmer)."""
+    if len(token) < 3:
+        return token
+    if token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Splits text into stemmed terms, approximating Lucene's English analyzer."""
+    text = _POSSESSIVE_PATTERN.sub("", text.lower())
+    return [
+        stem(token) for token in _TOKEN_PATTERN.findall(text) if token not in STOP_WORDS
+    ]
+
+
+class BM25Searcher:
+    """BM25 search over an inverted index stored in flat NumPy arrays.
+
+    The postings of term `t` are `posting_docs[offsets[t]:offsets[t + 1]]`, and
+    the corresponding `posting_weights` are their BM25 term frequency
+    components, precomputed for `k1` and `b` when the index is built. Scoring a
+    query is then a weighted sum of a few array slices.
+    """
+
+    def __init__(self, asins, vocabulary, idfs, offsets, posting_docs, posting_weights):
+        self.asins = asins
+        self.vocabulary = vocabulary
+        self.idfs = idfs
+        self.offsets = offsets
+        self.posting_docs = posting_docs
+        self.posting_weights = posting_weights
+
+    @classmethod
+    def from_documents(cls, path, k1=DEFAULT_K1, b=DEFAULT_B):
+        """Builds the index from a `documents.jsonl` file."""
+        asins = []
+        vocabulary = {}
+        term_ids, doc_ids, term_freqs, doc_lengths = [], [], [], []
+        with open(path) as f:
+            for doc_id, line in enumerate(f):
+                doc = json.loads(line)
+                asins.append(doc["id"])
+                tokens = tokenize(doc["contents"])
+                doc_lengths.append(len(tokens))
+                for term, freq in Counter(tokens).items():
+                    term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                    doc_ids.append(doc_id)
+                    term_freqs.append(freq)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        term_freqs = np.asarray(term_freqs, dtype=np.float32)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+
+        order = np.argsort(term_ids, kind="stable")
+        doc_freqs = np.bincount(term_ids, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=offsets[1:])
+
+        num_docs = len(asins)
+        idfs = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        length_norms = k1 * (1 - b + b * doc_lengths / max(doc_lengths.mean(), 1.0))
+        posting_docs = doc_ids[order]
+        posting_freqs = term_freqs[order]
+        posting_weights = (
+            posting_freqs * (k1 + 1) / (posting_freqs + length_norms[posting_docs])
+        )
+        return cls(
+            asins,
+            vocabulary,
+            idfs.astype(np.float32),
+            offsets,
+            posting_docs,
+            posting_weights.astype(np.float32),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index saved with `save`."""
+        with np.load(path) as arrays:
+            asins = bytes(arrays["asins"]).decode().split("\n")
+            terms = bytes(arrays["terms"]).decode().split("\n")
+            return cls(
+                asins,
+                {term: i for i, term in enumerate(terms)},
+                arrays["idfs"],
+                arrays["offsets"],
+                arrays["posting_docs"],
+                arrays["posting_weights"],
+            )
+
+    def save(self, path):
+        """Saves the index, so that it does not have to be built again."""
+        np.savez(
+            path,
+            asins=np.frombuffer("\n".join(self.asins).encode(), dtype=np.uint8),
+            terms=np.frombuffer("\n".join(self.vocabulary).encode(), dtype=np.uint8),
+            idfs=self.idfs,
+            offsets=self.offsets,
+            posting_docs=self.posting_docs,
+            posting_weights=self.posting_weights,
+        )
+
+    @property
+    def num_docs(self):
+        return len(self.asins)
+
+    def search(self, query, k=10):
+        """Returns the `k` best matching documents, breaking ties by position."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term, query_freq in Counter(tokenize(query)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            scores[self.posting_docs[start:end]] += (
+                query_freq * self.idfs[term_id] * self.posting_weights[start:end]
+            )
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            # Keep everything tied with the k-th score, so that ties are broken
+            # by document position (as Lucene does) rather than arbitrarily.
+            kth_score = np.partition(scores[candidates], len(candidates) - k)[
+                len(candidates) - k
+            ]
+            candidates = candidates[scores[candidates] >= kth_score]
+        top = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        return [SearchHit(self.asins[i], float(scores[i])) for i in top]
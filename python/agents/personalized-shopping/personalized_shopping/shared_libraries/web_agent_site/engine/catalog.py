@@ -0,0 +1,246 @@
+"""Binary snapshots of the product catalog, for a fast start of the WebShop server.
+
+`load_products` parses the whole product JSON file and `get_goals` then
+regenerates the goals, which takes minutes for the full catalog. A snapshot
+stores the result once: a pickled header with the ASINs, prices, indexes, goals
+and the nouns of the product names used by the rewards, followed by one pickled
+record per product. Snapshots are memory-mapped and products are only unpickled
+when they are first accessed.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from . import engine
+from .engine import ProductIndexes, build_product_indexes, load_products
+from .goal import add_name_nouns, get_goals, parse_name_nouns
+
+SNAPSHOT_VERSION = 3
+
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def get_snapshot_path(filepath, num_products=None, human_goals=True):
+    """Returns where the snapshot of a product file is stored, next to it."""
+    size = "all" if num_products is None else num_products
+    goals = "human" if human_goals else "synthetic"
+    return f"{os.path.splitext(filepath)[0]}_{size}_{goals}.snapshot"
+
+
+def get_source_versions(filepath):
+    """Returns the sizes and modification times of the files a catalog is read from.
+
+    These are the product file and the attribute and human instruction files
+    read by `load_products`.
+    """
+    versions = []
+    for path in (filepath, engine.DEFAULT_ATTR_PATH, engine.HUMAN_ATTR_PATH):
+        stat = os.stat(path)
+        versions.append((stat.st_size, stat.st_mtime_ns))
+    return versions
+
+
+class ProductCatalog(Sequence):
+    """The products of a snapshot, unpickled on first access."""
+
+    def __init__(self, buffer, offsets):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._products = [None] * (len(offsets) - 1)
+
+    def __len__(self):
+        return len(self._products)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        product = self._products[i]
+        if product is None:
+            start, end = self._offsets[i], self._offsets[i + 1]
+            product = self._products[i] = pickle.loads(self._buffer[start:end])
+        return product
+
+
+class _ProductsByAsin(Mapping):
+    def __init__(self, catalog, asin_to_index):
+        self._catalog = catalog
+        self._asin_to_index = asin_to_index
+
+    def __getitem__(self, asin):
+        return self._catalog[self._asin_to_index[asin]]
+
+    def __contains__(self, asin):
+        return asin in self._asin_to_index
+
+    def __iter__(self):
+        return iter(self._asin_to_index)
+
+    def __len__(self):
+        return len(self._asin_to_index)
+
+
+class _Grouping(Mapping):
+    """Maps keys to groups of product indexes stored in flat arrays."""
+
+    def __init__(self, keys, offsets, members, make_group):
+        self._key_to_index = {key: i for i, key in enumerate(keys)}
+        self._offsets = offsets
+        self._members = members
+        self._make_group = make_group
+
+    def __getitem__(self, key):
+        i = self._key_to_index[key]
+        indexes = self._members[self._offsets[i] : self._offsets[i + 1]]
+        return self._make_group(indexes.tolist())
+
+    def __contains__(self, key):
+        return key in self._key_to_index
+
+    def __iter__(self):
+        return iter(self._key_to_index)
+
+    def __len__(self):
+        return len(self._key_to_index)
+
+
+def _flatten_grouping(grouping, asin_to_index):
+    """Turns a mapping of keys to products or ASINs into flat arrays."""
+    keys, offsets, members = [], [0], []
+    for key, group in grouping.items():
+        keys.append(key)
+        members.extend(
+            asin_to_index[p if isinstance(p, str) else p["asin"]] for p in group
+        )
+        offsets.append(len(members))
+    return (
+        keys,
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(members, dtype=np.int32),
+    )
+
+
+def write_snapshot(
+    path,
+    all_products,
+    product_prices,
+    goals,
+    product_indexes=None,
+    source_versions=None,
+):
+    """Writes the products, their prices, their indexes and the goals to `path`.
+
+    `source_versions` are the `get_source_versions` of the files the products
+    were read from. `load_catalog` only uses snapshots written with them.
+    """
+    if product_indexes is None:
+        product_indexes = build_product_indexes(all_products)
+    asins = [p["asin"] for p in all_products]
+    asin_to_index = {asin: i for i, asin in enumerate(asins)}
+    records = [pickle.dumps(p, protocol=pickle.HIGHEST_PROTOCOL) for p in all_products]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([len(record) for record in records], out=offsets[1:])
+    header = pickle.dumps(
+        {
+            "version": SNAPSHOT_VERSION,
+            "source_versions": source_versions,
+            "asins": asins,
+            "prices": np.asarray([product_prices[asin] for asin in asins]),
+            "offsets": offsets,
+            "indexes": [
+                _flatten_grouping(grouping, asin_to_index)
+                for grouping in product_indexes
+            ],
+            "goals": goals,
+            "name_nouns": parse_name_nouns(
+                [p["name"] for p in all_products] + [g["name"] for g in goals]
+            ),
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    # Written next to the final file then renamed, so that a partially written
+    # snapshot is never loaded.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for record in records:
+            f.write(record)
+    os.replace(tmp_path, path)
+
+
+def _read_header(path):
+    """Maps a snapshot, and returns it with its header and where its records start."""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (header_length,) = _HEADER_LENGTH.unpack_from(buffer)
+    start = _HEADER_LENGTH.size + header_length
+    header = pickle.loads(buffer[_HEADER_LENGTH.size : start])
+    return buffer, header, start
+
+
+def load_snapshot(path):
+    """Loads a snapshot written by `write_snapshot`.
+
+    Returns:
+      The same products, product dict, prices and indexes as `load_products`,
+      and the goals of `get_goals`. The nouns of the product names are added to
+      those of `get_name_nouns`.
+    """
+    buffer, header, start = _read_header(path)
+    if header["version"] != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Snapshot {path} has version {header['version']}, expected"
+            f" {SNAPSHOT_VERSION}. Write it again with `write_snapshot`."
+        )
+    return _load_records(buffer, header, start)
+
+
+def _load_records(buffer, header, start):
+    asins = header["asins"]
+    catalog = ProductCatalog(memoryview(buffer)[start:], header["offsets"])
+    asin_to_index = {asin: i for i, asin in enumerate(asins)}
+    product_item_dict = _ProductsByAsin(catalog, asin_to_index)
+    product_prices = dict(zip(asins, header["prices"].tolist(), strict=True))
+
+    def products(indexes):
+        return [catalog[i] for i in indexes]
+
+    def asin_set(indexes):
+        return dict.fromkeys(asins[i] for i in indexes)
+
+    add_name_nouns(header["name_nouns"])
+
+    categories, queries, attributes = header["indexes"]
+    product_indexes = ProductIndexes(
+        _Grouping(*categories, products),
+        _Grouping(*queries, products),
+        _Grouping(*attributes, asin_set),
+    )
+    return catalog, product_item_dict, product_prices, product_indexes, header["goals"]
+
+
+def load_catalog(filepath, num_products=None, human_goals=True):
+    """Loads the products and goals from a snapshot, or from the JSON files.
+
+    A snapshot is used if it was written from the current version of the
+    product, attribute and human instruction files (see `write_snapshot`).
+    """
+    path = get_snapshot_path(filepath, num_products, human_goals)
+    if os.path.exists(path):
+        buffer, header, start = _read_header(path)
+        up_to_date = header.get("source_versions") == get_source_versions(filepath)
+        if header["version"] == SNAPSHOT_VERSION and up_to_date:
+            return _load_records(buffer, header, start)
+        buffer.close()
+    all_products, product_item_dict, product_prices, product_indexes = load_products(
+        filepath, num_products=num_products, human_goals=human_goals
+    )
+    goals = get_goals(all_products, product_prices, human_goals)
+    return all_products, product_item_dict, product_prices, product_indexes, goals
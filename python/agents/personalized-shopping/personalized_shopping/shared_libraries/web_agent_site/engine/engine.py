@@ -3,13 +3,16 @@
 from ast import literal_eval
 from collections import defaultdict
 from decimal import Decimal
+import functools
 import json
 import os
 import random
+from pprint import pformat
 import re
+from typing import NamedTuple
 
-from flask import render_template_string
-from pyserini.search.lucene import LuceneSearcher
+from flask import current_app, render_template
+from jinja2.utils import htmlsafe_json_dumps
 from rich import print
 from tqdm import tqdm
 
@@ -18,6 +21,7 @@ from ..utils import (
     DEFAULT_ATTR_PATH,
     HUMAN_ATTR_PATH,
 )
+from .bm25 import BM25Searcher
 
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 
@@ -25,6 +29,11 @@ SEARCH_RETURN_N = 50
 PRODUCT_WINDOW = 10
 TOP_K_ATTR = 10
 
+SEARCH_ENGINE_DIR = os.path.join(BASE_DIR, "../search_engine")
+# Selects the search engine: "lucene" (pyserini) or "bm25" (in-process NumPy).
+SEARCH_BACKEND = os.environ.get("WEBSHOP_SEARCH_BACKEND", "lucene")
+SEARCH_BACKENDS = ("lucene", "bm25")
+
 END_BUTTON = "Buy Now"
 NEXT_PAGE = "Next >"
 PREV_PAGE = "< Prev"
@@ -41,16 +50,14 @@ ACTION_TO_TEMPLATE = {
 def map_action_to_html(action, **kwargs):
     action_name, action_arg = parse_action(action)
     if action_name == "start":
-        path = os.path.join(TEMPLATE_DIR, "search_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render_template(
+            get_html_template("search_page.html"),
             session_id=kwargs["session_id"],
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "search":
-        path = os.path.join(TEMPLATE_DIR, "results_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render_template(
+            get_html_template("results_page.html"),
             session_id=kwargs["session_id"],
             products=kwargs["products"],
             keywords=kwargs["keywords"],
@@ -59,9 +66,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "click" and action_arg == END_BUTTON:
-        path = os.path.join(TEMPLATE_DIR, "done_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render_template(
+            get_html_template("done_page.html"),
             session_id=kwargs["session_id"],
             reward=kwargs["reward"],
             asin=kwargs["asin"],
@@ -76,9 +82,8 @@ def map_action_to_html(action, **kwargs):
             product_category=kwargs.get("product_category"),
         )
     elif action_name == "click" and action_arg in ACTION_TO_TEMPLATE:
-        path = os.path.join(TEMPLATE_DIR, ACTION_TO_TEMPLATE[action_arg])
-        html = render_template_string(
-            read_html_template(path),
+        html = render_template(
+            get_html_template(ACTION_TO_TEMPLATE[action_arg]),
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -88,9 +93,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs.get("instruction_text"),
         )
     elif action_name == "click":
-        path = os.path.join(TEMPLATE_DIR, "item_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render_template(
+            get_html_template("item_page.html"),
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -111,6 +115,201 @@ def read_html_template(path):
     return template
 
 
+def get_html_template(name):
+    """Returns the template compiled for the current Flask app."""
+    return _compile_html_template(current_app.jinja_env, name)
+
+
+@functools.cache
+def _compile_html_template(jinja_env, name):
+    return jinja_env.from_string(read_html_template(os.path.join(TEMPLATE_DIR, name)))
+
+
+class PageText(NamedTuple):
+    """A visible text of a page, as BeautifulSoup would find it in the HTML."""
+
+    text: str
+    element: str | None = None
+    """"button", "label" or "product-link" for texts that can be clicked."""
+
+
+class TextPage:
+    """A page rendered as its visible texts and clickables, without HTML.
+
+    `texts` and `clickables` are what `WebAgentTextEnv` would otherwise parse
+    from the HTML of the page: clickables map the text of buttons and product
+    links, then the value of options, to the attributes of their element. The
+    HTML is only rendered if asked for, from the same action and arguments.
+    """
+
+    def __init__(self, texts, clickables, has_search_bar, action, kwargs):
+        self.texts = texts
+        self.clickables = clickables
+        self.has_search_bar = has_search_bar
+        self.action = action
+        self.kwargs = kwargs
+        self._html = None
+
+    @property
+    def html(self):
+        """Renders the page with `map_action_to_html`, within a Flask app context."""
+        if self._html is None:
+            self._html = map_action_to_html(self.action, **self.kwargs)
+        return self._html
+
+
+# ASCII whitespace, as in BeautifulSoup.
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+_BUTTON = ["btn", "btn-primary"]
+
+
+class _TextPageBuilder:
+    def __init__(self):
+        self.texts = []
+        self.buttons = {}
+        self.product_links = {}
+        self.options = {}
+
+    def add(self, text, element=None):
+        """Adds a text node, collapsing whitespace as BeautifulSoup does."""
+        text = str(text)
+        if not text:
+            return
+        if not text.strip(_ASCII_SPACES):
+            if "\n" in text:
+                return
+            text = " "
+        self.texts.append(PageText(text, element))
+
+    def add_button(self, text, classes=_BUTTON):
+        self.add(text, "button")
+        self.buttons.setdefault(text.lower(), {"class": classes})
+
+    def add_product_link(self, asin):
+        self.add(asin, "product-link")
+        self.product_links.setdefault(str(asin).lower(), {"class": ["product-link"]})
+
+    def add_option(self, name, value):
+        self.add(value, "label")
+        self.options[str(value)] = {"name": str(name), "value": str(value)}
+
+    def add_instruction(self, instruction_text, separator="Instruction:"):
+        self.add(separator)
+        self.add(instruction_text)
+
+    def build(self, action, kwargs, has_search_bar=False):
+        clickables = dict(self.buttons)
+        for text, attrs in self.product_links.items():
+            clickables.setdefault(text, attrs)
+        clickables.update(self.options)
+        return TextPage(self.texts, clickables, has_search_bar, action, kwargs)
+
+
+def _get_template_attr(obj, name):
+    """Renders `{{ obj.name }}`, which is empty if `obj` has no such item."""
+    if isinstance(obj, dict) and name in obj:
+        return str(obj[name])
+    return ""
+
+
+def map_action_to_text_page(action, **kwargs):
+    """Renders the same page as `map_action_to_html`, as a `TextPage`."""
+    action_name, action_arg = parse_action(action)
+    page = _TextPageBuilder()
+    if action_name == "start":
+        page.add("WebShop")
+        page.add_instruction(kwargs["instruction_text"], "Instruction: ")
+        page.add_button("Search", ["btn", "btn-success"])
+        return page.build(action, kwargs, has_search_bar=True)
+    elif action_name == "search":
+        page.add_instruction(kwargs["instruction_text"])
+        page.add_button(BACK_TO_SEARCH, ["btn", "btn-success"])
+        page.add(f"Page {kwargs['page']} (Total results: {kwargs['total']})")
+        if kwargs["page"] > 1:
+            page.add_button(PREV_PAGE)
+        page.add_button(NEXT_PAGE)
+        for item in kwargs["products"]:
+            page.add_product_link(item["asin"])
+            page.add(item["Title"])
+            page.add(item["Price"])
+    elif action_name == "click" and action_arg == END_BUTTON:
+        goal = kwargs.get("goal")
+        page.add("Thank you for shopping with us!")
+        page.add("Your code: ")
+        page.add(kwargs.get("mturk_code"))
+        page.add(" (Paste it in your MTurk interface.)")
+        page.add("Purchased")
+        for label, value in (
+            ("asin", kwargs["asin"]),
+            ("options", htmlsafe_json_dumps(kwargs["options"], sort_keys=True)),
+            ("attrs", kwargs.get("purchased_attrs")),
+            ("category", kwargs.get("category")),
+            ("query", kwargs.get("query")),
+            ("product category", kwargs.get("product_category")),
+        ):
+            page.add(label)
+            page.add(value)
+        page.add("Target")
+        for label, name in (
+            ("asin", "asin"),
+            ("options", "goal_options"),
+            ("attrs", "attributes"),
+            ("price upper", "price_upper"),
+            ("instuction text", "instruction_text"),
+            ("category", "category"),
+            ("product category", "product_category"),
+            ("query", "query"),
+        ):
+            page.add(label)
+            page.add(_get_template_attr(goal, name))
+        page.add("Goal ")
+        page.add(pformat(goal))
+        page.add("Reward")
+        page.add("Your score (min 0.0, max 1.0)")
+        page.add(kwargs["reward"])
+        page.add("Reward Details ")
+        page.add(pformat(kwargs.get("reward_info")))
+    elif action_name == "click":
+        product_info = kwargs["product_info"]
+        page.add_instruction(kwargs.get("instruction_text"))
+        page.add_button(BACK_TO_SEARCH, ["btn", "btn-success"])
+        page.add_button(PREV_PAGE)
+        if action_arg == "Description":
+            page.add(product_info["Description"])
+        elif action_arg == "Features":
+            for bulletpoint in product_info["BulletPoints"]:
+                page.add(f" {bulletpoint}")
+        elif action_arg == "Reviews":
+            for review in product_info["Reviews"]:
+                page.add(f'"{_get_template_attr(review, "title")}"')
+                page.add(_get_template_attr(review, "score"))
+                page.add(_get_template_attr(review, "body"))
+        elif action_arg == "Attributes":
+            for attribute in product_info["Attributes"]:
+                page.add(f" {attribute}")
+            page.add(product_info["category"])
+            page.add(product_info["query"])
+            page.add(product_info["product_category"])
+        else:
+            for option_name, option_contents in product_info["options"].items():
+                page.add(option_name)
+                for option_content in option_contents:
+                    page.add_option(option_name, option_content)
+            page.add(product_info["Title"])
+            page.add(f"Price: {product_info['Price']}")
+            page.add(f"Rating: {product_info['Rating']}")
+            sub_pages = ["Description", "Features", "Reviews"]
+            if kwargs["show_attrs"]:
+                sub_pages.append("Attributes")
+            for sub_page in sub_pages:
+                page.add_button(sub_page)
+            page.add_button(END_BUTTON, ["btn", "btn-lg", "purchase"])
+    else:
+        raise ValueError("Action name not recognized.")
+    return page.build(action, kwargs)
+
+
 def parse_action(action):
     """Parse action string to action name and its arguments."""
     pattern = re.compile(r"(.+)\[(.+)\]")
@@ -140,30 +339,59 @@ def convert_web_app_string_to_var(name, string):
     return var
 
 
+class ProductIndexes(NamedTuple):
+    """Products of each category, query and attribute, in catalog order."""
+
+    category_to_products: dict
+    query_to_products: dict
+    attribute_to_asins: dict
+    """Maps each attribute to a dict whose keys are the ASINs, as an ordered set."""
+
+
+def build_product_indexes(all_products):
+    category_to_products = defaultdict(list)
+    query_to_products = defaultdict(list)
+    attribute_to_asins = defaultdict(dict)
+    for p in all_products:
+        category_to_products[p["category"]].append(p)
+        query_to_products[p["query"]].append(p)
+        for a in p["Attributes"]:
+            attribute_to_asins[a][p["asin"]] = None
+    return ProductIndexes(
+        dict(category_to_products), dict(query_to_products), dict(attribute_to_asins)
+    )
+
+
 def get_top_n_product_from_keywords(
     keywords,
     search_engine,
     all_products,
     product_item_dict,
-    attribute_to_asins=None,
+    product_indexes,
 ):
+    """Returns the products of a search.
+
+    `product_indexes` are the indexes of `all_products`, built once with
+    `build_product_indexes` (or returned by `load_products`), and used by the
+    `<a>`, `<c>` and `<q>` searches.
+    """
     if keywords[0] == "<r>":
         top_n_products = random.sample(all_products, k=SEARCH_RETURN_N)
     elif keywords[0] == "<a>":
         attribute = " ".join(keywords[1:]).strip()
-        asins = attribute_to_asins[attribute]
-        top_n_products = [p for p in all_products if p["asin"] in asins]
+        asins = product_indexes.attribute_to_asins.get(attribute, ())
+        top_n_products = [product_item_dict[asin] for asin in asins]
     elif keywords[0] == "<c>":
         category = keywords[1].strip()
-        top_n_products = [p for p in all_products if p["category"] == category]
+        top_n_products = list(product_indexes.category_to_products.get(category, ()))
     elif keywords[0] == "<q>":
         query = " ".join(keywords[1:]).strip()
-        top_n_products = [p for p in all_products if p["query"] == query]
+        top_n_products = list(product_indexes.query_to_products.get(query, ()))
     else:
         keywords = " ".join(keywords)
         hits = search_engine.search(keywords, k=SEARCH_RETURN_N)
-        docs = [search_engine.doc(hit.docid) for hit in hits]
-        top_n_asins = [json.loads(doc.raw())["id"] for doc in docs]
+        # The documents are indexed with their ASIN as id.
+        top_n_asins = [hit.docid for hit in hits]
         top_n_products = [
             product_item_dict[asin] for asin in top_n_asins if asin in product_item_dict
         ]
@@ -189,27 +417,54 @@ def generate_product_prices(all_products):
     return product_prices
 
 
-def init_search_engine(num_products=None):
+def get_search_engine_suffix(num_products=None):
     if num_products == 100:
-        indexes = "indexes_100"
+        return "100"
     elif num_products == 1000:
-        indexes = "indexes_1k"
+        return "1k"
     elif num_products == 10000:
-        indexes = "indexes_10k"
+        return "10k"
     elif num_products == 50000:
-        indexes = "indexes_50k"
+        return "50k"
     elif num_products is None:
-        indexes = "indexes_1k"
+        return "1k"
     else:
         raise NotImplementedError(
             f"num_products being {num_products} is not supported yet."
         )
-    search_engine = LuceneSearcher(
-        os.path.join(BASE_DIR, f"../search_engine/{indexes}")
+
+
+def load_bm25_searcher(suffix):
+    """Loads the BM25 index of `resources_{suffix}`, building it if outdated."""
+    documents_path = os.path.join(
+        SEARCH_ENGINE_DIR, f"resources_{suffix}", "documents.jsonl"
     )
+    index_path = os.path.join(SEARCH_ENGINE_DIR, f"indexes_{suffix}_bm25.npz")
+    documents_mtime = os.path.getmtime(documents_path)
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= documents_mtime:
+        return BM25Searcher.load(index_path)
+    search_engine = BM25Searcher.from_documents(documents_path)
+    search_engine.save(index_path)
     return search_engine
 
 
+def init_search_engine(num_products=None, search_backend=None):
+    suffix = get_search_engine_suffix(num_products)
+    search_backend = search_backend or SEARCH_BACKEND
+    if search_backend == "bm25":
+        return load_bm25_searcher(suffix)
+    elif search_backend == "lucene":
+        # Imported here so that the BM25 backend does not need pyserini or a JVM.
+        from pyserini.search.lucene import LuceneSearcher
+
+        return LuceneSearcher(os.path.join(SEARCH_ENGINE_DIR, f"indexes_{suffix}"))
+    else:
+        raise NotImplementedError(
+            f"search_backend being {search_backend} is not supported, expected one"
+            f" of {SEARCH_BACKENDS}."
+        )
+
+
 def clean_product_keys(products):
     for product in products:
         product.pop("product_information", None)
@@ -256,7 +511,6 @@ def load_products(filepath, num_products=None, human_goals=True):
 
     asins = set()
     all_products = []
-    attribute_to_asins = defaultdict(set)
     if num_products is not None:
         # using item_shuffle.json, we assume products already shuffled
         products = products[:num_products]
@@ -361,10 +615,7 @@ def load_products(filepath, num_products=None, human_goals=True):
 
         all_products.append(products[i])
 
-    for p in all_products:
-        for a in p["Attributes"]:
-            attribute_to_asins[a].add(p["asin"])
-
+    product_indexes = build_product_indexes(all_products)
     product_item_dict = {p["asin"]: p for p in all_products}
     product_prices = generate_product_prices(all_products)
-    return all_products, product_item_dict, product_prices, attribute_to_asins
+    return all_products, product_item_dict, product_prices, product_indexes
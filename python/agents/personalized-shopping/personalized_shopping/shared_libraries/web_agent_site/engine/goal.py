@@ -12,6 +12,12 @@ nlp = spacy.load("en_core_web_sm")
 
 PRICE_RANGE = [10.0 * i for i in range(1, 100)]
 
+NOUN_POS = ("PNOUN", "NOUN", "PROPN")
+NLP_BATCH_SIZE = 256
+
+# Nouns of the product and goal names, which do not change, by name.
+_name_nouns = {}
+
 
 def get_goals(all_products, product_prices, human_goals=True):
     if human_goals:
@@ -130,6 +136,34 @@ def get_synthetic_goals(all_products, product_prices):
     return goals
 
 
+def _get_nouns(doc):
+    return tuple(t.text.lower() for t in doc if t.pos_ in NOUN_POS)
+
+
+def get_name_nouns(name):
+    """Returns the lowercased nouns of a product or goal name, parsed only once"""
+    nouns = _name_nouns.get(name)
+    if nouns is None:
+        nouns = _name_nouns[name] = _get_nouns(nlp(name))
+    return nouns
+
+
+def parse_name_nouns(names, batch_size=NLP_BATCH_SIZE):
+    """Parses the nouns of many names in batches, and returns them by name"""
+    names = list(dict.fromkeys(names))
+    new_names = [name for name in names if name not in _name_nouns]
+    for name, doc in zip(
+        new_names, nlp.pipe(new_names, batch_size=batch_size), strict=True
+    ):
+        _name_nouns[name] = _get_nouns(doc)
+    return {name: _name_nouns[name] for name in names}
+
+
+def add_name_nouns(name_nouns):
+    """Adds nouns returned by `parse_name_nouns` to those of `get_name_nouns`"""
+    _name_nouns.update(name_nouns)
+
+
 def get_type_reward(purchased_product, goal):
     """Determines the type reward - captures whether chosen product is in the same category"""
     query_match = purchased_product["query"] == goal["query"]
@@ -144,22 +178,8 @@ def get_type_reward(purchased_product, goal):
     )
 
     # Determine whether types align based on product name similarity
-    purchased_type = purchased_product["name"]
-    desired_type = goal["name"]
-
-    purchased_type_parse = nlp(purchased_type)
-    desired_type_parse = nlp(desired_type)
-
-    purchased_type_parse = [
-        t.text.lower()
-        for t in purchased_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
-    desired_type_parse = [
-        t.text.lower()
-        for t in desired_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
+    purchased_type_parse = get_name_nouns(purchased_product["name"])
+    desired_type_parse = get_name_nouns(goal["name"])
 
     n_intersect_type = len(set(purchased_type_parse) & set(desired_type_parse))
     if len(desired_type_parse) == 0:
@@ -1,4 +1,5 @@
 from collections import defaultdict
+import copy
 import json
 import random
 import string
@@ -10,20 +11,23 @@ import gym
 from gym.envs.registration import register
 import numpy as np
 import torch
+from ..engine.catalog import load_catalog
 from ..engine.engine import (
     ACTION_TO_TEMPLATE,
     BACK_TO_SEARCH,
     END_BUTTON,
     NEXT_PAGE,
     PREV_PAGE,
+    PageText,
+    TextPage,
     get_product_per_page,
     get_top_n_product_from_keywords,
     init_search_engine,
-    load_products,
     map_action_to_html,
+    map_action_to_text_page,
     parse_action,
 )
-from ..engine.goal import get_goals, get_reward
+from ..engine.goal import get_reward
 from ..utils import (
     DEFAULT_FILE_PATH,
     FEAT_CONV,
@@ -58,6 +62,8 @@ class WebAgentTextEnv(gym.Env):
         session
         session_prefix
         show_attrs
+        search_backend
+        page_format
         """
         super(WebAgentTextEnv, self).__init__()
         self.observation_mode = observation_mode
@@ -75,6 +81,8 @@ class WebAgentTextEnv(gym.Env):
                 self.kwargs.get("num_products"),
                 self.kwargs.get("human_goals"),
                 self.kwargs.get("show_attrs", False),
+                self.kwargs.get("search_backend"),
+                self.kwargs.get("page_format", "html"),
             )
             if server is None
             else server
@@ -136,6 +144,13 @@ class WebAgentTextEnv(gym.Env):
 
     def get_available_actions(self):
         """Returns list of available actions at the current step"""
+        page = self.browser.page_source
+        if isinstance(page, TextPage):
+            self.text_to_clickable = page.clickables
+            return dict(
+                has_search_bar=page.has_search_bar,
+                clickables=list(self.text_to_clickable.keys()),
+            )
         html_obj = self._parse_html()
 
         # Collect search bar, buttons, links, and options as clickables
@@ -158,7 +173,7 @@ class WebAgentTextEnv(gym.Env):
 
     def get_image(self):
         """Scrape image from page HTML and return as a list of pixel values"""
-        html_obj = self._parse_html(self.browser.page_source)
+        html_obj = self._parse_html()
         image_url = html_obj.find(id="product-image")
         if image_url is not None:
             image_url = image_url["src"]
@@ -170,7 +185,7 @@ class WebAgentTextEnv(gym.Env):
 
     def get_instruction_text(self):
         """Get corresponding instruction text for current environment session"""
-        html_obj = self._parse_html(self.browser.page_source)
+        html_obj = self._parse_html()
         instruction_text = html_obj.find(id="instruction-text").h4.text
         return instruction_text
 
@@ -183,20 +198,21 @@ class WebAgentTextEnv(gym.Env):
             observation (HTML) for parsing.
         """
         if html is None:
-            html = self.state["html"]
+            html = self.server.get_html(self.browser.page_source)
         html_obj = BeautifulSoup(html, "html.parser")
         return html_obj
 
     @property
     def observation(self):
         """Compiles state into either the `html` or `text` observation mode"""
-        html = self.state["html"]
+        page = self.browser.page_source
         if self.observation_mode == "html":
-            return html
-        elif self.observation_mode == "text":
-            return self.convert_html_to_text(html, simple=True)
-        elif self.observation_mode == "text_rich":
-            return self.convert_html_to_text(html, simple=False)
+            return self.state["html"]
+        elif self.observation_mode in ("text", "text_rich"):
+            simple = self.observation_mode == "text"
+            if isinstance(page, TextPage):
+                return self.convert_texts_to_text(page.texts, simple=simple)
+            return self.convert_html_to_text(page, simple=simple)
         elif self.observation_mode == "url":
             return self.state["url"]
         else:
@@ -211,32 +227,40 @@ class WebAgentTextEnv(gym.Env):
         """
         return dict(
             url=self.browser.current_url,
-            html=self.browser.page_source,
+            html=self.server.get_html(self.browser.page_source),
             instruction_text=self.instruction_text,
         )
 
     def convert_html_to_text(self, html, simple=False):
         """Strip HTML of tags and add separators to convert observation into simple mode"""
         texts = self._parse_html(html).findAll(text=True)
-        visible_texts = filter(tag_visible, texts)
+        visible_texts = [
+            PageText(t, get_clickable_element(t)) for t in texts if tag_visible(t)
+        ]
+        return self.convert_texts_to_text(visible_texts, simple=simple)
+
+    def convert_texts_to_text(self, visible_texts, simple=False):
+        """Add separators between the visible texts of a page to make an observation"""
         if simple:
             # For `simple` mode, return just [SEP] separators
-            return " [SEP] ".join(t.strip() for t in visible_texts if t != "\n")
+            return " [SEP] ".join(
+                t.text.strip() for t in visible_texts if t.text != "\n"
+            )
         else:
             # Otherwise, return an observation with tags mapped to specific, unique separators
             observation = ""
-            for t in visible_texts:
+            for t, element in visible_texts:
                 if t == "\n":
                     continue
-                if t.parent.name == "button":  # button
+                if element == "button":  # button
                     processed_t = f"[button] {t} [button_]"
-                elif t.parent.name == "label":  # options
-                    if f'"{t}"' in self.state["url"]:
+                elif element == "label":  # options
+                    if f'"{t}"' in self.browser.current_url:
                         processed_t = f"  [clicked button] {t} [clicked button_]"
                         observation = f"You have clicked {t}.\n" + observation
                     else:
                         processed_t = f"  [button] {t} [button_]"
-                elif t.parent.get("class") == ["product-link"]:  # product asins
+                elif element == "product-link":  # product asins
                     if f"{t}" in self.server.user_sessions[self.session]["asins"]:
                         processed_t = f"\n[clicked button] {t} [clicked button_]"
                     else:
@@ -284,6 +308,15 @@ def tag_visible(element):
     return element.parent.name not in ignore and not isinstance(element, Comment)
 
 
+def get_clickable_element(element):
+    """Returns which kind of clickable element a text is in, if any"""
+    if element.parent.name in ("button", "label"):
+        return element.parent.name
+    elif element.parent.get("class") == ["product-link"]:
+        return "product-link"
+    return None
+
+
 class SimServer:
     """Lightweight simulator of WebShop Flask application for generating HTML observations"""
 
@@ -296,6 +329,8 @@ class SimServer:
         num_products=None,
         human_goals=0,
         show_attrs=False,
+        search_backend=None,
+        page_format="html",
     ):
         """Constructor for simulated server serving WebShop application
 
@@ -307,19 +342,29 @@ class SimServer:
         num_products (`int`) -- Number of products to search across
         human_goals (`bool`) -- If true, load human goals; otherwise, load synthetic
           goals
+        search_backend (`str`) -- ['lucene' | 'bm25'] search engine to use (default
+          from the `WEBSHOP_SEARCH_BACKEND` environment variable, else 'lucene')
+        page_format (`str`) -- ['html' | 'text'] render pages as HTML, or as the
+          texts and clickables of `map_action_to_text_page` (HTML on demand only)
         """
         # Load all products, goals, and search engine
         self.base_url = base_url
-        self.all_products, self.product_item_dict, self.product_prices, _ = (
-            load_products(
-                filepath=file_path,
-                num_products=num_products,
-                human_goals=human_goals,
-            )
+        (
+            self.all_products,
+            self.product_item_dict,
+            self.product_prices,
+            self.product_indexes,
+            self.goals,
+        ) = load_catalog(
+            filepath=file_path,
+            num_products=num_products,
+            human_goals=human_goals,
+        )
+        self.search_engine = init_search_engine(
+            num_products=num_products, search_backend=search_backend
         )
-        self.search_engine = init_search_engine(num_products=num_products)
-        self.goals = get_goals(self.all_products, self.product_prices, human_goals)
         self.show_attrs = show_attrs
+        self.page_format = page_format
 
         # Fix outcome for random shuffling of goals
         random.seed(233)
@@ -352,10 +397,34 @@ class SimServer:
         self.sample_time = 0
         self.assigned_instruction_text = None  # TODO: very hacky, should remove
 
+    def clone(self):
+        """Return a server with its own user sessions, sharing the products,
+        search engine and goals of this one"""
+        server = copy.copy(self)
+        server.user_sessions = dict()
+        server.search_time = 0
+        server.render_time = 0
+        server.sample_time = 0
+        server.assigned_instruction_text = None
+        return server
+
+    def render(self, action, **kwargs):
+        """Render a page as HTML, or as a `TextPage` in `text` page format"""
+        if self.page_format == "text":
+            return map_action_to_text_page(action, **kwargs)
+        return map_action_to_html(action, **kwargs)
+
+    def get_html(self, page):
+        """Return the HTML of a page returned by `render`"""
+        if isinstance(page, TextPage):
+            with app.app_context(), app.test_request_context():
+                return page.html
+        return page
+
     @app.route("/", methods=["GET", "POST"])
     def index(self, session_id, **kwargs):
         """Redirect to the search page with the given session ID"""
-        html = map_action_to_html(
+        html = self.render(
             "start",
             session_id=session_id,
             instruction_text=kwargs["instruction_text"],
@@ -385,6 +454,7 @@ class SimServer:
             self.search_engine,
             self.all_products,
             self.product_item_dict,
+            self.product_indexes,
         )
         self.search_time += time.time() - old_time
 
@@ -398,7 +468,7 @@ class SimServer:
 
         # Render HTML search page and record amount of time taken
         old_time = time.time()
-        html = map_action_to_html(
+        html = self.render(
             "search",
             session_id=session_id,
             products=products,
@@ -445,7 +515,7 @@ class SimServer:
             f"{session['page']}/{option_string}"
         )
 
-        html = map_action_to_html(
+        html = self.render(
             "click",
             session_id=session_id,
             product_info=product_info,
@@ -483,7 +553,7 @@ class SimServer:
             f"{session['asin']}/{keywords_url_string}/{session['page']}/"
             f"{clickable_name}/{session['options']}"
         )
-        html = map_action_to_html(
+        html = self.render(
             f"click[{clickable_name}]",
             session_id=session_id,
             product_info=product_info,
@@ -523,7 +593,7 @@ class SimServer:
         url = (
             f"{self.base_url}/done/{session_id}/{session['asin']}/{session['options']}"
         )
-        html = map_action_to_html(
+        html = self.render(
             f"click[{END_BUTTON}]",
             session_id=session_id,
             reward=reward,
@@ -548,7 +618,8 @@ class SimServer:
                     if (session_int is not None and isinstance(session_int, int))
                     else random_idx(self.cum_weights)
                 )
-                goal = self.goals[idx]
+                # Copied, as the goals are shared by the clones of this server
+                goal = dict(self.goals[idx])
                 instruction_text = goal["instruction_text"]
                 self.user_sessions[session_id] = {"goal": goal, "done": False}
             else:
@@ -1,3 +1,5 @@
+import asyncio
+
 from google.adk.tools import ToolContext
 from google.genai import types
 
@@ -14,10 +16,15 @@ async def click(button_name: str, tool_context: ToolContext) -> str:
     Returns:
       str: The webpage after clicking the button.
     """
-    webshop_env = get_webshop_env()
+    webshop_env = await asyncio.to_thread(
+        get_webshop_env, tool_context._invocation_context.session.id
+    )
     status = {"reward": None, "done": False}
     action_string = f"click[{button_name}]"
-    _, status["reward"], status["done"], _ = webshop_env.step(action_string)
+    # Stepping renders the next page, which would block the event loop.
+    _, status["reward"], status["done"], _ = await asyncio.to_thread(
+        webshop_env.step, action_string
+    )
 
     ob = webshop_env.observation
     index = ob.find("Back to Search")
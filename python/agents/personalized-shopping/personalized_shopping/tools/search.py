@@ -1,3 +1,5 @@
+import asyncio
+
 from google.adk.tools import ToolContext
 from google.genai import types
 
@@ -14,12 +16,18 @@ async def search(keywords: str, tool_context: ToolContext) -> str:
     Returns:
       str: The search result displayed in a webpage.
     """
-    webshop_env = get_webshop_env()
+    webshop_env = await asyncio.to_thread(
+        get_webshop_env, tool_context._invocation_context.session.id
+    )
     status = {"reward": None, "done": False}
     action_string = f"search[{keywords}]"
     webshop_env.server.assigned_instruction_text = f"Find me {keywords}."
     print(f"env instruction_text: {webshop_env.instruction_text}")
-    _, status["reward"], status["done"], _ = webshop_env.step(action_string)
+    # Stepping runs the search and renders the results, which would block the
+    # event loop.
+    _, status["reward"], status["done"], _ = await asyncio.to_thread(
+        webshop_env.step, action_string
+    )
 
     ob = webshop_env.observation
     index = ob.find("Back to Search")
@@ -0,0 +1,86 @@
+"""Tests of the in-process BM25 search backend, on a small document fixture."""
+
+import json
+import math
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.bm25 import (
+    DEFAULT_B,
+    DEFAULT_K1,
+    BM25Searcher,
+    tokenize,
+)
+
+DOCUMENTS = [
+    {"id": "B000000001", "contents": "Red cotton t-shirt for men, soft cotton"},
+    {"id": "B000000002", "contents": "Blue denim skirt for women"},
+    {"id": "B000000003", "contents": "Women's red running shoes"},
+    {"id": "B000000004", "contents": "Cotton socks, pack of 6 pairs"},
+    {"id": "B000000005", "contents": "Red dress with flowers"},
+]
+
+
+@pytest.fixture
+def documents_path(tmp_path):
+    path = tmp_path / "documents.jsonl"
+    path.write_text("".join(json.dumps(doc) + "\n" for doc in DOCUMENTS))
+    return path
+
+
+def reference_scores(query, k1=DEFAULT_K1, b=DEFAULT_B):
+    """Scores the documents with the BM25 formula of Lucene, term by term."""
+    docs = [tokenize(doc["contents"]) for doc in DOCUMENTS]
+    average_length = sum(len(doc) for doc in docs) / len(docs)
+    scores = {}
+    for doc_id, doc in zip((d["id"] for d in DOCUMENTS), docs, strict=True):
+        score = 0.0
+        for term in tokenize(query):
+            doc_freq = sum(term in other for other in docs)
+            freq = doc.count(term)
+            if not freq:
+                continue
+            idf = math.log1p((len(docs) - doc_freq + 0.5) / (doc_freq + 0.5))
+            length_norm = k1 * (1 - b + b * len(doc) / average_length)
+            score += idf * freq * (k1 + 1) / (freq + length_norm)
+        if score:
+            scores[doc_id] = score
+    return scores
+
+
+def test_tokenize_drops_stop_words_and_plurals():
+    assert tokenize("The women's shoes, for running!") == ["women", "shoe", "running"]
+    assert tokenize("Cotton PANTIES and dresses") == ["cotton", "panty", "dresse"]
+
+
+@pytest.mark.parametrize("query", ["red cotton", "women skirt", "socks", "red red"])
+def test_search_matches_bm25_formula(documents_path, query):
+    searcher = BM25Searcher.from_documents(documents_path)
+    expected = reference_scores(query)
+    hits = searcher.search(query, k=10)
+    assert {hit.docid: pytest.approx(hit.score, rel=1e-5) for hit in hits} == expected
+    assert [hit.score for hit in hits] == sorted(
+        (hit.score for hit in hits), reverse=True
+    )
+
+
+def test_search_keeps_the_k_best_and_breaks_ties_by_position(documents_path):
+    searcher = BM25Searcher.from_documents(documents_path)
+    assert [hit.docid for hit in searcher.search("red", k=2)] == [
+        "B000000005",
+        "B000000003",
+    ]
+    # Both documents have 4 terms, one of which is "women".
+    assert [hit.docid for hit in searcher.search("women", k=1)] == ["B000000002"]
+    assert searcher.search("unknown words", k=10) == []
+
+
+def test_save_and_load_give_the_same_results(documents_path, tmp_path):
+    searcher = BM25Searcher.from_documents(documents_path)
+    index_path = tmp_path / "index.npz"
+    searcher.save(index_path)
+    loaded = BM25Searcher.load(index_path)
+    assert loaded.asins == searcher.asins
+    assert loaded.vocabulary == searcher.vocabulary
+    for query in ("red cotton", "women denim skirt", "pairs of socks"):
+        assert loaded.search(query) == searcher.search(query)
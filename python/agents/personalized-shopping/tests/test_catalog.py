@@ -0,0 +1,154 @@
+"""Tests of the catalog snapshots."""
+
+import json
+import os
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import (
+    catalog,
+    engine,
+    goal,
+)
+
+
+def make_product(i, category, query, attributes):
+    return {
+        "asin": f"B00000000{i}",
+        "name": f"Product {i} cotton shirt for {query}",
+        "category": category,
+        "query": query,
+        "product_category": f"Clothing › {category} › Shirts",
+        "full_description": f"Description of product {i}.",
+        "small_description": [f"Feature {i}"],
+        "pricing": f"${10 + i}.99",
+        "customization_options": {
+            "Color": [{"value": "Red", "image": None}, {"value": "Navy/Blue"}],
+        },
+        "images": [f"https://example.com/{i}.jpg"],
+        "brand": "Brand",
+        "_attributes": attributes,
+    }
+
+
+PRODUCTS = [
+    make_product(1, "men", "t-shirts", ["cotton", "machine wash"]),
+    make_product(2, "women", "blouses", ["cotton"]),
+    make_product(3, "men", "T-Shirts ", ["slim fit"]),
+]
+
+
+@pytest.fixture
+def product_file(tmp_path, monkeypatch):
+    """Writes the products and their attributes and human instructions."""
+    attributes, human_instructions = {}, {}
+    products = []
+    for product in PRODUCTS:
+        product = dict(product)
+        asin = product["asin"]
+        attributes[asin] = {"attributes": product.pop("_attributes")}
+        human_instructions[asin] = [
+            {
+                "instruction": f"i want a {product['query']} shirt.",
+                "instruction_attributes": attributes[asin]["attributes"],
+                "instruction_options": ["red"],
+            }
+        ]
+        products.append(product)
+    file_path = tmp_path / "items.json"
+    file_path.write_text(json.dumps(products))
+    (tmp_path / "attrs.json").write_text(json.dumps(attributes))
+    (tmp_path / "human.json").write_text(json.dumps(human_instructions))
+    monkeypatch.setattr(engine, "DEFAULT_ATTR_PATH", str(tmp_path / "attrs.json"))
+    monkeypatch.setattr(engine, "HUMAN_ATTR_PATH", str(tmp_path / "human.json"))
+    return str(file_path)
+
+
+@pytest.fixture
+def name_nouns(monkeypatch):
+    """Starts from no parsed names, and restores them after the test."""
+    nouns = {}
+    monkeypatch.setattr(goal, "_name_nouns", nouns)
+    return nouns
+
+
+def groups(grouping):
+    """Lists the members of the groups of an index, by key."""
+    return {key: list(group) for key, group in grouping.items()}
+
+
+def test_snapshot_round_trip(product_file, tmp_path, name_nouns):
+    all_products, product_item_dict, product_prices, product_indexes = (
+        engine.load_products(product_file)
+    )
+    random.seed(0)
+    goals = goal.get_goals(all_products, product_prices)
+    path = tmp_path / "items.snapshot"
+    catalog.write_snapshot(path, all_products, product_prices, goals)
+    name_nouns.clear()
+
+    (
+        snapshot_products,
+        snapshot_item_dict,
+        snapshot_prices,
+        snapshot_indexes,
+        snapshot_goals,
+    ) = catalog.load_snapshot(path)
+    assert len(snapshot_products) == len(all_products)
+    assert list(snapshot_products) == all_products
+    assert snapshot_products[-1] == all_products[-1]
+    assert snapshot_products[1:] == all_products[1:]
+    assert dict(snapshot_item_dict) == product_item_dict
+    assert snapshot_prices == product_prices
+    assert snapshot_goals == goals
+    for snapshot_grouping, grouping in zip(
+        snapshot_indexes, product_indexes, strict=True
+    ):
+        assert groups(snapshot_grouping) == groups(grouping)
+    # The nouns of the names are loaded with the snapshot, not parsed again.
+    assert set(name_nouns) == {p["name"] for p in all_products}
+
+
+@pytest.mark.parametrize(
+    "source_path",
+    [
+        lambda product_file: product_file,
+        lambda product_file: engine.DEFAULT_ATTR_PATH,
+        lambda product_file: engine.HUMAN_ATTR_PATH,
+    ],
+    ids=["products", "attributes", "human_instructions"],
+)
+def test_load_catalog_uses_snapshot_only_if_up_to_date(
+    product_file, name_nouns, source_path
+):
+    source_versions = catalog.get_source_versions(product_file)
+    all_products, _, product_prices, _ = engine.load_products(product_file)
+    goals = goal.get_goals(all_products, product_prices)
+    path = catalog.get_snapshot_path(product_file)
+    catalog.write_snapshot(
+        path, all_products, product_prices, goals, source_versions=source_versions
+    )
+    assert isinstance(catalog.load_catalog(product_file)[0], catalog.ProductCatalog)
+
+    # A file modified after the snapshot was written, even one older than it.
+    os.utime(source_path(product_file), ns=(0, 0))
+    assert catalog.load_catalog(product_file)[0] == all_products
+
+
+def test_load_catalog_ignores_snapshots_of_unknown_files(product_file, name_nouns):
+    all_products, _, product_prices, _ = engine.load_products(product_file)
+    path = catalog.get_snapshot_path(product_file)
+    catalog.write_snapshot(path, all_products, product_prices, [])
+    assert catalog.load_catalog(product_file)[0] == all_products
+
+
+def test_load_snapshot_rejects_other_versions(
+    product_file, tmp_path, monkeypatch, name_nouns
+):
+    all_products, _, product_prices, _ = engine.load_products(product_file)
+    path = tmp_path / "items.snapshot"
+    catalog.write_snapshot(path, all_products, product_prices, [])
+    monkeypatch.setattr(catalog, "SNAPSHOT_VERSION", catalog.SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError, match="version"):
+        catalog.load_snapshot(path)
@@ -0,0 +1,161 @@
+"""Tests of the pool of per-session environments, with a stub environment."""
+
+import threading
+
+import pytest
+
+from personalized_shopping.shared_libraries import init_env
+from personalized_shopping.shared_libraries.web_agent_site.envs import (
+    web_agent_text_env,
+)
+
+
+class StubEnv:
+    """Stands for `WebAgentTextEnv`, without a browser or products."""
+
+    def __init__(self, observation_mode, server):
+        self.observation_mode = observation_mode
+        self.server = server
+
+    @property
+    def unwrapped(self):
+        return self
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(init_env.time, "monotonic", clock)
+    return clock
+
+
+def make_base_env():
+    """Makes a base environment whose server shares its products and goals."""
+    server = web_agent_text_env.SimServer.__new__(web_agent_text_env.SimServer)
+    server.all_products = [{"asin": "B000000001"}]
+    server.goals = [{"asin": "B000000001"}]
+    server.user_sessions = {"base": {"done": False}}
+    server.search_time = server.render_time = server.sample_time = 1.5
+    server.assigned_instruction_text = "i need a shirt"
+    return StubEnv(observation_mode="text", server=server)
+
+
+def test_get_keeps_one_environment_per_session(clock):
+    base_env = make_base_env()
+    pool = init_env.WebShopEnvPool(base_env, max_size=4, idle_timeout=60)
+    env_a = pool.get("a")
+    env_b = pool.get("b")
+    assert pool.get("a") is env_a
+    assert env_a is not env_b
+    assert env_a.observation_mode == "text"
+    assert len(pool) == 2
+
+
+def test_sessions_are_isolated(clock):
+    base_env = make_base_env()
+    pool = init_env.WebShopEnvPool(base_env, max_size=4, idle_timeout=60)
+    env_a = pool.get("a")
+    env_b = pool.get("b")
+    for env in (env_a, env_b):
+        # The products and goals are shared, but not the session state.
+        assert env.server.all_products is base_env.server.all_products
+        assert env.server.goals is base_env.server.goals
+        assert env.server.user_sessions == {}
+        assert env.server.assigned_instruction_text is None
+        assert env.server.search_time == 0
+    env_a.server.user_sessions["a"] = {"done": True}
+    env_a.server.assigned_instruction_text = "i need socks"
+    assert env_b.server.user_sessions == {}
+    assert env_b.server.assigned_instruction_text is None
+    assert base_env.server.user_sessions == {"base": {"done": False}}
+    assert base_env.server.assigned_instruction_text == "i need a shirt"
+
+
+def test_least_recently_used_environment_is_evicted(clock):
+    pool = init_env.WebShopEnvPool(make_base_env(), max_size=2, idle_timeout=60)
+    env_a = pool.get("a")
+    clock.now = 1
+    env_b = pool.get("b")
+    clock.now = 2
+    assert pool.get("a") is env_a
+    clock.now = 3
+    pool.get("c")
+    assert len(pool) == 2
+    assert pool.get("a") is env_a
+    assert pool.get("b") is not env_b
+
+
+def test_idle_environments_are_evicted(clock):
+    pool = init_env.WebShopEnvPool(make_base_env(), max_size=4, idle_timeout=60)
+    env_a = pool.get("a")
+    clock.now = 30
+    env_b = pool.get("b")
+    clock.now = 70
+    # "a" was idle for 70 seconds and is dropped; "b" is kept.
+    assert pool.get("b") is env_b
+    assert len(pool) == 1
+    assert pool.get("a") is not env_a
+    clock.now = 200
+    assert pool.get("a") is not None
+    assert len(pool) == 1
+
+
+class BlockingEnv(StubEnv):
+    """A stub environment whose creation waits for `release`, once it is set."""
+
+    created = threading.Event()
+    release = None
+
+    def __init__(self, observation_mode, server):
+        super().__init__(observation_mode, server)
+        if self.release is not None:
+            self.created.set()
+            assert self.release.wait(timeout=10)
+
+
+def test_environments_are_created_outside_the_lock(clock, monkeypatch):
+    base_env = BlockingEnv(observation_mode="text", server=make_base_env().server)
+    pool = init_env.WebShopEnvPool(base_env, max_size=4, idle_timeout=60)
+    env_a = pool.get("a")
+    monkeypatch.setattr(BlockingEnv, "created", threading.Event())
+    monkeypatch.setattr(BlockingEnv, "release", threading.Event())
+
+    results = {}
+    creating = threading.Thread(target=lambda: results.update(b=pool.get("b")))
+    creating.start()
+    assert BlockingEnv.created.wait(timeout=10)
+    # Another session is served while "b" is being created.
+    serving = threading.Thread(target=lambda: results.update(a=pool.get("a")))
+    serving.start()
+    serving.join(timeout=5)
+    served = not serving.is_alive()
+    BlockingEnv.release.set()
+    creating.join(timeout=10)
+    serving.join(timeout=10)
+    assert served
+    assert results["a"] is env_a
+    assert pool.get("b") is results["b"]
+
+
+def test_environment_created_first_is_kept(clock, monkeypatch):
+    pool = init_env.WebShopEnvPool(make_base_env(), max_size=4, idle_timeout=60)
+    env_first = StubEnv(observation_mode="text", server=None)
+    touch = pool._touch
+
+    def touch_after_other_call(session_id, new_env=None):
+        if new_env is not None:
+            # Another call created and added an environment meanwhile.
+            touch(session_id, env_first)
+        return touch(session_id, new_env)
+
+    monkeypatch.setattr(pool, "_touch", touch_after_other_call)
+    assert pool.get("a") is env_first
+    assert len(pool) == 1
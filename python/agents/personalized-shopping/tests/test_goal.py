@@ -0,0 +1,34 @@
+"""Tests of the nouns of product names, parsed for the goals."""
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import goal
+
+NAMES = [
+    "Product 1 cotton shirt for t-shirts",
+    "Product 2 cotton shirt for blouses",
+    "Blue denim skirt",
+    "Product 1 cotton shirt for t-shirts",
+]
+
+
+@pytest.fixture
+def name_nouns(monkeypatch):
+    """Starts from no parsed names, and restores them after the test."""
+    nouns = {}
+    monkeypatch.setattr(goal, "_name_nouns", nouns)
+    return nouns
+
+
+def test_parse_name_nouns_matches_get_name_nouns(name_nouns):
+    parsed = goal.parse_name_nouns(NAMES, batch_size=2)
+    assert list(parsed) == list(dict.fromkeys(NAMES))
+    name_nouns.clear()
+    assert parsed == {name: goal.get_name_nouns(name) for name in NAMES}
+    assert any(parsed.values())
+
+
+def test_parse_name_nouns_caches_the_nouns(name_nouns):
+    goal.parse_name_nouns(NAMES[:1])
+    assert set(name_nouns) == {NAMES[0]}
+    assert goal.get_name_nouns(NAMES[0]) is name_nouns[NAMES[0]]
@@ -0,0 +1,157 @@
+"""Tests that text pages show the same observations as the HTML templates.
+
+`map_action_to_text_page` repeats the visible texts of the templates, so any
+edit of a template must be reflected there.
+"""
+
+import types
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.engine import (
+    END_BUTTON,
+    map_action_to_html,
+    map_action_to_text_page,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs import (
+    web_agent_text_env,
+)
+
+SESSION_ID = "abc"
+INSTRUCTION_TEXT = "i need a red cotton shirt, and price lower than 40.00 dollars"
+
+
+def make_product(asin, title):
+    return {
+        "asin": asin,
+        "Title": title,
+        "Price": "$12.99 to $15.5",
+        "Rating": "N.A.",
+        "MainImage": f"https://example.com/{asin}.jpg",
+        "Description": "A soft shirt.\n  Machine wash.",
+        "BulletPoints": ["100% cotton", "Regular fit"],
+        "Reviews": [
+            {"title": "Great", "score": 5, "body": "Fits well."},
+            {"title": "Too small", "score": 2, "body": ""},
+        ],
+        "Attributes": ["cotton", "machine wash"],
+        "category": "fashion",
+        "query": "t-shirts",
+        "product_category": "Clothing › Men › Shirts",
+        "options": {"color": ["red", "navy | blue"], "size": ["m"]},
+        "option_to_image": {"red": None, "navy | blue": None, "m": None},
+    }
+
+
+PRODUCTS = [
+    make_product("B000000001", "Red Shirt & <Tee>"),
+    make_product("B000000002", "Blue Shirt"),
+]
+
+ITEM_KWARGS = dict(
+    session_id=SESSION_ID,
+    product_info=PRODUCTS[0],
+    keywords=["red", "shirt"],
+    page=1,
+    asin=PRODUCTS[0]["asin"],
+    options={"color": "red"},
+    instruction_text=INSTRUCTION_TEXT,
+)
+
+PAGES = {
+    "start": ("start", dict(session_id=SESSION_ID, instruction_text=INSTRUCTION_TEXT)),
+    "results": (
+        "search",
+        dict(
+            session_id=SESSION_ID,
+            products=PRODUCTS,
+            keywords=["red", "shirt"],
+            page=1,
+            total=2,
+            instruction_text=INSTRUCTION_TEXT,
+        ),
+    ),
+    "results_page_2": (
+        "search",
+        dict(
+            session_id=SESSION_ID,
+            products=[],
+            keywords=["red"],
+            page=2,
+            total=12,
+            instruction_text=INSTRUCTION_TEXT,
+        ),
+    ),
+    "item": ("click", dict(ITEM_KWARGS, show_attrs=False)),
+    "item_with_attributes": ("click", dict(ITEM_KWARGS, show_attrs=True)),
+    "description": ("click[Description]", ITEM_KWARGS),
+    "features": ("click[Features]", ITEM_KWARGS),
+    "reviews": ("click[Reviews]", ITEM_KWARGS),
+    "attributes": ("click[Attributes]", ITEM_KWARGS),
+    # As rendered by `SimServer.done`.
+    "done": (
+        f"click[{END_BUTTON}]",
+        dict(
+            session_id=SESSION_ID,
+            reward=0.75,
+            asin=PRODUCTS[0]["asin"],
+            options={"color": "red"},
+            instruction_text=INSTRUCTION_TEXT,
+        ),
+    ),
+    "done_with_goal": (
+        f"click[{END_BUTTON}]",
+        dict(
+            session_id=SESSION_ID,
+            reward=1.0,
+            asin=PRODUCTS[0]["asin"],
+            options={"size": "m", "color": "red"},
+            reward_info={"r_type": 1.0},
+            goal={"asin": "B000000001", "attributes": ["cotton"], "price_upper": 40.0},
+            mturk_code="CODE",
+            query="t-shirts",
+            category="fashion",
+            product_category="Clothing › Men › Shirts",
+            purchased_attrs=["cotton"],
+        ),
+    ),
+}
+
+
+def make_env(page_source):
+    """Makes an environment showing a page, without loading any products."""
+    env = web_agent_text_env.WebAgentTextEnv.__new__(
+        web_agent_text_env.WebAgentTextEnv
+    )
+    env.session = SESSION_ID
+    env.server = types.SimpleNamespace(
+        user_sessions={SESSION_ID: {"asins": {PRODUCTS[1]["asin"]}}},
+        get_html=lambda page: page,
+    )
+    env.browser = types.SimpleNamespace(
+        page_source=page_source,
+        current_url='http://127.0.0.1:3000/item_page/abc/{"color": "red"}',
+    )
+    return env
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_text_page_matches_html(name):
+    action, kwargs = PAGES[name]
+    with web_agent_text_env.app.app_context():
+        with web_agent_text_env.app.test_request_context():
+            html = map_action_to_html(action, **kwargs)
+            text_page = map_action_to_text_page(action, **kwargs)
+            assert text_page.html == html
+    html_env = make_env(html)
+    text_env = make_env(text_page)
+    for simple in (True, False):
+        assert text_env.convert_texts_to_text(
+            text_page.texts, simple=simple
+        ) == html_env.convert_html_to_text(html, simple=simple)
+    html_actions = html_env.get_available_actions()
+    text_actions = text_env.get_available_actions()
+    assert text_actions == html_actions
+    for text, attrs in text_env.text_to_clickable.items():
+        element = html_env.text_to_clickable[text]
+        assert {key: element.get(key) for key in attrs} == attrs